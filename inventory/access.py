@@ -0,0 +1,176 @@
+# inventory/access.py
+#
+# Request-weiter Zugriffskontext für Dashboard-Rechte (request.access):
+# - Profil-ID, erlaubte und favorisierte Overview-IDs werden pro Request genau
+#   einmal geladen und danach nur noch im Speicher geprüft
+# - die IDs liegen zusätzlich kurz im gemeinsamen Cache (pro User), damit
+#   Scanner-Klickstrecken nicht bei jedem Request 3–5 Rechte-Queries zahlen
+# - m2m_changed auf allowed_overviews/favorite_overviews und Änderungen an
+#   Overviews invalidieren den Cache (siehe signals.py)
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.core.cache import cache
+
+from .versions import bump_counter, read_counter
+
+ACCESS_CACHE_PREFIX = "inventory:access"
+ACCESS_GENERATION_KEY = "inventory:access:generation"
+
+# Kurzlebig: Signale invalidieren, der Timeout ist nur das Sicherheitsnetz.
+ACCESS_CACHE_TIMEOUT = 60
+
+
+class OverviewAccess:
+    """
+    Rechte-Sicht eines Users auf die Overviews.
+    `allowed_ids` enthält nur aktive Overviews (wie `_allowed_overviews_for_user`).
+    """
+
+    __slots__ = ("user_id", "is_authenticated", "is_superuser", "profile_id", "allowed_ids", "favorite_ids")
+
+    def __init__(
+        self,
+        *,
+        user_id: int | None,
+        is_authenticated: bool,
+        is_superuser: bool,
+        profile_id: int | None,
+        allowed_ids: Iterable[int] = (),
+        favorite_ids: Iterable[int] = (),
+    ):
+        self.user_id = user_id
+        self.is_authenticated = is_authenticated
+        self.is_superuser = is_superuser
+        self.profile_id = profile_id
+        self.allowed_ids = frozenset(allowed_ids)
+        self.favorite_ids = frozenset(favorite_ids)
+
+    @staticmethod
+    def _pk(overview) -> int | None:
+        if overview is None:
+            return None
+        return getattr(overview, "pk", overview)
+
+    def can_view(self, overview) -> bool:
+        """Darf der User dieses Overview (Objekt oder ID) sehen/bearbeiten?"""
+        if not self.is_authenticated:
+            return False
+        if self.is_superuser:
+            return True
+        pk = self._pk(overview)
+        return pk is not None and int(pk) in self.allowed_ids
+
+    def is_favorite(self, overview) -> bool:
+        pk = self._pk(overview)
+        return pk is not None and int(pk) in self.favorite_ids
+
+    def allowed_overviews(self):
+        """
+        QuerySet der sichtbaren, aktiven Overviews (sortiert wie bisher).
+        Superuser: alle aktiven; sonst nur die explizit erlaubten.
+        """
+        from .models import Overview
+
+        base_qs = Overview.objects.filter(is_active=True).order_by("order", "name")
+        if not self.is_authenticated:
+            return base_qs.none()
+        if self.is_superuser:
+            return base_qs
+        if not self.allowed_ids:
+            return base_qs.none()
+        return base_qs.filter(id__in=self.allowed_ids)
+
+
+def access_generation() -> int:
+    """Steigt bei jeder Änderung an Overviews (aktiv/Name) – auch Teil der ETags."""
+    return read_counter(ACCESS_GENERATION_KEY)
+
+
+def _cache_key(user_id: int) -> str:
+    return f"{ACCESS_CACHE_PREFIX}:{access_generation()}:{user_id}"
+
+
+def _load_ids(user) -> dict:
+    from .models import UserProfile
+
+    profile_id = (
+        UserProfile.objects.filter(user=user).values_list("id", flat=True).first()
+    )
+    if profile_id is None:
+        return {"profile_id": None, "allowed": [], "favorites": []}
+
+    allowed_through = UserProfile.allowed_overviews.through
+    favorite_through = UserProfile.favorite_overviews.through
+    allowed = list(
+        allowed_through.objects.filter(
+            userprofile_id=profile_id, overview__is_active=True
+        ).values_list("overview_id", flat=True)
+    )
+    favorites = list(
+        favorite_through.objects.filter(userprofile_id=profile_id).values_list("overview_id", flat=True)
+    )
+    return {"profile_id": profile_id, "allowed": allowed, "favorites": favorites}
+
+
+def load_access(user) -> OverviewAccess:
+    """Baut den Zugriffskontext für einen User (Cache → DB)."""
+    if user is None or not user.is_authenticated:
+        return OverviewAccess(user_id=None, is_authenticated=False, is_superuser=False, profile_id=None)
+
+    key = _cache_key(user.pk)
+    try:
+        data = cache.get(key)
+    except Exception:
+        data = None
+    if data is None:
+        data = _load_ids(user)
+        try:
+            cache.set(key, data, ACCESS_CACHE_TIMEOUT)
+        except Exception:
+            pass
+
+    return OverviewAccess(
+        user_id=user.pk,
+        is_authenticated=True,
+        # Superuser-Status kommt immer frisch vom User-Objekt der Request.
+        is_superuser=bool(user.is_superuser),
+        profile_id=data["profile_id"],
+        allowed_ids=data["allowed"],
+        favorite_ids=data["favorites"],
+    )
+
+
+def get_access(request) -> OverviewAccess:
+    """
+    Liefert request.access; funktioniert auch ohne Middleware
+    (z. B. RequestFactory in Tests, Management-Commands).
+    """
+    access = getattr(request, "access", None)
+    if access is None:
+        access = load_access(getattr(request, "user", None))
+        request.access = access
+    return access
+
+
+def invalidate_access(user_ids: Iterable[int]) -> None:
+    """Verwirft den Cache-Eintrag der angegebenen User."""
+    generation = access_generation()
+    keys = [f"{ACCESS_CACHE_PREFIX}:{generation}:{uid}" for uid in user_ids if uid]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        pass
+
+
+def invalidate_all_access() -> None:
+    """
+    Verwirft alle Einträge auf einmal (neue Generation), z. B. wenn ein
+    Overview (de)aktiviert oder gelöscht wurde.
+    """
+    # verdrängt → Neustart bei der aktuellen Zeit, nie bei einer schon benutzten Generation
+    bump_counter(ACCESS_GENERATION_KEY)
+
@@ -4,7 +4,6 @@ from django import forms
 from django.urls import reverse
 from django.utils.html import format_html
 from django.http import HttpResponseRedirect
-from django.utils.timezone import now
 from django.contrib import admin
 
 # >>> NEU: Auth-Imports für User/Group im Custom-Admin
@@ -77,7 +76,7 @@ class InventoryItemAdmin(admin.ModelAdmin):
     def qr_code_link(self, obj):
         if obj.id:
             return format_html(
-                '<a href="/media/qrcodes/qr_{}.jpg" target="_blank">QR anzeigen</a>', obj.id
+                '<a href="{}" target="_blank">QR anzeigen</a>', obj.qr_url
             )
         return "-"
     qr_code_link.short_description = "QR-Code"
@@ -148,12 +147,8 @@ superuser_admin_site.register(GlobalSettings, GlobalSettingsAdmin)
 # ── BorrowedItem ──────────────────────────────────────────────────────────────
 @admin.action(description="✅ Als zurückgegeben markieren (inkl. Bestandskorrektur)")
 def mark_as_returned(modeladmin, request, queryset):
-    for borrowed in queryset.filter(returned=False):
-        borrowed.item.quantity += borrowed.quantity_borrowed
-        borrowed.item.save()
-        borrowed.returned = True
-        borrowed.returned_at = now()
-        borrowed.save()
+    for borrowed in queryset.filter(returned=False).select_related("item"):
+        borrowed.return_item()
 
 
 class BorrowedItemAdmin(admin.ModelAdmin):
@@ -165,6 +160,14 @@ class BorrowedItemAdmin(admin.ModelAdmin):
     search_fields = ('borrower', 'item__name')
     actions = [mark_as_returned]
 
+    def save_model(self, request, obj, form, change):
+        # Manuelle Änderungen (Anzahl, Rückgabe-Haken) → Zähler am Item neu berechnen
+        super().save_model(request, obj, form, change)
+        item_ids = {obj.item_id}
+        if change and form.initial.get("item"):
+            item_ids.add(form.initial["item"])  # Verleih auf anderes Item umgehängt
+        InventoryItem.recompute_borrowed_open(item_ids)
+
 
 superuser_admin_site.register(BorrowedItem, BorrowedItemAdmin)
 
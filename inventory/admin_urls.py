@@ -23,11 +23,13 @@ from .admin_views import (
     InventoryItemListView,
     admin_item_edit,
     admin_item_delete,
+    admin_item_import,
     BorrowedItemListView,
     admin_qr_codes_view,
     admin_updates,
     admin_tailscale_setup,
     admin_system_status,
+    admin_performance,
 
     # User Profiles
     UserProfileListView,
@@ -86,6 +88,7 @@ urlpatterns = [
 
     # Items & Vorgänge
     path('items/', InventoryItemListView.as_view(), name='admin_items'),
+    path('items/import/', admin_item_import, name='admin_item_import'),
     path('items/<int:pk>/edit/', admin_item_edit, name='admin_item_edit'),
     path('items/<int:pk>/delete/', admin_item_delete, name='admin_item_delete'),
     path('borrowed-items/', BorrowedItemListView.as_view(), name='admin_borrowed_items'),
@@ -93,6 +96,7 @@ urlpatterns = [
     path('updates/', admin_updates, name='admin_updates'),
     path('tailscale-setup/', admin_tailscale_setup, name='admin_tailscale_setup'),
     path('system-status/', admin_system_status, name='admin_system_status'),
+    path('performance/', admin_performance, name='admin_performance'),
     path('history/', admin_history_list, name='admin_history_list'),
     path('history/<int:pk>/rollback/', admin_history_rollback, name='admin_history_rollback'),
 
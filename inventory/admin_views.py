@@ -10,6 +10,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django import forms
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.db import connection
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 # NEU: wir brauchen den User für die Bearbeitungs-/Löschmaske
@@ -27,6 +28,8 @@ import shutil
 from pathlib import Path
 
 from .feature_flags import get_feature_flags
+from .pagination import KeysetPaginator
+from .settings_cache import get_settings_snapshot
 from .models import (
     InventoryItem,
     InventoryHistory,
@@ -40,7 +43,7 @@ from .models import (
     Overview,
     Feedback,
 )
-from .forms import StorageLocationForm
+from .forms import ItemImportForm, StorageLocationForm
 
 # ============================================================
 # Zugriffsschutz: Nur Admins (is_staff ODER is_superuser)
@@ -1424,13 +1427,71 @@ def admin_system_status(request):
     return render(request, "inventory/admin_system_status.html", context)
 
 
+# ---------------------------------------------------------------------
+# Performance (langsamste / query-hungrigste Endpunkte)
+# ---------------------------------------------------------------------
+@superuser_required
+def admin_performance(request):
+    from . import performance
+
+    if request.method == "POST" and request.POST.get("action") == "reset":
+        performance.registry.reset()
+        messages.success(request, "Performance-Statistik zurückgesetzt.")
+        return redirect("admin_performance")
+
+    rows = performance.registry.snapshot()
+    context = {
+        "enabled": performance.is_enabled(),
+        "slowest": sorted(rows, key=lambda r: r["p95_ms"], reverse=True)[:20],
+        "query_hungry": sorted(rows, key=lambda r: r["avg_queries"], reverse=True)[:20],
+        "endpoint_count": len(rows),
+        "started_at": timezone.datetime.fromtimestamp(
+            performance.registry.started_at, tz=timezone.get_current_timezone()
+        ),
+        "worker_pid": os.getpid(),
+    }
+    return render(request, "inventory/admin_performance.html", context)
+
+
+# ---------------------------------------------------------------------
+# Massenimport (imports.py)
+# ---------------------------------------------------------------------
+@staff_required
+def admin_item_import(request):
+    from . import imports
+
+    report = None
+    form = ItemImportForm(request.POST or None, request.FILES or None)
+    if request.method == "POST" and form.is_valid():
+        upload = form.cleaned_data["file"]
+        try:
+            report = imports.import_items(
+                upload.file,
+                upload.name,
+                user=request.user,
+                overview=form.cleaned_data["overview"],
+                dry_run=form.cleaned_data["dry_run"],
+                skip_invalid=form.cleaned_data["skip_invalid"],
+            )
+        except ValueError as exc:
+            messages.error(request, str(exc))
+        else:
+            if report.created:
+                messages.success(request, f"{report.created} Artikel importiert.")
+            elif report.rolled_back:
+                messages.error(request, "Nichts importiert: die Datei enthält fehlerhafte Zeilen.")
+    return render(request, "inventory/admin_item_import.html", {"form": form, "report": report})
+
+
 # ---------------------------------------------------------------------
 # QR-Code Overview
 # ---------------------------------------------------------------------
 @staff_required
 def admin_qr_codes_view(request):
-    items = InventoryItem.objects.all()
-    return render(request, 'inventory/admin_qr_overview.html', {'items': items})
+    # seitenweise; Druck aller Codes über die Etikettenbögen (labels.py)
+    qs = InventoryItem.objects.only("id", "name", "barcode", "location_letter", "location_number")
+    page = KeysetPaginator(qs, "id", per_page=60).page(request.GET.get("cursor"))
+    return render(request, 'inventory/admin_qr_overview.html', {'items': page, 'page': page})
 
 
 # ---------------------------------------------------------------------
@@ -1442,8 +1503,7 @@ class StorageLocationListView(StaffRequiredMixin, ListView):
     context_object_name = 'locations'
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        return sorted(qs, key=lambda loc: loc.get_full_path().lower())
+        return super().get_queryset().select_related("parent").order_by(Lower("full_path"), "pk")
 
 
 class StorageLocationCreateView(StaffRequiredMixin, CreateView):
@@ -1475,9 +1535,9 @@ class StorageLocationUpdateView(StaffRequiredMixin, UpdateView):
         ctx["parent_selected"] = ctx["form"].instance.parent_id
         ctx["is_create"] = False
         if self.object.nfc_token:
-            gs = GlobalSettings.objects.first()
-            local_base = gs.nfc_base_url_local if gs else ""
-            remote_base = gs.nfc_base_url_remote if gs else ""
+            gs = get_settings_snapshot()
+            local_base = gs.nfc_base_url_local
+            remote_base = gs.nfc_base_url_remote
             base = local_base if self.object.nfc_base_choice == "local" else remote_base
             if not base:
                 base = self.request.build_absolute_uri("/").rstrip("/")
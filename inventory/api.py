@@ -5,11 +5,18 @@ import os
 from typing import Any, Dict
 
 from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
 from django.http import JsonResponse, HttpResponseForbidden
+from django.shortcuts import get_object_or_404
 from django.utils.timezone import localtime, now
 
-from .models import Feedback
+from .access import get_access
+from .conditional import conditional_get, make_etag, user_parts
+from .models import Feedback, InventoryItem, StorageLocation
+from .suggest import suggest
+from .reorder import reorder_groups
+from .versions import catalog_version, feedback_version, global_version
 from .admin_views import _get_tailscale_status, _get_global_settings
 from .integrations.homeassistant import check_available, get_status_tuple, get_diagnostics
 
@@ -38,7 +45,11 @@ class FeedbackSummaryAPI(View):
         guard = _require_key(request)
         if guard is not None:
             return guard
+        # nicht user-abhängig → auch für geteilte Caches (revalidieren immer)
+        etag = make_etag((feedback_version(),), "feedback-summary")
+        return conditional_get(request, etag, self.summary, private=False)
 
+    def summary(self):
         qs = Feedback.objects.select_related("created_by").order_by("-created_at")
         data: Dict[str, Any] = {
             "open": qs.filter(status=Feedback.Status.OFFEN).count(),
@@ -134,3 +145,95 @@ class SystemHealthAPI(View):
         }
 
         return JsonResponse(payload, json_dumps_params={"ensure_ascii": False})
+
+
+class ItemSuggestAPI(LoginRequiredMixin, View):
+    """
+    Typeahead für Scanner-Stationen und Item-Formulare:
+    /api/items/suggest/?q=schra&limit=10[&overview=<id>]
+    Antwort kommt aus dem Präfixindex des Workers (suggest.py), nicht aus der DB.
+    """
+
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 25
+
+    def get(self, request):
+        query = (request.GET.get("q") or "").strip()
+        try:
+            limit = min(max(int(request.GET.get("limit") or self.DEFAULT_LIMIT), 1), self.MAX_LIMIT)
+        except ValueError:
+            limit = self.DEFAULT_LIMIT
+        try:
+            overview_id = int(request.GET["overview"]) if request.GET.get("overview") else None
+        except ValueError:
+            overview_id = None
+
+        entries = suggest(query, get_access(request), overview_id=overview_id, limit=limit) if query else []
+        data = {
+            "query": query,
+            "results": [entry.as_dict() for entry in entries],
+        }
+        return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+
+
+class ReorderAPI(LoginRequiredMixin, View):
+    """
+    Nachbestell-Liste als JSON (gleiche Gruppierung wie /reorder/):
+    {"item_count": n, "groups": [{"domain", "item_count", "categories": [...]}]}
+    """
+
+    def get(self, request):
+        etag = make_etag((global_version(), catalog_version()), "reorder-api", user_parts(request))
+        return conditional_get(request, etag, lambda: self.payload(request))
+
+    def payload(self, request):
+        groups = reorder_groups(get_access(request))
+        data = {
+            "item_count": sum(group["item_count"] for group in groups),
+            "groups": groups,
+        }
+        return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
+
+
+class LocationItemsAPI(LoginRequiredMixin, View):
+    """
+    Aktive Items eines Lagerorts inkl. aller Unterorte (Pfad-Präfix, eine Query):
+    {"location": {...}, "items": [{"id", "name", "quantity", "overview", "storage_location"}]}
+    Admins bekommen zusätzlich die Teilbaum-Summen (rollups.py).
+    """
+
+    def get(self, request, pk):
+        # Umhängen/Umbenennen erhöht den Katalog-Zähler, Items den globalen
+        etag = make_etag((global_version(), catalog_version()), "location-items", pk, user_parts(request))
+        return conditional_get(request, etag, lambda: self.payload(request, pk))
+
+    def payload(self, request, pk):
+        location = get_object_or_404(StorageLocation.objects.select_related("rollup"), pk=pk)
+        access = get_access(request)
+        items = InventoryItem.objects.filter(location.subtree_items_q(), is_active=True)
+        if not access.is_superuser:
+            items = items.filter(overview_id__in=access.allowed_ids)
+        rows = items.order_by("storage_location__full_path", "name", "pk").values_list(
+            "id", "name", "quantity", "overview__slug", "storage_location_id", "storage_location__full_path"
+        )
+        data: Dict[str, Any] = {
+            "location": {"id": location.pk, "name": location.name, "full_path": location.full_path},
+            "items": [
+                {
+                    "id": item_id,
+                    "name": name,
+                    "quantity": quantity,
+                    "overview": overview_slug,
+                    "storage_location": {"id": location_id, "full_path": full_path},
+                }
+                for item_id, name, quantity, overview_slug, location_id, full_path in rows
+            ],
+        }
+        rollup = getattr(location, "rollup", None)
+        if access.is_superuser and rollup is not None:
+            data["location"]["rollup"] = {
+                "item_count": rollup.item_count,
+                "total_quantity": rollup.total_quantity,
+                "low_stock_count": rollup.low_stock_count,
+            }
+        return JsonResponse(data, json_dumps_params={"ensure_ascii": False})
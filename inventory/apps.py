@@ -11,3 +11,7 @@ class InventoryConfig(AppConfig):
         # Signals für UserProfile-Erstellung und Default-Tag/-Group laden
         import inventory.signals
         import inventory.checks
+        from inventory.nplusone import install_command_hook
+
+        # N+1-Erkennung für alle Management-Commands der App
+        install_command_hook()
@@ -0,0 +1,208 @@
+# inventory/benchmarks.py
+#
+# View-Benchmarks über den Django-Test-Client (siehe Command `benchmark_views`):
+# - misst Wall-Time (Median über mehrere Läufe), Query-Anzahl und Peak-Speicher
+# - vergleicht gegen eine gespeicherte Baseline-JSON und meldet Regressionen
+# Datengrundlage z. B. per `generate_fake_inventory --items 10000`.
+from __future__ import annotations
+
+import json
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+# Standard-Toleranzen für den Baseline-Vergleich.
+DEFAULT_TIME_TOLERANCE = 0.5     # +50 % Median-Zeit
+DEFAULT_TIME_SLACK_MS = 20.0     # absolute Schwelle gegen Messrauschen
+DEFAULT_QUERY_TOLERANCE = 0      # jede zusätzliche Query ist eine Regression
+
+
+@dataclass
+class Scenario:
+    name: str
+    url: str
+    # Settings-Overrides nur für dieses Szenario (z. B. Cache aus zum Vergleich)
+    settings: dict = field(default_factory=dict)
+    # zusätzliche Request-Header (z. B. X-Partial für Teil-Antworten)
+    headers: dict = field(default_factory=dict)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    url: str
+    status: int
+    median_ms: float
+    min_ms: float
+    queries: int
+    peak_kib: float
+
+
+def build_scenarios() -> list[Scenario]:
+    """Leitet die zu messenden URLs aus dem vorhandenen Datenbestand ab."""
+    from .models import InventoryItem, Overview, StorageLocation
+
+    scenarios = [Scenario("dashboard-selector", reverse("dashboards"))]
+
+    overview = (
+        Overview.objects.filter(is_active=True)
+        .annotate(n=Count("items"))
+        .order_by("-n", "pk")
+        .first()
+    )
+    if overview is not None:
+        dashboard = reverse("overview-dashboard", kwargs={"slug": overview.slug})
+        scenarios += [
+            Scenario("overview-dashboard", dashboard),
+            Scenario("overview-dashboard-search", f"{dashboard}?q=a&sort=quantity&order=desc"),
+            # Zeilen-Fragment-Cache: warm (nach dem Warmup-Lauf) gegen abgeschaltet
+            Scenario("overview-dashboard-200", f"{dashboard}?page_size=200"),
+            Scenario(
+                "overview-dashboard-200-uncached",
+                f"{dashboard}?page_size=200",
+                settings={"INVENTORY_ROW_CACHE": "off"},
+            ),
+            # Sortieren/Blättern per fetch: nur Tabelle + Paginierung
+            Scenario(
+                "overview-dashboard-partial",
+                f"{dashboard}?sort=quantity&order=desc",
+                headers={"X-Partial": "table"},
+            ),
+            Scenario(
+                "overview-export-csv",
+                reverse("overview-export", kwargs={"slug": overview.slug, "export_format": "csv"}),
+            ),
+        ]
+
+    scenarios.append(Scenario("movement-report", reverse("movement-report")))
+
+    item = InventoryItem.objects.filter(is_active=True).order_by("pk").first()
+    if item is not None:
+        scenarios.append(Scenario("edit-item", reverse("edit-item", kwargs={"pk": item.pk})))
+        scenarios.append(Scenario("scan-barcode", f"{reverse('scan-barcode')}?barcode={item.barcode}"))
+        if item.nfc_token:
+            scenarios.append(Scenario("nfc-item", reverse("nfc-redirect", kwargs={"token": item.nfc_token})))
+
+    location = (
+        StorageLocation.objects.filter(nfc_token__isnull=False)
+        .annotate(n=Count("items"))
+        .order_by("-n", "pk")
+        .first()
+    )
+    if location is not None:
+        scenarios.append(
+            Scenario("nfc-location", reverse("nfc-location-redirect", kwargs={"token": location.nfc_token}))
+        )
+    return scenarios
+
+
+def run_scenario(client: Client, scenario: Scenario, repeat: int = 5, warmup: int = 1) -> BenchmarkResult:
+    with override_settings(**scenario.settings):
+        return _run_scenario(client, scenario, repeat=repeat, warmup=warmup)
+
+
+def _run_scenario(client: Client, scenario: Scenario, repeat: int, warmup: int) -> BenchmarkResult:
+    for _ in range(warmup):
+        _consume(client.get(scenario.url, headers=scenario.headers))
+
+    timings = []
+    status = 0
+    queries = 0
+    for _ in range(max(1, repeat)):
+        # queries_log ist auf 9000 Einträge begrenzt → vor jeder Messung leeren.
+        reset_queries()
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = client.get(scenario.url, headers=scenario.headers)
+            _consume(response)
+            timings.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+        queries = len(ctx.captured_queries)
+
+    # Speicher separat messen – tracemalloc verfälscht die Zeit.
+    tracemalloc.start()
+    try:
+        _consume(client.get(scenario.url, headers=scenario.headers))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=scenario.name,
+        url=scenario.url,
+        status=status,
+        median_ms=round(statistics.median(timings), 2),
+        min_ms=round(min(timings), 2),
+        queries=queries,
+        peak_kib=round(peak / 1024, 1),
+    )
+
+
+def _consume(response) -> None:
+    """Streaming-Antworten vollständig lesen, sonst fehlt die Renderzeit."""
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+
+
+def run_benchmarks(
+    client: Client,
+    scenarios: list[Scenario],
+    repeat: int = 5,
+    progress: Callable[[BenchmarkResult], None] | None = None,
+) -> list[BenchmarkResult]:
+    results = []
+    for scenario in scenarios:
+        result = run_scenario(client, scenario, repeat=repeat)
+        results.append(result)
+        if progress:
+            progress(result)
+    return results
+
+
+def load_baseline(path: Path) -> dict[str, dict]:
+    if not path.exists():
+        return {}
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {row["name"]: row for row in data.get("results", [])}
+
+
+def write_baseline(path: Path, results: list[BenchmarkResult], meta: dict | None = None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"meta": meta or {}, "results": [asdict(r) for r in results]}
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def compare(
+    results: list[BenchmarkResult],
+    baseline: dict[str, dict],
+    time_tolerance: float = DEFAULT_TIME_TOLERANCE,
+    time_slack_ms: float = DEFAULT_TIME_SLACK_MS,
+    query_tolerance: int = DEFAULT_QUERY_TOLERANCE,
+) -> list[str]:
+    """Liefert eine Liste lesbarer Regressionen (leer = alles gut)."""
+    problems = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.status != base.get("status", result.status):
+            problems.append(f"{result.name}: Status {base['status']} → {result.status}")
+        if result.queries > base["queries"] + query_tolerance:
+            problems.append(f"{result.name}: Queries {base['queries']} → {result.queries}")
+        limit = base["median_ms"] * (1 + time_tolerance) + time_slack_ms
+        if result.median_ms > limit:
+            problems.append(
+                f"{result.name}: Zeit {base['median_ms']:.1f} ms → {result.median_ms:.1f} ms "
+                f"(Grenze {limit:.1f} ms)"
+            )
+    return problems
@@ -0,0 +1,142 @@
+# inventory/bulk.py
+#
+# Massenaktionen im Dashboard (BulkItemActionView):
+# - jede Aktion ist ein UPDATE bzw. ein Statement auf der Tag-Zwischentabelle,
+#   alles in einer Transaktion – unabhängig von der Anzahl der Items
+# - Historie aus Vorher-/Nachher-Schnappschüssen (history.snapshots, je eine
+#   Query), Anzeige-Namen gemeinsam aufgelöst, Einträge per bulk_create
+# - UPDATE umgeht save() und die Signale → Zeilenversion, Dashboard-Versionen,
+#   Suchindex, Typeahead und Lagerort-Summen werden hier nachgezogen
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from . import history, rollups
+from .search import reindex_items
+from .suggest import record_suggest_changes
+from .versions import bump_overview_versions_on_commit
+
+ACTIONS = {
+    "favorite": "Als Favorit markieren",
+    "unfavorite": "Favorit entfernen",
+    "move_overview": "In Dashboard verschieben",
+    "set_category": "Kategorie setzen",
+    "set_location": "Lagerort setzen",
+    "adjust_quantity": "Bestand anpassen (±)",
+    "add_tag": "Tag hinzufügen",
+    "remove_tag": "Tag entfernen",
+    "deactivate": "Deaktivieren",
+}
+# Aktion → Name des Wert-Felds im Formular
+VALUE_FIELDS = {
+    "move_overview": "overview",
+    "set_category": "category",
+    "set_location": "storage_location",
+    "adjust_quantity": "delta",
+    "add_tag": "tag",
+    "remove_tag": "tag",
+}
+MAX_DELTA = 1_000_000
+
+# Was außer Historie und Versionen nachgezogen werden muss
+SEARCH_ACTIONS = {"set_category", "set_location", "add_tag", "remove_tag"}
+SUGGEST_ACTIONS = {"move_overview", "set_location", "deactivate"}
+ROLLUP_ACTIONS = {"set_location", "adjust_quantity", "deactivate"}
+# ohne Besitz-Prüfung erlaubt (ändert nur die Markierung, wie auf der Item-Seite)
+OWNER_FREE_ACTIONS = {"favorite", "unfavorite"}
+
+
+def _columns(action: str, value) -> dict:
+    """Spaltenwerte für das UPDATE der übrigen Aktionen."""
+    return {
+        "favorite": {"is_favorite": True},
+        "unfavorite": {"is_favorite": False},
+        "move_overview": {"overview_id": value},
+        "set_category": {"category_id": value},
+        "set_location": {"storage_location_id": value},
+        "deactivate": {"is_active": False},
+    }[action]
+
+
+def _rollup_state(snapshot: dict) -> rollups.ItemState:
+    return rollups.state(
+        snapshot["storage_location_id"], snapshot["is_active"], snapshot["quantity"], snapshot["low_quantity"]
+    )
+
+
+def apply_action(action: str, item_ids: Iterable[int], value=None, *, user) -> int:
+    """
+    Führt `action` für alle Items aus (`value`: Ziel-ID bzw. Bestandsänderung,
+    siehe VALUE_FIELDS). Liefert die Anzahl tatsächlich geänderter Items.
+    """
+    from .models import InventoryHistory, InventoryItem
+
+    if action not in ACTIONS:
+        raise ValueError(f"Unbekannte Aktion: {action}")
+    with transaction.atomic():
+        before = history.snapshots(item_ids, lock=True)
+        ids = sorted(before)
+        if not ids:
+            return 0
+        items = InventoryItem.objects.filter(pk__in=ids)
+        tags = {pk: snapshot["tags"] for pk, snapshot in before.items()}
+
+        if action in ("add_tag", "remove_tag"):
+            through = InventoryItem.application_tags.through
+            if action == "add_tag":
+                affected = [pk for pk in ids if value not in tags[pk]]
+                through.objects.bulk_create(
+                    [through(inventoryitem_id=pk, applicationtag_id=value) for pk in affected],
+                    batch_size=500,
+                    ignore_conflicts=True,
+                )
+                tags.update({pk: tags[pk] + [value] for pk in affected})
+            else:
+                affected = [pk for pk in ids if value in tags[pk]]
+                through.objects.filter(applicationtag_id=value, inventoryitem_id__in=affected).delete()
+                tags.update({pk: [tag for tag in tags[pk] if tag != value] for pk in affected})
+            InventoryItem.bump_versions(affected)
+        elif action == "adjust_quantity":
+            items.update(quantity=Greatest(F("quantity") + value, 0), version=F("version") + 1)
+            # eigenes UPDATE: below_minimum muss den begrenzten neuen Bestand sehen
+            items.update(below_minimum=InventoryItem.below_minimum_after())
+        else:
+            updated = items.update(**_columns(action, value), version=F("version") + 1)
+            if action in ("favorite", "unfavorite"):
+                # Favorit steht nicht in der Historie
+                bump_overview_versions_on_commit({snapshot["overview_id"] for snapshot in before.values()})
+                return updated
+
+        after = history.snapshots(ids, tags=tags)
+        pairs = [(before[pk], after[pk]) for pk in ids]
+        entries, changed = [], []
+        for pk, (old, new), changes in zip(ids, pairs, history.build_changes_many(pairs)):
+            if not changes:
+                continue
+            changed.append(pk)
+            for entry_action, entry_changes in history.split_changes(changes):
+                entries.append(InventoryHistory(
+                    item_id=pk,
+                    user=user,
+                    action=entry_action,
+                    changes=entry_changes,
+                    data_before=old,
+                    data_after=new,
+                    meta={"source": "bulk", "action": action},
+                ))
+        InventoryHistory.objects.bulk_create(entries, batch_size=500)
+
+        if action in SEARCH_ACTIONS:
+            reindex_items(changed)
+        if action in SUGGEST_ACTIONS:
+            record_suggest_changes(changed)
+        if action in ROLLUP_ACTIONS:
+            rollups.apply_item_changes((_rollup_state(before[pk]), _rollup_state(after[pk])) for pk in changed)
+        bump_overview_versions_on_commit(
+            {before[pk]["overview_id"] for pk in changed} | {after[pk]["overview_id"] for pk in changed}
+        )
+    return len(changed)
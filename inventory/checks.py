@@ -2,6 +2,7 @@ from django.conf import settings
 from django.core.checks import Error, register
 
 from .patch_notes import CURRENT_VERSION, PATCH_NOTES
+from .versions import counter_backend_error
 
 
 @register()
@@ -45,3 +46,17 @@ def patch_notes_check(app_configs, **kwargs):
         )
 
     return errors
+
+
+@register()
+def counter_backend_check(app_configs, **kwargs):
+    reason = counter_backend_error()
+    if not reason:
+        return []
+    return [
+        Error(
+            f"Der Default-Cache eignet sich nicht für Versionszähler: {reason}.",
+            hint="CACHE_BACKEND=redis (mehrere Prozesse), file oder locmem verwenden.",
+            id="inventory.E005",
+        )
+    ]
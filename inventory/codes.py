@@ -0,0 +1,270 @@
+# inventory/codes.py
+#
+# QR-Codes und Code128-Barcodes auf Abruf: /codes/<kind>/<token>.<png|svg>
+# - kind: qr (Bearbeiten-Link), barcode (Barcode-Wert), nfc (NFC-Link des
+#   Items), location (NFC-Link eines Lagerorts) – alles außer barcode als QR
+# - token = "<id>-<digest>", digest = Hash des Inhalts (inkl. Basis-URLs aus
+#   GlobalSettings) → ändert sich der Inhalt, ändert sich die URL; Antworten
+#   sind daher immutable cachebar, und eine neue Basis-URL macht alte Codes
+#   ohne Aufräumen ungültig
+# - gerendert wird beim ersten Abruf und in einem content-adressierten
+#   Datei-Cache abgelegt: <root>/ab/cd/<sha256>.<fmt>, Schlüssel = Inhalt +
+#   Render-Optionen (RENDER_VERSION hochzählen, wenn sich das Aussehen ändert)
+# - Templates bauen nur URLs (url_for / InventoryItem.qr_url), kein
+#   os.path.exists pro Zeile
+# - expected() listet alle aktuell erwarteten Codes (regenerate_codes),
+#   prune() löscht Dateien, zu denen nichts mehr passt (Mark & Sweep über die
+#   mtime statt Schlüssel-Set im Speicher; liegengebliebene .tmp-Dateien nach
+#   TMP_GRACE_SECONDS)
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator, NamedTuple
+
+from django.conf import settings
+from django.urls import reverse
+
+ITEM_KINDS = ("qr", "barcode", "nfc")
+LOCATION_KINDS = ("location",)
+KINDS = ITEM_KINDS + LOCATION_KINDS
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Zeichenart je Code-Art
+RENDERERS = {"qr": "qr", "barcode": "barcode", "nfc": "qr", "location": "qr"}
+RENDER_VERSION = 1
+# .tmp-Dateien jünger als das gehören zu einem laufenden ensure(); ältere
+# stammen aus abgebrochenen Prozessen und werden von prune() entfernt
+TMP_GRACE_SECONDS = 3600
+# gröbste übliche mtime-Auflösung (FAT: 2 s; exFAT/Netzlaufwerke oft 1 s) –
+# prune() stempelt nur darauf aufgerundete Zeiten, sonst landet die
+# abgeschnittene mtime unter der Marke und jede erwartete Datei würde gelöscht
+MTIME_GRANULARITY_NS = 2_000_000_000
+RENDER_OPTIONS = {
+    "qr": {"box_size": 10, "border": 4},
+    "barcode": {"module_height": 15.0, "quiet_zone": 6.5},
+}
+
+ITEM_FIELDS = ("pk", "barcode", "nfc_token", "nfc_base_choice")
+LOCATION_FIELDS = ("pk", "nfc_token", "nfc_base_choice")
+
+
+class CodeSource(NamedTuple):
+    """Was ein Code über sein Item/seinen Lagerort wissen muss (auch aus values_list)."""
+
+    pk: int
+    barcode: str = ""
+    nfc_token: str | None = None
+    nfc_base_choice: str = "local"
+    # nur von lookup() gefüllt (Rechteprüfung im CodeImageView)
+    overview_id: int | None = None
+
+
+@dataclass(frozen=True)
+class Bases:
+    qr: str
+    nfc_local: str = ""
+    nfc_remote: str = ""
+
+    def nfc(self, choice: str) -> str:
+        # ohne eigene NFC-Basis: QR-Basis (kein Request zum Ableiten vorhanden)
+        base = self.nfc_local if choice == "local" else self.nfc_remote
+        return (base or self.qr).rstrip("/")
+
+
+def current_bases() -> Bases:
+    from .settings_cache import get_settings_snapshot  # Lokaler Import (Zirkelbezug models ↔ Cache)
+
+    snapshot = get_settings_snapshot()
+    if not snapshot.exists:
+        return Bases(settings.INVENTORY_BASE_URL)
+    return Bases(snapshot.qr_base_url, snapshot.nfc_base_url_local, snapshot.nfc_base_url_remote)
+
+
+def qr_base_url() -> str:
+    return current_bases().qr
+
+
+def cache_root() -> str:
+    return getattr(settings, "INVENTORY_CODE_CACHE_ROOT", "") or os.path.join(settings.MEDIA_ROOT, "codes")
+
+
+def code_data(kind: str, source, bases: Bases | None = None) -> str:
+    """Inhalt des Codes ('' = dieser Code existiert für das Objekt nicht)."""
+    if kind == "barcode":
+        return source.barcode or ""
+    bases = bases or current_bases()
+    if kind == "qr":
+        return f"{bases.qr}/edit-item/{source.pk}"
+    if not source.nfc_token:
+        return ""
+    name = "nfc-location-redirect" if kind == "location" else "nfc-redirect"
+    return bases.nfc(source.nfc_base_choice) + reverse(name, kwargs={"token": source.nfc_token})
+
+
+def digest(kind: str, data: str) -> str:
+    return hashlib.sha256(f"{kind}\n{data}".encode("utf-8")).hexdigest()[:16]
+
+
+def token_for(kind: str, source, bases: Bases | None = None) -> str:
+    return f"{source.pk}-{digest(kind, code_data(kind, source, bases))}"
+
+
+def parse_token(token: str) -> tuple[int, str] | None:
+    pk, _, token_digest = token.partition("-")
+    if not pk.isdigit() or not token_digest:
+        return None
+    return int(pk), token_digest
+
+
+def url_for(source, kind: str = "qr", fmt: str = "png") -> str:
+    if not source.pk or not code_data(kind, source):
+        return ""
+    return reverse("code-image", kwargs={"kind": kind, "token": token_for(kind, source), "fmt": fmt})
+
+
+def lookup(kind: str, pk: int) -> CodeSource | None:
+    """Item (samt overview_id) bzw. Lagerort zu einem Token (eine Query, nur die nötigen Spalten)."""
+    from .models import InventoryItem, StorageLocation
+
+    if kind in LOCATION_KINDS:
+        row = StorageLocation.objects.filter(pk=pk).values_list(*LOCATION_FIELDS).first()
+        return CodeSource(row[0], "", *row[1:]) if row else None
+    row = InventoryItem.objects.filter(pk=pk).values_list(*ITEM_FIELDS, "overview_id").first()
+    return CodeSource(*row) if row else None
+
+
+def expected(bases: Bases | None = None, kinds: Iterable[str] = KINDS) -> Iterator[tuple[str, str]]:
+    """(kind, Inhalt) aller Codes, die es gerade geben sollte – chunkweise aus der DB."""
+    from .models import InventoryItem, StorageLocation
+
+    bases = bases or current_bases()
+    kinds = tuple(kinds)
+    item_kinds = [kind for kind in kinds if kind in ITEM_KINDS]
+    if item_kinds:
+        for row in InventoryItem.objects.values_list(*ITEM_FIELDS).iterator(chunk_size=2000):
+            source = CodeSource(*row)
+            for kind in item_kinds:
+                data = code_data(kind, source, bases)
+                if data:
+                    yield kind, data
+    if "location" in kinds:
+        for pk, token, choice in StorageLocation.objects.values_list(*LOCATION_FIELDS).iterator(chunk_size=2000):
+            data = code_data("location", CodeSource(pk, "", token, choice), bases)
+            if data:
+                yield "location", data
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Rendern + Datei-Cache
+# ──────────────────────────────────────────────────────────────────────────────
+def cache_key(kind: str, fmt: str, data: str) -> str:
+    renderer = RENDERERS[kind]
+    options = sorted(RENDER_OPTIONS[renderer].items())
+    raw = f"{RENDER_VERSION}\n{renderer}\n{fmt}\n{options!r}\n{data}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_path(key: str, fmt: str, root: str | None = None) -> str:
+    return os.path.join(root or cache_root(), key[:2], key[2:4], f"{key}.{fmt}")
+
+
+def render_bytes(kind: str, fmt: str, data: str) -> bytes:
+    buffer = io.BytesIO()
+    renderer = RENDERERS[kind]
+    options = RENDER_OPTIONS[renderer]
+    if renderer == "qr":
+        import qrcode
+        import qrcode.image.svg
+
+        factory = qrcode.image.svg.SvgPathImage if fmt == "svg" else None
+        qrcode.make(data, image_factory=factory, **options).save(buffer)
+    else:
+        from barcode import Code128
+        from barcode.writer import ImageWriter, SVGWriter
+
+        writer = SVGWriter() if fmt == "svg" else ImageWriter()
+        Code128(data, writer=writer).write(buffer, options=dict(options))
+    return buffer.getvalue()
+
+
+def ensure(kind: str, fmt: str, data: str, root: str | None = None) -> str:
+    """Pfad der gerenderten Datei; rendert beim ersten Aufruf (atomar per rename)."""
+    path = cache_path(cache_key(kind, fmt, data), fmt, root)
+    if os.path.exists(path):
+        return path
+    content = render_bytes(kind, fmt, data)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return path
+
+
+def refresh(source, kinds: Iterable[str] = ITEM_KINDS) -> None:
+    """Codes eines Items/Lagerorts neu rendern (z. B. nach einem Renderer-Update)."""
+    for kind in kinds:
+        data = code_data(kind, source)
+        if not data:
+            continue
+        for fmt in FORMATS:
+            path = cache_path(cache_key(kind, fmt, data), fmt)
+            if os.path.exists(path):
+                os.unlink(path)
+            ensure(kind, fmt, data)
+
+
+def is_cached(kind: str, fmt: str, data: str, root: str | None = None) -> bool:
+    return os.path.exists(cache_path(cache_key(kind, fmt, data), fmt, root))
+
+
+def prune() -> int:
+    """Dateien ohne aktuellen Code (alte Basis-URL, geänderter Barcode/Token, gelöscht) entfernen.
+
+    Mark & Sweep: erwartete Dateien bekommen die (auf MTIME_GRANULARITY_NS
+    aufgerundete) Startzeit als mtime, danach fliegt alles vor dem Start
+    Geschriebene – der Speicherbedarf bleibt unabhängig von der Anzahl Codes.
+    Während des Laufs neu geschriebene Dateien sind jünger und bleiben stehen.
+    """
+    root = cache_root()
+    if not os.path.isdir(root):
+        return 0
+    mark = time.time_ns()
+    stamp = -(-mark // MTIME_GRANULARITY_NS) * MTIME_GRANULARITY_NS
+    for kind, data in expected():
+        for fmt in FORMATS:
+            try:
+                os.utime(cache_path(cache_key(kind, fmt, data), fmt, root), ns=(stamp, stamp))
+            except FileNotFoundError:
+                pass
+    tmp_cutoff = mark - TMP_GRACE_SECONDS * 1_000_000_000
+    removed = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            ext = name.partition(".")[2]
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:  # parallel ersetzt/gelöscht
+                continue
+            if ext == "tmp" and mtime >= tmp_cutoff:  # ensure() schreibt gerade
+                continue
+            if ext in FORMATS and mtime >= mark:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+    return removed
@@ -0,0 +1,82 @@
+# inventory/conditional.py
+#
+# Bedingte GET-Antworten (ETag → 304 Not Modified) für Endpunkte, die ständig
+# gepollt werden (Dashboards, Home-Assistant-APIs, Exporte):
+# - das ETag entsteht VOR den Haupt-Queries aus den Versionszählern
+#   (versions.py) plus allem, was die Antwort sonst noch bestimmt (User,
+#   Rechte, Query-String, Settings-Snapshot …)
+# - passt If-None-Match, gibt es sofort 304 – ohne Item-/Feedback-Queries
+# - Cache-Control: no-cache → Browser und Reverse-Proxies speichern die
+#   Antwort, fragen aber jedes Mal mit If-None-Match beim WSGI-App nach
+# - ist ein Zähler nicht lesbar (Cache weg), gibt es kein ETag statt eines
+#   womöglich veralteten
+from __future__ import annotations
+
+import hashlib
+from typing import Callable
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from .access import access_generation, get_access
+from .settings_cache import get_settings_snapshot
+
+
+def make_etag(versions: tuple[int, ...], *parts) -> str | None:
+    """Starkes ETag aus Zählerständen + Teilen; None, wenn ein Zähler 0 (= unbekannt) ist."""
+    if not all(versions):
+        return None
+    return '"%s"' % hashlib.sha1(repr((versions, parts)).encode("utf-8")).hexdigest()[:32]
+
+
+def user_parts(request) -> tuple:
+    """Request-abhängige Anteile einer HTML-/JSON-Seite eines eingeloggten Users."""
+    access = get_access(request)
+    return (
+        access.user_id,
+        access.is_superuser,
+        tuple(sorted(access.allowed_ids)),
+        tuple(sorted(access.favorite_ids)),
+        access_generation(),
+        # CSRF-Token steckt im Markup → neues Cookie, neue Seite
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+    )
+
+
+def page_parts(request) -> tuple:
+    """Alles, was Basis-Template und Context-Processors beitragen."""
+    return (
+        request.get_full_path(),
+        request.headers.get("Accept", ""),
+        tuple(sorted(get_settings_snapshot().as_dict().items())),
+    )
+
+
+def conditional_get(
+    request,
+    etag: str | None,
+    render: Callable,
+    *,
+    private: bool = True,
+    vary: tuple[str, ...] = (),
+):
+    """
+    304, wenn If-None-Match zum ETag passt – sonst `render()` mit ETag.
+    Nur für Antworten ohne Flash-Messages im Markup (die stehen in keinem Zähler).
+    """
+    if request.method not in ("GET", "HEAD") or etag is None:
+        return render()
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+        if response.status_code != 200:
+            return response
+    response["ETag"] = etag
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    if vary:
+        patch_vary_headers(response, vary)
+    return response
@@ -1,33 +1,70 @@
+from django.utils.functional import SimpleLazyObject
+
 from .feature_flags import get_feature_flags_namespace
-from .models import GlobalSettings, Overview
+from .models import Overview
+from .settings_cache import get_settings_snapshot
+
+# Attribut an der Request, in dem die ausgewerteten Werte zwischengespeichert werden.
+_MEMO_ATTR = "_inventory_context_memo"
+
+
+def _memoized(request, key, factory):
+    """
+    Liefert ein Lazy-Objekt, das `factory()` erst beim ersten Zugriff im Template
+    ausführt und das Ergebnis an der Request ablegt. Weitere render()-Aufrufe
+    (Includes, Inclusion-Tags, Fehlerseiten) derselben Request teilen sich den Wert.
+    """
+    def _evaluate():
+        if request is None:
+            return factory()
+        memo = getattr(request, _MEMO_ATTR, None)
+        if memo is None:
+            memo = {}
+            setattr(request, _MEMO_ATTR, memo)
+        if key not in memo:
+            memo[key] = factory()
+        return memo[key]
+
+    return SimpleLazyObject(_evaluate)
+
 
 def active_overviews(request):
     """
     Liefert alle aktiven Overviews in jedem Template-Kontext,
     falls global benötigt (z. B. für eine Sidebar).
+    Die Query läuft nur, wenn ein Template den Wert wirklich liest.
     """
-    return {"active_overviews": Overview.objects.filter(is_active=True)}
+    return {
+        "active_overviews": _memoized(
+            request,
+            "active_overviews",
+            lambda: list(Overview.objects.filter(is_active=True)),
+        )
+    }
 
 
 def global_features(request):
     """
     Liefert globale Feature-Schalter für Templates.
     """
-    return {"global_features": get_feature_flags_namespace()}
+    return {
+        "global_features": _memoized(request, "global_features", get_feature_flags_namespace)
+    }
 
 
 def maintenance_status(request):
     """
     Liefert Wartungsmodus-Status und Nachricht für Templates.
     """
-    settings_obj = GlobalSettings.objects.first()
     return {
-        "maintenance_mode_enabled": bool(
-            settings_obj and settings_obj.maintenance_mode_enabled
+        "maintenance_mode_enabled": _memoized(
+            request,
+            "maintenance_mode_enabled",
+            lambda: bool(get_settings_snapshot().maintenance_mode_enabled),
         ),
-        "maintenance_message": (
-            settings_obj.maintenance_message
-            if settings_obj and settings_obj.maintenance_message
-            else ""
+        "maintenance_message": _memoized(
+            request,
+            "maintenance_message",
+            lambda: get_settings_snapshot().maintenance_message or "",
         ),
     }
@@ -0,0 +1,185 @@
+# inventory/duplicates.py
+#
+# Dublettenerkennung beim Anlegen von Items (MinHash + LSH):
+# - pro Item eine MinHash-Signatur über Zeichen-Trigramme aus Name/Variante
+#   und Wörter der Beschreibung (ItemSimilaritySignature)
+# - die Signatur zerfällt in BANDS Bänder à ROWS Werte; jedes Band ergibt einen
+#   Bucket-Hash (ItemSimilarityBand, Index auf band+bucket)
+# - Kandidaten = Items mit mindestens einem gleichen Bucket (eine indizierte
+#   Query), Ähnlichkeit = Anteil gleicher Signaturwerte (≈ Jaccard)
+# Gepflegt per Signal bei Änderungen an SIMILARITY_FIELDS bzw. über
+# `manage.py rebuild_search_index`.
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import struct
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Q
+
+NGRAM = 3
+BANDS = 10
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+# Ab diesem geschätzten Jaccard-Wert gilt ein Item als mögliche Dublette.
+DUPLICATE_THRESHOLD = 0.5
+# Beschreibungen fließen nur mit ihren ersten Wörtern ein (sonst dominieren sie)
+MAX_DESCRIPTION_WORDS = 20
+# Obergrenze der Kandidaten aus den Buckets (sehr häufige Namen)
+MAX_CANDIDATES = 500
+
+_MERSENNE = (1 << 61) - 1
+_MAX32 = 0xFFFFFFFF
+# Fester Seed → Signaturen sind über Prozesse und Deployments hinweg stabil
+_rng = random.Random(20261017)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f">{NUM_PERM}I")
+
+_RE_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(name: str, variant: str = "", description: str = "") -> set[str]:
+    text = " ".join(_RE_WORD.findall(f"{name or ''} {variant or ''}".casefold()))
+    result = {text[i:i + NGRAM] for i in range(max(len(text) - NGRAM + 1, 1))} if text else set()
+    words = [w for w in _RE_WORD.findall((description or "").casefold()) if len(w) >= 4]
+    result.update(f"w:{w}" for w in words[:MAX_DESCRIPTION_WORDS])
+    return result
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(tokens: Iterable[str]) -> tuple[int, ...] | None:
+    """MinHash-Signatur (NUM_PERM Werte à 32 Bit); None bei leerer Menge."""
+    hashes = [_hash64(t) for t in tokens]
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * h + b) % _MERSENNE) & _MAX32 for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def band_buckets(signature: tuple[int, ...]) -> list[int]:
+    """Ein vorzeichenbehafteter 63-Bit-Hash pro Band (passt in BigIntegerField)."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = struct.pack(f">{ROWS}I", *signature[band * ROWS:(band + 1) * ROWS])
+        value = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big") >> 1
+        buckets.append(value - (1 << 62))
+    return buckets
+
+
+def pack(signature: tuple[int, ...]) -> bytes:
+    return _SIGNATURE.pack(*signature)
+
+
+def unpack(data: bytes) -> tuple[int, ...]:
+    return _SIGNATURE.unpack(bytes(data))
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Abfrage
+# ──────────────────────────────────────────────────────────────────────────────
+def find_duplicates(
+    name: str,
+    variant: str = "",
+    description: str = "",
+    *,
+    access=None,
+    exclude_id: int | None = None,
+    threshold: float = DUPLICATE_THRESHOLD,
+    limit: int = 5,
+) -> list[tuple[int, float]]:
+    """
+    (Item-ID, Ähnlichkeit 0…1) der möglichen Dubletten, beste zuerst.
+    `access`: nur Items aus den für den User sichtbaren Overviews.
+    """
+    from .models import ItemSimilarityBand, ItemSimilaritySignature
+
+    signature = minhash(shingles(name, variant, description))
+    if signature is None:
+        return []
+    match = Q()
+    for band, bucket in enumerate(band_buckets(signature)):
+        match |= Q(band=band, bucket=bucket)
+    candidates = ItemSimilarityBand.objects.filter(match, item__is_active=True)
+    if access is not None and not access.is_superuser:
+        candidates = candidates.filter(item__overview_id__in=access.allowed_ids)
+    if exclude_id:
+        candidates = candidates.exclude(item_id=exclude_id)
+    candidate_ids = list(candidates.values_list("item_id", flat=True).distinct()[:MAX_CANDIDATES])
+    if not candidate_ids:
+        return []
+
+    scored = []
+    for item_id, data in ItemSimilaritySignature.objects.filter(item_id__in=candidate_ids).values_list(
+        "item_id", "signature"
+    ):
+        score = similarity(signature, unpack(data))
+        if score >= threshold:
+            scored.append((item_id, score))
+    scored.sort(key=lambda row: (-row[1], row[0]))
+    return scored[:limit]
+
+
+def duplicate_items(name: str, variant: str = "", description: str = "", **kwargs) -> list:
+    """Wie find_duplicates(), aber als Items mit Attribut `similarity` (Prozent)."""
+    from .models import InventoryItem
+
+    found = find_duplicates(name, variant, description, **kwargs)
+    if not found:
+        return []
+    items = InventoryItem.objects.in_bulk([item_id for item_id, _ in found])
+    result = []
+    for item_id, score in found:
+        item = items.get(item_id)
+        if item is not None:
+            item.similarity = round(score * 100)
+            result.append(item)
+    return result
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Index-Pflege
+# ──────────────────────────────────────────────────────────────────────────────
+def reindex_items(item_ids: Iterable[int], batch_size: int = 500) -> int:
+    """Berechnet Signatur und Buckets der Items neu; gibt die Anzahl zurück."""
+    from .models import InventoryItem, ItemSimilarityBand, ItemSimilaritySignature
+
+    ids = sorted({pk for pk in item_ids if pk})
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        rows = InventoryItem.objects.filter(pk__in=chunk).values_list("pk", "name", "variant", "description")
+        signatures, bands = [], []
+        for pk, name, variant, description in rows:
+            signature = minhash(shingles(name, variant, description))
+            if signature is None:
+                continue
+            signatures.append(ItemSimilaritySignature(item_id=pk, signature=pack(signature)))
+            bands.extend(
+                ItemSimilarityBand(item_id=pk, band=band, bucket=bucket)
+                for band, bucket in enumerate(band_buckets(signature))
+            )
+        with transaction.atomic():
+            ItemSimilarityBand.objects.filter(item_id__in=chunk).delete()
+            ItemSimilaritySignature.objects.filter(item_id__in=chunk).delete()
+            ItemSimilaritySignature.objects.bulk_create(signatures, batch_size=batch_size)
+            ItemSimilarityBand.objects.bulk_create(bands, batch_size=batch_size * BANDS)
+        written += len(signatures)
+    return written
+
+
+def reindex_all(batch_size: int = 500) -> int:
+    from .models import InventoryItem
+
+    return reindex_items(InventoryItem.objects.values_list("pk", flat=True), batch_size=batch_size)
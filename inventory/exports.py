@@ -11,6 +11,7 @@ from django.utils import timezone
 from .models import ScheduledExport
 
 from .models import InventoryItem, Overview
+from .nplusone import detect
 
 
 EXPORT_COLUMNS = [
@@ -26,7 +27,8 @@ EXPORT_COLUMNS = [
     ("location_number", "Ort (Nummer)", lambda it: it.location_number or ""),
     ("location_shelf", "Ort (Fach)", lambda it: it.location_shelf or ""),
     ("min_stock", "Mindestbestand", lambda it: it.low_quantity),
-    ("tags", "Tags", lambda it: ", ".join(sorted(it.application_tags.values_list("name", flat=True)))),
+    # .all() statt values_list → nutzt prefetch_related("application_tags")
+    ("tags", "Tags", lambda it: ", ".join(sorted(tag.name for tag in it.application_tags.all()))),
     ("overview", "Dashboard", lambda it: it.overview.name if it.overview else ""),
     ("maintenance_date", "Wartungsdatum", lambda it: it.maintenance_date.isoformat() if it.maintenance_date else ""),
     ("last_used", "Letzte Nutzung", lambda it: it.last_used.isoformat() if it.last_used else ""),
@@ -41,6 +43,14 @@ def get_export_columns(selected: Iterable[str] | None = None):
     return EXPORT_COLUMNS[:]
 
 
+def prepare_export_items(items) -> list:
+    """
+    Lädt die Items (Lagerort-Pfad steht gespeichert in StorageLocation.full_path,
+    select_related("storage_location") genügt).
+    """
+    return list(items)
+
+
 def calculate_next_run(frequency: str, base_time=None):
     base = base_time or timezone.now()
     if frequency == ScheduledExport.Frequency.DAILY:
@@ -66,17 +76,18 @@ def export_overview_to_file(
     os.makedirs(export_dir, exist_ok=True)
     full_path = os.path.join(export_dir, filename)
 
-    items = (
-        InventoryItem.objects.filter(overview=overview)
-        .select_related("category", "storage_location", "overview")
-        .prefetch_related("application_tags")
-        .order_by("name")
-    )
-
-    with open(full_path, "w", newline="", encoding="utf-8") as handle:
-        writer = csv.writer(handle, delimiter=delimiter)
-        writer.writerow([col[1] for col in selected_columns])
-        for item in items:
-            writer.writerow([col[2](item) for col in selected_columns])
+    with detect(f"export {overview.slug}"):
+        items = prepare_export_items(
+            InventoryItem.objects.filter(overview=overview)
+            .select_related("category", "storage_location", "overview")
+            .prefetch_related("application_tags")
+            .order_by("name")
+        )
+
+        with open(full_path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle, delimiter=delimiter)
+            writer.writerow([col[1] for col in selected_columns])
+            for item in items:
+                writer.writerow([col[2](item) for col in selected_columns])
 
     return os.path.join("exports", filename)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from types import SimpleNamespace
 
-from .models import GlobalSettings
+from .settings_cache import get_settings_snapshot
 
 
 DEFAULT_FEATURE_FLAGS = {
@@ -28,31 +28,11 @@ DEFAULT_FEATURE_FLAGS = {
 
 
 def get_feature_flags() -> dict[str, bool]:
+    """Dünne Sicht auf den gecachten Settings-Snapshot (keine DB-Query)."""
     flags = DEFAULT_FEATURE_FLAGS.copy()
-    settings = GlobalSettings.objects.first()
-    if settings:
-        flags.update(
-            {
-                "show_patch_notes": settings.show_patch_notes,
-                "show_feedback": settings.show_feedback,
-                "show_movement_report": settings.show_movement_report,
-                "show_admin_history": settings.show_admin_history,
-                "show_scheduled_exports": settings.show_scheduled_exports,
-                "show_mark_button": settings.show_mark_button,
-                "show_favorites": settings.show_favorites,
-                "show_system_settings": settings.show_system_settings,
-                "enable_user_overview_requests": settings.enable_user_overview_requests,
-                "enable_bulk_actions": settings.enable_bulk_actions,
-                "enable_item_move": settings.enable_item_move,
-                "enable_item_history": settings.enable_item_history,
-                "enable_attachments": settings.enable_attachments,
-                "enable_image_upload": settings.enable_image_upload,
-                "enable_image_library": settings.enable_image_library,
-                "enable_qr_actions": settings.enable_qr_actions,
-                "enable_nfc_fields": settings.enable_nfc_fields,
-                "enable_unit_fields": settings.enable_unit_fields,
-            }
-        )
+    snapshot = get_settings_snapshot()
+    if snapshot.exists:
+        flags.update({name: snapshot[name] for name in DEFAULT_FEATURE_FLAGS})
     return flags
 
 
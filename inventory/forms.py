@@ -6,7 +6,9 @@ from django.db.utils import OperationalError, ProgrammingError
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 from django.db.models import Q
+from django.db.models.functions import Lower
 
+from . import labels
 from .models import (
     Category,
     InventoryItem,
@@ -16,9 +18,11 @@ from .models import (
     Feedback,
     FeedbackComment,
     ItemComment,
+    Overview,
     ScheduledExport,
-    GlobalSettings,
 )
+from .rollups import rollups_for
+from .settings_cache import get_settings_snapshot
 
 
 # -----------------------------
@@ -108,10 +112,8 @@ def unit_fields_enabled() -> bool:
     Bei DB-/Migrations-Problemen gilt der sichere Default: aktiviert.
     """
     try:
-        if not table_exists(GlobalSettings):
-            return True
-        settings = GlobalSettings.objects.first()
-        if not settings:
+        settings = get_settings_snapshot()
+        if not settings.exists:
             return True
         return bool(settings.enable_unit_fields)
     except (OperationalError, ProgrammingError):
@@ -141,27 +143,15 @@ class StorageLocationForm(forms.ModelForm):
             "nfc_base_choice": forms.Select(attrs={"class": "form-control form-control-lg"}),
         }
 
-    def _descendant_ids(self, root: StorageLocation) -> set[int]:
-        ids: set[int] = set()
-        stack = [root]
-        while stack:
-            node = stack.pop()
-            for child in node.children.all():
-                if child.pk and child.pk not in ids:
-                    ids.add(child.pk)
-                    stack.append(child)
-        return ids
-
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         qs = StorageLocation.objects.all()
 
         if self.instance and self.instance.pk:
-            exclude_ids = self._descendant_ids(self.instance)
-            exclude_ids.add(self.instance.pk)
-            qs = qs.exclude(pk__in=exclude_ids)
+            # sich selbst und den eigenen Teilbaum ausschließen (gespeicherter Pfad)
+            qs = qs.exclude(path__startswith=self.instance.path) if self.instance.path else qs.exclude(pk=self.instance.pk)
 
-        ordered = sorted(qs, key=lambda loc: loc.get_full_path().lower())
+        ordered = list(qs.order_by(Lower("full_path"), "pk"))
         self.fields["parent"].queryset = qs
         choices = [("", "– Kein übergeordneter Lagerort –")]
         for loc in ordered:
@@ -174,8 +164,10 @@ class StorageLocationForm(forms.ModelForm):
     def _build_parent_tree(self, ordered: list[StorageLocation]) -> list[dict]:
         node_map: dict[int, dict] = {}
         root_nodes: list[dict] = []
+        # Teilbaum-Summen gespeichert (rollups.py) → eine Query statt Rekursion
+        totals = rollups_for(loc.pk for loc in ordered)
         for loc in ordered:
-            node = {"id": loc.pk, "name": loc.name, "children": []}
+            node = {"id": loc.pk, "name": loc.name, "children": [], "rollup": totals.get(loc.pk)}
             node_map[loc.pk] = node
         for loc in ordered:
             node = node_map[loc.pk]
@@ -270,7 +262,7 @@ class EquipmentItemForm(forms.ModelForm):
         try:
             qs_all = StorageLocation.objects.all()
             # Für die Anzeige nach Pfad sortieren
-            sorted_locs = sorted(qs_all, key=lambda loc: loc.get_full_path().lower())
+            sorted_locs = qs_all.order_by(Lower("full_path"), "pk")
             # QuerySet (Validierung) + Choices (Sortierung) setzen
             self.fields['storage_location'].queryset = qs_all
             choices = [('', '–')]
@@ -388,7 +380,7 @@ class ConsumableItemForm(forms.ModelForm):
         # >>> NEU/ÄNDERUNG: Lagerorte dynamisch befüllen (nicht beim Import einfrieren)
         try:
             qs_all = StorageLocation.objects.all()
-            sorted_locs = sorted(qs_all, key=lambda loc: loc.get_full_path().lower())
+            sorted_locs = qs_all.order_by(Lower("full_path"), "pk")
             self.fields['storage_location'].queryset = qs_all
             choices = [('', '–')]
             choices.extend((loc.pk, loc.get_full_path()) for loc in sorted_locs)
@@ -558,4 +550,109 @@ class ScheduledExportForm(forms.ModelForm):
             "frequency": forms.Select(attrs={"class": "form-control form-control-lg"}),
             "columns": forms.HiddenInput(),
             "is_active": forms.CheckboxInput(attrs={"class": "form-check-input"}),
-        }
\ No newline at end of file
+        }
+
+class LabelSheetForm(forms.Form):
+    """Auswahl + Vorlage für einen Etikettenbogen (labels.py)."""
+
+    overview = forms.ModelChoiceField(
+        queryset=Overview.objects.none(),
+        required=False,
+        label="Dashboard",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    location = forms.ModelChoiceField(
+        queryset=StorageLocation.objects.none(),
+        required=False,
+        label="Lagerort (inkl. Unterorte)",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    tag = forms.ModelChoiceField(
+        queryset=ApplicationTag.objects.none(),
+        required=False,
+        label="Tag",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    ids = forms.CharField(
+        required=False,
+        label="Item-IDs",
+        help_text="z. B. 3, 7, 12-15",
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
+    template = forms.ChoiceField(
+        choices=[(t.key, t.name) for t in labels.TEMPLATES.values()],
+        label="Vorlage",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    kind = forms.ChoiceField(
+        choices=list(labels.KINDS.items()),
+        label="Code",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    fmt = forms.ChoiceField(
+        choices=[(key, key.upper()) for key in labels.FORMATS],
+        label="Format",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    skip = forms.IntegerField(
+        required=False,
+        min_value=0,
+        initial=0,
+        label="Bereits benutzte Etiketten",
+        help_text="Auf dem ersten A4-Bogen so viele Plätze überspringen.",
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+
+    def __init__(self, *args, access=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.access = access
+        if access is not None:
+            self.fields["overview"].queryset = access.allowed_overviews()
+        self.fields["location"].queryset = StorageLocation.objects.order_by(Lower("full_path"), "pk")
+        self.fields["location"].label_from_instance = lambda loc: loc.full_path
+        self.fields["tag"].queryset = ApplicationTag.objects.order_by(Lower("name"))
+
+    def clean_ids(self):
+        raw = self.cleaned_data.get("ids") or ""
+        try:
+            return labels.parse_ids(raw)
+        except ValueError as exc:
+            raise forms.ValidationError(f"Ungültige Angabe: {exc}")
+
+    def clean(self):
+        cleaned = super().clean()
+        if not any(cleaned.get(name) for name in ("overview", "location", "tag", "ids")):
+            raise forms.ValidationError("Bitte Dashboard, Lagerort, Tag oder Item-IDs wählen.")
+        template = labels.TEMPLATES.get(cleaned.get("template"))
+        if template is not None:
+            cleaned["skip"] = (cleaned.get("skip") or 0) % template.per_page
+        return cleaned
+
+
+class ItemImportForm(forms.Form):
+    """Upload für den Massenimport (imports.py)."""
+
+    file = forms.FileField(
+        label="Datei (CSV oder XLSX)",
+        help_text="Spalten wie im Export; Lagerorte als Pfad „Halle > Regal > Fach“, Tags kommagetrennt.",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv,.txt,.xls,.xlsx"}),
+    )
+    overview = forms.ModelChoiceField(
+        queryset=Overview.objects.order_by("order", "name"),
+        required=False,
+        label="Dashboard",
+        help_text="Für Zeilen ohne Spalte „Dashboard“.",
+        widget=forms.Select(attrs={"class": "form-control"}),
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        label="Nur prüfen (Probelauf)",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
+    skip_invalid = forms.BooleanField(
+        required=False,
+        label="Fehlerhafte Zeilen überspringen",
+        help_text="Sonst wird bei einer fehlerhaften Zeile nichts importiert.",
+        widget=forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    )
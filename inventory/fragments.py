@@ -0,0 +1,137 @@
+# inventory/fragments.py
+#
+# Fragment-Cache für die Item-Zeilen im Overview-Dashboard:
+# - jede Zeile (inkl. Kommentar-Modal und Verleih-Zeile) wird einzeln gerendert
+#   und unter Item-Version + Overview + Feature-Set + Rechteklasse +
+#   Stammdaten-Version + QR-Basis-URL gecacht
+# - request-abhängige Teile (CSRF-Token, ?next=) stehen als Platzhalter im
+#   Fragment und werden pro Request eingesetzt → Fragmente sind userübergreifend
+# - ein Seitenaufruf kostet ein get_many; nur fehlende Zeilen brauchen die
+#   Prefetches (Tags, Verleihe, Kommentare) und werden gerendert
+# - Fragmente liegen im Cache-Alias "fragments" (falls konfiguriert): viele,
+#   kurzlebige Einträge sollen keine Versionszähler im default-Cache verdrängen
+# Abschaltbar über settings.INVENTORY_ROW_CACHE = off.
+from __future__ import annotations
+
+import hashlib
+from typing import Callable
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.template.loader import render_to_string
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from . import codes
+from .versions import catalog_version
+
+ROW_TEMPLATE = "inventory/partials/overview_item_row.html"
+ROW_CACHE_PREFIX = "inventory:row"
+ROW_CACHE_ALIAS = "fragments"
+
+# Platzhalter (nur Buchstaben/Unterstriche → übersteht escape und urlencode)
+CSRF_MARKER = "__ROW_CSRF_TOKEN__"
+NEXT_MARKER = "__ROW_NEXT_PATH__"
+NEXT_QUOTED_MARKER = "__ROW_NEXT_QUOTED__"
+
+
+def row_cache_enabled() -> bool:
+    return getattr(settings, "INVENTORY_ROW_CACHE", "on") != "off"
+
+
+def row_cache():
+    return caches[ROW_CACHE_ALIAS] if ROW_CACHE_ALIAS in settings.CACHES else cache
+
+
+def permission_class(user) -> str:
+    if getattr(user, "is_superuser", False):
+        return "admin"
+    if getattr(user, "is_staff", False):
+        return "staff"
+    return "user"
+
+
+def variant_key(overview, features: dict, global_features: dict, user) -> str:
+    """Alles außer dem Item selbst, wovon das Zeilen-Markup abhängt."""
+    raw = repr((
+        overview.pk,
+        overview.slug,
+        sorted(features.items()),
+        sorted(global_features.items()),
+        permission_class(user),
+        catalog_version(),
+        # QR-URLs enthalten einen Hash über die Basis-URL
+        codes.qr_base_url(),
+    ))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _cache_key(item, variant: str) -> str:
+    return f"{ROW_CACHE_PREFIX}:{item.pk}:{item.version}:{variant}"
+
+
+def _fill_placeholders(fragment: str, request, csrf_input: str) -> str:
+    path = request.get_full_path()
+    return (
+        fragment
+        .replace(CSRF_MARKER, csrf_input)
+        .replace(NEXT_QUOTED_MARKER, escape(quote(path, safe="/")))
+        .replace(NEXT_MARKER, escape(path))
+    )
+
+
+def render_item_rows(
+    request,
+    items: list,
+    context: dict,
+    *,
+    prepare: Callable[[list], None] | None = None,
+) -> list[str]:
+    """
+    Gerenderte Zeilen in der Reihenfolge von `items`.
+    `prepare(missing)` lädt vor dem Rendern nachzuladende Daten (Prefetches,
+    Lagerort-Pfade) – nur für Items, deren Zeile nicht im Cache liegt.
+    `context` braucht overview, features und global_features (dict).
+    """
+    from django.middleware.csrf import get_token
+
+    csrf_input = format_html('<input type="hidden" name="csrfmiddlewaretoken" value="{}">', get_token(request))
+    row_context = {
+        **context,
+        "row_csrf": mark_safe(CSRF_MARKER),
+        "row_next": NEXT_MARKER,
+        "row_next_quoted": NEXT_QUOTED_MARKER,
+    }
+
+    cached: dict[str, str] = {}
+    keys = []
+    if row_cache_enabled():
+        variant = variant_key(context["overview"], context["features"], context["global_features"], request.user)
+        keys = [_cache_key(item, variant) for item in items]
+        try:
+            cached = row_cache().get_many(keys)
+        except Exception:
+            cached = {}
+
+    missing = [item for i, item in enumerate(items) if not keys or keys[i] not in cached]
+    if missing and prepare is not None:
+        prepare(missing)
+
+    fresh: dict[str, str] = {}
+    rows = []
+    for i, item in enumerate(items):
+        fragment = cached.get(keys[i]) if keys else None
+        if fragment is None:
+            fragment = render_to_string(ROW_TEMPLATE, {**row_context, "it": item})
+            if keys:
+                fresh[keys[i]] = fragment
+        rows.append(mark_safe(_fill_placeholders(fragment, request, csrf_input)))
+
+    if fresh:
+        try:
+            row_cache().set_many(fresh, getattr(settings, "INVENTORY_ROW_CACHE_TIMEOUT", 3600))
+        except Exception:
+            pass
+    return rows
+
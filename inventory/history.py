@@ -0,0 +1,210 @@
+# inventory/history.py
+#
+# Historie/Timeline der Items (InventoryHistory): Schnappschüsse und
+# Änderungslisten für Ansichten, Import (imports.py) und Massenaktionen.
+# - snapshot_item() nimmt optional die Tag-IDs entgegen, snapshots() liest
+#   viele Items auf einmal, build_changes_many() löst die Anzeige-Namen für
+#   alle Einträge gemeinsam auf → bei Massenoperationen keine Query pro Item
+from __future__ import annotations
+
+from datetime import datetime
+
+HISTORY_FIELDS = (
+    "name",
+    "description",
+    "quantity",
+    "unit",
+    "variant",
+    "category_id",
+    "storage_location_id",
+    "location_letter",
+    "location_number",
+    "location_shelf",
+    "low_quantity",
+    "order_link",
+    "maintenance_date",
+    "overview_id",
+    "item_type",
+    "is_active",
+    "tags",
+)
+
+HISTORY_LABELS = {
+    "name": "Name",
+    "description": "Beschreibung",
+    "quantity": "Bestand",
+    "unit": "Einheit",
+    "variant": "Variante",
+    "category_id": "Kategorie",
+    "storage_location_id": "Lagerort",
+    "location_letter": "Ort (Buchstabe)",
+    "location_number": "Ort (Nummer)",
+    "location_shelf": "Ort (Fach)",
+    "low_quantity": "Mindestbestand",
+    "order_link": "Bestell-Link",
+    "maintenance_date": "Wartungs-/Ablaufdatum",
+    "overview_id": "Dashboard",
+    "item_type": "Typ",
+    "is_active": "Aktiv",
+    "tags": "Tags",
+}
+
+MOVEMENT_FIELDS = {
+    "storage_location_id",
+    "location_letter",
+    "location_number",
+    "location_shelf",
+}
+
+
+def snapshot_item(item, tag_ids=None) -> dict:
+    """Zustand eines Items für data_before/data_after (`tag_ids`: bereits bekannte Tags)."""
+    if tag_ids is None:
+        tag_ids = item.application_tags.values_list("id", flat=True)
+    return {
+        "name": item.name,
+        "description": item.description,
+        "quantity": item.quantity,
+        "unit": item.unit,
+        "variant": item.variant,
+        "category_id": item.category_id,
+        "storage_location_id": item.storage_location_id,
+        "location_letter": item.location_letter,
+        "location_number": item.location_number,
+        "location_shelf": item.location_shelf,
+        "low_quantity": item.low_quantity,
+        "order_link": item.order_link,
+        "maintenance_date": item.maintenance_date.isoformat() if item.maintenance_date else None,
+        "overview_id": item.overview_id,
+        "item_type": item.item_type,
+        "is_active": item.is_active,
+        "tags": sorted(tag_ids),
+    }
+
+
+def _format_bool(value):
+    if value is True:
+        return "Ja"
+    if value is False:
+        return "Nein"
+    return "–"
+
+
+def _format_date(value):
+    if not value:
+        return "–"
+    try:
+        parsed = datetime.fromisoformat(value)
+        return parsed.date().isoformat()
+    except ValueError:
+        return value
+
+
+def snapshots(item_ids, *, tags: dict | None = None, lock: bool = False) -> dict[int, dict]:
+    """
+    Schnappschüsse vieler Items wie snapshot_item(): eine Query, dazu eine für
+    die Tags (entfällt, wenn `tags` = {item_id: [tag_ids]} schon bekannt ist).
+    `lock`: Zeilen bis zum Ende der Transaktion sperren (select_for_update).
+    """
+    from .models import InventoryItem
+
+    qs = InventoryItem.objects.filter(pk__in=list(item_ids))
+    if lock:
+        qs = qs.select_for_update()
+    result = {}
+    for row in qs.values("pk", *(f for f in HISTORY_FIELDS if f != "tags")):
+        pk = row.pop("pk")
+        row["maintenance_date"] = row["maintenance_date"].isoformat() if row["maintenance_date"] else None
+        row["tags"] = sorted(tags.get(pk, ())) if tags is not None else []
+        result[pk] = row
+    if tags is None and result:
+        through = InventoryItem.application_tags.through
+        for item_id, tag_id in through.objects.filter(inventoryitem_id__in=list(result)).values_list(
+            "inventoryitem_id", "applicationtag_id"
+        ):
+            result[item_id]["tags"].append(tag_id)
+        for row in result.values():
+            row["tags"].sort()
+    return result
+
+
+def _display_names(pairs) -> dict[str, dict]:
+    """Anzeige-Namen aller geänderten Bezüge – je Tabelle eine Query."""
+    from .models import ApplicationTag, Category, Overview, StorageLocation
+
+    ids = {"category_id": set(), "storage_location_id": set(), "overview_id": set(), "tags": set()}
+    for before, after in pairs:
+        for name, values in ids.items():
+            old, new = before.get(name), after.get(name)
+            if old == new:
+                continue
+            if name == "tags":
+                values.update(old or (), new or ())
+            else:
+                values.update(value for value in (old, new) if value)
+    return {
+        "category_id": dict(Category.objects.filter(id__in=ids["category_id"]).values_list("id", "name")),
+        "storage_location_id": dict(
+            StorageLocation.objects.filter(id__in=ids["storage_location_id"]).values_list("id", "full_path")
+        ),
+        "overview_id": dict(Overview.objects.filter(id__in=ids["overview_id"]).values_list("id", "name")),
+        "tags": dict(ApplicationTag.objects.filter(id__in=ids["tags"]).values_list("id", "name")),
+    }
+
+
+def _diff(before: dict, after: dict, names: dict[str, dict]) -> list[dict]:
+    def display_value(field: str, value):
+        if field in ("category_id", "storage_location_id", "overview_id"):
+            return names[field].get(value, "–") if value else "–"
+        if field == "tags":
+            return ", ".join(sorted([names["tags"].get(tid, "–") for tid in value])) if value else "–"
+        if field == "maintenance_date":
+            return _format_date(value)
+        if field == "is_active":
+            return _format_bool(value)
+        return value if value not in (None, "") else "–"
+
+    changes = []
+    for field in HISTORY_FIELDS:
+        if before.get(field) != after.get(field):
+            delta = None
+            if field == "quantity":
+                try:
+                    delta = int(after.get(field) or 0) - int(before.get(field) or 0)
+                except (TypeError, ValueError):
+                    delta = None
+            changes.append(
+                {
+                    "field": field,
+                    "label": HISTORY_LABELS.get(field, field),
+                    "before": display_value(field, before.get(field)),
+                    "after": display_value(field, after.get(field)),
+                    "delta": delta,
+                }
+            )
+    return changes
+
+
+def build_changes(before: dict, after: dict) -> list[dict]:
+    return _diff(before, after, _display_names([(before, after)]))
+
+
+def build_changes_many(pairs: list[tuple[dict, dict]]) -> list[list[dict]]:
+    """build_changes() für viele (vorher, nachher)-Paare mit gemeinsamer Namensauflösung."""
+    names = _display_names(pairs)
+    return [_diff(before, after, names) for before, after in pairs]
+
+
+def split_changes(changes: list[dict]) -> list[tuple[str, list[dict]]]:
+    """Wie beim Bearbeiten: Ortsänderungen als MOVEMENT, der Rest als QUANTITY bzw. UPDATED."""
+    from .models import InventoryHistory
+
+    movement = [c for c in changes if c["field"] in MOVEMENT_FIELDS]
+    other = [c for c in changes if c["field"] not in MOVEMENT_FIELDS]
+    entries = []
+    if movement:
+        entries.append((InventoryHistory.Action.MOVEMENT, movement))
+    if other:
+        only_quantity = {c["field"] for c in other} == {"quantity"}
+        entries.append((InventoryHistory.Action.QUANTITY if only_quantity else InventoryHistory.Action.UPDATED, other))
+    return entries
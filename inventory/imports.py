@@ -0,0 +1,485 @@
+# inventory/imports.py
+#
+# Massenimport von Items aus CSV/XLSX (manage.py import_items, /manage/import/):
+# - die Datei wird zeilenweise gelesen (csv.reader bzw. openpyxl read_only)
+#   und in Blöcken zu CHUNK_SIZE Zeilen geprüft und geschrieben
+# - Spalten wie im Export (exports.EXPORT_COLUMNS: Schlüssel oder Überschrift),
+#   unbekannte Spalten werden ignoriert und im Bericht genannt
+# - Kategorien, Tags, Lagerort-Pfade und Dashboards über Lookup-Maps (eine
+#   Query je Tabelle vorab); fehlende Kategorien/Tags/Lagerorte werden angelegt
+# - Items per bulk_create (Tokens wie InventoryItem.save(); Kollisionen fängt
+#   der Unique-Index → Block mit neuen Tokens wiederholen), Tags über die
+#   Zwischentabelle, CREATED-Historie gesammelt. bulk_create löst keine
+#   Signale aus → Suchindex, Dubletten und Typeahead werden blockweise,
+#   Lagerort-Summen und Dashboard-Versionen am Ende nachgezogen; die Codes
+#   rendert der Media-Worker (MediaJob)
+# - alles oder nichts: eine ungültige Zeile → nichts wird übernommen
+#   (skip_invalid übernimmt die gültigen). dry_run schreibt nichts und liefert
+#   nur den Bericht (was angelegt würde, Fehler je Zeile)
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import IO, Iterator
+
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import IntegrityError, transaction
+
+from . import duplicates, media, rollups
+from .exports import EXPORT_COLUMNS
+from .history import snapshot_item
+from .models import ApplicationTag, Category, InventoryHistory, InventoryItem, Overview, StorageLocation
+from .search import reindex_items
+from .suggest import record_suggest_changes
+from .versions import bump_overview_versions_on_commit
+
+CHUNK_SIZE = 1000
+MAX_ERRORS = 200
+PREVIEW_ROWS = 20
+DELIMITERS = (";", ",", "\t")
+
+IMPORT_FIELDS = (
+    "name", "description", "type", "quantity", "unit", "variant", "category", "storage_location",
+    "location_letter", "location_number", "location_shelf", "min_stock", "tags", "overview",
+    "maintenance_date", "barcode", "order_link",
+)
+# Zusätzliche Überschriften neben Schlüssel/Überschrift aus dem Export
+EXTRA_HEADERS = {
+    "description": ("Beschreibung",),
+    "type": ("item_type", "Art des Artikels"),
+    "min_stock": ("low_quantity", "Grundpuffer"),
+    "barcode": ("Barcode",),
+    "order_link": ("Bestell-Link",),
+}
+
+
+def header_aliases() -> dict[str, str]:
+    aliases = {}
+    for key, label, _ in EXPORT_COLUMNS:
+        if key in IMPORT_FIELDS:
+            aliases[key.casefold()] = key
+            aliases[label.casefold()] = key
+    for key in IMPORT_FIELDS:
+        for name in (key, *EXTRA_HEADERS.get(key, ())):
+            aliases.setdefault(name.casefold(), key)
+    return aliases
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Datei lesen
+# ──────────────────────────────────────────────────────────────────────────────
+def read_rows(fileobj: IO[bytes], filename: str, encoding: str = "utf-8-sig") -> Iterator[tuple[int, list]]:
+    """(Zeilennummer, Zellen) – Zeile 1 sind die Überschriften."""
+    if filename.lower().endswith(".xlsx"):
+        return _xlsx_rows(fileobj)
+    return _csv_rows(fileobj, encoding)
+
+
+def _csv_rows(fileobj: IO[bytes], encoding: str) -> Iterator[tuple[int, list]]:
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+    try:
+        first = text.readline()
+        # Export schreibt ";" (CSV) bzw. Tab ("XLS"), Tabellenprogramme oft ","
+        delimiter = max(DELIMITERS, key=first.count)
+        yield from enumerate(csv.reader(itertools.chain([first], text), delimiter=delimiter), 1)
+    except UnicodeDecodeError as exc:
+        raise ValueError(f"Die Datei ist nicht als {encoding} lesbar (bitte als UTF-8-CSV speichern).") from exc
+    finally:
+        text.detach()  # Upload/Datei gehört dem Aufrufer
+
+
+def _xlsx_rows(fileobj: IO[bytes]) -> Iterator[tuple[int, list]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ValueError("Für XLSX-Dateien wird das Paket openpyxl benötigt (alternativ als CSV speichern).") from exc
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for line, row in enumerate(workbook.active.iter_rows(values_only=True), 1):
+            yield line, list(row)
+    finally:
+        workbook.close()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Werte prüfen
+# ──────────────────────────────────────────────────────────────────────────────
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # XLSX liefert Zahlen als float
+    return str(value).strip()
+
+
+def _int(value, label: str, default: int | None) -> int | None:
+    text = _text(value)
+    if not text:
+        return default
+    try:
+        number = float(text.replace(",", "."))
+    except ValueError:
+        raise ValueError(f"{label}: „{text}“ ist keine Zahl") from None
+    if not number.is_integer():
+        raise ValueError(f"{label}: „{text}“ ist keine ganze Zahl")
+    return int(number)
+
+
+def _date(value, label: str) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(text, "%d.%m.%Y").date()
+    except ValueError:
+        raise ValueError(f"{label}: „{text}“ ist kein Datum (JJJJ-MM-TT oder TT.MM.JJJJ)") from None
+
+
+def _choice(value, choices, label: str, default: str) -> str:
+    text = _text(value).casefold()
+    if not text:
+        return default
+    for code, display in choices:
+        if text in (code.casefold(), str(display).casefold()):
+            return code
+    raise ValueError(f"{label}: „{_text(value)}“ ist nicht zulässig")
+
+
+def _limited(value, label: str, max_length: int) -> str:
+    text = _text(value)
+    if len(text) > max_length:
+        raise ValueError(f"{label}: höchstens {max_length} Zeichen")
+    return text
+
+
+def _path_segments(value) -> tuple[str, ...]:
+    return tuple(part.strip() for part in _text(value).split(">") if part.strip())
+
+
+def _path_key(segments) -> str:
+    return StorageLocation.PATH_SEPARATOR.join(segments).casefold()
+
+
+@dataclass
+class ParsedRow:
+    line: int
+    fields: dict
+    overview: Overview
+    category: str = ""
+    location: tuple[str, ...] = ()
+    tags: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool = False
+    rows: int = 0
+    created: int = 0
+    error_count: int = 0
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    ignored_columns: list[str] = field(default_factory=list)
+    new_categories: list[str] = field(default_factory=list)
+    new_tags: list[str] = field(default_factory=list)
+    new_locations: list[str] = field(default_factory=list)
+    preview: list[dict] = field(default_factory=list)
+    rolled_back: bool = False
+
+    @property
+    def valid(self) -> int:
+        return self.rows - self.error_count
+
+    def add_error(self, line: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Import
+# ──────────────────────────────────────────────────────────────────────────────
+class ItemImporter:
+    def __init__(self, *, user, overview: Overview | None = None, dry_run: bool = False,
+                 skip_invalid: bool = False, chunk_size: int = CHUNK_SIZE, source: str = ""):
+        self.user = user
+        self.default_overview = overview
+        self.skip_invalid = skip_invalid
+        self.chunk_size = max(1, chunk_size)
+        self.source = source
+        self.report = ImportReport(dry_run=dry_run)
+        self.columns: dict[str, int] = {}
+        self.barcodes: set[str] = set()
+        self.overview_ids: set[int] = set()
+        self.rollup_states: list = []
+        self.url_validator = URLValidator()
+
+        # Lookup-Maps (casefold → pk; None = wird angelegt)
+        self.categories = {name.casefold(): pk for pk, name in Category.objects.values_list("pk", "name")}
+        self.tags = {name.casefold(): pk for pk, name in ApplicationTag.objects.values_list("pk", "name")}
+        self.locations = {
+            full_path.casefold(): pk for pk, full_path in StorageLocation.objects.values_list("pk", "full_path")
+        }
+        self.overviews = {}
+        for overview_obj in Overview.objects.only("pk", "name", "slug", "is_consumable_mode"):
+            self.overviews[overview_obj.slug.casefold()] = overview_obj
+            self.overviews[overview_obj.name.casefold()] = overview_obj
+
+    def run(self, rows: Iterator[tuple[int, list]]) -> ImportReport:
+        report = self.report
+        with transaction.atomic():
+            chunk = []
+            for line, cells in rows:
+                if line == 1:
+                    self._read_header(cells)
+                    continue
+                if not any(_text(cell) for cell in cells):
+                    continue
+                report.rows += 1
+                parsed = self._parse(line, cells)
+                if parsed is not None:
+                    chunk.append(parsed)
+                if len(chunk) >= self.chunk_size:
+                    self._flush(chunk)
+                    chunk = []
+            if not self.columns:
+                raise ValueError("Die Datei ist leer.")
+            self._flush(chunk)
+
+            if not report.dry_run and report.error_count and not self.skip_invalid:
+                report.rolled_back, report.created = True, 0
+                transaction.set_rollback(True)
+            elif report.created:
+                # Lagerort-Summen einmal am Ende: ein UPDATE je Lagerort statt je Block
+                rollups.apply_item_changes((None, state) for state in self.rollup_states)
+                bump_overview_versions_on_commit(self.overview_ids)
+        return report
+
+    # ------------------------------------------------------------------
+    def _read_header(self, cells) -> None:
+        aliases = header_aliases()
+        for index, cell in enumerate(cells):
+            header = _text(cell)
+            key = aliases.get(header.casefold())
+            if key and key not in self.columns:
+                self.columns[key] = index
+            elif header:
+                self.report.ignored_columns.append(header)
+        if "name" not in self.columns:
+            raise ValueError("Spalte „Name“ fehlt in der ersten Zeile.")
+
+    def _parse(self, line: int, cells) -> ParsedRow | None:
+        def cell(key):
+            index = self.columns.get(key)
+            return cells[index] if index is not None and index < len(cells) else None
+
+        errors = []
+
+        def check(parse, *args):
+            try:
+                return parse(*args)
+            except ValueError as exc:
+                errors.append(str(exc))
+                return None
+
+        name = check(_limited, cell("name"), "Name", 200)
+        if name == "":
+            errors.append("Name fehlt")
+
+        overview_name = _text(cell("overview"))
+        overview = self.overviews.get(overview_name.casefold()) if overview_name else self.default_overview
+        if overview is None:
+            errors.append(f"Dashboard „{overview_name}“ unbekannt" if overview_name else "kein Dashboard angegeben")
+        default_type = "consumable" if overview is not None and overview.is_consumable_mode else "equipment"
+
+        order_link = check(_limited, cell("order_link"), "Bestell-Link", 500)
+        if order_link:
+            try:
+                self.url_validator(order_link)
+            except ValidationError:
+                errors.append(f"Bestell-Link: „{order_link}“ ist keine gültige URL")
+
+        barcode = check(_limited, cell("barcode"), "Barcode", 50)
+        if barcode:
+            if barcode in self.barcodes:
+                errors.append(f"Barcode „{barcode}“ kommt mehrfach vor")
+            self.barcodes.add(barcode)
+
+        fields = {
+            "name": name,
+            "description": _text(cell("description")),
+            "item_type": check(_choice, cell("type"), InventoryItem.ITEM_TYPES, "Typ", default_type),
+            "quantity": check(_int, cell("quantity"), "Bestand", 0),
+            "low_quantity": check(_int, cell("min_stock"), "Mindestbestand", 3),
+            "unit": check(_choice, cell("unit"), InventoryItem.UNIT_CHOICES, "Einheit", "pcs"),
+            "variant": check(_limited, cell("variant"), "Variante", 120),
+            "location_letter": check(_limited, cell("location_letter"), "Ort (Buchstabe)", 1) or None,
+            "location_number": check(_int, cell("location_number"), "Ort (Nummer)", None),
+            "location_shelf": check(_limited, cell("location_shelf"), "Ort (Fach)", 50) or None,
+            "maintenance_date": check(_date, cell("maintenance_date"), "Wartungsdatum"),
+            "order_link": order_link or None,
+            "barcode": barcode or "",
+        }
+
+        category = check(_limited, cell("category"), "Kategorie", 200)
+        location = _path_segments(cell("storage_location"))
+        if any(len(segment) > 100 for segment in location):
+            errors.append("Lagerort: höchstens 100 Zeichen je Ebene")
+        tags = [tag.strip() for tag in _text(cell("tags")).split(",") if tag.strip()]
+        if any(len(tag) > 50 for tag in tags):
+            errors.append("Tags: höchstens 50 Zeichen je Tag")
+
+        if errors:
+            self.report.add_error(line, "; ".join(errors))
+            return None
+        self._register(category, location, tags)
+        return ParsedRow(line, fields, overview, category, location, list(dict.fromkeys(tags)))
+
+    def _register(self, category: str, location: tuple[str, ...], tags: list[str]) -> None:
+        """Unbekannte Kategorien/Tags/Lagerorte vormerken (None = wird angelegt)."""
+        if category and category.casefold() not in self.categories:
+            self.categories[category.casefold()] = None
+            self.report.new_categories.append(category)
+        for tag in tags:
+            if tag.casefold() not in self.tags:
+                self.tags[tag.casefold()] = None
+                self.report.new_tags.append(tag)
+        for depth in range(1, len(location) + 1):
+            key = _path_key(location[:depth])
+            if key not in self.locations:
+                self.locations[key] = None
+                self.report.new_locations.append(StorageLocation.PATH_SEPARATOR.join(location[:depth]))
+
+    def _flush(self, chunk: list[ParsedRow]) -> None:
+        report = self.report
+        barcodes = [row.fields["barcode"] for row in chunk if row.fields["barcode"]]
+        taken = set(InventoryItem.objects.filter(barcode__in=barcodes).values_list("barcode", flat=True))
+        if taken:
+            for row in chunk:
+                if row.fields["barcode"] in taken:
+                    report.add_error(row.line, f"Barcode „{row.fields['barcode']}“ ist bereits vergeben")
+            chunk = [row for row in chunk if row.fields["barcode"] not in taken]
+
+        for row in chunk[: PREVIEW_ROWS - len(report.preview)]:
+            report.preview.append({
+                "line": row.line,
+                "name": row.fields["name"],
+                "quantity": row.fields["quantity"],
+                "overview": row.overview.name,
+                "category": row.category,
+                "location": StorageLocation.PATH_SEPARATOR.join(row.location),
+                "tags": ", ".join(row.tags),
+            })
+        if not chunk or report.dry_run or (report.error_count and not self.skip_invalid):
+            return
+        self._create_catalog()
+        self._write(chunk)
+
+    def _create_catalog(self) -> None:
+        """Vorgemerkte Kategorien/Tags/Lagerorte anlegen und in die Maps eintragen."""
+        for model, lookup, names in (
+            (Category, self.categories, self.report.new_categories),
+            (ApplicationTag, self.tags, self.report.new_tags),
+        ):
+            missing = [name for name in names if lookup.get(name.casefold()) is None]
+            if missing:
+                model.objects.bulk_create([model(name=name) for name in missing], ignore_conflicts=True)
+                for pk, name in model.objects.filter(name__in=missing).values_list("pk", "name"):
+                    lookup[name.casefold()] = pk
+        # Lagerorte einzeln per save() (Pfad, Summen-Zeile); new_locations ist nach Tiefe geordnet
+        for path in self.report.new_locations:
+            segments = _path_segments(path)
+            if self.locations.get(_path_key(segments)) is not None:
+                continue
+            parent_id = self.locations[_path_key(segments[:-1])] if len(segments) > 1 else None
+            location = StorageLocation(name=segments[-1], parent_id=parent_id)
+            location.save()
+            self.locations[_path_key(segments)] = location.pk
+
+    def _write(self, chunk: list[ParsedRow]) -> None:
+        items, generated, tag_ids = [], [], []
+        for row in chunk:
+            item = InventoryItem(
+                **row.fields,
+                overview=row.overview,
+                user=self.user,
+                category_id=self.categories[row.category.casefold()] if row.category else None,
+                storage_location_id=self.locations[_path_key(row.location)] if row.location else None,
+            )
+            item.below_minimum = item.quantity < item.low_quantity
+            generated.append(item._fill_tokens())
+            item.barcode_text = f"Barcode für {item.name}: {item.barcode}"
+            items.append(item)
+            tag_ids.append(sorted(self.tags[tag.casefold()] for tag in row.tags))
+
+        for attempt in range(InventoryItem.TOKEN_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    InventoryItem.objects.bulk_create(items, batch_size=self.chunk_size)
+                break
+            except IntegrityError:
+                if attempt == InventoryItem.TOKEN_ATTEMPTS - 1:
+                    raise
+                # Kollision eines erzeugten Tokens → nur diese neu würfeln
+                for item, names in zip(items, generated):
+                    item.pk, item._state.adding = None, True
+                    for name in names:
+                        setattr(item, name, "")
+                    item._fill_tokens()
+                    item.barcode_text = f"Barcode für {item.name}: {item.barcode}"
+        if any(item.pk is None for item in items):
+            # Backends ohne RETURNING (MySQL): IDs über den eindeutigen Barcode
+            pks = dict(
+                InventoryItem.objects.filter(barcode__in=[item.barcode for item in items]).values_list("barcode", "pk")
+            )
+            for item in items:
+                item.pk = pks[item.barcode]
+
+        through = InventoryItem.application_tags.through
+        through.objects.bulk_create(
+            [
+                through(inventoryitem_id=item.pk, applicationtag_id=tag_id)
+                for item, tags in zip(items, tag_ids)
+                for tag_id in tags
+            ],
+            batch_size=self.chunk_size,
+        )
+        InventoryHistory.objects.bulk_create(
+            [
+                InventoryHistory(
+                    item_id=item.pk,
+                    user=self.user,
+                    action=InventoryHistory.Action.CREATED,
+                    data_after=snapshot_item(item, tags),
+                    meta={"source": "import", "file": self.source, "row": row.line},
+                )
+                for item, tags, row in zip(items, tag_ids, chunk)
+            ],
+            batch_size=self.chunk_size,
+        )
+
+        # bulk_create umgeht die post_save-Signale → Indizes/Summen selbst nachziehen
+        ids = [item.pk for item in items]
+        reindex_items(ids, batch_size=self.chunk_size)
+        duplicates.reindex_items(ids, batch_size=self.chunk_size)
+        record_suggest_changes(ids)
+        self.rollup_states.extend(rollups.item_state(item) for item in items)
+        media.enqueue(ids, created=True)
+        self.overview_ids.update(item.overview_id for item in items)
+        self.report.created += len(items)
+
+
+def import_items(fileobj: IO[bytes], filename: str, *, user, encoding: str = "utf-8-sig", **options) -> ImportReport:
+    """Datei einlesen und importieren (Optionen siehe ItemImporter); ValueError bei unlesbarer Datei."""
+    importer = ItemImporter(user=user, source=filename, **options)
+    return importer.run(read_rows(fileobj, filename, encoding))
@@ -18,6 +18,8 @@ from django.urls import reverse
 from django.utils.timezone import now
 from requests.exceptions import SSLError
 
+from ..performance import timed
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Konfiguration aus .env / settings
 # ──────────────────────────────────────────────────────────────────────────────
@@ -81,6 +83,7 @@ def _health_ok_status(code: int) -> bool:
     # Für Erreichbarkeit: 200 oder 401 (Unauthorized = API lebt)
     return code in (200, 401)
 
+@timed("ha")
 def check_available(force: bool = False) -> bool:
     """
     Prüft Erreichbarkeit:
@@ -239,6 +242,7 @@ def _item_payload(item, user=None) -> Dict[str, Any]:
         "url": url,
     }
 
+@timed("ha")
 def _api_try_urls(urls: List[str], method: str, json: Dict[str, Any]) -> bool:
     last_url = None
     for u in urls:
@@ -258,6 +262,7 @@ def _api_try_urls(urls: List[str], method: str, json: Dict[str, Any]) -> bool:
     return False
 
 # ── NEU: robuster Webhook-POST mit TLS-Fallback ───────────────────────────────
+@timed("ha")
 def _post_webhook_with_fallback(url: str, payload: Dict[str, Any]) -> bool:
     # 1) Normaler Versuch mit explizitem Connection: close (hilft gg. SSLEOFError)
     try:
@@ -387,3 +392,28 @@ def notify_item_marked(item, user=None) -> bool:
             service_data.update(payload)
             ok = call_service(domain, service, service_data) and ok
     return ok
+
+def notify_reorder_digest(groups: List[Dict[str, Any]], lines: List[str]) -> bool:
+    """
+    Tägliche Nachbestell-Übersicht (siehe reorder.py / send_reorder_digest):
+    Event bzw. Webhook mit allen Gruppen, im API-Modus zusätzlich eine
+    Persistent Notification.
+    """
+    try:
+        list_path = reverse("reorder-list")
+    except Exception:
+        list_path = "/"
+    payload = {
+        "item_count": sum(group["item_count"] for group in groups),
+        "groups": groups,
+        "url": _build_absolute_url(list_path),
+        "created_at": now().isoformat(),
+    }
+    ok = fire_event("inventory_reorder_digest", payload)
+    if not _use_webhook():
+        ok = call_service("persistent_notification", "create", {
+            "title": f"Nachbestellen: {payload['item_count']} Artikel",
+            "message": "\n".join([*lines, f"Liste: {payload['url']}"]),
+            "notification_id": "inventory_reorder_digest",
+        }) and ok
+    return ok
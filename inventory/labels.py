@@ -0,0 +1,373 @@
+# inventory/labels.py
+#
+# Etikettenbögen (PDF/SVG) mit QR-Codes oder Barcodes:
+# - Auswahl: Overview, Lagerort-Teilbaum, Tag oder ID-Liste (selection_queryset)
+# - Vorlagen: A4-Raster und Einzeletiketten für Brother/Dymo (TEMPLATES)
+# - QR-Module und Barcode-Striche werden als Vektor-Rechtecke gezeichnet –
+#   keine Bilddateien, scharf in jeder Druckauflösung
+# - render_page() baut eine Seite und läuft (ab POOL_MIN_PAGES Seiten) in
+#   einem Prozess-Pool; die Seiten gehen der Reihe nach in die
+#   StreamingHttpResponse, die Items kommen per iterator() aus der DB
+#   → 2000 Etiketten liegen nie komplett im Speicher
+from __future__ import annotations
+
+import os
+import textwrap
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+MM = 72 / 25.4  # PDF-Punkte je mm
+POOL_MIN_PAGES = 4
+KINDS = {"qr": "QR-Code", "barcode": "Barcode (Code128)"}
+FORMATS = {"pdf": "application/pdf", "svg": "image/svg+xml"}
+
+
+@dataclass(frozen=True)
+class LabelTemplate:
+    """Maße in mm; Endlos-/Einzeletiketten = eine Seite pro Etikett."""
+
+    key: str
+    name: str
+    page_width: float
+    page_height: float
+    label_width: float
+    label_height: float
+    columns: int = 1
+    rows: int = 1
+    margin_left: float = 0
+    margin_top: float = 0
+    gap_x: float = 0
+    gap_y: float = 0
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    def origin(self, index: int) -> tuple[float, float]:
+        """Linke obere Ecke des Etiketts `index` (zeilenweise) auf der Seite."""
+        row, column = divmod(index, self.columns)
+        return (
+            self.margin_left + column * (self.label_width + self.gap_x),
+            self.margin_top + row * (self.label_height + self.gap_y),
+        )
+
+
+TEMPLATES = {
+    template.key: template
+    for template in (
+        LabelTemplate("a4-3x8", "A4, 3 × 8 (70 × 37 mm)", 210, 297, 70, 37, 3, 8, margin_top=0.5),
+        LabelTemplate("a4-4x10", "A4, 4 × 10 (48,5 × 25,4 mm)", 210, 297, 48.5, 25.4, 4, 10, 8, 21.5),
+        LabelTemplate("brother-62x29", "Brother DK-11209 (62 × 29 mm)", 62, 29, 62, 29),
+        LabelTemplate("dymo-89x36", "Dymo 99012 (89 × 36 mm)", 89, 36, 89, 36),
+    )
+}
+
+
+def label_workers() -> int:
+    workers = int(getattr(settings, "INVENTORY_LABEL_WORKERS", 0) or 0)
+    return workers if workers > 0 else min(4, os.cpu_count() or 1)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Auswahl
+# ──────────────────────────────────────────────────────────────────────────────
+def parse_ids(raw: str) -> list[int]:
+    """'3, 7 12-15' → [3, 7, 12, 13, 14, 15] (Reihenfolge bleibt, Doppelte raus)."""
+    ids: dict[int, None] = {}
+    for part in raw.replace(",", " ").replace(";", " ").split():
+        start, _, end = part.partition("-")
+        if not start.isdigit() or (end and not end.isdigit()):
+            raise ValueError(part)
+        first, last = int(start), int(end or start)
+        if last < first or last - first > 10000:
+            raise ValueError(part)
+        ids.update(dict.fromkeys(range(first, last + 1)))
+    return list(ids)
+
+
+def selection_queryset(access=None, *, overview=None, location=None, tag=None, ids=None):
+    """Items für den Bogen; ohne ID-Liste nur aktive. `access`: nur sichtbare Overviews."""
+    from django.db.models.functions import Lower
+
+    from .models import InventoryItem
+
+    qs = InventoryItem.objects.all()
+    if ids:
+        qs = qs.filter(pk__in=ids)
+    else:
+        qs = qs.filter(is_active=True)
+    if overview is not None:
+        qs = qs.filter(overview=overview)
+    if location is not None:
+        qs = qs.filter(location.subtree_items_q())
+    if tag is not None:
+        qs = qs.filter(application_tags=tag)
+    if access is not None and not access.is_superuser:
+        qs = qs.filter(overview_id__in=access.allowed_ids)
+    return qs.order_by("storage_location__full_path", Lower("name"), "pk")
+
+
+def iter_labels(queryset, kind: str, bases) -> Iterator[dict]:
+    """Picklebare Etikett-Daten, chunkweise aus der DB."""
+    from . import codes
+
+    rows = queryset.values_list("pk", "name", "barcode", "storage_location__full_path")
+    for pk, name, barcode, location in rows.iterator(chunk_size=500):
+        yield {
+            "name": name,
+            "info": barcode if kind == "barcode" else (location or f"#{pk}"),
+            "data": codes.code_data(kind, codes.CodeSource(pk, barcode), bases),
+        }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Seiten zeichnen (läuft im Pool-Prozess)
+# ──────────────────────────────────────────────────────────────────────────────
+Rect = tuple[float, float, float, float]  # x, y (oben links), Breite, Höhe in mm
+Text = tuple[float, float, float, str]  # x, Grundlinie y in mm, Schriftgröße pt, Text
+
+
+def qr_matrix(data: str) -> list[list[bool]]:
+    import qrcode
+
+    qr = qrcode.QRCode(border=0, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def barcode_modules(data: str) -> str:
+    """Code128-Modulfolge ('1' = Strich); '' bei Zeichen außerhalb von Code128."""
+    from barcode import Code128
+    from barcode.errors import BarcodeError
+
+    try:
+        return Code128(data).build()[0]
+    except BarcodeError:
+        return ""
+
+
+def _runs(cells: Iterable[bool]) -> Iterator[tuple[int, int]]:
+    """(Start, Länge) aufeinanderfolgender dunkler Module."""
+    start = None
+    index = -1
+    for index, dark in enumerate(cells):
+        if dark and start is None:
+            start = index
+        elif not dark and start is not None:
+            yield start, index - start
+            start = None
+    if start is not None:
+        yield start, index + 1 - start
+
+
+def _fit(text: str, width: float, size: float, lines: int = 1) -> list[str]:
+    # Helvetica: im Mittel ~0,55 em pro Zeichen
+    chars = max(4, int(width / (size * 0.55 / MM)))
+    wrapped = textwrap.wrap(text, chars) or [""]
+    if len(wrapped) > lines:
+        wrapped = wrapped[:lines]
+        wrapped[-1] = wrapped[-1][: chars - 1] + "…"
+    return wrapped
+
+
+def _label_shapes(kind: str, label: dict, x: float, y: float, w: float, h: float) -> tuple[list[Rect], list[Text]]:
+    pad = min(2.5, h * 0.08)
+    rects: list[Rect] = []
+    texts: list[Text] = []
+    if not label["data"]:
+        return rects, texts
+    if kind == "qr":
+        matrix = qr_matrix(label["data"])
+        size = h - 2 * pad
+        module = size / len(matrix)
+        for row, cells in enumerate(matrix):
+            for start, length in _runs(cells):
+                rects.append((x + pad + start * module, y + pad + row * module, length * module, module))
+        text_x = x + size + 2 * pad
+        text_w = w - size - 3 * pad
+        name_size = 9 if h >= 30 else 7
+        line_y = y + pad + name_size / MM
+        for line in _fit(label["name"], text_w, name_size, lines=3):
+            texts.append((text_x, line_y, name_size, line))
+            line_y += name_size * 1.2 / MM
+        for line in _fit(label["info"], text_w, 6, lines=2):
+            texts.append((text_x, line_y, 6, line))
+            line_y += 6 * 1.2 / MM
+    else:
+        modules = barcode_modules(label["data"])
+        quiet = 10
+        module = (w - 2 * pad) / (len(modules) + 2 * quiet)
+        bar_h = h * 0.55
+        for start, length in _runs(c == "1" for c in modules):
+            rects.append((x + pad + (quiet + start) * module, y + pad, length * module, bar_h))
+        name_size = 8 if h >= 30 else 6.5
+        line_y = y + pad + bar_h + name_size * 1.1 / MM
+        texts.append((x + pad, line_y, name_size, _fit(label["info"], w - 2 * pad, name_size)[0]))
+        texts.append((x + pad, line_y + name_size * 1.2 / MM, name_size, _fit(label["name"], w - 2 * pad, name_size)[0]))
+    return rects, texts
+
+
+def _pdf_text(text: str) -> bytes:
+    raw = text.encode("cp1252", "replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _pdf_content(template: LabelTemplate, rects: list[Rect], texts: list[Text]) -> bytes:
+    height = template.page_height
+    parts = [b"0 g"]
+    parts.extend(
+        b"%.2f %.2f %.2f %.2f re" % (x * MM, (height - y - h) * MM, w * MM, h * MM) for x, y, w, h in rects
+    )
+    if rects:
+        parts.append(b"f")
+    for x, y, size, text in texts:
+        parts.append(b"BT /F1 %.1f Tf %.2f %.2f Td (%s) Tj ET" % (size, x * MM, (height - y) * MM, _pdf_text(text)))
+    return zlib.compress(b"\n".join(parts))
+
+
+def _svg_content(template: LabelTemplate, rects: list[Rect], texts: list[Text], offset: float) -> bytes:
+    path = "".join(f"M{x:.2f} {y + offset:.2f}h{w:.2f}v{h:.2f}h{-w:.2f}z" for x, y, w, h in rects)
+    parts = [f'<g><rect x="0" y="{offset:.2f}" width="{template.page_width}" height="{template.page_height}" fill="#fff"/>']
+    if path:
+        parts.append(f'<path d="{path}" fill="#000"/>')
+    parts.extend(
+        f'<text x="{x:.2f}" y="{y + offset:.2f}" font-size="{size / MM:.2f}">{escape(text)}</text>'
+        for x, y, size, text in texts
+    )
+    parts.append("</g>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def render_page(job: tuple) -> bytes:
+    """(template_key, kind, fmt, Seitennummer, Startposition, Etiketten) → Seiteninhalt."""
+    template_key, kind, fmt, number, first_slot, labels = job
+    template = TEMPLATES[template_key]
+    rects: list[Rect] = []
+    texts: list[Text] = []
+    for slot, label in enumerate(labels, start=first_slot):
+        x, y = template.origin(slot)
+        label_rects, label_texts = _label_shapes(kind, label, x, y, template.label_width, template.label_height)
+        rects.extend(label_rects)
+        texts.extend(label_texts)
+    if fmt == "pdf":
+        return _pdf_content(template, rects, texts)
+    return _svg_content(template, rects, texts, number * template.page_height)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Dokument streamen
+# ──────────────────────────────────────────────────────────────────────────────
+def page_count(template: LabelTemplate, total: int, skip: int = 0) -> int:
+    return -(-(total + skip % template.per_page) // template.per_page) if total else 0
+
+
+def _page_jobs(template: LabelTemplate, kind: str, fmt: str, labels: Iterable[dict], skip: int) -> Iterator[tuple]:
+    number, slot, page = 0, skip % template.per_page, []
+    first_slot = slot
+    for label in labels:
+        page.append(label)
+        slot += 1
+        if slot == template.per_page:
+            yield template.key, kind, fmt, number, first_slot, page
+            number, slot, page, first_slot = number + 1, 0, [], 0
+    if page:
+        yield template.key, kind, fmt, number, first_slot, page
+
+
+def _render_pages(jobs: Iterable[tuple], workers: int) -> Iterator[bytes]:
+    if workers <= 1:
+        for job in jobs:
+            yield render_page(job)
+        return
+    # begrenztes Fenster: höchstens 2 Seiten pro Prozess in Arbeit bzw. fertig im Speicher
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: deque = deque()
+    try:
+        for job in jobs:
+            pending.append(pool.submit(render_page, job))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pdf_document(template: LabelTemplate, pages: Iterable[bytes]) -> Iterator[bytes]:
+    offsets: dict[int, int] = {}
+    position = 0
+
+    def obj(number: int, body: bytes) -> bytes:
+        nonlocal position
+        offsets[number] = position
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        position += len(chunk)
+        return chunk
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header
+    # 1 Catalog, 2 Pages (kommt zuletzt, kennt dann alle Seiten), 3 Schrift
+    yield obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    yield obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    media_box = b"[0 0 %.2f %.2f]" % (template.page_width * MM, template.page_height * MM)
+    kids = []
+    number = 4
+    for content in pages:
+        yield obj(number, b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+        yield obj(
+            number + 1,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox %s /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> >> >>" % (media_box, number),
+        )
+        kids.append(b"%d 0 R" % (number + 1))
+        number += 2
+    yield obj(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids)))
+
+    xref = [b"xref\n0 %d\n" % number, b"0000000000 65535 f \n"]
+    xref.extend(b"%010d 00000 n \n" % offsets[n] for n in range(1, number))
+    yield b"".join(xref) + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (number, position)
+
+
+def _svg_document(template: LabelTemplate, pages: Iterable[bytes], count: int) -> Iterator[bytes]:
+    # SVG kennt keine Seiten → Seiten untereinander, Höhe = Seitenzahl × Seitenhöhe
+    width, height = template.page_width, template.page_height * max(1, count)
+    yield (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}mm" height="{height}mm" '
+        f'viewBox="0 0 {width} {height}" font-family="Helvetica, Arial, sans-serif">\n'
+    ).encode("utf-8")
+    yield from pages
+    yield b"</svg>\n"
+
+
+def stream_sheet(
+    queryset,
+    template: LabelTemplate,
+    kind: str,
+    fmt: str,
+    *,
+    total: int,
+    skip: int = 0,
+    workers: int = 1,
+    bases=None,
+) -> Iterator[bytes]:
+    """Bytes des Dokuments, Seite für Seite. `skip`: bereits benutzte Etiketten auf Blatt 1."""
+    from . import codes
+
+    bases = bases or codes.current_bases()
+    count = page_count(template, total, skip)
+    if count < POOL_MIN_PAGES:
+        workers = 1
+    jobs = _page_jobs(template, kind, fmt, iter_labels(queryset, kind, bases), skip)
+    pages = _render_pages(jobs, workers)
+    if fmt == "pdf":
+        return _pdf_document(template, pages)
+    return _svg_document(template, pages, count)
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand, CommandError
 from inventory.models import InventoryItem, Overview
+from inventory.suggest import reset_suggest_index
+from inventory.versions import bump_overview_versions
 
 
 class Command(BaseCommand):
@@ -38,7 +40,11 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Keine Items zum Verschieben gefunden."))
             return
 
+        # update() löst keine Signale aus → Versionen der alten + neuen Dashboards selbst erhöhen
+        affected = set(qs.values_list("overview_id", flat=True).distinct())
         qs.update(overview=overview)
+        bump_overview_versions(affected | {overview.pk})
+        reset_suggest_index()
 
         self.stdout.write(
             self.style.SUCCESS(
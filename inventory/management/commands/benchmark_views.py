@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import platform
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from inventory import benchmarks
+from inventory.models import InventoryItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Misst zentrale Views (Dashboard, Bewegungen, Export, Bearbeiten, Scan) über den "
+        "Test-Client und vergleicht mit einer Baseline-JSON. Regressionen → Exit-Code 1."
+    )
+    # gemessene Views laufen durch die N+1-Middleware (ein Scope pro Request)
+    nplusone_scope = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--baseline",
+            default=str(Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"),
+            help="Pfad zur Baseline-JSON.",
+        )
+        parser.add_argument("--update-baseline", action="store_true", help="Ergebnis als neue Baseline speichern.")
+        parser.add_argument("--repeat", type=int, default=5, help="Messläufe pro View (Median).")
+        parser.add_argument("--user", default="", help="Benutzername (Standard: erster Superuser).")
+        parser.add_argument("--only", nargs="*", default=None, help="Nur diese Szenarien messen.")
+        parser.add_argument("--time-tolerance", type=float, default=benchmarks.DEFAULT_TIME_TOLERANCE)
+        parser.add_argument("--query-tolerance", type=int, default=benchmarks.DEFAULT_QUERY_TOLERANCE)
+
+    def handle(self, *args, **options):
+        user = self._user(options["user"])
+        scenarios = benchmarks.build_scenarios()
+        if options["only"]:
+            scenarios = [s for s in scenarios if s.name in options["only"]]
+        if not scenarios:
+            raise CommandError("Keine Szenarien – zuerst Daten erzeugen (generate_fake_inventory).")
+
+        client = Client()
+        client.force_login(user)
+
+        self.stdout.write(f"{'Szenario':<34}{'Status':>7}{'Median ms':>12}{'Min ms':>10}{'Queries':>9}{'Peak KiB':>11}")
+
+        def progress(r):
+            self.stdout.write(
+                f"{r.name:<34}{r.status:>7}{r.median_ms:>12.1f}{r.min_ms:>10.1f}{r.queries:>9}{r.peak_kib:>11.1f}"
+            )
+
+        # Der Test-Client braucht "testserver" in ALLOWED_HOSTS.
+        hosts = list(settings.ALLOWED_HOSTS) + ["testserver"]
+        with override_settings(ALLOWED_HOSTS=hosts):
+            results = benchmarks.run_benchmarks(client, scenarios, repeat=options["repeat"], progress=progress)
+
+        path = Path(options["baseline"])
+        if options["update_baseline"]:
+            meta = {
+                "created_at": timezone.now().isoformat(),
+                "items": InventoryItem.objects.count(),
+                "db_engine": settings.DATABASES["default"]["ENGINE"],
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            }
+            benchmarks.write_baseline(path, results, meta)
+            self.stdout.write(self.style.SUCCESS(f"Baseline gespeichert: {path}"))
+            return
+
+        baseline = benchmarks.load_baseline(path)
+        if not baseline:
+            self.stdout.write(self.style.WARNING(
+                f"Keine Baseline unter {path} – mit --update-baseline auf dieser Maschine anlegen."
+            ))
+            return
+
+        problems = benchmarks.compare(
+            results,
+            baseline,
+            time_tolerance=options["time_tolerance"],
+            query_tolerance=options["query_tolerance"],
+        )
+        if problems:
+            for line in problems:
+                self.stderr.write(self.style.ERROR(f"REGRESSION {line}"))
+            raise CommandError(f"{len(problems)} Regression(en) gegenüber {path}.")
+        self.stdout.write(self.style.SUCCESS("Keine Regressionen gegenüber der Baseline."))
+
+    def _user(self, username):
+        qs = User.objects.filter(is_active=True)
+        user = qs.filter(username=username).first() if username else qs.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            raise CommandError("Kein passender Benutzer gefunden (--user angeben oder Superuser anlegen).")
+        return user
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import random
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import (
+    ApplicationTag,
+    BorrowedItem,
+    Category,
+    InventoryHistory,
+    InventoryItem,
+    ItemComment,
+    Overview,
+    StorageLocation,
+    TagType,
+    UserProfile,
+)
+from inventory import duplicates, rollups
+from inventory.search import reindex_items
+from inventory.suggest import reset_suggest_index
+from inventory.versions import bump_overview_versions
+
+# Verhältnisse pro Item (grob an echten Installationen orientiert).
+BORROW_RATIO = 0.08
+COMMENT_RATIO = 0.15
+HISTORY_PER_ITEM = 3
+TAGS_PER_ITEM = (0, 3)
+
+WORDS = [
+    "Akku", "Bohrer", "Kabel", "Schraube", "Mutter", "Dübel", "Stecker", "Adapter",
+    "Sensor", "Relais", "Lampe", "Schalter", "Zange", "Säge", "Hammer", "Klebeband",
+    "Filament", "Lötzinn", "Netzteil", "Router", "Switch", "Patchkabel", "Batterie",
+    "Schlauch", "Ventil", "Dichtung", "Feder", "Lager", "Riemen", "Motor",
+]
+VARIANTS = ["M3", "M4", "M5", "M6", "rot", "blau", "schwarz", "12V", "24V", "230V", "1m", "2m", "5m"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Erzeugt einen synthetischen Datenbestand (Items, Lagerort-Baum, Tags, Overviews, "
+        "Verleihe, Kommentare, Historie) für Performance-Messungen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=1000, help="Anzahl Items (z. B. 1000/10000/100000).")
+        parser.add_argument("--overviews", type=int, default=5, help="Anzahl Dashboards.")
+        parser.add_argument("--depth", type=int, default=4, help="Tiefe des Lagerort-Baums.")
+        parser.add_argument("--fanout", type=int, default=4, help="Kinder pro Lagerort.")
+        parser.add_argument("--seed", type=int, default=42, help="Zufalls-Seed (reproduzierbar).")
+        parser.add_argument("--prefix", default="bench", help="Präfix für erzeugte Namen.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        n_items = options["items"]
+        if n_items < 1:
+            raise CommandError("--items muss mindestens 1 sein.")
+        rng = random.Random(options["seed"])
+        prefix = options["prefix"]
+        batch = options["batch_size"]
+
+        with transaction.atomic():
+            user = self._user(prefix)
+            overviews = self._overviews(prefix, options["overviews"], user)
+            categories = self._categories(prefix, max(10, n_items // 100))
+            tags = self._tags(prefix, max(20, n_items // 50), batch)
+            leaves = self._locations(prefix, options["depth"], options["fanout"], batch)
+            items = self._items(rng, prefix, n_items, user, overviews, categories, leaves, batch)
+            self._item_tags(rng, items, tags, batch)
+            borrowings = self._borrowings(rng, items, batch)
+            comments = self._comments(rng, items, user, batch)
+            history = self._history(rng, items, user, batch)
+            # bulk_create löst keine Signale aus → Suchindex/Versionen selbst nachziehen
+            reindex_items([item.pk for item in items], batch_size=batch)
+            duplicates.reindex_items([item.pk for item in items], batch_size=batch)
+            rollups.rebuild()
+        bump_overview_versions(ov.pk for ov in overviews)
+        reset_suggest_index()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(items)} Items, {len(leaves)} Blatt-Lagerorte, {len(tags)} Tags, "
+            f"{len(overviews)} Dashboards, {borrowings} Verleihe, {comments} Kommentare, "
+            f"{history} Historien-Einträge erzeugt."
+        ))
+
+    # ------------------------------------------------------------------
+    def _user(self, prefix):
+        user, created = User.objects.get_or_create(username=f"{prefix}-user")
+        if created:
+            user.set_password(uuid.uuid4().hex)
+            user.save(update_fields=["password"])
+        return user
+
+    def _overviews(self, prefix, count, user):
+        overviews = []
+        for i in range(max(1, count)):
+            ov, _ = Overview.objects.get_or_create(
+                slug=f"{prefix}-{i + 1}",
+                defaults={
+                    "name": f"{prefix.title()} Dashboard {i + 1}",
+                    "order": 100 + i,
+                    "enable_borrow": i % 2 == 0,
+                    "is_consumable_mode": i % 3 == 1,
+                    "has_min_stock": i % 3 == 1,
+                    "enable_comments": True,
+                    "enable_quick_adjust": True,
+                },
+            )
+            overviews.append(ov)
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        profile.allowed_overviews.add(*overviews)
+        return overviews
+
+    def _categories(self, prefix, count):
+        existing = set(Category.objects.filter(name__startswith=f"{prefix}-").values_list("name", flat=True))
+        Category.objects.bulk_create(
+            [Category(name=f"{prefix}-kategorie-{i}") for i in range(count) if f"{prefix}-kategorie-{i}" not in existing]
+        )
+        return list(Category.objects.filter(name__startswith=f"{prefix}-kategorie-"))
+
+    def _tags(self, prefix, count, batch):
+        tag_type, _ = TagType.objects.get_or_create(name=f"{prefix}-typ")
+        existing = set(ApplicationTag.objects.filter(name__startswith=f"{prefix}-").values_list("name", flat=True))
+        ApplicationTag.objects.bulk_create(
+            [
+                ApplicationTag(name=f"{prefix}-tag-{i}", type=tag_type)
+                for i in range(count)
+                if f"{prefix}-tag-{i}" not in existing
+            ],
+            batch_size=batch,
+        )
+        return list(ApplicationTag.objects.filter(name__startswith=f"{prefix}-tag-"))
+
+    def _locations(self, prefix, depth, fanout, batch):
+        """Baut den Baum ebenenweise per bulk_create; liefert die Blätter.
+
+        Jede Ebene wird über ihr Namenspräfix neu gelesen: MySQL liefert aus
+        bulk_create keine PKs, die nächste Ebene braucht sie aber als parent.
+        """
+        level_nodes = [None]
+        run = uuid.uuid4().hex[:6]
+        for level in range(max(1, depth)):
+            new_nodes = []
+            for parent_index, parent in enumerate(level_nodes):
+                for i in range(fanout):
+                    new_nodes.append(
+                        StorageLocation(
+                            name=f"{prefix}-{run}-L{level}-{parent_index}-{i}",
+                            parent=parent,
+                            nfc_token=uuid.uuid4().hex[:16],
+                        )
+                    )
+            StorageLocation.objects.bulk_create(new_nodes, batch_size=batch)
+            level_nodes = list(
+                StorageLocation.objects.filter(name__startswith=f"{prefix}-{run}-L{level}-").order_by("name")
+            )
+        # bulk_create umgeht save() → Pfade nachziehen
+        StorageLocation.rebuild_paths()
+        return level_nodes
+
+    def _items(self, rng, prefix, count, user, overviews, categories, leaves, batch):
+        now = timezone.now()
+        objs = []
+        for i in range(count):
+            overview = rng.choice(overviews)
+            consumable = overview.is_consumable_mode
+            name = f"{rng.choice(WORDS)} {rng.choice(VARIANTS)} {prefix}-{i}"
+            barcode = uuid.uuid4().hex[:12]
+            quantity, low_quantity = rng.randint(0, 50), rng.randint(0, 10)
+            objs.append(
+                InventoryItem(
+                    name=name,
+                    description=f"{rng.choice(WORDS)} für {rng.choice(WORDS)}",
+                    quantity=quantity,
+                    low_quantity=low_quantity,
+                    below_minimum=quantity < low_quantity,
+                    item_type="consumable" if consumable else "equipment",
+                    category=rng.choice(categories),
+                    overview=overview,
+                    storage_location=rng.choice(leaves),
+                    location_letter=rng.choice("ABCDEFGH"),
+                    location_number=rng.randint(1, 40),
+                    variant=rng.choice(VARIANTS),
+                    barcode=barcode,
+                    barcode_text=f"Barcode für {name}: {barcode}",
+                    nfc_token=uuid.uuid4().hex[:16],
+                    is_favorite=rng.random() < 0.02,
+                    last_used=now - timedelta(days=rng.randint(0, 365)),
+                    user=user,
+                )
+            )
+        # bulk_create umgeht save() → keine QR-/Barcode-Jobs (gewollt; bei Bedarf process_media_jobs --all).
+        InventoryItem.objects.bulk_create(objs, batch_size=batch)
+        # über den eindeutigen nfc_token neu lesen (MySQL liefert keine PKs), Reihenfolge wie erzeugt
+        tokens = [obj.nfc_token for obj in objs]
+        by_token = {}
+        for start in range(0, len(tokens), batch):
+            chunk = tokens[start:start + batch]
+            by_token.update((item.nfc_token, item) for item in InventoryItem.objects.filter(nfc_token__in=chunk))
+        return [by_token[token] for token in tokens]
+
+    def _item_tags(self, rng, items, tags, batch):
+        through = InventoryItem.application_tags.through
+        rows = []
+        for item in items:
+            for tag in rng.sample(tags, rng.randint(*TAGS_PER_ITEM)):
+                rows.append(through(inventoryitem_id=item.pk, applicationtag_id=tag.pk))
+        through.objects.bulk_create(rows, batch_size=batch, ignore_conflicts=True)
+
+    def _borrowings(self, rng, items, batch):
+        rows = [
+            BorrowedItem(
+                item=item,
+                borrower=f"Person {rng.randint(1, 40)}",
+                quantity_borrowed=rng.randint(1, 3),
+                returned=rng.random() < 0.5,
+            )
+            for item in items
+            if rng.random() < BORROW_RATIO
+        ]
+        BorrowedItem.objects.bulk_create(rows, batch_size=batch)
+        # bulk_create umgeht borrow() → denormalisierten Zähler nachziehen
+        InventoryItem.recompute_borrowed_open({row.item_id for row in rows if not row.returned})
+        return len(rows)
+
+    def _comments(self, rng, items, user, batch):
+        rows = [
+            ItemComment(item=item, author=user, text=f"{rng.choice(WORDS)} prüfen")
+            for item in items
+            if rng.random() < COMMENT_RATIO
+        ]
+        ItemComment.objects.bulk_create(rows, batch_size=batch)
+        InventoryItem.refresh_latest_comments()
+        return len(rows)
+
+    def _history(self, rng, items, user, batch):
+        now = timezone.now()
+        actions = [
+            InventoryHistory.Action.QUANTITY,
+            InventoryHistory.Action.UPDATED,
+            InventoryHistory.Action.MOVEMENT,
+        ]
+        rows = []
+        for item in items:
+            rows.append(InventoryHistory(item=item, user=user, action=InventoryHistory.Action.CREATED))
+            for _ in range(HISTORY_PER_ITEM - 1):
+                before = rng.randint(0, 50)
+                after = max(0, before + rng.randint(-5, 5))
+                rows.append(
+                    InventoryHistory(
+                        item=item,
+                        user=user,
+                        action=rng.choice(actions),
+                        changes=[
+                            {
+                                "field": "quantity",
+                                "label": "Ist-Bestand",
+                                "before": before,
+                                "after": after,
+                                "delta": after - before,
+                            }
+                        ],
+                        data_before={"quantity": before},
+                        data_after={"quantity": after},
+                    )
+                )
+        InventoryHistory.objects.bulk_create(rows, batch_size=batch)
+        # created_at ist auto_now_add → nachträglich über ~90 Tage verteilen
+        # (Zeilen neu lesen, bulk_update braucht PKs).
+        item_ids = [item.pk for item in items]
+        for start in range(0, len(item_ids), batch):
+            created = list(
+                InventoryHistory.objects.filter(item_id__in=item_ids[start:start + batch]).only("pk").order_by("pk")
+            )
+            for row in created:
+                row.created_at = now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))
+            InventoryHistory.objects.bulk_update(created, ["created_at"], batch_size=batch)
+        return len(rows)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import imports
+from inventory.models import Overview
+
+
+class Command(BaseCommand):
+    help = (
+        "Importiert Items aus einer CSV-/XLSX-Datei (Spalten wie im Export). Alles oder nichts: "
+        "bei einer ungültigen Zeile wird nichts übernommen (außer mit --skip-invalid)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV- oder XLSX-Datei.")
+        parser.add_argument("--user", help="Benutzername für Items und Historie (Standard: erster Superuser).")
+        parser.add_argument("--overview", help="Dashboard (Slug oder Name) für Zeilen ohne Spalte „Dashboard“.")
+        parser.add_argument("--dry-run", action="store_true", help="Nur prüfen und anzeigen, was angelegt würde.")
+        parser.add_argument("--skip-invalid", action="store_true", help="Gültige Zeilen trotz Fehlern übernehmen.")
+        parser.add_argument("--encoding", default="utf-8-sig", help="Zeichensatz der CSV-Datei.")
+        parser.add_argument("--chunk-size", type=int, default=imports.CHUNK_SIZE, help="Zeilen pro Block.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.isfile(path):
+            raise CommandError(f"Datei nicht gefunden: {path}")
+        user = self._user(options["user"])
+        overview = None
+        if options["overview"]:
+            overview = (
+                Overview.objects.filter(slug=options["overview"]).first()
+                or Overview.objects.filter(name__iexact=options["overview"]).first()
+            )
+            if overview is None:
+                raise CommandError(f"Dashboard „{options['overview']}“ nicht gefunden.")
+
+        started = time.monotonic()
+        try:
+            with open(path, "rb") as fh:
+                report = imports.import_items(
+                    fh,
+                    os.path.basename(path),
+                    user=user,
+                    overview=overview,
+                    encoding=options["encoding"],
+                    dry_run=options["dry_run"],
+                    skip_invalid=options["skip_invalid"],
+                    chunk_size=options["chunk_size"],
+                )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        elapsed = time.monotonic() - started
+
+        if report.ignored_columns:
+            self.stdout.write(f"Ignorierte Spalten: {', '.join(report.ignored_columns)}")
+        for label, names in (
+            ("Neue Kategorien", report.new_categories),
+            ("Neue Tags", report.new_tags),
+            ("Neue Lagerorte", report.new_locations),
+        ):
+            if names:
+                shown = ", ".join(names[:20]) + (f" … (+{len(names) - 20})" if len(names) > 20 else "")
+                self.stdout.write(f"{label} ({len(names)}): {shown}")
+        for line, message in report.errors[:50]:
+            self.stderr.write(f"Zeile {line}: {message}")
+        if report.error_count > 50:
+            self.stderr.write(f"… {report.error_count - 50} weitere Fehler")
+
+        summary = f"{report.rows} Zeile(n), {report.valid} gültig, {report.error_count} fehlerhaft"
+        if report.dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Probelauf: {summary}; nichts gespeichert ({elapsed:.1f} s)."))
+        elif report.rolled_back:
+            raise CommandError(f"{summary}; nichts importiert (--skip-invalid übernimmt die gültigen Zeilen).")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"{summary}; {report.created} Item(s) importiert in {elapsed:.1f} s. "
+                "Codes rendert process_media_jobs."
+            ))
+
+    def _user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f"Benutzer „{username}“ nicht gefunden.")
+            return user
+        user = User.objects.filter(is_superuser=True).order_by("pk").first()
+        if user is None:
+            raise CommandError("Kein Superuser vorhanden – bitte --user angeben.")
+        return user
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory import codes, media
+from inventory.models import MediaJob
+from inventory.nplusone import detect
+
+
+class Command(BaseCommand):
+    help = (
+        "Rendert ausstehende Barcode-/QR-Codes (MediaJob) in einem Prozess-Pool vor. "
+        "Unveränderte Inhalte (gleicher Hash, Dateien vorhanden) werden übersprungen."
+    )
+    # Dauerbetrieb: ein N+1-Scope pro Durchlauf statt einer für die ganze Laufzeit
+    nplusone_scope = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Prozesse im Pool.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Jobs pro Durchlauf.")
+        parser.add_argument("--all", action="store_true", help="Vorher alle Items einstellen.")
+        parser.add_argument(
+            "--prune", action="store_true",
+            help="Danach Cache-Dateien ohne aktuelles Item löschen (alte Basis-URL, geänderte Barcodes).",
+        )
+        parser.add_argument(
+            "--loop", type=float, default=0,
+            help="Dauerbetrieb: nach leerer Warteschlange so viele Sekunden warten (0 = einmal abarbeiten).",
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            media.enqueue_all()
+        totals = {"rendered": 0, "skipped": 0, "failed": 0}
+        while True:
+            with detect("command process_media_jobs"):
+                stats = media.process_jobs(limit=max(1, options["batch_size"]), workers=max(1, options["workers"]))
+            for key, value in stats.items():
+                totals[key] += value
+            if any(stats.values()):
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
+
+        with detect("command process_media_jobs"):
+            pruned = codes.prune() if options["prune"] else 0
+            failed = MediaJob.objects.filter(status=MediaJob.Status.FAILED).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['rendered']} gerendert, {totals['skipped']} unverändert übersprungen, "
+            f"{totals['failed']} Fehlversuch(e); {failed} Job(s) endgültig fehlgeschlagen; "
+            f"{pruned} veraltete Datei(en) gelöscht."
+        ))
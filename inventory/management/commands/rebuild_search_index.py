@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from inventory import duplicates, search
+
+
+class Command(BaseCommand):
+    help = (
+        "Baut den Suchtext (ItemSearchDocument) und die Dubletten-Signaturen aller "
+        "Items neu auf – z. B. nach Massenimporten per bulk_create oder direkten "
+        "SQL-Änderungen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        written = search.reindex_all(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} Suchdokument(e) geschrieben (Backend: {search.get_backend().name})."
+        ))
+        signatures = duplicates.reindex_all(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"{signatures} Dubletten-Signatur(en) berechnet."))
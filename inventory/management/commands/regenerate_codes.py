@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory import codes
+
+
+def _render(target: tuple[str, str, str, str]) -> str:
+    """Ein Code in den Cache (läuft im Pool-Prozess); '' oder Fehlermeldung."""
+    kind, fmt, data, root = target
+    try:
+        codes.ensure(kind, fmt, data, root)
+    except Exception as exc:
+        return f"{kind}/{fmt} {data!r}: {type(exc).__name__}: {exc}"
+    return ""
+
+
+class Command(BaseCommand):
+    help = (
+        "Rendert QR-Codes/Barcodes von Items und Lagerorten neu – nur Inhalte, deren Datei im "
+        "Code-Cache fehlt (neue Basis-URL, geänderter Barcode/NFC-Token, Renderer-Update). "
+        "Dateien werden atomar ersetzt; der Server kann währenddessen weiterlaufen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="Prozesse im Pool.")
+        parser.add_argument(
+            "--kinds", default=",".join(codes.KINDS),
+            help=f"Code-Arten, kommagetrennt (Standard: {','.join(codes.KINDS)}).",
+        )
+        parser.add_argument(
+            "--formats", default="png",
+            help=f"Formate, kommagetrennt ({','.join(codes.FORMATS)}; Standard: png, SVG rendert /codes/ bei Bedarf).",
+        )
+        parser.add_argument("--prune", action="store_true", help="Danach Dateien ohne aktuellen Code löschen.")
+        parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts rendern oder löschen.")
+
+    def _split(self, value: str, allowed, label: str) -> tuple[str, ...]:
+        values = tuple(dict.fromkeys(v.strip() for v in value.split(",") if v.strip()))
+        unknown = [v for v in values if v not in allowed]
+        if unknown or not values:
+            raise CommandError(f"Unbekannte {label}: {', '.join(unknown) or '(leer)'} (erlaubt: {', '.join(allowed)})")
+        return values
+
+    def handle(self, *args, **options):
+        kinds = self._split(options["kinds"], codes.KINDS, "Code-Art(en)")
+        formats = self._split(options["formats"], tuple(codes.FORMATS), "Format(e)")
+        root = codes.cache_root()
+
+        # Inhalt = Cache-Schlüssel: unveränderte Codes liegen schon unter ihrem Hash
+        total, targets = 0, []
+        for kind, data in codes.expected(kinds=kinds):
+            for fmt in formats:
+                total += 1
+                if not codes.is_cached(kind, fmt, data, root):
+                    targets.append((kind, fmt, data, root))
+        self.stdout.write(f"{total} Code(s) erwartet, {len(targets)} fehlen.")
+
+        if options["dry_run"]:
+            return
+
+        errors = []
+        if targets:
+            workers = max(1, min(options["workers"], len(targets)))
+            step = max(1, len(targets) // 20)
+            if workers == 1:
+                results = map(_render, targets)
+                pool = None
+            else:
+                pool = Pool(workers)
+                results = pool.imap_unordered(_render, targets, chunksize=max(1, min(100, step // workers)))
+            try:
+                for done, error in enumerate(results, 1):
+                    if error:
+                        errors.append(error)
+                    if done % step == 0 or done == len(targets):
+                        self.stdout.write(f"  {done}/{len(targets)} ({done * 100 // len(targets)} %)")
+            finally:
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+
+        for error in errors[:20]:
+            self.stderr.write(error)
+        pruned = codes.prune() if options["prune"] else 0
+        message = (
+            f"{len(targets) - len(errors)} gerendert, {total - len(targets)} unverändert, "
+            f"{len(errors)} fehlgeschlagen; {pruned} veraltete Datei(en) gelöscht."
+        )
+        self.stdout.write(self.style.ERROR(message) if errors else self.style.SUCCESS(message))
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from inventory.models import InventoryItem
+from inventory.versions import bump_overview_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Berechnet den denormalisierten Zähler InventoryItem.borrowed_open aus den "
+        "offenen Verleihen neu (nur abweichende Items, in Batches)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Nur Abweichungen anzeigen.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        mismatched = list(
+            InventoryItem.objects
+            .annotate(
+                actual=Coalesce(Sum("borrowings__quantity_borrowed", filter=Q(borrowings__returned=False)), 0)
+            )
+            .exclude(borrowed_open=F("actual"))
+            .values_list("pk", "overview_id", "borrowed_open", "actual")
+        )
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS("Alle Zähler stimmen."))
+            return
+
+        for pk, _, stored, actual in mismatched[:20]:
+            self.stdout.write(f"Item {pk}: gespeichert {stored}, tatsächlich {actual}")
+        if len(mismatched) > 20:
+            self.stdout.write(f"… und {len(mismatched) - 20} weitere")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"{len(mismatched)} Abweichung(en) – nichts geändert (--dry-run)."))
+            return
+
+        batch = max(1, options["batch_size"])
+        ids = [row[0] for row in mismatched]
+        updated = 0
+        for start in range(0, len(ids), batch):
+            updated += InventoryItem.recompute_borrowed_open(ids[start:start + batch])
+        bump_overview_versions(row[1] for row in mismatched)
+        self.stdout.write(self.style.SUCCESS(f"{updated} Zähler korrigiert."))
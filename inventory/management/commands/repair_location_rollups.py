@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Berechnet die Teilbaum-Summen der Lagerorte (StorageLocationRollup: Items, "
+        "Bestand, unter Mindestbestand) neu – nur abweichende Zeilen werden geschrieben."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            changed = rollups.rebuild()
+        if changed:
+            self.stdout.write(self.style.SUCCESS(f"{changed} Lagerort-Summe(n) korrigiert."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Alle Summen stimmen."))
@@ -9,6 +9,8 @@ from inventory.models import ScheduledExport, ExportRun
 
 class Command(BaseCommand):
     help = "Führt fällige geplante Exporte aus."
+    # N+1-Erkennung läuft pro Export (siehe export_overview_to_file).
+    nplusone_scope = False
 
     def handle(self, *args, **options):
         now = timezone.now()
@@ -3,8 +3,12 @@ from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
-    help = "Führt geplante Hintergrundaufgaben (Backups/Exporte) aus."
+    help = "Führt geplante Hintergrundaufgaben (Backups/Exporte/Nachbestell-Übersicht/Barcode-/QR-Dateien) aus."
+    # jeder aufgerufene Command bekommt seinen eigenen N+1-Scope
+    nplusone_scope = False
 
     def handle(self, *args, **options):
         call_command("run_scheduled_backups")
         call_command("run_scheduled_exports")
+        call_command("send_reorder_digest")
+        call_command("process_media_jobs", prune=True)
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.admin_views import _get_global_settings
+from inventory.integrations.homeassistant import notify_reorder_digest
+from inventory.reorder import digest_lines, reorder_groups
+
+
+class Command(BaseCommand):
+    help = (
+        "Schickt die Nachbestell-Übersicht (alle Overviews, nach Shop gruppiert) an "
+        "Home Assistant – höchstens einmal pro Tag, auch wenn öfter aufgerufen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Auch senden, wenn heute schon gesendet wurde.")
+        parser.add_argument("--dry-run", action="store_true", help="Nur ausgeben, nichts senden.")
+
+    def handle(self, *args, **options):
+        settings_obj = _get_global_settings()
+        today = timezone.localdate()
+        last = settings_obj.last_reorder_digest_at
+        if last and timezone.localtime(last).date() == today and not options["force"]:
+            self.stdout.write("Nachbestell-Übersicht wurde heute bereits gesendet.")
+            return
+
+        groups = reorder_groups()
+        lines = digest_lines(groups)
+        for line in lines:
+            self.stdout.write(line)
+        if options["dry_run"]:
+            return
+        if not groups:
+            self.stdout.write("Nichts nachzubestellen.")
+        elif not notify_reorder_digest(groups, lines):
+            # Zeitstempel nicht setzen → der nächste Lauf versucht es erneut
+            self.stderr.write(self.style.ERROR(
+                "Home Assistant nicht erreichbar oder nicht konfiguriert – Übersicht nicht gesendet."
+            ))
+            return
+        settings_obj.last_reorder_digest_at = timezone.now()
+        settings_obj.save(update_fields=["last_reorder_digest_at"])
@@ -0,0 +1,180 @@
+# inventory/media.py
+#
+# Barcode-/QR-Dateien der Items im Hintergrund vorrendern:
+# - InventoryItem.save() stellt nur einen MediaJob ein (eine Zeile pro Item),
+#   gerendert wird nicht im Request
+# - process_jobs() (manage.py process_media_jobs) vergibt ausstehende Jobs per
+#   bedingtem UPDATE und füllt in einem Prozess-Pool den Code-Cache
+#   (codes.py) mit den Standardformaten (PNG); /codes/ rendert alles andere
+#   beim ersten Abruf selbst
+# - der Inhalt (Barcode, QR-URL) wird gehasht: gleicher Hash und Dateien
+#   vorhanden → übersprungen (z. B. nach enqueue_all() ohne echte Änderung)
+# - wird ein Item während des Renderns erneut gespeichert, bleibt sein Job
+#   ausstehend; hängengebliebene Jobs werden nach STALE_AFTER neu vergeben
+from __future__ import annotations
+
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Iterable
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import codes
+
+logger = logging.getLogger(__name__)
+
+STALE_AFTER = timedelta(minutes=15)
+MAX_ATTEMPTS = 5
+PREWARM_KINDS = ("qr", "barcode")
+PREWARM_FORMATS = ("png",)
+
+
+def build_payload(source: codes.CodeSource, bases: codes.Bases, root: str) -> dict:
+    """Alles, was der Pool-Prozess zum Rendern braucht (ohne DB/Settings)."""
+    return {
+        "item_id": source.pk,
+        "codes": {kind: codes.code_data(kind, source, bases) for kind in PREWARM_KINDS},
+        "root": root,
+    }
+
+
+def payload_hash(payload: dict) -> str:
+    raw = "\n".join(payload["codes"][kind] for kind in PREWARM_KINDS)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _targets(payload: dict):
+    for kind, data in payload["codes"].items():
+        if data:
+            for fmt in PREWARM_FORMATS:
+                yield kind, fmt, data
+
+
+def files_present(payload: dict) -> bool:
+    return all(codes.is_cached(kind, fmt, data, payload["root"]) for kind, fmt, data in _targets(payload))
+
+
+def render(payload: dict) -> str:
+    """Füllt den Code-Cache; '' oder Fehlermeldung (läuft im Pool-Prozess)."""
+    try:
+        for kind, fmt, data in _targets(payload):
+            codes.ensure(kind, fmt, data, payload["root"])
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+    return ""
+
+
+def render_many(payloads: list[dict], workers: int = 1) -> list[str]:
+    if workers <= 1 or len(payloads) < 2:
+        return [render(payload) for payload in payloads]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render, payloads, chunksize=max(1, len(payloads) // (workers * 4))))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Warteschlange
+# ──────────────────────────────────────────────────────────────────────────────
+def enqueue(item_ids: Iterable[int], *, created: bool = False) -> None:
+    """Jobs (neu) einstellen. `created`: Items sind gerade angelegt → nur INSERT."""
+    from .models import MediaJob
+
+    ids = sorted({pk for pk in item_ids if pk})
+    if not ids:
+        return
+    now = timezone.now()
+    if not created:
+        values = {"status": MediaJob.Status.PENDING, "requested_at": now, "attempts": 0}
+        if MediaJob.objects.filter(item_id__in=ids).update(**values) == len(ids):
+            return
+    MediaJob.objects.bulk_create(
+        [MediaJob(item_id=pk, requested_at=now) for pk in ids],
+        ignore_conflicts=True,
+    )
+
+
+def enqueue_all(batch_size: int = 1000) -> None:
+    """Alle Items einstellen (z. B. nach Änderung der QR-Basis-URL); unveränderte werden übersprungen."""
+    from .models import InventoryItem, MediaJob
+
+    now = timezone.now()
+    MediaJob.objects.update(status=MediaJob.Status.PENDING, requested_at=now, attempts=0)
+    missing = list(InventoryItem.objects.filter(media_job__isnull=True).values_list("pk", flat=True))
+    MediaJob.objects.bulk_create(
+        [MediaJob(item_id=pk, requested_at=now) for pk in missing],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+
+
+def _claimable():
+    from .models import MediaJob
+
+    return Q(status=MediaJob.Status.PENDING) | Q(
+        status=MediaJob.Status.RUNNING, started_at__lt=timezone.now() - STALE_AFTER
+    )
+
+
+def claim(limit: int, item_ids: Iterable[int] | None = None) -> tuple[object, dict[int, str]]:
+    """Vergibt bis zu `limit` Jobs an diesen Worker → (Token, {item_id: alter Hash})."""
+    from .models import MediaJob
+
+    qs = MediaJob.objects.filter(_claimable())
+    if item_ids is not None:
+        qs = qs.filter(item_id__in=list(item_ids))
+    candidates = list(qs.order_by("requested_at").values_list("item_id", flat=True)[:limit])
+    token = timezone.now()
+    if not candidates:
+        return token, {}
+    # Bedingtes UPDATE: parallele Worker bekommen jeden Job nur einmal
+    MediaJob.objects.filter(_claimable(), item_id__in=candidates).update(
+        status=MediaJob.Status.RUNNING, started_at=token, attempts=F("attempts") + 1
+    )
+    claimed = MediaJob.objects.filter(item_id__in=candidates, status=MediaJob.Status.RUNNING, started_at=token)
+    return token, dict(claimed.values_list("item_id", "payload_hash"))
+
+
+def process_jobs(limit: int = 500, workers: int = 1, item_ids: Iterable[int] | None = None) -> dict[str, int]:
+    """Einen Schwung Jobs abarbeiten; liefert Zähler rendered/skipped/failed."""
+    from .models import InventoryItem, MediaJob
+
+    token, old_hashes = claim(limit, item_ids)
+    stats = {"rendered": 0, "skipped": 0, "failed": 0}
+    if not old_hashes:
+        return stats
+
+    bases, root = codes.current_bases(), codes.cache_root()
+    todo, skipped = [], []
+    for row in InventoryItem.objects.filter(pk__in=list(old_hashes)).values_list(*codes.ITEM_FIELDS):
+        source = codes.CodeSource(*row)
+        pk = source.pk
+        payload = build_payload(source, bases, root)
+        digest = payload_hash(payload)
+        if digest == old_hashes[pk] and files_present(payload):
+            skipped.append(pk)
+        else:
+            todo.append((pk, payload, digest))
+
+    mine = MediaJob.objects.filter(status=MediaJob.Status.RUNNING, started_at=token)
+    now = timezone.now()
+    mine.filter(item_id__in=skipped).update(status=MediaJob.Status.DONE, finished_at=now, last_error="")
+    stats["skipped"] = len(skipped)
+
+    errors = render_many([payload for _, payload, _ in todo], workers)
+    rendered = []
+    now = timezone.now()
+    for (pk, _, digest), error in zip(todo, errors):
+        if error:
+            logger.warning("Medien für Item %s fehlgeschlagen: %s", pk, error)
+            mine.filter(item_id=pk, attempts__lt=MAX_ATTEMPTS).update(status=MediaJob.Status.PENDING, last_error=error)
+            mine.filter(item_id=pk).update(status=MediaJob.Status.FAILED, finished_at=now, last_error=error)
+            stats["failed"] += 1
+        else:
+            mine.filter(item_id=pk).update(
+                status=MediaJob.Status.DONE, payload_hash=digest, finished_at=now, last_error=""
+            )
+            rendered.append(pk)
+    stats["rendered"] = len(rendered)
+    return stats
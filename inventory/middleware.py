@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 import threading
+import time
 from typing import Optional
 from django.http import HttpRequest
 from django.shortcuts import render
+from django.utils.functional import SimpleLazyObject
 
 # Thread-lokaler Speicher für die aktuelle Request
 _request_local = threading.local()
@@ -33,6 +35,79 @@ class ThreadLocalMiddleware:
         return response
 
 
+class PerformanceMiddleware:
+    """
+    Misst pro Request SQL-Anzahl/-Zeit, Template-, View- und Home-Assistant-Zeit,
+    sammelt ein Aggregat pro URL-Name (siehe /manage/performance/) und setzt
+    für Staff-User einen Server-Timing-Header – anderen Clients werden keine
+    SQL-Zahlen verraten. Abschaltbar über INVENTORY_PERFORMANCE_ENABLED.
+    """
+    def __init__(self, get_response):
+        from . import performance
+
+        self.get_response = get_response
+        self.enabled = performance.is_enabled()
+        if self.enabled:
+            performance.install_template_timing()
+
+    def __call__(self, request: HttpRequest):
+        if not self.enabled:
+            return self.get_response(request)
+
+        from . import performance
+
+        start = time.perf_counter()
+        # TemplateResponse wird innerhalb von get_response gerendert → zählt mit.
+        with performance.collect() as metrics:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            response["Server-Timing"] = performance.server_timing_header(metrics, total)
+        performance.registry.record(
+            performance.endpoint_name(request),
+            total_ms=total * 1000,
+            queries=metrics.sql_count,
+            sql_ms=metrics.sql_time * 1000,
+        )
+        return response
+
+
+class NPlusOneMiddleware:
+    """
+    Meldet wiederholte Query-Formen pro Request (siehe nplusone.py).
+    Nur aktiv, wenn INVENTORY_NPLUSONE_DETECTION = "log" oder "raise".
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        from .nplusone import detect, mode
+
+        if mode() == "off":
+            return self.get_response(request)
+        with detect(f"{request.method} {request.path}"):
+            response = self.get_response(request)
+        return response
+
+
+class AccessContextMiddleware:
+    """
+    Hängt `request.access` (siehe access.OverviewAccess) an jede Request.
+    Lazy: Requests, die keine Dashboard-Rechte prüfen, kosten nichts.
+    Muss nach AuthenticationMiddleware stehen.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        from .access import load_access  # Lokaler Import, um App-Loading sauber zu halten.
+
+        request.access = SimpleLazyObject(lambda: load_access(request.user))
+        return self.get_response(request)
+
+
 class MaintenanceModeMiddleware:
     """
     Zeigt eine Wartungsseite an, wenn maintenance_mode_enabled aktiv ist.
@@ -42,7 +117,7 @@ class MaintenanceModeMiddleware:
         self.get_response = get_response
 
     def __call__(self, request: HttpRequest):
-        from .models import GlobalSettings  # Lokaler Import, um App-Loading sauber zu halten.
+        from .settings_cache import get_settings_snapshot  # Lokaler Import, um App-Loading sauber zu halten.
 
         if request.path in {"/login/", "/logout/"}:
             return self.get_response(request)
@@ -50,8 +125,8 @@ class MaintenanceModeMiddleware:
         if request.user.is_authenticated and (request.user.is_staff or request.user.is_superuser):
             return self.get_response(request)
 
-        settings_obj = GlobalSettings.objects.first()
-        if settings_obj and settings_obj.maintenance_mode_enabled:
+        settings_obj = get_settings_snapshot()
+        if settings_obj.maintenance_mode_enabled:
             context = {"message": settings_obj.maintenance_message}
             return render(request, "inventory/maintenance.html", context, status=503)
 
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0062_merge_0061_add_overview_request_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['overview', 'name', 'id'], name='inventory_i_overvie_3611a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['overview', 'quantity', 'id'], name='inventory_i_overvie_79b450_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['overview', 'low_quantity', 'id'], name='inventory_i_overvie_a5b9ef_idx'),
+        ),
+    ]
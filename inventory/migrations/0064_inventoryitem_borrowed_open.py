@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_borrowed_open(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    BorrowedItem = apps.get_model("inventory", "BorrowedItem")
+    open_total = (
+        BorrowedItem.objects.filter(item=OuterRef("pk"), returned=False)
+        .values("item")
+        .annotate(total=Sum("quantity_borrowed"))
+        .values("total")
+    )
+    InventoryItem.objects.update(borrowed_open=Coalesce(Subquery(open_total), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0063_dashboard_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='borrowed_open',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Verliehen (offen)'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['overview', 'borrowed_open', 'id'], name='inventory_i_overvie_c2cb73_idx'),
+        ),
+        migrations.RunPython(populate_borrowed_open, migrations.RunPython.noop),
+    ]
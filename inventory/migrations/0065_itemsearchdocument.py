@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:18
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+FTS_TABLE = "inventory_item_fts"
+DOC_TABLE = "inventory_itemsearchdocument"
+
+
+def create_search_structures(apps, schema_editor):
+    """Engine-spezifische Indizes; ohne passende Engine bleibt der ORM-Fallback."""
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS inventory_itemsearch_tsv_idx ON {DOC_TABLE} "
+                "USING gin (to_tsvector('simple', document))"
+            )
+            try:
+                with transaction.atomic(using=connection.alias):
+                    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            except Exception:
+                # Keine Rechte für CREATE EXTENSION → Teilstringsuche ohne Index
+                return
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS inventory_itemsearch_trgm_idx ON {DOC_TABLE} "
+                "USING gin (document gin_trgm_ops)"
+            )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            try:
+                cursor.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(document, tokenize='trigram')")
+            except Exception:
+                try:
+                    cursor.execute(
+                        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(document, tokenize='unicode61 remove_diacritics 2')"
+                    )
+                except Exception:
+                    return  # SQLite ohne FTS5
+            cursor.execute(
+                f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {DOC_TABLE} BEGIN "
+                f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.item_id, new.document); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {DOC_TABLE} BEGIN "
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = old.item_id; END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON {DOC_TABLE} BEGIN "
+                f"UPDATE {FTS_TABLE} SET rowid = new.item_id, document = new.document WHERE rowid = old.item_id; END"
+            )
+
+
+def drop_search_structures(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("DROP INDEX IF EXISTS inventory_itemsearch_tsv_idx")
+            cursor.execute("DROP INDEX IF EXISTS inventory_itemsearch_trgm_idx")
+        elif connection.vendor == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def populate_documents(apps, schema_editor):
+    """Entspricht inventory.search.compose_document (historische Modelle)."""
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    ItemSearchDocument = apps.get_model("inventory", "ItemSearchDocument")
+    StorageLocation = apps.get_model("inventory", "StorageLocation")
+
+    nodes = {pk: (name, parent_id) for pk, name, parent_id in StorageLocation.objects.values_list("pk", "name", "parent_id")}
+
+    def path(pk):
+        names, seen = [], set()
+        while pk is not None and pk in nodes and pk not in seen:
+            seen.add(pk)
+            names.append(nodes[pk][0])
+            pk = nodes[pk][1]
+        return " > ".join(reversed(names))
+
+    batch = []
+    items = InventoryItem.objects.select_related("category").prefetch_related("application_tags").order_by("pk")
+    for item in items.iterator(chunk_size=1000):
+        number = str(item.location_number) if item.location_number is not None else ""
+        parts = [
+            item.name, item.variant, item.barcode, item.description, item.location_letter, number,
+            f"{item.location_letter or ''}{number}", item.location_shelf,
+            item.category.name if item.category_id else "",
+            path(item.storage_location_id) if item.storage_location_id else "",
+            *(tag.name for tag in item.application_tags.all()),
+        ]
+        batch.append(
+            ItemSearchDocument(item_id=item.pk, document=" ".join(p.strip() for p in parts if p and p.strip()))
+        )
+        if len(batch) >= 1000:
+            ItemSearchDocument.objects.bulk_create(batch)
+            batch = []
+    ItemSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0064_inventoryitem_borrowed_open'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSearchDocument',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='inventory.inventoryitem')),
+                ('document', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_structures, drop_search_structures),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:26
+
+import hashlib
+import random
+import re
+import struct
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Stand von inventory/duplicates.py zum Zeitpunkt dieser Migration – bewusst
+# kopiert: spätere Änderungen an Shingles/Hash/Bändern dürfen nicht ändern,
+# was diese Migration schreibt (Abweichungen gleicht rebuild_search_index aus).
+NGRAM = 3
+BANDS = 10
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+MAX_DESCRIPTION_WORDS = 20
+_MERSENNE = (1 << 61) - 1
+_MAX32 = 0xFFFFFFFF
+_rng = random.Random(20261017)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f">{NUM_PERM}I")
+_RE_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(name, variant="", description=""):
+    text = " ".join(_RE_WORD.findall(f"{name or ''} {variant or ''}".casefold()))
+    result = {text[i:i + NGRAM] for i in range(max(len(text) - NGRAM + 1, 1))} if text else set()
+    words = [w for w in _RE_WORD.findall((description or "").casefold()) if len(w) >= 4]
+    result.update(f"w:{w}" for w in words[:MAX_DESCRIPTION_WORDS])
+    return result
+
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(tokens):
+    hashes = [_hash64(t) for t in tokens]
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * h + b) % _MERSENNE) & _MAX32 for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def band_buckets(signature):
+    buckets = []
+    for band in range(BANDS):
+        chunk = struct.pack(f">{ROWS}I", *signature[band * ROWS:(band + 1) * ROWS])
+        value = int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big") >> 1
+        buckets.append(value - (1 << 62))
+    return buckets
+
+
+def populate_signatures(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    ItemSimilaritySignature = apps.get_model("inventory", "ItemSimilaritySignature")
+    ItemSimilarityBand = apps.get_model("inventory", "ItemSimilarityBand")
+
+    signatures, bands = [], []
+    rows = InventoryItem.objects.order_by("pk").values_list("pk", "name", "variant", "description")
+    for pk, name, variant, description in rows.iterator(chunk_size=1000):
+        signature = minhash(shingles(name, variant, description))
+        if signature is None:
+            continue
+        signatures.append(ItemSimilaritySignature(item_id=pk, signature=_SIGNATURE.pack(*signature)))
+        bands.extend(
+            ItemSimilarityBand(item_id=pk, band=band, bucket=bucket)
+            for band, bucket in enumerate(band_buckets(signature))
+        )
+        if len(signatures) >= 1000:
+            ItemSimilaritySignature.objects.bulk_create(signatures)
+            ItemSimilarityBand.objects.bulk_create(bands)
+            signatures, bands = [], []
+    ItemSimilaritySignature.objects.bulk_create(signatures)
+    ItemSimilarityBand.objects.bulk_create(bands)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0065_itemsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSimilaritySignature',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='similarity_signature', serialize=False, to='inventory.inventoryitem')),
+                ('signature', models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ItemSimilarityBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_bands', to='inventory.inventoryitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='inventory_i_band_5f7079_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'band'), name='uniq_similarity_item_band')],
+            },
+        ),
+        migrations.RunPython(populate_signatures, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0066_itemsimilarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
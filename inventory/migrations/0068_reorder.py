@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, Q
+
+
+def populate_below_minimum(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    InventoryItem.objects.update(
+        below_minimum=ExpressionWrapper(Q(quantity__lt=F("low_quantity")), output_field=models.BooleanField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0067_inventoryitem_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='globalsettings',
+            name='last_reorder_digest_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Letzte Nachbestell-Übersicht am'),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='below_minimum',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Unter Mindestbestand'),
+        ),
+        migrations.RunPython(populate_below_minimum, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['overview', 'below_minimum', 'name', 'id'], name='inventory_i_overvie_ff0fd4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['below_minimum', 'item_type', 'is_active'], name='inventory_i_below_m_1349ba_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:48
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    StorageLocation = apps.get_model("inventory", "StorageLocation")
+    nodes = {pk: (name, parent_id) for pk, name, parent_id in StorageLocation.objects.values_list("pk", "name", "parent_id")}
+    resolved = {}
+
+    def resolve(pk):
+        chain, current = [], pk
+        while current is not None and current in nodes and current not in resolved and current not in chain:
+            chain.append(current)
+            current = nodes[current][1]
+        path, full_path, depth = resolved.get(current, ("/", "", -1))
+        for node_pk in reversed(chain):
+            path = f"{path}{node_pk}/"
+            full_path = f"{full_path} > {nodes[node_pk][0]}" if full_path else nodes[node_pk][0]
+            depth += 1
+            resolved[node_pk] = (path, full_path, depth)
+
+    locations = list(StorageLocation.objects.only("pk"))
+    for loc in locations:
+        resolve(loc.pk)
+        loc.path, loc.full_path, loc.depth = resolved[loc.pk]
+    StorageLocation.objects.bulk_update(locations, ["path", "full_path", "depth"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0068_reorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storagelocation',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='storagelocation',
+            name='full_path',
+            field=models.CharField(default='', editable=False, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='storagelocation',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
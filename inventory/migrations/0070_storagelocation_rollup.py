@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_rollups(apps, schema_editor):
+    StorageLocation = apps.get_model("inventory", "StorageLocation")
+    StorageLocationRollup = apps.get_model("inventory", "StorageLocationRollup")
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+
+    paths = dict(StorageLocation.objects.values_list("pk", "path"))
+    totals = {pk: [0, 0, 0] for pk in paths}
+    rows = (
+        InventoryItem.objects.filter(is_active=True, storage_location__isnull=False)
+        .values("storage_location_id")
+        .annotate(n=Count("pk"), quantity=Sum("quantity"), low=Count("pk", filter=Q(below_minimum=True)))
+        .values_list("storage_location_id", "n", "quantity", "low")
+    )
+    for location_id, count, quantity, low in rows:
+        for pk in (int(part) for part in paths.get(location_id, "").strip("/").split("/") if part):
+            if pk in totals:
+                totals[pk][0] += count
+                totals[pk][1] += quantity or 0
+                totals[pk][2] += low
+    StorageLocationRollup.objects.bulk_create(
+        [
+            StorageLocationRollup(location_id=pk, item_count=count, total_quantity=quantity, low_stock_count=low)
+            for pk, (count, quantity, low) in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0069_storagelocation_paths'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageLocationRollup',
+            fields=[
+                ('location', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to='inventory.storagelocation')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.IntegerField(default=0)),
+                ('low_stock_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
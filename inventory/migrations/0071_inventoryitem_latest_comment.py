@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_latest_comment(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    ItemComment = apps.get_model("inventory", "ItemComment")
+    newest = (
+        ItemComment.objects
+        .filter(item=OuterRef("pk"))
+        .order_by("-updated_at", "-created_at", "-pk")
+        .values("pk")[:1]
+    )
+    InventoryItem.objects.update(latest_comment=Subquery(newest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0070_storagelocation_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='latest_comment',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.itemcomment'),
+        ),
+        migrations.RunPython(populate_latest_comment, migrations.RunPython.noop),
+    ]
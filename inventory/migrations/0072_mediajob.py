@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0071_inventoryitem_latest_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='media_job', serialize=False, to='inventory.inventoryitem')),
+                ('status', models.CharField(choices=[('pending', 'Ausstehend'), ('running', 'In Arbeit'), ('done', 'Erledigt'), ('failed', 'Fehlgeschlagen')], default='pending', max_length=10)),
+                ('payload_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('requested_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'requested_at'], name='inventory_m_status_8d4f58_idx')],
+            },
+        ),
+    ]
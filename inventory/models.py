@@ -1,16 +1,16 @@
 from datetime import date
 import logging
-import os
 import uuid
-from django.conf import settings
 from django.contrib.auth.models import User, Group
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.utils import timezone
-from barcode import Code128
-from barcode.writer import ImageWriter
-import qrcode
 from django.db.models import JSONField
 
+from . import codes, media, rollups
+from .versions import bump_overview_versions_on_commit
+
 logger = logging.getLogger(__name__)
 
 
@@ -199,6 +199,11 @@ class GlobalSettings(models.Model):
         blank=True,
         verbose_name="Letztes Backup am",
     )
+    last_reorder_digest_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Letzte Nachbestell-Übersicht am",
+    )
     role_plan_notes = models.TextField(
         blank=True,
         default="",
@@ -341,108 +346,159 @@ class InventoryItem(models.Model):
     date_created = models.DateTimeField(auto_now_add=True, db_index=True)
     is_active = models.BooleanField(default=True, db_index=True)
 
+    # Denormalisiert: Summe der offenen Verleihe. Wird nur per F()-Update
+    # gepflegt (BorrowedItem.borrow/return_item), Reparatur: repair_borrowed_counts
+    borrowed_open = models.IntegerField(default=0, editable=False, verbose_name="Verliehen (offen)")
+
+    # Zeilenversion für den Fragment-Cache der Dashboard-Zeilen (fragments.py):
+    # steigt bei jedem save() sowie bei Verleih, Kommentar und Tag-Änderungen
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    # Gespeichert statt quantity < low_quantity pro Abfrage (kein Index möglich):
+    # gepflegt in save(), BorrowedItem.borrow/return_item und per below_minimum_after()
+    below_minimum = models.BooleanField(default=False, editable=False, verbose_name="Unter Mindestbestand")
+
+    # Denormalisiert: neuester Kommentar (Dashboard lädt genau einen pro Zeile).
+    # Gepflegt per Signal bei ItemComment save/delete, Reparatur: refresh_latest_comments()
+    latest_comment = models.ForeignKey(
+        "ItemComment", null=True, blank=True, on_delete=models.SET_NULL, related_name="+", editable=False
+    )
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     application_tags = models.ManyToManyField(ApplicationTag, blank=True)
 
+    # Felder, die in den Suchtext (ItemSearchDocument) einfließen
+    SEARCH_FIELDS = (
+        "name", "variant", "barcode", "description", "location_letter",
+        "location_number", "location_shelf", "category_id", "storage_location_id",
+    )
+    # Felder, aus denen die Dubletten-Signatur (duplicates.py) entsteht
+    SIMILARITY_FIELDS = ("name", "variant", "description")
+    # Felder, die im Typeahead-Index (suggest.py) stehen
+    SUGGEST_FIELDS = ("name", "variant", "barcode", "storage_location_id", "overview_id", "is_active")
+
     def __str__(self):
         return self.name
 
 
 
     # ---------- NEU: QR-Helfer (Eigenschaften) ----------
+    # URLs enthalten einen Inhalts-Hash (codes.py) → kein Dateisystem-Zugriff
     @property
-    def qr_file_path(self) -> str:
-        """Absoluter Dateipfad des QR-Codes."""
-        return os.path.join(settings.MEDIA_ROOT, 'qrcodes', f'qr_{self.id}.jpg') if self.id else ""
+    def qr_url(self) -> str:
+        """URL des QR-Codes (PNG, für Templates/Download)."""
+        return codes.url_for(self, "qr")
 
     @property
-    def qr_url(self) -> str:
-        """Öffentliche URL des QR-Codes (für Templates/Download)."""
-        if not self.id:
-            return ""
-        # MEDIA_URL endet i. d. R. mit '/', daher bewusst ohne extra Slash hier
-        return f"{settings.MEDIA_URL}qrcodes/qr_{self.id}.jpg"
+    def qr_svg_url(self) -> str:
+        return codes.url_for(self, "qr", "svg")
 
     @property
-    def qr_exists(self) -> bool:
-        """True, wenn die QR-Code-Datei existiert."""
-        try:
-            return bool(self.id and os.path.exists(self.qr_file_path))
-        except Exception:
-            return False
+    def barcode_url(self) -> str:
+        """URL des Code128-Barcodes (PNG)."""
+        return codes.url_for(self, "barcode")
+
+    @property
+    def nfc_qr_url(self) -> str:
+        """QR-Code des NFC-Links ('' ohne NFC-Token)."""
+        return codes.url_for(self, "nfc")
     # ---------- Ende NEU ----------
 
-    def save(self, *args, **kwargs):
-        is_new = self._state.adding
-        regenerate_qr = False
+    TOKEN_ATTEMPTS = 3
 
+    def _fill_tokens(self) -> list[str]:
+        """Leere Barcode-/NFC-Tokens zufällig füllen; liefert die erzeugten Felder."""
+        generated = []
         if not self.barcode:
-            self.barcode = str(uuid.uuid4())[:12]
-            while InventoryItem.objects.filter(barcode=self.barcode).exists():
-                self.barcode = str(uuid.uuid4())[:12]
-
-        self.barcode_text = f"Barcode für {self.name}: {self.barcode}"
-
+            self.barcode = uuid.uuid4().hex[:12]
+            generated.append("barcode")
         if not self.nfc_token:
             self.nfc_token = uuid.uuid4().hex[:16]
-            while InventoryItem.objects.filter(nfc_token=self.nfc_token).exists():
-                self.nfc_token = uuid.uuid4().hex[:16]
+            generated.append("nfc_token")
+        return generated
+
+    def _token_taken(self, generated: list[str]) -> bool:
+        """Kollidiert einer der zufällig erzeugten Tokens mit einem anderen Item?"""
+        match = Q()
+        for name in generated:
+            match |= Q(**{name: getattr(self, name)})
+        return InventoryItem.objects.filter(match).exists()
+
+    # Felder der alten Zeile, die save() für Dirty-Flags und Teilbaum-Summen braucht
+    PREVIOUS_FIELDS = tuple(dict.fromkeys((
+        *SEARCH_FIELDS, *SIMILARITY_FIELDS, *SUGGEST_FIELDS, "quantity", "low_quantity",
+    )))
+
+    def save(self, *args, **kwargs):
+        """
+        Speichert nur die Zeile. Suchindex, Dubletten-Signatur, Typeahead und
+        Teilbaum-Summen ziehen die post_save-Signale nach dem Commit nach
+        (signals.py); version bleibt danach deferred (wird bei Bedarf gelesen).
+        """
+        is_new = self._state.adding
+        # Kollisionen fängt der Unique-Index ab (statt exists()-Schleifen vorab)
+        generated = self._fill_tokens()
+        self.barcode_text = f"Barcode für {self.name}: {self.barcode}"
+        media_dirty = is_new
 
         if not is_new:
-            old = InventoryItem.objects.get(pk=self.pk)
-            if (old.name != self.name or
-                old.location_letter != self.location_letter or
-                old.location_number != self.location_number or
-                old.location_shelf != self.location_shelf):
-                regenerate_qr = True
-
-        super().save(*args, **kwargs)
-
-        qr_path = self.qr_file_path  # ← nutzt die neue Property
-        if is_new or regenerate_qr or not os.path.exists(qr_path):
-            self.generate_barcode_image()
-            self.save_barcode_text_to_file()
-            self.generate_qr_code()
-
-    def generate_barcode_image(self):
-        if not self.barcode:
-            return
-        path = os.path.join(settings.MEDIA_ROOT, 'barcodes')
-        os.makedirs(path, exist_ok=True)
-        try:
-            barcode = Code128(self.barcode, writer=ImageWriter())
-            barcode.save(os.path.join(path, f'barcode_{self.barcode}'))
-        except Exception:
-            logger.exception("Fehler Barcode-Erzeugung für Item %s", self.id)
-
-    def save_barcode_text_to_file(self):
-        path = os.path.join(settings.MEDIA_ROOT, 'barcodes')
-        os.makedirs(path, exist_ok=True)
-        with open(os.path.join(path, f'barcode_{self.id}.txt'), 'w') as file:
-            file.write(self.barcode_text)
-
-    def generate_qr_code(self):
-        try:
-            base = (
-                GlobalSettings.objects.first().qr_base_url
-                if GlobalSettings.objects.exists()
-                else settings.INVENTORY_BASE_URL
+            old = InventoryItem.objects.only(*self.PREVIOUS_FIELDS).get(pk=self.pk)
+            # Für den Versionszähler: Verschieben betrifft auch das alte Dashboard.
+            self._previous_overview_id = old.overview_id
+            # Suchindex nur neu aufbauen, wenn sich ein durchsuchbares Feld ändert
+            self._search_dirty = any(getattr(old, f) != getattr(self, f) for f in self.SEARCH_FIELDS)
+            self._suggest_dirty = any(getattr(old, f) != getattr(self, f) for f in self.SUGGEST_FIELDS)
+            self._similarity_dirty = any(getattr(old, f) != getattr(self, f) for f in self.SIMILARITY_FIELDS)
+            # Barcode-Bild hängt am Wert, QR nur an der ID (+ Basis-URL, siehe signals.py)
+            media_dirty = old.barcode != self.barcode
+            # borrowed_open/latest_comment nie mit einem veralteten Instanzwert überschreiben
+            if kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+                kwargs["update_fields"] = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name not in ("borrowed_open", "latest_comment")
+                ]
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+                if {"quantity", "low_quantity"} & kwargs["update_fields"]:
+                    kwargs["update_fields"].add("below_minimum")
+            self.version = F("version") + 1
+        self.below_minimum = self.quantity < self.low_quantity
+        # Teilbaum-Summen der Lagerorte (post_save → rollups.apply_item_change)
+        if is_new:
+            self._rollup_change = (None, rollups.item_state(self))
+        else:
+            self._rollup_change = (
+                rollups.item_state(old),
+                rollups.item_state(self, fallback=old, fields=kwargs.get("update_fields")),
             )
-            url = f"{base}/edit-item/{self.id}"
-            qr = qrcode.make(url)
-            path = os.path.join(settings.MEDIA_ROOT, 'qrcodes')
-            os.makedirs(path, exist_ok=True)
-            # ↓ nutzt den standardisierten Dateinamen
-            qr.save(self.qr_file_path)
-        except Exception:
-            logger.exception("Fehler bei QR-Code-Generierung für Item %s", self.id)
+
+        if is_new and generated:
+            for attempt in range(self.TOKEN_ATTEMPTS):
+                try:
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                    break
+                except IntegrityError:
+                    # nur Kollisionen der erzeugten Tokens wiederholen, alles andere ist ein echter Fehler
+                    if attempt == self.TOKEN_ATTEMPTS - 1 or not self._token_taken(generated):
+                        raise
+                    for name in generated:
+                        setattr(self, name, "")
+                    self._fill_tokens()
+                    self.barcode_text = f"Barcode für {self.name}: {self.barcode}"
+        else:
+            super().save(*args, **kwargs)
+        if not is_new:
+            # in der DB per F() erhöht → deferred statt Ausdruck bzw. Extra-SELECT
+            self.__dict__.pop("version", None)
+
+        # Codes vorrendern übernimmt der Worker (media.py, process_media_jobs)
+        if media_dirty:
+            media.enqueue([self.pk], created=is_new)
 
     @property
     def verliehen(self):
-        return (self.borrowings
-                .filter(returned=False)
-                .aggregate(total=models.Sum("quantity_borrowed"))
-               )["total"] or 0
+        return self.borrowed_open
 
     @property
     def borrowed_quantity(self):
@@ -460,17 +516,59 @@ class InventoryItem(models.Model):
     def muss_bestellt_werden(self):
         return self.quantity < self.dynamischer_mindestbestand
 
+    @staticmethod
+    def below_minimum_after(delta=0):
+        """
+        Ausdruck für below_minimum nach quantity += delta im selben UPDATE.
+        Muss VOR quantity stehen: MySQL wertet SET von links nach rechts mit
+        bereits neuen Werten aus, PostgreSQL/SQLite immer mit den alten.
+        """
+        return ExpressionWrapper(Q(quantity__lt=F("low_quantity") - delta), output_field=models.BooleanField())
+
     @property
     def is_expired(self):
         """True, wenn maintenance_date in der Vergangenheit liegt."""
         return bool(self.maintenance_date and self.maintenance_date < date.today())
 
+    @classmethod
+    def recompute_borrowed_open(cls, item_ids=None) -> int:
+        """
+        Setzt borrowed_open per UPDATE … = (SELECT SUM …) neu (alle Items oder
+        die angegebenen IDs). Liefert die Anzahl aktualisierter Zeilen.
+        """
+        open_total = (
+            BorrowedItem.objects
+            .filter(item=OuterRef("pk"), returned=False)
+            .values("item")
+            .annotate(total=Sum("quantity_borrowed"))
+            .values("total")
+        )
+        qs = cls.objects.all() if item_ids is None else cls.objects.filter(pk__in=item_ids)
+        return qs.update(borrowed_open=Coalesce(Subquery(open_total), 0), version=F("version") + 1)
+
+    @classmethod
+    def refresh_latest_comments(cls, item_ids=None) -> int:
+        """Setzt latest_comment per UPDATE … = (SELECT id … LIMIT 1) neu (alle oder die angegebenen Items)."""
+        newest = (
+            ItemComment.objects
+            .filter(item=OuterRef("pk"))
+            .order_by("-updated_at", "-created_at", "-pk")
+            .values("pk")[:1]
+        )
+        qs = cls.objects.all() if item_ids is None else cls.objects.filter(pk__in=item_ids)
+        return qs.update(latest_comment=Subquery(newest))
+
+    @classmethod
+    def bump_versions(cls, item_ids) -> int:
+        """Zeilenversion erhöhen, wenn sich Dargestelltes ohne save() ändert."""
+        return cls.objects.filter(pk__in=item_ids).update(version=F("version") + 1)
+
     @staticmethod
-    def get_similar_items(item_name):
-        return InventoryItem.objects.filter(
-            models.Q(name__icontains=item_name) |
-            models.Q(description__icontains=item_name)
-        ).exclude(name=item_name)
+    def get_similar_items(item_name, variant="", description="", **kwargs):
+        """Mögliche Dubletten (Items mit Attribut `similarity` in Prozent)."""
+        from .duplicates import duplicate_items  # Lokaler Import (Zirkelbezug models ↔ duplicates)
+
+        return duplicate_items(item_name, variant, description, **kwargs)
 
     class Meta:
         indexes = [
@@ -479,6 +577,14 @@ class InventoryItem(models.Model):
             models.Index(fields=["item_type", "category"]),
             models.Index(fields=["location_letter", "location_number"]),
             models.Index(fields=["date_created"]),
+            # Keyset-Paginierung im Dashboard: (overview, Sortierspalte, id)
+            models.Index(fields=["overview", "name", "id"]),
+            models.Index(fields=["overview", "quantity", "id"]),
+            models.Index(fields=["overview", "low_quantity", "id"]),
+            models.Index(fields=["overview", "borrowed_open", "id"]),
+            # Nachbestellen: only_low im Dashboard und Nachbestell-Liste (reorder.py)
+            models.Index(fields=["overview", "below_minimum", "name", "id"]),
+            models.Index(fields=["below_minimum", "item_type", "is_active"]),
         ]
 
 
@@ -659,17 +765,44 @@ class BorrowedItem(models.Model):
     def __str__(self):
         return f"{self.quantity_borrowed}x {self.item.name} an {self.borrower}"
 
-    def return_item(self):
-        if not self.returned:
-            # Bestand zurück buchen
-            self.item.quantity += self.quantity_borrowed
-            # letzte Nutzung setzen
-            self.item.last_used = timezone.now()
-            self.item.save()
-
-            self.returned = True
-            self.returned_at = timezone.now()
+    def borrow(self):
+        """
+        Legt den Verleih an und bucht Bestand + borrowed_open des Items in
+        einem atomaren UPDATE um (kein Read-Modify-Write auf der Instanz).
+        """
+        with transaction.atomic():
             self.save()
+            InventoryItem.objects.filter(pk=self.item_id).update(
+                below_minimum=InventoryItem.below_minimum_after(-self.quantity_borrowed),
+                quantity=F("quantity") - self.quantity_borrowed,
+                borrowed_open=F("borrowed_open") + self.quantity_borrowed,
+                version=F("version") + 1,
+            )
+            rollups.apply_quantity_delta(self.item_id, -self.quantity_borrowed)
+        bump_overview_versions_on_commit([self.item.overview_id])
+
+    def return_item(self):
+        if self.returned:
+            return
+        now = timezone.now()
+        with transaction.atomic():
+            # Bedingtes UPDATE: parallele Rückgaben buchen nur einmal zurück
+            claimed = BorrowedItem.objects.filter(pk=self.pk, returned=False).update(
+                returned=True, returned_at=now
+            )
+            if claimed:
+                InventoryItem.objects.filter(pk=self.item_id).update(
+                    below_minimum=InventoryItem.below_minimum_after(self.quantity_borrowed),
+                    quantity=F("quantity") + self.quantity_borrowed,
+                    borrowed_open=F("borrowed_open") - self.quantity_borrowed,
+                    last_used=now,
+                    version=F("version") + 1,
+                )
+                rollups.apply_quantity_delta(self.item_id, self.quantity_borrowed)
+        self.returned = True
+        self.returned_at = now
+        if claimed:
+            bump_overview_versions_on_commit([self.item.overview_id])
 
     class Meta:
         indexes = [
@@ -758,31 +891,128 @@ class StorageLocation(models.Model):
         related_name='children',
         on_delete=models.CASCADE
     )
-    # …
+    # Materialisierter Pfad, gepflegt in save() (inkl. aller Unterorte):
+    # path = IDs von der Wurzel "/1/5/9/" (Teilbaum = path__startswith),
+    # full_path = "Werkstatt > Regal 2 > Fach 3", depth = 0 für Wurzeln
+    path = models.CharField(max_length=255, default="", editable=False, db_index=True)
+    full_path = models.CharField(max_length=1000, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    PATH_SEPARATOR = " > "
+    TREE_FIELDS = ("path", "full_path", "depth")
 
     def __str__(self):
         return self.name
 
     def get_full_path(self):
+        if self.full_path:
+            return self.full_path
+        # noch nicht gespeichert
         if self.parent:
-            return f"{self.parent.get_full_path()} > {self.name}"
+            return f"{self.parent.get_full_path()}{self.PATH_SEPARATOR}{self.name}"
         return self.name
 
     @property
     def level(self):
-        lvl = 0
-        node = self.parent
-        while node:
-            lvl += 1
-            node = node.parent
-        return lvl
+        return self.depth
+
+    @property
+    def qr_url(self) -> str:
+        """QR-Code des NFC-Links ('' ohne NFC-Token), siehe codes.py."""
+        return codes.url_for(self, "location")
+
+    def get_descendants(self, include_self=False):
+        qs = StorageLocation.objects.filter(path__startswith=self.path)
+        return qs if include_self else qs.exclude(pk=self.pk)
+
+    @staticmethod
+    def path_ids(path: str) -> list[int]:
+        """IDs entlang eines Pfads, Wurzel zuerst ("/1/5/9/" → [1, 5, 9])."""
+        return [int(pk) for pk in (path or "").strip("/").split("/") if pk]
+
+    def subtree_items_q(self, field: str = "storage_location") -> Q:
+        """Filter für Items im Lagerort inkl. aller Unterorte (ein LIKE 'pfad%' über den Index)."""
+        if not self.path:
+            return Q(**{field: self})
+        return Q(**{f"{field}__path__startswith": self.path})
+
+    @classmethod
+    def rebuild_paths(cls) -> int:
+        """
+        Berechnet path/full_path/depth aller Lagerorte neu (nach bulk_create,
+        Importen oder direkten SQL-Änderungen). Gibt die Anzahl geänderter zurück.
+        """
+        nodes = {pk: (name, parent_id) for pk, name, parent_id in cls.objects.values_list("pk", "name", "parent_id")}
+        resolved: dict[int, tuple[str, str, int]] = {}
+
+        def resolve(pk):
+            chain, current = [], pk
+            while current is not None and current in nodes and current not in resolved and current not in chain:
+                chain.append(current)
+                current = nodes[current][1]
+            path, full_path, depth = resolved.get(current, ("/", "", -1))
+            for node_pk in reversed(chain):
+                name = nodes[node_pk][0]
+                path = f"{path}{node_pk}/"
+                full_path = f"{full_path}{cls.PATH_SEPARATOR}{name}" if full_path else name
+                depth += 1
+                resolved[node_pk] = (path, full_path, depth)
+
+        for pk in nodes:
+            resolve(pk)
+        changed = []
+        for loc in cls.objects.only("pk", *cls.TREE_FIELDS):
+            values = resolved.get(loc.pk)
+            if values is not None and values != (loc.path, loc.full_path, loc.depth):
+                loc.path, loc.full_path, loc.depth = values
+                changed.append(loc)
+        cls.objects.bulk_update(changed, cls.TREE_FIELDS, batch_size=500)
+        return len(changed)
 
     def save(self, *args, **kwargs):
         if not self.nfc_token:
             self.nfc_token = uuid.uuid4().hex[:16]
             while StorageLocation.objects.filter(nfc_token=self.nfc_token).exists():
                 self.nfc_token = uuid.uuid4().hex[:16]
-        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"name", "parent", "parent_id"} & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *self.TREE_FIELDS}
+
+        old = None
+        if not self._state.adding:
+            old = StorageLocation.objects.filter(pk=self.pk).values_list(*self.TREE_FIELDS).first()
+        parent = None
+        if self.parent_id:
+            parent = StorageLocation.objects.filter(pk=self.parent_id).values_list(*self.TREE_FIELDS).first()
+            if old and parent and parent[0].startswith(old[0]):
+                raise ValueError("Ein Lagerort kann nicht unter sich selbst oder einen Unterort gehängt werden.")
+        prefix, parent_full_path, parent_depth = parent or ("/", "", -1)
+        self.full_path = f"{parent_full_path}{self.PATH_SEPARATOR}{self.name}" if parent_full_path else self.name
+        self.depth = parent_depth + 1
+
+        with transaction.atomic():
+            if self.pk is None:
+                super().save(*args, **kwargs)
+                self.path = f"{prefix}{self.pk}/"
+                StorageLocation.objects.filter(pk=self.pk).update(path=self.path)
+                return
+            self.path = f"{prefix}{self.pk}/"
+            # für die Teilbaum-Summen (rollups.py, post_save)
+            self._previous_path = old[0] if old else ""
+            if old and old[0] and old != (self.path, self.full_path, self.depth):
+                # Umbenennen/Umhängen: ganzer Teilbaum in einem UPDATE – vor dem
+                # eigenen save(), damit post_save-Handler (Suchindex) neue Pfade sehen
+                old_path, old_full_path, old_depth = old
+                StorageLocation.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr("path", len(old_path) + 1)),
+                    full_path=Concat(Value(self.full_path), Substr("full_path", len(old_full_path) + 1)),
+                    depth=F("depth") + (self.depth - old_depth),
+                )
+            super().save(*args, **kwargs)
 
     class Meta:
         indexes = [
@@ -790,6 +1020,24 @@ class StorageLocation(models.Model):
         ]
 
 
+class StorageLocationRollup(models.Model):
+    """
+    Summen über den ganzen Teilbaum eines Lagerorts (nur aktive Items).
+    Eigene Tabelle, damit Formular-Saves des Lagerorts die Zähler nicht mit
+    veralteten Werten überschreiben. Pflege per F()-Delta in rollups.py,
+    Reparatur: manage.py repair_location_rollups
+    """
+    location = models.OneToOneField(
+        StorageLocation, primary_key=True, on_delete=models.CASCADE, related_name="rollup"
+    )
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.IntegerField(default=0)
+    low_stock_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.location_id}: {self.item_count} Items"
+
+
 # --- NEU: Modulares Dashboard/Overview --- #
 class Overview(models.Model):
     name = models.CharField(max_length=80, unique=True)
@@ -908,13 +1156,103 @@ class ItemComment(models.Model):
     class Meta:
         ordering = ["-updated_at", "-created_at"]
         indexes = [
-            models.Index(fields=["item", "-created_at"]),
+            models.Index(fields=["item", "-created_at"], name="inventory_i_item_id_e2a9b0_idx"),
         ]
 
     def __str__(self):
         return f"{self.item.name} ({self.author.username})"
 
 
+class ItemSearchDocument(models.Model):
+    """
+    Denormalisierter Suchtext pro Item (Name, Variante, Barcode, Beschreibung,
+    Fach, Kategorie, Lagerort-Pfad, Tags). Grundlage für FTS5 bzw. tsvector/
+    pg_trgm – Pflege und Abfrage siehe inventory/search.py.
+    """
+    item = models.OneToOneField(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    document = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Suchindex {self.item_id}"
+
+
+class ItemSimilaritySignature(models.Model):
+    """
+    MinHash-Signatur eines Items (Name, Variante, Beschreibung) für die
+    Dublettenerkennung beim Anlegen – siehe inventory/duplicates.py.
+    """
+    item = models.OneToOneField(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="similarity_signature",
+    )
+    signature = models.BinaryField()
+
+    def __str__(self):
+        return f"Signatur {self.item_id}"
+
+
+class ItemSimilarityBand(models.Model):
+    """LSH-Bucket eines Signatur-Bands; gleiche Buckets = Dubletten-Kandidaten."""
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name="similarity_bands")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["item", "band"], name="uniq_similarity_item_band"),
+        ]
+        indexes = [
+            models.Index(fields=["band", "bucket"]),
+        ]
+
+    def __str__(self):
+        return f"Band {self.band} von Item {self.item_id}"
+
+
+class MediaJob(models.Model):
+    """
+    Ausstehende Barcode-/QR-Erzeugung eines Items (eine Zeile pro Item).
+    save() stellt nur ein, gerendert wird im Worker (media.py,
+    manage.py process_media_jobs); payload_hash = zuletzt gerenderter Inhalt.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ausstehend"
+        RUNNING = "running", "In Arbeit"
+        DONE = "done", "Erledigt"
+        FAILED = "failed", "Fehlgeschlagen"
+
+    item = models.OneToOneField(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="media_job",
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    payload_hash = models.CharField(max_length=64, blank=True, default="")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    requested_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "requested_at"]),
+        ]
+
+    def __str__(self):
+        return f"Medien für Item {self.item_id}: {self.status}"
+
+
 # -------------------------------------------------------------------
 # NEU: Feedback-Modelle (lokales Feedback-Board mit Votes & Kommentaren)
 # -------------------------------------------------------------------
@@ -954,12 +1292,27 @@ class Feedback(models.Model):
     def __str__(self):
         return f"{self.title} [{self.get_status_display()}]"
 
+    @staticmethod
+    def with_vote_counts(queryset):
+        """
+        Annotiert Up-/Downvotes, damit Listen nicht pro Zeile zählen müssen
+        (upvotes_count/downvotes_count nutzen die Annotation automatisch).
+        """
+        return queryset.annotate(
+            upvotes_total=models.Count("votes", filter=models.Q(votes__value=1)),
+            downvotes_total=models.Count("votes", filter=models.Q(votes__value=-1)),
+        )
+
     @property
     def upvotes_count(self) -> int:
+        if "upvotes_total" in self.__dict__:
+            return self.upvotes_total
         return self.votes.filter(value=1).count()
 
     @property
     def downvotes_count(self) -> int:
+        if "downvotes_total" in self.__dict__:
+            return self.downvotes_total
         return self.votes.filter(value=-1).count()
 
 
@@ -0,0 +1,195 @@
+# inventory/nplusone.py
+#
+# N+1-Erkennung für Entwicklung und Tests:
+# - jede SQL-Anweisung wird auf ihre "Form" reduziert (Literale/Platzhalter raus)
+# - wiederholt sich eine Form innerhalb eines Scopes (Request, Command, Export)
+#   öfter als INVENTORY_NPLUSONE_THRESHOLD, wird die Aufrufstelle (Python-Datei
+#   und ggf. Template + Zeile) geloggt bzw. eine Exception geworfen
+# - Requests über NPlusOneMiddleware, alle Management-Commands der App über
+#   install_command_hook() (BaseCommand.execute), Exporte über detect()
+# Steuerung über settings.INVENTORY_NPLUSONE_DETECTION = "off" | "log" | "raise".
+from __future__ import annotations
+
+import functools
+import logging
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+logger = logging.getLogger("inventory.nplusone")
+
+DEFAULT_THRESHOLD = 5
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)")
+_RE_WS = re.compile(r"\s+")
+
+_THIS_FILE = os.path.abspath(__file__)
+_SKIP_FILES = {_THIS_FILE, os.path.join(os.path.dirname(_THIS_FILE), "performance.py")}
+
+
+class NPlusOneDetected(Exception):
+    """Wird im Modus "raise" am Ende eines Scopes geworfen."""
+
+
+def mode() -> str:
+    value = str(getattr(settings, "INVENTORY_NPLUSONE_DETECTION", "off") or "off").lower()
+    return value if value in ("log", "raise") else "off"
+
+
+def threshold() -> int:
+    return int(getattr(settings, "INVENTORY_NPLUSONE_THRESHOLD", DEFAULT_THRESHOLD))
+
+
+def fingerprint(sql: str) -> str:
+    """Reduziert SQL auf seine Form: gleiche Query mit anderen Werten → gleicher Fingerprint."""
+    shape = _RE_STRING.sub("?", sql)
+    shape = _RE_NUMBER.sub("?", shape)
+    shape = _RE_PLACEHOLDER_LIST.sub("(...)", shape)
+    return _RE_WS.sub(" ", shape).strip()
+
+
+def _call_site() -> str:
+    """Innerste Aufrufstelle im Projektcode und (falls vorhanden) im Template."""
+    base_dir = str(getattr(settings, "BASE_DIR", ""))
+    python_site = None
+    template_site = None
+    frame = sys._getframe(2)
+    while frame is not None and (python_site is None or template_site is None):
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            template_site is None
+            and frame.f_code.co_name == "render_annotated"
+            and "django" in filename
+        ):
+            node = frame.f_locals.get("self")
+            context = frame.f_locals.get("context")
+            origin = getattr(getattr(context, "template", None), "origin", None)
+            token = getattr(node, "token", None)
+            if origin is not None and token is not None:
+                template_site = f"{origin.template_name or origin.name}:{token.lineno}"
+        if (
+            python_site is None
+            and filename.startswith(base_dir)
+            and filename not in _SKIP_FILES
+            and "site-packages" not in filename
+        ):
+            python_site = f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    parts = [python_site or "?"]
+    if template_site:
+        parts.append(f"Template {template_site}")
+    return " | ".join(parts)
+
+
+@dataclass
+class Finding:
+    fingerprint: str
+    count: int
+    call_site: str
+
+
+@dataclass
+class _Scope:
+    label: str
+    limit: int
+    counts: dict[str, int] = field(default_factory=dict)
+    sites: dict[str, str] = field(default_factory=dict)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Nur Lese-Queries: wiederholte INSERT/UPDATE sind Schreibschleifen, kein N+1.
+        if sql.lstrip()[:6].upper() != "SELECT":
+            return execute(sql, params, many, context)
+        shape = fingerprint(sql)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+        if count == self.limit + 1:
+            # Aufrufstelle erst beim Überschreiten bestimmen – Stack-Walk ist teuer.
+            self.sites[shape] = _call_site()
+        return execute(sql, params, many, context)
+
+    def findings(self) -> list[Finding]:
+        return [
+            Finding(shape, count, self.sites.get(shape, "?"))
+            for shape, count in sorted(self.counts.items(), key=lambda kv: -kv[1])
+            if count > self.limit
+        ]
+
+
+_active: ContextVar[_Scope | None] = ContextVar("inventory_nplusone_scope", default=None)
+
+
+def report(label: str, findings: list[Finding]) -> str:
+    lines = [f"N+1 in {label}: {len(findings)} wiederholte Query-Form(en)"]
+    for f in findings:
+        lines.append(f"  {f.count}x {f.call_site}\n      {f.fingerprint[:300]}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def detect(label: str, *, raise_errors: bool | None = None):
+    """
+    Überwacht alle Queries im Block. Verschachtelte Scopes sind No-Ops
+    (der äußere Scope – z. B. die Request – meldet).
+    """
+    current_mode = mode()
+    if current_mode == "off" or _active.get() is not None:
+        yield None
+        return
+
+    from django.db import connections
+
+    scope = _Scope(label=label, limit=threshold())
+    token = _active.set(scope)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(scope))
+            yield scope
+    finally:
+        _active.reset(token)
+
+    findings = scope.findings()
+    if not findings:
+        return
+    message = report(label, findings)
+    should_raise = current_mode == "raise" if raise_errors is None else raise_errors
+    if should_raise:
+        raise NPlusOneDetected(message)
+    logger.warning(message)
+
+
+_COMMAND_PREFIX = f"{__package__}.management.commands."
+
+
+def install_command_hook() -> None:
+    """
+    Umhüllt BaseCommand.execute (einmalig, aus AppConfig.ready): jeder
+    Management-Command dieser App läuft in einem eigenen Scope, Label ist der
+    Command-Name. Fremde Commands (migrate & Co.) bleiben unberührt; ob
+    gemeldet wird, entscheidet wie überall mode() zur Laufzeit.
+    Commands, die unabhängige Einheiten wiederholen (Requests, Exporte,
+    Durchläufe), setzen `nplusone_scope = False` und öffnen feinere Scopes selbst.
+    """
+    from django.core.management.base import BaseCommand
+
+    original = BaseCommand.execute
+    if getattr(original, "_nplusone_hook", False):
+        return
+
+    @functools.wraps(original)
+    def execute(self, *args, **options):
+        module = type(self).__module__
+        if not module.startswith(_COMMAND_PREFIX) or not getattr(self, "nplusone_scope", True):
+            return original(self, *args, **options)
+        with detect(f"command {module.rsplit('.', 1)[-1]}"):
+            return original(self, *args, **options)
+
+    execute._nplusone_hook = True
+    BaseCommand.execute = execute
@@ -0,0 +1,111 @@
+# inventory/pagination.py
+#
+# Keyset-(Cursor-)Paginierung für große Listen:
+# - sortiert immer nach (Sortierwert, id) – id ist der Tiebreaker
+# - die nächste/vorige Seite wird per WHERE (wert, id) > (letzter Wert, letzte id)
+#   geholt statt per OFFSET → Seite 500 kostet so viel wie Seite 1
+# - kein COUNT(*): ob es weitergeht, zeigt ein zusätzlich geladener Datensatz
+# - Cursor sind signierte, undurchsichtige Tokens (Wert, id, Richtung, Seite,
+#   Fingerprint der Filter/Sortierung); passt der Fingerprint nicht mehr,
+#   beginnt die Liste wieder bei Seite 1
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "inventory.pagination.cursor"
+
+
+@dataclass
+class KeysetPage:
+    object_list: list = field(default_factory=list)
+    number: int = 1
+    has_next: bool = False
+    has_previous: bool = False
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(payload: dict) -> str:
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token: str | None) -> dict | None:
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+class KeysetPaginator:
+    """
+    `key` ist ein Feld oder eine Annotation des Querysets, deren Werte nicht
+    NULL sein dürfen (ggf. vorher per Coalesce annotieren) und sich als JSON
+    serialisieren lassen.
+    """
+
+    def __init__(self, queryset, key: str, *, descending: bool = False, per_page: int = 25, fingerprint: str = ""):
+        self.queryset = queryset
+        self.key = key
+        self.descending = descending
+        self.per_page = max(1, int(per_page))
+        self.fingerprint = fingerprint
+
+    def _ordering(self, backwards: bool) -> list[str]:
+        desc = self.descending != backwards
+        prefix = "-" if desc else ""
+        return [f"{prefix}{self.key}", f"{prefix}pk"]
+
+    def _seek(self, value, pk, backwards: bool) -> Q:
+        op = "lt" if self.descending != backwards else "gt"
+        return Q(**{f"{self.key}__{op}": value}) | Q(**{self.key: value, f"pk__{op}": pk})
+
+    def _cursor(self, row, direction: str, number: int) -> str:
+        return encode_cursor(
+            {"v": getattr(row, self.key), "id": row.pk, "d": direction, "n": number, "f": self.fingerprint}
+        )
+
+    def page(self, cursor: str | None) -> KeysetPage:
+        payload = decode_cursor(cursor)
+        if payload is None or payload.get("f") != self.fingerprint or payload.get("d") not in ("n", "p"):
+            payload = None
+
+        qs = self.queryset
+        backwards = bool(payload and payload["d"] == "p")
+        if payload is not None:
+            qs = qs.filter(self._seek(payload["v"], payload["id"], backwards))
+        rows = list(qs.order_by(*self._ordering(backwards))[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        page = KeysetPage(object_list=rows)
+        if payload is None:
+            page.has_next = has_more
+        elif backwards:
+            rows.reverse()
+            page.has_previous = has_more
+            page.has_next = True
+            # Seitenzahl ist nur eine Anzeigehilfe; am Anfang angekommen → 1
+            page.number = max(1, int(payload.get("n") or 1)) if has_more else 1
+        else:
+            page.has_previous = True
+            page.has_next = has_more
+            page.number = max(2, int(payload.get("n") or 2))
+
+        if rows:
+            if page.has_next:
+                page.next_cursor = self._cursor(rows[-1], "n", page.number + 1)
+            if page.has_previous:
+                page.previous_cursor = self._cursor(rows[0], "p", page.number - 1)
+        return page
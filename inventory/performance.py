@@ -0,0 +1,239 @@
+# inventory/performance.py
+#
+# Leichtgewichtige Request-Instrumentierung (siehe PerformanceMiddleware):
+# - SQL-Anzahl/-Zeit über connection.execute_wrapper
+# - Template-Renderzeit über einen Wrapper um das Django-Template-Backend
+# - Zeit in ausgehenden Home-Assistant-Aufrufen über track("ha")
+# - Aggregat pro URL-Name (p50/p95/max, Queries pro Request) im Speicher des
+#   Workers, begrenzt in Anzahl Endpunkte und Samples
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from django.conf import settings
+
+# Wie viele Samples pro Endpunkt und wie viele Endpunkte höchstens gemerkt werden.
+DEFAULT_MAX_SAMPLES = 200
+DEFAULT_MAX_ENDPOINTS = 200
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "INVENTORY_PERFORMANCE_ENABLED", True))
+
+
+class RequestMetrics:
+    """Messwerte einer einzelnen Request (Zeiten in Sekunden)."""
+
+    __slots__ = ("sql_count", "sql_time", "template_time", "external", "_template_depth")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.external: dict[str, float] = {}
+        self._template_depth = 0
+
+    def add_external(self, kind: str, seconds: float) -> None:
+        self.external[kind] = self.external.get(kind, 0.0) + seconds
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("inventory_request_metrics", default=None)
+
+
+def current_metrics() -> RequestMetrics | None:
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Startet eine Messung für den aktuellen Thread/Context und liefert die Metrics."""
+    from django.db import connections
+
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+
+    def _sql_wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.sql_count += 1
+            metrics.sql_time += time.perf_counter() - start
+
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(_sql_wrapper))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def track(kind: str):
+    """Misst einen ausgehenden Aufruf (z. B. "ha") für die laufende Request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_external(kind, time.perf_counter() - start)
+
+
+def timed(kind: str):
+    """Decorator-Variante von track()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Template-Renderzeit
+# ──────────────────────────────────────────────────────────────────────────────
+_template_patch_lock = threading.Lock()
+_template_patched = False
+
+
+def install_template_timing() -> None:
+    """
+    Hängt sich einmalig in django.template.backends.django.Template.render.
+    Verschachtelte Renders (render_to_string im Template-Tag o. Ä.) werden
+    nur einmal gezählt.
+    """
+    global _template_patched
+    with _template_patch_lock:
+        if _template_patched:
+            return
+        from django.template.backends.django import Template
+
+        original = Template.render
+
+        @functools.wraps(original)
+        def render(self, context=None, request=None):
+            metrics = _current.get()
+            if metrics is None:
+                return original(self, context, request)
+            metrics._template_depth += 1
+            start = time.perf_counter()
+            try:
+                return original(self, context, request)
+            finally:
+                metrics._template_depth -= 1
+                if metrics._template_depth == 0:
+                    metrics.template_time += time.perf_counter() - start
+
+        Template.render = render
+        _template_patched = True
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Aggregat pro Endpunkt
+# ──────────────────────────────────────────────────────────────────────────────
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class EndpointStats:
+    """Rollierende Samples (Gesamtzeit ms, Queries, SQL ms) eines Endpunkts."""
+
+    def __init__(self, max_samples: int):
+        self.samples: deque[tuple[float, int, float]] = deque(maxlen=max_samples)
+        self.total_requests = 0
+
+    def add(self, total_ms: float, queries: int, sql_ms: float) -> None:
+        self.samples.append((total_ms, queries, sql_ms))
+        self.total_requests += 1
+
+    def summary(self) -> dict[str, Any]:
+        durations = sorted(s[0] for s in self.samples)
+        queries = [s[1] for s in self.samples]
+        sql = [s[2] for s in self.samples]
+        count = len(self.samples) or 1
+        return {
+            "requests": self.total_requests,
+            "samples": len(self.samples),
+            "p50_ms": round(_percentile(durations, 50), 1),
+            "p95_ms": round(_percentile(durations, 95), 1),
+            "max_ms": round(durations[-1], 1) if durations else 0.0,
+            "avg_queries": round(sum(queries) / count, 1),
+            "max_queries": max(queries) if queries else 0,
+            "avg_sql_ms": round(sum(sql) / count, 1),
+        }
+
+
+class PerformanceRegistry:
+    """Begrenztes In-Memory-Aggregat (pro Worker), LRU über die Endpunkte."""
+
+    def __init__(self, max_endpoints: int = DEFAULT_MAX_ENDPOINTS, max_samples: int = DEFAULT_MAX_SAMPLES):
+        self.max_endpoints = max_endpoints
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stats: OrderedDict[str, EndpointStats] = OrderedDict()
+        self.started_at = time.time()
+
+    def record(self, endpoint: str, total_ms: float, queries: int, sql_ms: float) -> None:
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = EndpointStats(self.max_samples)
+                self._stats[endpoint] = stats
+                while len(self._stats) > self.max_endpoints:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(endpoint)
+            stats.add(total_ms, queries, sql_ms)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = [{"endpoint": name, **stats.summary()} for name, stats in self._stats.items()]
+        return rows
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+
+registry = PerformanceRegistry(
+    max_endpoints=getattr(settings, "INVENTORY_PERFORMANCE_MAX_ENDPOINTS", DEFAULT_MAX_ENDPOINTS),
+    max_samples=getattr(settings, "INVENTORY_PERFORMANCE_MAX_SAMPLES", DEFAULT_MAX_SAMPLES),
+)
+
+
+def endpoint_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is not None:
+        return match.view_name or match._func_path
+    return "<unresolved>"
+
+
+def server_timing_header(metrics: RequestMetrics, total: float) -> str:
+    """Baut den Server-Timing-Header (Dauer in ms)."""
+    ha = metrics.external.get("ha", 0.0)
+    # "view" = Zeit im View-Code inkl. SQL, ohne Template-Rendering und HA.
+    view = max(0.0, total - metrics.template_time - ha)
+    parts = [
+        f'db;dur={metrics.sql_time * 1000:.1f};desc="SQL ({metrics.sql_count})"',
+        f"view;dur={view * 1000:.1f}",
+        f"tpl;dur={metrics.template_time * 1000:.1f}",
+    ]
+    if ha:
+        parts.append(f'ha;dur={ha * 1000:.1f};desc="Home Assistant"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,103 @@
+# inventory/reorder.py
+#
+# Nachbestell-Liste über alle Overviews:
+# - Grundlage ist das gespeicherte InventoryItem.below_minimum (Index
+#   below_minimum + item_type + is_active) → eine Query über die betroffenen
+#   Zeilen statt quantity < low_quantity für jedes Item
+# - "nachbestellen" = aktives Verbrauchsmaterial unter dem Mindestbestand
+#   (wie InventoryItem.muss_bestellt_werden)
+# - gruppiert nach Shop (Domain des order_link) und Kategorie
+# Seite: /reorder/, JSON: /api/reorder/, Digest: manage.py send_reorder_digest
+from __future__ import annotations
+
+from urllib.parse import urlsplit
+
+REORDER_FIELDS = (
+    "id",
+    "name",
+    "variant",
+    "unit",
+    "quantity",
+    "low_quantity",
+    "order_link",
+    "category__name",
+    "overview__name",
+    "overview__slug",
+)
+
+
+def order_domain(link: str | None) -> str:
+    """Shop-Domain ohne www. ('' ohne Bestell-Link)."""
+    link = (link or "").strip()
+    if not link:
+        return ""
+    host = urlsplit(link if "//" in link else f"//{link}").hostname or ""
+    return host.removeprefix("www.")
+
+
+def reorder_queryset(access=None):
+    """Nachzubestellende Items; `access`: nur die für den User sichtbaren Overviews."""
+    from .models import InventoryItem
+
+    qs = InventoryItem.objects.filter(
+        below_minimum=True,
+        item_type="consumable",
+        is_active=True,
+        overview__is_active=True,
+    )
+    if access is not None and not access.is_superuser:
+        qs = qs.filter(overview_id__in=access.allowed_ids)
+    return qs
+
+
+def _last(value: str) -> tuple[bool, str]:
+    # Leere Gruppen ("ohne Shop", "ohne Kategorie") ans Ende
+    return (not value, value.casefold())
+
+
+def reorder_groups(access=None) -> list[dict]:
+    """
+    [{"domain", "item_count", "categories": [{"category", "items": [...]}]}]
+    – direkt als JSON verwendbar.
+    """
+    shops: dict[str, dict[str, list[dict]]] = {}
+    for row in reorder_queryset(access).values(*REORDER_FIELDS):
+        item = {
+            "id": row["id"],
+            "name": row["name"],
+            "variant": row["variant"] or "",
+            "unit": row["unit"] or "",
+            "quantity": row["quantity"],
+            "low_quantity": row["low_quantity"],
+            "shortfall": row["low_quantity"] - row["quantity"],
+            "order_link": row["order_link"] or "",
+            "overview": row["overview__name"],
+            "overview_slug": row["overview__slug"],
+        }
+        domain = order_domain(item["order_link"])
+        shops.setdefault(domain, {}).setdefault(row["category__name"] or "", []).append(item)
+
+    groups = []
+    for domain in sorted(shops, key=_last):
+        categories = [
+            {"category": name, "items": sorted(items, key=lambda it: (it["name"].casefold(), it["id"]))}
+            for name, items in sorted(shops[domain].items(), key=lambda pair: _last(pair[0]))
+        ]
+        groups.append({
+            "domain": domain,
+            "item_count": sum(len(cat["items"]) for cat in categories),
+            "categories": categories,
+        })
+    return groups
+
+
+def digest_lines(groups: list[dict], max_items: int = 10) -> list[str]:
+    """Kurzfassung pro Shop für Benachrichtigungen."""
+    lines = []
+    for group in groups:
+        items = [item for cat in group["categories"] for item in cat["items"]]
+        names = ", ".join(f"{it['name']} ({it['quantity']}/{it['low_quantity']})" for it in items[:max_items])
+        if len(items) > max_items:
+            names += f" … (+{len(items) - max_items})"
+        lines.append(f"{group['domain'] or 'ohne Shop'}: {names}")
+    return lines
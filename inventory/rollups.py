@@ -0,0 +1,193 @@
+# inventory/rollups.py
+#
+# Teilbaum-Summen je Lagerort (StorageLocationRollup): Anzahl aktiver Items,
+# Gesamtbestand, Anzahl unter Mindestbestand – jeweils inkl. aller Unterorte.
+# - gepflegt per F()-Delta auf alle Vorfahren (IDs stehen im materialisierten
+#   StorageLocation.path) → ein UPDATE pro betroffenem Lagerort, keine Rekursion
+# - Item-save()/-delete (signals.py), Verleih/Rückgabe (BorrowedItem),
+#   Import/Massenaktionen gesammelt (apply_item_changes),
+#   Umhängen eines Teilbaums (StorageLocation.save → signals.py)
+# - rebuild() rechnet alles neu (bulk_create, Reparatur: repair_location_rollups)
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+ROLLUP_FIELDS = ("item_count", "total_quantity", "low_stock_count")
+
+# (storage_location_id, quantity, below_minimum) oder None (zählt nirgends)
+ItemState = tuple[int, int, bool] | None
+
+
+def item_state(item, fallback=None, fields: Iterable[str] | None = None) -> ItemState:
+    """
+    Beitrag eines Items. Mit `fields` (update_fields eines save()) kommen
+    nicht gespeicherte Felder aus `fallback` (= Zeile vor dem save()).
+    """
+    fields = None if fields is None else set(fields)
+
+    def value(name, attname=None):
+        if fields is None or name in fields or (attname and attname in fields):
+            return getattr(item, attname or name)
+        return getattr(fallback, attname or name)
+
+    return state(
+        value("storage_location", "storage_location_id"), value("is_active"), value("quantity"), value("low_quantity")
+    )
+
+
+def state(location_id, is_active, quantity, low_quantity) -> ItemState:
+    """Beitrag aus einzelnen Werten (z. B. Schnappschüsse aus history.snapshots)."""
+    if not location_id or not is_active:
+        return None
+    return location_id, quantity, quantity < low_quantity
+
+
+def _add(deltas: dict, state: ItemState, sign: int) -> None:
+    if state is None:
+        return
+    location_id, quantity, below = state
+    delta = deltas[location_id]
+    delta[0] += sign
+    delta[1] += sign * quantity
+    delta[2] += sign * int(below)
+
+
+def _apply(deltas: dict, paths: dict[int, str]) -> None:
+    from .models import StorageLocation, StorageLocationRollup
+
+    for location_id, (count, quantity, low) in deltas.items():
+        if not (count or quantity or low) or location_id not in paths:
+            continue
+        StorageLocationRollup.objects.filter(location_id__in=StorageLocation.path_ids(paths[location_id])).update(
+            item_count=F("item_count") + count,
+            total_quantity=F("total_quantity") + quantity,
+            low_stock_count=F("low_stock_count") + low,
+        )
+
+
+def apply_item_change(before: ItemState, after: ItemState) -> None:
+    """Differenz zwischen zwei Item-Zuständen auf die Vorfahren buchen."""
+    if before != after:
+        apply_item_changes([(before, after)])
+
+
+def apply_item_changes(changes: Iterable[tuple[ItemState, ItemState]]) -> None:
+    """Wie apply_item_change für viele Items (Import, Massenaktionen): ein UPDATE je Lagerort."""
+    from .models import StorageLocation
+
+    deltas: dict[int, list[int]] = defaultdict(lambda: [0, 0, 0])
+    for before, after in changes:
+        _add(deltas, before, -1)
+        _add(deltas, after, 1)
+    deltas = {pk: delta for pk, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    paths = dict(StorageLocation.objects.filter(pk__in=deltas).values_list("pk", "path"))
+    _apply(deltas, paths)
+
+
+def apply_quantity_delta(item_id: int, delta: int) -> None:
+    """
+    Nach einem F()-Update des Bestands (Verleih/Rückgabe) im selben
+    Transaktionsblock: Zeile ist gesperrt, Vorher-Zustand = Nachher - delta.
+    """
+    from .models import InventoryItem
+
+    row = (
+        InventoryItem.objects.filter(pk=item_id)
+        .values_list("storage_location_id", "is_active", "quantity", "low_quantity")
+        .first()
+    )
+    if row is None:
+        return
+    location_id, is_active, quantity, low_quantity = row
+    if not location_id or not is_active:
+        return
+    before = quantity - delta
+    apply_item_change(
+        (location_id, before, before < low_quantity),
+        (location_id, quantity, quantity < low_quantity),
+    )
+
+
+def subtree_moved(location, old_path: str) -> None:
+    """Teilbaum-Summen von den alten zu den neuen Vorfahren umbuchen."""
+    from .models import StorageLocation, StorageLocationRollup
+
+    rollup = StorageLocationRollup.objects.filter(location=location).values_list(*ROLLUP_FIELDS).first()
+    if not rollup or not any(rollup):
+        return
+    count, quantity, low = rollup
+    old_ancestors = StorageLocation.path_ids(old_path)[:-1]
+    new_ancestors = StorageLocation.path_ids(location.path)[:-1]
+    for ancestors, sign in ((old_ancestors, -1), (new_ancestors, 1)):
+        if ancestors:
+            StorageLocationRollup.objects.filter(location_id__in=ancestors).update(
+                item_count=F("item_count") + sign * count,
+                total_quantity=F("total_quantity") + sign * quantity,
+                low_stock_count=F("low_stock_count") + sign * low,
+            )
+
+
+def recompute(location_ids: Iterable[int]) -> None:
+    """Summen einzelner Lagerorte neu zählen (z. B. Vorfahren eines gelöschten Teilbaums)."""
+    from .models import InventoryItem, StorageLocation, StorageLocationRollup
+
+    for location in StorageLocation.objects.filter(pk__in=list(location_ids)).only("pk", "path"):
+        totals = InventoryItem.objects.filter(location.subtree_items_q(), is_active=True).aggregate(
+            item_count=Count("pk"),
+            total_quantity=Coalesce(Sum("quantity"), 0),
+            low_stock_count=Count("pk", filter=Q(below_minimum=True)),
+        )
+        StorageLocationRollup.objects.update_or_create(location=location, defaults=totals)
+
+
+def rebuild() -> int:
+    """Alle Summen neu berechnen; schreibt nur abweichende Zeilen. Gibt deren Anzahl zurück."""
+    from .models import InventoryItem, StorageLocation, StorageLocationRollup
+
+    paths = dict(StorageLocation.objects.values_list("pk", "path"))
+    totals = {pk: [0, 0, 0] for pk in paths}
+    rows = (
+        InventoryItem.objects.filter(is_active=True, storage_location__isnull=False)
+        .values("storage_location_id")
+        .annotate(n=Count("pk"), quantity=Coalesce(Sum("quantity"), 0), low=Count("pk", filter=Q(below_minimum=True)))
+        .values_list("storage_location_id", "n", "quantity", "low")
+    )
+    for location_id, count, quantity, low in rows:
+        for pk in StorageLocation.path_ids(paths.get(location_id, "")):
+            if pk in totals:
+                totals[pk][0] += count
+                totals[pk][1] += quantity
+                totals[pk][2] += low
+
+    existing = {r.location_id: r for r in StorageLocationRollup.objects.all()}
+    to_create, to_update = [], []
+    for pk, (count, quantity, low) in totals.items():
+        rollup = existing.get(pk)
+        if rollup is None:
+            to_create.append(StorageLocationRollup(
+                location_id=pk, item_count=count, total_quantity=quantity, low_stock_count=low
+            ))
+        elif (rollup.item_count, rollup.total_quantity, rollup.low_stock_count) != (count, quantity, low):
+            rollup.item_count, rollup.total_quantity, rollup.low_stock_count = count, quantity, low
+            to_update.append(rollup)
+    StorageLocationRollup.objects.bulk_create(to_create, batch_size=500)
+    StorageLocationRollup.objects.bulk_update(to_update, ROLLUP_FIELDS, batch_size=500)
+    return len(to_create) + len(to_update)
+
+
+def rollups_for(location_ids: Iterable[int]) -> dict[int, dict]:
+    """{location_id: {"item_count", "total_quantity", "low_stock_count"}} in einer Query."""
+    from .models import StorageLocationRollup
+
+    return {
+        row["location_id"]: row
+        for row in StorageLocationRollup.objects.filter(location_id__in=list(location_ids)).values(
+            "location_id", *ROLLUP_FIELDS
+        )
+    }
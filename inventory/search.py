@@ -0,0 +1,287 @@
+# inventory/search.py
+#
+# Volltextsuche über Items mit austauschbarem Backend:
+# - Grundlage ist ein denormalisierter Suchtext pro Item (ItemSearchDocument),
+#   gepflegt über Signale (Item, Tags, Kategorie, Lagerort) bzw.
+#   `manage.py rebuild_search_index`
+# - PostgreSQL: GIN-Index auf to_tsvector('simple', document) (Wort-/Präfix-
+#   treffer, Ranking über ts_rank) + pg_trgm-GIN für Teilstrings (Barcodes)
+# - SQLite: FTS5-Tabelle (Trigram-Tokenizer, sonst unicode61 mit Präfixsuche),
+#   per Trigger synchron zu ItemSearchDocument; Ranking über Namenstreffer
+#   (bm25() bräuchte eine korrelierte MATCH-Subquery pro Treffer)
+# - sonst (z. B. MySQL): icontains auf dem Suchtext (ein Feld statt vier)
+# Auswahl über settings.INVENTORY_SEARCH_BACKEND = auto | postgres | sqlite | orm.
+# Alle Backends verknüpfen die Suchbegriffe mit UND und liefern eine ganzzahlige
+# Relevanz (höher = besser) als Annotation `search_rank`.
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, Func, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+MAX_TOKENS = 8
+FTS_TABLE = "inventory_item_fts"
+
+_RE_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Pro Datenbank einmal ermittelte Fähigkeiten (FTS5-Tokenizer, pg_trgm)
+_capabilities: dict[str, str | None] = {}
+
+
+def tokenize(query: str) -> list[str]:
+    seen = []
+    for token in _RE_TOKEN.findall((query or "").lower()):
+        if token not in seen:
+            seen.append(token)
+    return seen[:MAX_TOKENS]
+
+
+class _SQL(Func):
+    """
+    Rohes SQL-Fragment mit Platzhaltern {0}, {1} … für Ausdrücke.
+    Spalten bleiben Ausdrücke (F) → Django setzt bei Subqueries die Aliase richtig.
+    """
+
+    def __init__(self, sql: str, *expressions, output_field):
+        self.sql = sql
+        super().__init__(*expressions, output_field=output_field)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        parts, params = [], []
+        for expression in self.get_source_expressions():
+            part, part_params = compiler.compile(expression)
+            parts.append(part)
+            params.extend(part_params)
+        return self.sql.format(*parts), params
+
+
+def _like_escape(token: str) -> str:
+    return token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Backends
+# ──────────────────────────────────────────────────────────────────────────────
+class OrmSearchBackend:
+    """Fallback ohne Spezialindex: icontains je Suchbegriff auf dem Suchtext."""
+
+    name = "orm"
+
+    def documents(self, tokens: list[str]):
+        from .models import ItemSearchDocument
+
+        docs = ItemSearchDocument.objects.all()
+        for token in tokens:
+            docs = docs.filter(document__icontains=token)
+        return docs
+
+    def rank(self, tokens: list[str], docs):
+        """
+        Relevanz direkt aus den Item-Spalten: Treffer im Namen zählen mehr als
+        in Beschreibung/Tags/Lagerort, Namensanfang am meisten. Bewusst keine
+        korrelierte Subquery – die kostet pro Treffer eine eigene Suche.
+        """
+        score = Case(When(name__istartswith=tokens[0], then=Value(50)), default=Value(0))
+        for token in tokens:
+            score = score + Case(When(name__icontains=token, then=Value(100)), default=Value(0))
+        return ExpressionWrapper(score, output_field=IntegerField())
+
+    def filter(self, queryset, query: str, *, ranked: bool = False):
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.annotate(search_rank=Value(0, output_field=IntegerField())) if ranked else queryset
+        docs = self.documents(tokens)
+        queryset = queryset.filter(pk__in=docs.values("item_id"))
+        if ranked:
+            queryset = queryset.annotate(search_rank=self.rank(tokens, docs))
+        return queryset
+
+
+class PostgresSearchBackend(OrmSearchBackend):
+    name = "postgres"
+
+    def documents(self, tokens: list[str]):
+        from .models import ItemSearchDocument
+
+        tsquery = " & ".join(f"{token}:*" for token in tokens)
+        document = F("document")
+        # Wort-/Präfixtreffer über den tsvector-Index ODER alle Begriffe als Teilstring (pg_trgm)
+        substring_sql = " AND ".join(f"{{0}} ILIKE {{{i + 2}}}" for i in range(len(tokens)))
+        match = _SQL(
+            f"(to_tsvector('simple', {{0}}) @@ to_tsquery('simple', {{1}}) OR ({substring_sql}))",
+            document,
+            Value(tsquery),
+            *[Value(f"%{_like_escape(token)}%") for token in tokens],
+            output_field=BooleanField(),
+        )
+        # similarity() nur, wenn pg_trgm installiert werden konnte
+        similarity = " + similarity({0}, {2}) * 100" if _pg_trgm_available() else ""
+        rank = _SQL(
+            "CAST(ts_rank(to_tsvector('simple', {0}), to_tsquery('simple', {1})) * 1000"
+            f"{similarity} AS integer)",
+            document,
+            Value(tsquery),
+            Value(" ".join(tokens)),
+            output_field=IntegerField(),
+        )
+        return ItemSearchDocument.objects.filter(match).annotate(rank=rank)
+
+    def rank(self, tokens: list[str], docs):
+        # ts_rank/similarity pro Treffer: nutzt den Dokument-PK, keine zweite Suche
+        return Coalesce(
+            Subquery(docs.filter(item_id=OuterRef("pk")).values("rank")[:1]),
+            0,
+            output_field=IntegerField(),
+        )
+
+
+class SqliteSearchBackend(OrmSearchBackend):
+    name = "sqlite"
+
+    def __init__(self, tokenizer: str):
+        self.tokenizer = tokenizer
+
+    def _match_expression(self, tokens: list[str]) -> str:
+        quoted = ['"' + token.replace('"', '""') + '"' for token in tokens]
+        if self.tokenizer == "trigram":
+            return " AND ".join(quoted)
+        return " AND ".join(f"{q}*" for q in quoted)
+
+    def documents(self, tokens: list[str]):
+        from .models import ItemSearchDocument
+
+        # Trigram-FTS findet erst ab 3 Zeichen; kürzere Begriffe per LIKE
+        fts_tokens = [t for t in tokens if self.tokenizer != "trigram" or len(t) >= 3]
+        short_tokens = [t for t in tokens if t not in fts_tokens]
+        if not fts_tokens:
+            return super().documents(tokens)
+
+        item_id = F("item_id")
+        match = Value(self._match_expression(fts_tokens))
+        docs = ItemSearchDocument.objects.filter(
+            _SQL(
+                f"{{0}} IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH {{1}})",
+                item_id,
+                match,
+                output_field=BooleanField(),
+            )
+        )
+        for token in short_tokens:
+            docs = docs.filter(document__icontains=token)
+        return docs
+
+
+def _pg_trgm_available() -> bool:
+    name = f"pg:{connection.settings_dict.get('NAME')}"
+    if name not in _capabilities:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _capabilities[name] = "pg_trgm" if cursor.fetchone() else None
+    return _capabilities[name] is not None
+
+
+def _sqlite_fts_tokenizer() -> str | None:
+    """Tokenizer der FTS5-Tabelle (None = Tabelle fehlt, z. B. SQLite ohne FTS5)."""
+    name = str(connection.settings_dict.get("NAME"))
+    if name not in _capabilities:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+            row = cursor.fetchone()
+        if row is None:
+            _capabilities[name] = None
+        else:
+            _capabilities[name] = "trigram" if "trigram" in (row[0] or "") else "unicode61"
+    return _capabilities[name]
+
+
+def get_backend() -> OrmSearchBackend:
+    choice = str(getattr(settings, "INVENTORY_SEARCH_BACKEND", "auto") or "auto").lower()
+    vendor = connection.vendor
+    if choice == "auto":
+        choice = vendor if vendor in ("postgresql", "sqlite") else "orm"
+        choice = "postgres" if choice == "postgresql" else choice
+    if choice == "postgres" and vendor == "postgresql":
+        return PostgresSearchBackend()
+    if choice == "sqlite" and vendor == "sqlite":
+        tokenizer = _sqlite_fts_tokenizer()
+        if tokenizer:
+            return SqliteSearchBackend(tokenizer)
+    return OrmSearchBackend()
+
+
+def search_items(queryset, query: str, *, ranked: bool = False):
+    """Schränkt ein Item-Queryset auf Treffer ein (optional mit `search_rank`)."""
+    return get_backend().filter(queryset, query, ranked=ranked)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Index-Pflege
+# ──────────────────────────────────────────────────────────────────────────────
+def compose_document(item, location_path: str = "") -> str:
+    parts = [
+        item.name,
+        item.variant,
+        item.barcode,
+        item.description,
+        item.location_letter,
+        str(item.location_number) if item.location_number is not None else "",
+        f"{item.location_letter or ''}{item.location_number if item.location_number is not None else ''}",
+        item.location_shelf,
+        item.category.name if item.category_id else "",
+        location_path,
+        *(tag.name for tag in item.application_tags.all()),
+    ]
+    return " ".join(p.strip() for p in parts if p and p.strip())
+
+
+def reindex_items(item_ids: Iterable[int], batch_size: int = 500) -> int:
+    """Baut den Suchtext für die Items neu auf; schreibt nur geänderte Zeilen."""
+    from .models import InventoryItem, ItemSearchDocument
+
+    ids = sorted({pk for pk in item_ids if pk})
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        items = list(
+            InventoryItem.objects.filter(pk__in=chunk)
+            .select_related("category", "storage_location")
+            .prefetch_related("application_tags")
+        )
+        existing = dict(
+            ItemSearchDocument.objects.filter(item_id__in=chunk).values_list("item_id", "document")
+        )
+        to_create, to_update = [], []
+        for item in items:
+            path = item.storage_location.get_full_path() if item.storage_location_id else ""
+            text = compose_document(item, path)
+            if item.pk not in existing:
+                to_create.append(ItemSearchDocument(item_id=item.pk, document=text))
+            elif existing[item.pk] != text:
+                to_update.append(ItemSearchDocument(item_id=item.pk, document=text))
+        with transaction.atomic():
+            ItemSearchDocument.objects.bulk_create(to_create, batch_size=batch_size)
+            ItemSearchDocument.objects.bulk_update(to_update, ["document"], batch_size=batch_size)
+        written += len(to_create) + len(to_update)
+    return written
+
+
+def reindex_all(batch_size: int = 500) -> int:
+    from .models import InventoryItem, ItemSearchDocument
+
+    ItemSearchDocument.objects.exclude(item_id__in=InventoryItem.objects.values("pk")).delete()
+    return reindex_items(InventoryItem.objects.values_list("pk", flat=True), batch_size=batch_size)
+
+
+def item_ids_for_locations(location_ids: Iterable[int]) -> list[int]:
+    """Items in den Lagerorten inkl. aller Unterorte (Pfad steht im Suchtext)."""
+    from .models import InventoryItem, StorageLocation
+
+    subtree = Q()
+    for location in StorageLocation.objects.filter(pk__in=[pk for pk in location_ids if pk]).only("pk", "path"):
+        subtree |= location.subtree_items_q()
+    if not subtree:
+        return []
+    return list(InventoryItem.objects.filter(subtree).values_list("pk", flat=True))
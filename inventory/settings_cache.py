@@ -0,0 +1,146 @@
+# inventory/settings_cache.py
+#
+# Prozessweiter Snapshot von GlobalSettings:
+# - jeder Worker hält eine unveränderliche Kopie der Einstellungen im Speicher
+# - ein Versionszähler im gemeinsamen Cache (settings.CACHES["default"]) sagt
+#   allen gunicorn-Workern, wann sie neu laden müssen
+# - post_save/post_delete auf GlobalSettings erhöht den Zähler (siehe signals.py)
+# - ein verdrängter Zähler startet bei der aktuellen Zeit neu (versions.py),
+#   nie wieder bei einem Stand, den ein Worker schon gesehen hat
+# Ein normaler Request kostet dadurch keine einzige Settings-Query mehr.
+from __future__ import annotations
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from django.db.utils import OperationalError, ProgrammingError
+
+from .versions import bump_counter, read_counter
+
+SETTINGS_VERSION_KEY = "inventory:global_settings:version"
+
+# Wie oft (Sekunden) ein Worker höchstens den gemeinsamen Zähler abfragt.
+VERSION_CHECK_INTERVAL = 1.0
+
+_lock = threading.Lock()
+_snapshot: "SettingsSnapshot | None" = None
+_snapshot_version: int | None = None
+_last_version_check: float = 0.0
+
+
+class SettingsSnapshot:
+    """
+    Unveränderliche, attributweise lesbare Kopie einer GlobalSettings-Zeile.
+    `exists` ist False, wenn (noch) keine Zeile in der DB existiert – dann
+    enthalten alle Felder die Model-Defaults.
+    """
+
+    __slots__ = ("_values", "exists", "pk")
+
+    def __init__(self, values: Mapping[str, Any], *, exists: bool, pk: int | None = None):
+        object.__setattr__(self, "_values", MappingProxyType(dict(values)))
+        object.__setattr__(self, "exists", exists)
+        object.__setattr__(self, "pk", pk)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("SettingsSnapshot ist unveränderlich.")
+
+    def __getitem__(self, name: str) -> Any:
+        return self._values[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._values.get(name, default)
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(self._values)
+
+
+def _concrete_field_names() -> list[str]:
+    from .models import GlobalSettings
+
+    return [
+        f.attname
+        for f in GlobalSettings._meta.concrete_fields
+        if not f.primary_key
+    ]
+
+
+def _default_snapshot() -> SettingsSnapshot:
+    from .models import GlobalSettings
+
+    values = {}
+    for field in GlobalSettings._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        values[field.attname] = field.get_default()
+    return SettingsSnapshot(values, exists=False)
+
+
+def _load_snapshot() -> SettingsSnapshot | None:
+    """Liest die Settings genau einmal aus der DB. None = DB (noch) nicht bereit."""
+    from .models import GlobalSettings
+
+    names = _concrete_field_names()
+    try:
+        row = GlobalSettings.objects.order_by("pk").values("pk", *names).first()
+    except (OperationalError, ProgrammingError):
+        return None
+    if row is None:
+        return _default_snapshot()
+    pk = row.pop("pk")
+    return SettingsSnapshot(row, exists=True, pk=pk)
+
+
+def _shared_version() -> int:
+    # fehlender Zähler startet bei der aktuellen Zeit → nie ein schon gesehener Stand
+    return read_counter(SETTINGS_VERSION_KEY)
+
+
+def get_settings_snapshot() -> SettingsSnapshot:
+    """
+    Liefert den aktuellen Settings-Snapshot dieses Workers.
+    Lädt nur neu, wenn sich der gemeinsame Versionszähler geändert hat.
+    """
+    global _snapshot, _snapshot_version, _last_version_check
+
+    now = time.monotonic()
+    current = _snapshot
+    if current is not None and (now - _last_version_check) < VERSION_CHECK_INTERVAL:
+        return current
+
+    version = _shared_version()
+    with _lock:
+        _last_version_check = now
+        if _snapshot is not None and _snapshot_version == version:
+            return _snapshot
+
+        loaded = _load_snapshot()
+        if loaded is None:
+            # Tabellen fehlen (z. B. vor migrate) → Defaults, aber nicht merken.
+            return _default_snapshot()
+        _snapshot = loaded
+        _snapshot_version = version
+        return loaded
+
+
+def invalidate_settings_snapshot() -> None:
+    """
+    Verwirft den lokalen Snapshot und erhöht den gemeinsamen Zähler,
+    damit alle anderen Worker beim nächsten Zugriff neu laden.
+    """
+    global _snapshot, _snapshot_version, _last_version_check
+
+    bump_counter(SETTINGS_VERSION_KEY)
+
+    with _lock:
+        _snapshot = None
+        _snapshot_version = None
+        _last_version_check = 0.0
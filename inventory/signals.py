@@ -1,12 +1,37 @@
 # inventory/signals.py
 from __future__ import annotations
 
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.contrib.auth.models import User, Group
 from django.dispatch import receiver
 
-from .models import UserProfile, Feedback, FeedbackComment
+from . import duplicates, media, rollups
+from .access import invalidate_access, invalidate_all_access
+from .models import (
+    ApplicationTag,
+    BorrowedItem,
+    Category,
+    Feedback,
+    FeedbackComment,
+    GlobalSettings,
+    InventoryHistory,
+    InventoryItem,
+    ItemComment,
+    Overview,
+    StorageLocation,
+    StorageLocationRollup,
+    UserProfile,
+)
 from .integrations.homeassistant import notify_feedback_event
+from .search import item_ids_for_locations, reindex_items
+from .settings_cache import invalidate_settings_snapshot
+from .suggest import record_suggest_changes
+from .versions import (
+    bump_catalog_version_on_commit,
+    bump_feedback_version_on_commit,
+    bump_overview_versions_on_commit,
+)
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -45,6 +70,367 @@ def create_user_profile_and_assign_defaults(sender, instance, created, **kwargs)
     instance.groups.add(default_group)
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# GlobalSettings: Snapshot in allen Workern invalidieren
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=GlobalSettings)
+@receiver(post_delete, sender=GlobalSettings)
+def _global_settings_changed(sender, instance, **kwargs):
+    """
+    Lokal sofort verwerfen; den gemeinsamen Zähler zusätzlich nach dem Commit
+    erhöhen, damit andere Worker nicht den alten Stand neu einlesen.
+    """
+    invalidate_settings_snapshot()
+    transaction.on_commit(invalidate_settings_snapshot)
+
+
+@receiver(pre_save, sender=GlobalSettings)
+def _remember_qr_base_url(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    old = GlobalSettings.objects.filter(pk=instance.pk).values_list("qr_base_url", flat=True).first()
+    instance._qr_base_changed = old is not None and old != instance.qr_base_url
+
+
+@receiver(post_save, sender=GlobalSettings)
+def _requeue_media_on_base_change(sender, instance, created, raw=False, **kwargs):
+    # QR-Inhalt = Basis-URL + ID → alle Items neu einstellen (Hash überspringt Unverändertes)
+    if raw or created or not instance.__dict__.pop("_qr_base_changed", False):
+        return
+    transaction.on_commit(media.enqueue_all)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Dashboard-Rechte: request.access-Cache invalidieren
+# ──────────────────────────────────────────────────────────────────────────────
+def _invalidate_profiles(profile_ids):
+    user_ids = list(
+        UserProfile.objects.filter(pk__in=profile_ids).values_list("user_id", flat=True)
+    )
+    invalidate_access(user_ids)
+    transaction.on_commit(lambda: invalidate_access(user_ids))
+
+
+@receiver(m2m_changed, sender=UserProfile.allowed_overviews.through)
+@receiver(m2m_changed, sender=UserProfile.favorite_overviews.through)
+def _profile_overviews_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Vorwärts (profile.allowed_overviews.add(...)) betrifft genau einen User;
+    rückwärts (overview.allowed_users.add(...)) stehen Profil-IDs in pk_set.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _invalidate_profiles([instance.pk])
+    elif pk_set:
+        _invalidate_profiles(pk_set)
+    else:
+        # Rückwärts-clear liefert keine IDs mehr → alles verwerfen.
+        invalidate_all_access()
+        transaction.on_commit(invalidate_all_access)
+
+
+@receiver(post_delete, sender=UserProfile)
+def _profile_deleted(sender, instance, **kwargs):
+    invalidate_access([instance.user_id])
+
+
+@receiver(post_save, sender=Overview)
+@receiver(post_delete, sender=Overview)
+def _overview_changed(sender, instance, **kwargs):
+    """Aktiv-Status fließt in die erlaubten IDs ein → alle Einträge verwerfen."""
+    invalidate_all_access()
+    transaction.on_commit(invalidate_all_access)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Items: Versionszähler pro Overview erhöhen
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+def _item_changed(sender, instance, **kwargs):
+    bump_overview_versions_on_commit([instance.overview_id, getattr(instance, "_previous_overview_id", None)])
+
+
+@receiver(m2m_changed, sender=InventoryItem.application_tags.through)
+def _item_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        bump_overview_versions_on_commit([instance.overview_id])
+    elif pk_set:
+        # tag.inventoryitem_set.add(...): pk_set sind Item-IDs
+        bump_overview_versions_on_commit(
+            InventoryItem.objects.filter(pk__in=pk_set).values_list("overview_id", flat=True).distinct()
+        )
+    else:
+        bump_overview_versions_on_commit(Overview.objects.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=BorrowedItem)
+def _open_borrowing_deleted(sender, instance, **kwargs):
+    """Gelöschter offener Verleih (Admin) → borrowed_open des Items neu berechnen."""
+    if instance.returned:
+        return
+    InventoryItem.recompute_borrowed_open([instance.item_id])
+    bump_overview_versions_on_commit(
+        InventoryItem.objects.filter(pk=instance.item_id).values_list("overview_id", flat=True)
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Suchindex (ItemSearchDocument) synchron halten
+#   Läuft in derselben Transaktion wie die Änderung → Rollback nimmt den
+#   Index mit. Ausnahme Item-save(): erst nach dem Commit, damit save() nur
+#   die Zeile schreibt (ein Rollback plant dann gar nicht erst neu ein).
+#   Löschungen von Items entfernen ihr Dokument per CASCADE.
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=InventoryItem)
+def _reindex_item(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or getattr(instance, "_search_dirty", True):
+        pk = instance.pk
+        transaction.on_commit(lambda: reindex_items([pk]))
+
+
+@receiver(m2m_changed, sender=InventoryItem.application_tags.through)
+def _reindex_item_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # tag.inventoryitem_set.clear(): nach dem Clear sind die Items nicht mehr bekannt
+        instance._search_item_ids = list(instance.inventoryitem_set.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        reindex_items([instance.pk])
+    elif pk_set:
+        reindex_items(pk_set)
+    else:
+        reindex_items(getattr(instance, "_search_item_ids", ()))
+
+
+_SEARCH_NAME_FIELDS = {
+    ApplicationTag: ("name",),
+    Category: ("name",),
+    StorageLocation: ("name", "parent_id"),
+}
+
+
+@receiver(pre_save, sender=ApplicationTag)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=StorageLocation)
+def _remember_search_name(sender, instance, raw=False, **kwargs):
+    """Nur Umbenennen/Umhängen ändert den Suchtext der zugehörigen Items."""
+    if raw or not instance.pk:
+        return
+    fields = _SEARCH_NAME_FIELDS[sender]
+    old = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    instance._search_dirty = old is not None and old != tuple(getattr(instance, f) for f in fields)
+
+
+def _affected_item_ids(instance):
+    if isinstance(instance, ApplicationTag):
+        return list(instance.inventoryitem_set.values_list("pk", flat=True))
+    if isinstance(instance, Category):
+        return list(InventoryItem.objects.filter(category=instance).values_list("pk", flat=True))
+    return item_ids_for_locations([instance.pk])
+
+
+@receiver(post_save, sender=ApplicationTag)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=StorageLocation)
+def _reindex_after_rename(sender, instance, created, raw=False, **kwargs):
+    if raw or created or not getattr(instance, "_search_dirty", False):
+        return
+    instance._search_item_ids = _affected_item_ids(instance)
+    reindex_items(instance._search_item_ids)
+
+
+@receiver(pre_delete, sender=ApplicationTag)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=StorageLocation)
+def _remember_items_before_delete(sender, instance, **kwargs):
+    # SET_NULL/m2m-Löschungen laufen ohne Item-Signale → IDs vorher merken
+    instance._search_item_ids = _affected_item_ids(instance)
+
+
+@receiver(post_delete, sender=ApplicationTag)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=StorageLocation)
+def _reindex_after_delete(sender, instance, **kwargs):
+    reindex_items(getattr(instance, "_search_item_ids", ()))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Neuester Kommentar je Item (InventoryItem.latest_comment)
+#   Gespeicherter Kommentar hat das jüngste updated_at → direkt setzen;
+#   nach dem Löschen den Nächstälteren per Subquery nachrücken lassen.
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=ItemComment)
+def _latest_comment_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    InventoryItem.objects.filter(pk=instance.item_id).update(latest_comment=instance)
+
+
+@receiver(post_delete, sender=ItemComment)
+def _latest_comment_deleted(sender, instance, **kwargs):
+    InventoryItem.refresh_latest_comments([instance.item_id])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Zeilenversionen für den Fragment-Cache (fragments.py)
+#   Item-save() erhöht InventoryItem.version selbst, Verleihe per F()-Update.
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=ItemComment)
+@receiver(post_delete, sender=ItemComment)
+def _comment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    InventoryItem.bump_versions([instance.item_id])
+
+
+@receiver(m2m_changed, sender=InventoryItem.application_tags.through)
+def _tags_bump_item_versions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        InventoryItem.bump_versions([instance.pk])
+    elif pk_set:
+        InventoryItem.bump_versions(pk_set)
+    else:
+        # von _reindex_item_tags im pre_clear gemerkt
+        InventoryItem.bump_versions(getattr(instance, "_search_item_ids", ()))
+
+
+@receiver(post_save, sender=ApplicationTag)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=StorageLocation)
+def _catalog_renamed(sender, instance, created, raw=False, **kwargs):
+    # Name/Pfad steht in gecachten Zeilen; neue Einträge kommen in keiner Zeile vor
+    if raw or created or not getattr(instance, "_search_dirty", False):
+        return
+    bump_catalog_version_on_commit()
+
+
+@receiver(post_delete, sender=ApplicationTag)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=StorageLocation)
+def _catalog_deleted(sender, instance, **kwargs):
+    bump_catalog_version_on_commit()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Dubletten-Signaturen (duplicates.py) – nach dem Commit, Löschen per CASCADE
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=InventoryItem)
+def _reindex_item_similarity(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or getattr(instance, "_similarity_dirty", True):
+        pk = instance.pk
+        transaction.on_commit(lambda: duplicates.reindex_items([pk]))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Typeahead-Index (suggest.py): betroffene Items ins Journal schreiben
+#   Kategorien/Tags stehen nicht im Index, Lagerorte nur über den Pfad.
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=InventoryItem)
+def _suggest_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or getattr(instance, "_suggest_dirty", True):
+        pk = instance.pk
+        transaction.on_commit(lambda: record_suggest_changes([pk], committed=True))
+
+
+@receiver(post_delete, sender=InventoryItem)
+def _suggest_item_deleted(sender, instance, **kwargs):
+    record_suggest_changes([instance.pk])
+
+
+@receiver(post_save, sender=StorageLocation)
+def _suggest_location_renamed(sender, instance, created, raw=False, **kwargs):
+    if raw or created or not getattr(instance, "_search_dirty", False):
+        return
+    # von _reindex_after_rename ermittelt (Items im ganzen Teilbaum)
+    record_suggest_changes(getattr(instance, "_search_item_ids", ()))
+
+
+@receiver(post_delete, sender=StorageLocation)
+def _suggest_location_deleted(sender, instance, **kwargs):
+    record_suggest_changes(getattr(instance, "_search_item_ids", ()))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Teilbaum-Summen je Lagerort (rollups.py)
+#   Item-save() merkt sich Vorher/Nachher (gebucht nach dem Commit; Drift
+#   nach einem Absturz dazwischen räumt rollups.rebuild() auf), Verleihe
+#   buchen selbst.
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=InventoryItem)
+def _rollup_item_saved(sender, instance, raw=False, **kwargs):
+    change = instance.__dict__.pop("_rollup_change", None)
+    if raw or change is None:
+        return
+    transaction.on_commit(lambda: rollups.apply_item_change(*change))
+
+
+@receiver(post_delete, sender=InventoryItem)
+def _rollup_item_deleted(sender, instance, **kwargs):
+    rollups.apply_item_change(rollups.item_state(instance), None)
+
+
+@receiver(post_save, sender=StorageLocation)
+def _rollup_location_saved(sender, instance, created, raw=False, **kwargs):
+    previous_path = instance.__dict__.pop("_previous_path", "")
+    if raw:
+        return
+    if created:
+        StorageLocationRollup.objects.get_or_create(location=instance)
+        return
+    if previous_path and previous_path != instance.path:
+        rollups.subtree_moved(instance, previous_path)
+        # Teilbaum-Filter und gecachte Zählungen der betroffenen Dashboards
+        bump_overview_versions_on_commit(
+            InventoryItem.objects.filter(instance.subtree_items_q())
+            .values_list("overview_id", flat=True)
+            .distinct()
+        )
+
+
+@receiver(post_delete, sender=StorageLocation)
+def _rollup_location_deleted(sender, instance, **kwargs):
+    # Items des Teilbaums stehen jetzt ohne Lagerort (SET_NULL) → Vorfahren neu zählen
+    rollups.recompute(StorageLocation.path_ids(instance.path)[:-1])
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Änderungszähler für ETags (conditional.py)
+#   Item-save() und Verleihe erhöhen den Overview-Zähler bereits selbst.
+# ──────────────────────────────────────────────────────────────────────────────
+@receiver(post_save, sender=ItemComment)
+@receiver(post_delete, sender=ItemComment)
+@receiver(post_save, sender=InventoryHistory)
+def _item_related_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    try:
+        overview_id = instance.item.overview_id
+    except InventoryItem.DoesNotExist:
+        return
+    bump_overview_versions_on_commit([overview_id])
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def _feedback_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_feedback_version_on_commit()
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Feedback → Home Assistant
 #   - created           → "created"
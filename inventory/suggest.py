@@ -0,0 +1,393 @@
+# inventory/suggest.py
+#
+# Typeahead-Vorschläge aus einem Präfixindex im Speicher jedes Workers:
+# - sortierte Liste aller Schlüssel (Wörter aus Name, Variante, Barcode und
+#   Lagerort-Pfad) + Postings Schlüssel → Menge der Item-IDs; Präfixsuche per
+#   bisect. Neue Schlüssel landen in einer kleinen Zusatzliste, leere bleiben
+#   als Leichen stehen – beides wird gesammelt neu sortiert (kein O(n) pro Item)
+# - ein Versionszähler im gemeinsamen Cache sagt, ob sich etwas geändert hat;
+#   pro Version liegt ein Journal-Eintrag mit den betroffenen Item-IDs im Cache
+#   → Worker laden nur diese Items nach (fehlt ein Eintrag: kompletter Neuaufbau)
+# - Nachladen/Neuaufbau läuft außerhalb des Such-Locks; der fertige Index wird
+#   nur noch eingehängt, Tastendrücke warten also nicht auf die DB
+# - Signale schreiben das Journal (siehe signals.py); queryset.update() muss
+#   selbst record_suggest_changes() aufrufen
+# Ein Tastendruck kostet dadurch keine Query auf InventoryItem.
+from __future__ import annotations
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from heapq import merge
+from typing import Iterable, Iterator, NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.utils import OperationalError, ProgrammingError
+
+from .versions import bump_counter, read_counter
+
+SUGGEST_VERSION_KEY = "inventory:suggest:version"
+SUGGEST_CHANGE_PREFIX = "inventory:suggest:change"
+# Journal-Einträge leben so lange; wer länger nicht nachgeladen hat, baut neu auf.
+CHANGE_TIMEOUT = 24 * 3600
+# Bei größeren Lücken ist ein Neuaufbau billiger als das Nachladen.
+MAX_JOURNAL_GAP = 500
+# Wie oft (Sekunden) ein Worker höchstens den gemeinsamen Zähler abfragt.
+VERSION_CHECK_INTERVAL = 1.0
+# Obergrenze der Kandidaten pro Anfrage (kurze Präfixe wie "s")
+MAX_CANDIDATES = 2000
+# Sehr häufige Wörter taugen nicht für "ähnliche Items"
+MAX_SIMILAR_POSTINGS = 5000
+# Ab so vielen neuen Schlüsseln wird die Hauptliste neu sortiert
+MAX_FRESH_KEYS = 256
+
+_RE_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# _lock schützt Suchen und Änderungen am Index, _reload_lock serialisiert das
+# Nachladen aus der DB (nur ein Thread pro Worker lädt, die anderen suchen weiter)
+_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_index: "PrefixIndex | None" = None
+_index_version: int | None = None
+_last_version_check: float = 0.0
+
+
+def normalize_tokens(*texts: str | None) -> tuple[str, ...]:
+    seen: list[str] = []
+    for text in texts:
+        for token in _RE_TOKEN.findall((text or "").casefold()):
+            if token not in seen:
+                seen.append(token)
+    return tuple(seen)
+
+
+class Entry(NamedTuple):
+    id: int
+    name: str
+    variant: str
+    barcode: str
+    overview_id: int | None
+    location: str
+    tokens: tuple[str, ...]
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "variant": self.variant,
+            "barcode": self.barcode,
+            "location": self.location,
+            "overview_id": self.overview_id,
+        }
+
+
+def _entry(pk, name, variant, barcode, overview_id, location) -> Entry:
+    name, variant, barcode = name or "", variant or "", barcode or ""
+    return Entry(
+        pk, name, variant, barcode, overview_id, location,
+        normalize_tokens(name, variant, barcode, location),
+    )
+
+
+class PrefixIndex:
+    """
+    Sortierte Schlüssel + Postings. Nicht threadsicher – Zugriffe auf den
+    eingehängten Index laufen über das Modul-Lock (siehe suggest()/
+    similar_item_ids()); ein neu aufgebauter gehört bis zum Einhängen nur
+    seinem Thread.
+
+    `keys` darf Schlüssel ohne Postings enthalten (entfernte Wörter), neue
+    Schlüssel stehen sortiert in `fresh`; _compact() räumt beides gesammelt auf.
+    """
+
+    def __init__(self, entries: Iterable[Entry] = ()):
+        self.entries: dict[int, Entry] = {}
+        self.postings: dict[str, set[int]] = {}
+        for entry in entries:
+            self.entries[entry.id] = entry
+            for token in entry.tokens:
+                self.postings.setdefault(token, set()).add(entry.id)
+        self._compact()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _compact(self) -> None:
+        self.keys: list[str] = sorted(self.postings)
+        self.fresh: list[str] = []
+        self._listed: set[str] = set(self.keys)
+        self._dead = 0
+
+    def remove(self, pk: int) -> None:
+        entry = self.entries.pop(pk, None)
+        if entry is None:
+            return
+        for token in entry.tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(pk)
+            if not ids:
+                # Schlüssel bleibt gelistet, bis sich das Neusortieren lohnt
+                del self.postings[token]
+                self._dead += 1
+        if self._dead > len(self.postings) // 4 + MAX_FRESH_KEYS:
+            self._compact()
+
+    def add(self, entry: Entry) -> None:
+        self.remove(entry.id)
+        self.entries[entry.id] = entry
+        for token in entry.tokens:
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = {entry.id}
+                if token in self._listed:
+                    self._dead -= 1
+                else:
+                    insort(self.fresh, token)
+                    self._listed.add(token)
+            else:
+                ids.add(entry.id)
+        if len(self.fresh) > MAX_FRESH_KEYS:
+            self._compact()
+
+    def _keys_with_prefix(self, prefix: str) -> Iterator[str]:
+        def scan(keys: list[str]) -> Iterator[str]:
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and keys[i].startswith(prefix):
+                yield keys[i]
+                i += 1
+
+        for key in merge(scan(self.keys), scan(self.fresh)):
+            if key in self.postings:
+                yield key
+
+    def _prefix_ids(self, prefix: str, allowed, limit: int) -> list[int]:
+        # Schlüssel == Präfix sortiert zuerst → exakte Worttreffer kommen vor dem Limit
+        found: dict[int, None] = {}
+        for key in self._keys_with_prefix(prefix):
+            for pk in self.postings[key]:
+                if allowed is None or self.entries[pk].overview_id in allowed:
+                    found[pk] = None
+            if len(found) >= limit:
+                break
+        return list(found)
+
+    def search(self, query: str, *, allowed=None, limit: int = 10) -> list[Entry]:
+        """
+        Alle Suchbegriffe müssen Präfix eines Schlüssels sein (UND).
+        `allowed`: erlaubte Overview-IDs oder None (= alle).
+        """
+        tokens = normalize_tokens(query)
+        if not tokens:
+            return []
+        # Der längste Begriff ist meist der selektivste → treibt die Kandidatensuche
+        driver = max(tokens, key=len)
+        rest = [t for t in tokens if t != driver]
+        candidates = []
+        for pk in self._prefix_ids(driver, allowed, MAX_CANDIDATES):
+            entry = self.entries[pk]
+            if all(any(t.startswith(q) for t in entry.tokens) for q in rest):
+                candidates.append(entry)
+
+        needle = " ".join(tokens)
+        barcode = (query or "").strip().casefold()
+
+        def score(entry: Entry):
+            name = entry.name.casefold()
+            value = 0
+            if entry.barcode.casefold() == barcode:
+                value += 1000
+            if name.startswith(needle):
+                value += 500
+            name_tokens = normalize_tokens(entry.name)
+            value += 100 * sum(1 for q in tokens if any(t.startswith(q) for t in name_tokens))
+            return (-value, len(name), name, entry.id)
+
+        candidates.sort(key=score)
+        return candidates[:limit]
+
+    def similar(self, pk: int, *, allowed=None, limit: int = 5, min_overlap: float = 0.5) -> list[int]:
+        """Items mit möglichst vielen gleichen Namenswörtern (Jaccard über Wörter)."""
+        entry = self.entries.get(pk)
+        if entry is None:
+            return []
+        words = [t for t in normalize_tokens(entry.name) if len(t) >= 3]
+        if not words:
+            return []
+        candidates: set[int] = set()
+        for word in words:
+            ids = self.postings.get(word, ())
+            if len(ids) <= MAX_SIMILAR_POSTINGS:
+                candidates.update(ids)
+        candidates.discard(pk)
+        words = set(words)
+        scored = []
+        for other in candidates:
+            candidate = self.entries[other]
+            if allowed is not None and candidate.overview_id not in allowed:
+                continue
+            # Postings enthalten auch Variante/Barcode/Lagerort → nur Namenswörter zählen
+            other_words = {t for t in normalize_tokens(candidate.name) if len(t) >= 3}
+            ratio = len(words & other_words) / len(words | other_words)
+            if ratio >= min_overlap:
+                scored.append((-ratio, candidate.name.casefold(), other))
+        scored.sort()
+        return [other for _, _, other in scored[:limit]]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Laden aus der DB
+# ──────────────────────────────────────────────────────────────────────────────
+def _load_entries(item_ids: Iterable[int] | None = None) -> list[Entry]:
+    """Aktive Items (alle oder nur die angegebenen) inkl. Lagerort-Pfad."""
+    from .models import InventoryItem, StorageLocation
+
+    qs = InventoryItem.objects.filter(is_active=True)
+    if item_ids is not None:
+        qs = qs.filter(pk__in=list(item_ids))
+    rows = list(qs.values_list("pk", "name", "variant", "barcode", "overview_id", "storage_location_id"))
+    location_ids = {row[5] for row in rows if row[5]}
+    paths = {}
+    if location_ids:
+        paths = dict(StorageLocation.objects.filter(pk__in=location_ids).values_list("pk", "full_path"))
+    return [
+        _entry(pk, name, variant, barcode, overview_id, paths.get(location_id, ""))
+        for pk, name, variant, barcode, overview_id, location_id in rows
+    ]
+
+
+def _shared_version() -> int:
+    return read_counter(SUGGEST_VERSION_KEY)
+
+
+def _changed_ids(since: int, until: int) -> set[int] | None:
+    """Item-IDs aus dem Journal (since, until]; None = Lücke → Neuaufbau."""
+    if until - since > MAX_JOURNAL_GAP:
+        return None
+    keys = [f"{SUGGEST_CHANGE_PREFIX}:{v}" for v in range(since + 1, until + 1)]
+    try:
+        journal = cache.get_many(keys)
+    except Exception:
+        return None
+    changed: set[int] = set()
+    for key in keys:
+        ids = journal.get(key)
+        if ids is None:
+            return None
+        changed.update(ids)
+    return changed
+
+
+def get_index() -> PrefixIndex:
+    """
+    Index dieses Workers; lädt nur nach, wenn sich der gemeinsame Zähler
+    geändert hat (inkrementell über das Journal, sonst komplett).
+    Aufrufer dürfen das Lock nicht halten: die DB-Abfragen laufen ohne es,
+    nur das Einhängen bzw. das Einspielen geladener Einträge nimmt es kurz.
+    Lädt schon ein anderer Thread, wird mit dem bisherigen Index gesucht.
+    """
+    global _index, _index_version, _last_version_check
+
+    now = time.monotonic()
+    if _index is not None and (now - _last_version_check) < VERSION_CHECK_INTERVAL:
+        return _index
+
+    if not _reload_lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        _last_version_check = now
+        version = _shared_version()
+        index, since = _index, _index_version
+        if index is not None and since == version:
+            return index
+        try:
+            changed = _changed_ids(since, version) if index is not None and since < version else None
+            if changed is None:
+                fresh = PrefixIndex(_load_entries())
+                with _lock:
+                    _index, _index_version = fresh, version
+                return fresh
+            entries = {entry.id: entry for entry in _load_entries(changed)}
+        except (OperationalError, ProgrammingError):
+            # Tabellen fehlen (z. B. vor migrate) → leer, aber nicht merken.
+            _last_version_check = 0.0
+            return PrefixIndex()
+        with _lock:
+            for pk in changed:
+                if pk in entries:
+                    index.add(entries[pk])
+                else:
+                    # gelöscht oder deaktiviert
+                    index.remove(pk)
+            _index_version = version
+        return index
+    finally:
+        _reload_lock.release()
+
+
+def suggest(query: str, access=None, *, overview_id: int | None = None, limit: int = 10) -> list[Entry]:
+    """Vorschläge für `query`, eingeschränkt auf die für `access` sichtbaren Overviews."""
+    allowed = None
+    if access is not None and not access.is_superuser:
+        allowed = access.allowed_ids
+    if overview_id is not None:
+        allowed = frozenset({overview_id}) if allowed is None else allowed & {overview_id}
+    index = get_index()
+    with _lock:
+        return index.search(query, allowed=allowed, limit=limit)
+
+
+def similar_item_ids(item_id: int, access=None, *, limit: int = 5) -> list[int]:
+    allowed = None
+    if access is not None and not access.is_superuser:
+        allowed = access.allowed_ids
+    index = get_index()
+    with _lock:
+        return index.similar(item_id, allowed=allowed, limit=limit)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Änderungen melden
+# ──────────────────────────────────────────────────────────────────────────────
+def _bump(item_ids: list[int]) -> None:
+    # Ein verdrängter Zähler startet bei der aktuellen Zeit (versions.py) → die
+    # Lücke zum Stand der Worker ist riesig, sie bauen komplett neu auf.
+    version = bump_counter(SUGGEST_VERSION_KEY)
+    if version is None:
+        return
+    try:
+        # Ohne Journal-Eintrag bauen andere Worker komplett neu auf – korrekt, nur teurer
+        cache.set(f"{SUGGEST_CHANGE_PREFIX}:{version}", item_ids, timeout=CHANGE_TIMEOUT)
+    except Exception:
+        pass
+
+
+def record_suggest_changes(item_ids: Iterable[int], *, committed: bool = False) -> None:
+    """
+    Sofort und nach dem Commit melden – sonst lädt ein Worker den alten Stand.
+    `committed=True` für Aufrufer, die selbst schon aus on_commit kommen.
+    """
+    global _last_version_check
+
+    item_ids = sorted({pk for pk in item_ids if pk})
+    if not item_ids:
+        return
+    _bump(item_ids)
+    # eigener Worker soll die Änderung sofort sehen
+    _last_version_check = 0.0
+    if not committed:
+        transaction.on_commit(lambda: _bump(item_ids))
+
+
+def reset_suggest_index() -> None:
+    """Alle Worker bauen beim nächsten Zugriff komplett neu auf (Journal-Lücke)."""
+    global _index, _index_version, _last_version_check
+
+    bump_counter(SUGGEST_VERSION_KEY, MAX_JOURNAL_GAP + 1)
+    with _reload_lock, _lock:
+        _index = None
+        _index_version = None
+        _last_version_check = 0.0
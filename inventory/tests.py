@@ -1,3 +1,1932 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import (
+    benchmarks, bulk, codes, context_processors, duplicates, fragments, imports, labels, media, nplusone, performance, reorder, rollups, search,
+    settings_cache, suggest, views,
+)
+from .access import ACCESS_GENERATION_KEY, load_access
+from .checks import counter_backend_check
+from .context_processors import maintenance_status
+from .feature_flags import get_feature_flags
+from .exports import export_overview_to_file
+from .models import (
+    ApplicationTag,
+    BorrowedItem,
+    Category,
+    Feedback,
+    FeedbackVote,
+    GlobalSettings,
+    InventoryHistory,
+    InventoryItem,
+    ItemComment,
+    ItemSearchDocument,
+    ItemSimilaritySignature,
+    MediaJob,
+    Overview,
+    StorageLocation,
+    StorageLocationRollup,
+    UserProfile,
+)
+from .forms import StorageLocationForm
+from .settings_cache import (
+    SETTINGS_VERSION_KEY,
+    get_settings_snapshot,
+    invalidate_settings_snapshot,
+)
+from .versions import CATALOG_VERSION_KEY, bump_counter, read_counter
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "fragments": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "fragments"},
+}
+
+
+def clear_caches():
+    """Alle Aliase leeren – Zeilen-Fragmente liegen nicht im default-Cache."""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SettingsSnapshotTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        invalidate_settings_snapshot()
+
+    def test_defaults_without_row(self):
+        snapshot = get_settings_snapshot()
+        self.assertFalse(snapshot.exists)
+        self.assertFalse(snapshot.maintenance_mode_enabled)
+        self.assertTrue(get_feature_flags()["show_feedback"])
+
+    def test_warm_snapshot_costs_no_queries(self):
+        GlobalSettings.objects.create(show_feedback=False)
+        get_settings_snapshot()
+        with self.assertNumQueries(0):
+            self.assertFalse(get_feature_flags()["show_feedback"])
+            self.assertFalse(maintenance_status(None)["maintenance_mode_enabled"])
+
+    def test_save_invalidates_snapshot(self):
+        gs = GlobalSettings.objects.create()
+        self.assertTrue(get_feature_flags()["enable_bulk_actions"])
+        gs.enable_bulk_actions = False
+        gs.save()
+        self.assertFalse(get_feature_flags()["enable_bulk_actions"])
+
+    def test_shared_version_bump_reloads(self):
+        gs = GlobalSettings.objects.create()
+        get_settings_snapshot()
+        # Änderung "in einem anderen Worker": Zeile ohne Signal ändern, Zähler erhöhen.
+        GlobalSettings.objects.filter(pk=gs.pk).update(maintenance_mode_enabled=True)
+        cache.incr(SETTINGS_VERSION_KEY)
+        settings_cache._last_version_check = 0.0
+        self.assertTrue(get_settings_snapshot().maintenance_mode_enabled)
+
+    def test_evicted_counter_does_not_restart_at_seen_version(self):
+        gs = GlobalSettings.objects.create()
+        cache.set(SETTINGS_VERSION_KEY, 1, timeout=None)
+        settings_cache._last_version_check = 0.0
+        stale = get_settings_snapshot()
+        # Zähler verdrängt (z. B. Cull des Datei-Caches), dann ändert ein anderer Worker
+        cache.delete(SETTINGS_VERSION_KEY)
+        GlobalSettings.objects.filter(pk=gs.pk).update(maintenance_mode_enabled=True)
+        invalidate_settings_snapshot()
+        # … dieser Worker hält noch den alten Snapshot mit Version 1
+        settings_cache._snapshot, settings_cache._snapshot_version = stale, 1
+        self.assertTrue(get_settings_snapshot().maintenance_mode_enabled)
+
+    def test_snapshot_is_immutable(self):
+        snapshot = get_settings_snapshot()
+        with self.assertRaises(AttributeError):
+            snapshot.maintenance_mode_enabled = True
+
+
+class VersionCounterTests(TestCase):
+    def test_file_cache_bumps_are_atomic_across_workers(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location},
+        }):
+            from concurrent.futures import ThreadPoolExecutor
+
+            start = read_counter(CATALOG_VERSION_KEY)
+            # jeder Thread bekommt eine eigene Cache-Instanz – wie ein eigener Worker
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                seen = list(pool.map(lambda _: bump_counter(CATALOG_VERSION_KEY), range(40)))
+            self.assertEqual(len(set(seen)), 40)
+            self.assertEqual(read_counter(CATALOG_VERSION_KEY), start + 40)
+
+    def test_check_rejects_non_atomic_backend(self):
+        with override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache_table"},
+        }):
+            self.assertEqual([e.id for e in counter_backend_check(None)], ["inventory.E005"])
+        with override_settings(CACHES=LOCMEM_CACHES):
+            self.assertEqual(counter_backend_check(None), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ContextProcessorMemoTests(TestCase):
+    """Jeder Context-Processor darf pro Request höchstens einmal ausgewertet werden."""
+
+    def setUp(self):
+        clear_caches()
+        invalidate_settings_snapshot()
+        self.calls = {}
+        original = context_processors._memoized
+
+        def counting(request, key, factory):
+            def wrapped():
+                self.calls[key] = self.calls.get(key, 0) + 1
+                return factory()
+            return original(request, key, wrapped)
+
+        patcher = mock.patch.object(context_processors, "_memoized", counting)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertEvaluatedAtMostOnce(self):
+        # leer hieße: die Processors laufen nicht (mehr) über _memoized
+        self.assertIn("global_features", self.calls)
+        for key, count in self.calls.items():
+            self.assertLessEqual(count, 1, f"{key} wurde {count}x ausgewertet")
+
+    def _warm_get(self, url, queries):
+        """Zweiter Aufruf (Settings-Snapshot und Session warm) mit festem Query-Budget."""
+        self.client.get(url)
+        self.calls.clear()
+        with self.assertNumQueries(queries) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return ctx.captured_queries
+
+    def test_admin_page(self):
+        user = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.force_login(user)
+        # Session, User, GlobalSettings (Einrichtungsstatus), offene Anfragen, Feedback
+        self._warm_get(reverse("admin_dashboard"), 5)
+        self.assertEvaluatedAtMostOnce()
+
+    def test_dashboard_page(self):
+        overview = Overview.objects.create(name="Werkstatt", slug="werkstatt")
+        user = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(user)
+        queries = self._warm_get(reverse("overview-dashboard", args=[overview.slug]), 11)
+        self.assertEvaluatedAtMostOnce()
+        # Settings kommen aus dem Snapshot, nicht aus der DB
+        self.assertFalse([q for q in queries if "inventory_globalsettings" in q["sql"]])
+        # Kein Template liest active_overviews → die Query entfällt komplett.
+        self.assertNotIn("active_overviews", self.calls)
+
+    def test_lazy_values_behave_like_plain_values(self):
+        GlobalSettings.objects.create(maintenance_mode_enabled=True, maintenance_message="Update")
+        request = mock.Mock(spec=[])
+        context = maintenance_status(request)
+        self.assertTrue(context["maintenance_mode_enabled"])
+        self.assertEqual(str(context["maintenance_message"]), "Update")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AccessContextTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.user = User.objects.create_user("scanner", password="pw")
+        # Der erste User wird per Signal Superuser → für diese Tests zurücksetzen.
+        User.objects.filter(pk=self.user.pk).update(is_staff=False, is_superuser=False)
+        self.user.refresh_from_db()
+        self.profile = UserProfile.objects.get(user=self.user)
+
+    def test_can_view_follows_allowed_overviews(self):
+        self.assertFalse(load_access(self.user).can_view(self.overview))
+        self.profile.allowed_overviews.add(self.overview)
+        access = load_access(self.user)
+        self.assertTrue(access.can_view(self.overview))
+        self.assertTrue(access.can_view(self.overview.pk))
+        self.assertFalse(access.can_view(None))
+
+    def test_reverse_m2m_change_invalidates(self):
+        load_access(self.user)
+        self.overview.allowed_users.add(self.profile)
+        self.assertTrue(load_access(self.user).can_view(self.overview))
+
+    def test_deactivated_overview_is_not_allowed(self):
+        self.profile.allowed_overviews.add(self.overview)
+        load_access(self.user)
+        self.overview.is_active = False
+        self.overview.save()
+        self.assertFalse(load_access(self.user).can_view(self.overview))
+
+    def test_evicted_generation_does_not_reuse_cached_entries(self):
+        self.profile.allowed_overviews.add(self.overview)
+        cache.set(ACCESS_GENERATION_KEY, 1, timeout=None)
+        load_access(self.user)
+        cache.delete(ACCESS_GENERATION_KEY)
+        self.overview.is_active = False
+        self.overview.save()
+        self.assertFalse(load_access(self.user).can_view(self.overview))
+
+    def test_warm_cache_skips_permission_queries(self):
+        self.profile.allowed_overviews.add(self.overview)
+        self.client.force_login(self.user)
+        url = reverse("overview-dashboard", args=[self.overview.slug])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        profile_queries = [q["sql"] for q in ctx.captured_queries if "inventory_userprofile" in q["sql"]]
+        self.assertEqual(profile_queries, [])
+
+    def test_dashboard_denied_without_access(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("overview-dashboard", args=[self.overview.slug]))
+        self.assertRedirects(response, reverse("dashboards"), fetch_redirect_response=False)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        performance.registry.reset()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(self.user)
+
+    def test_server_timing_header_and_aggregate(self):
+        response = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(response.status_code, 200)
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "view;dur=", "tpl;dur=", "total;dur="):
+            self.assertIn(metric, header)
+        rows = {row["endpoint"]: row for row in performance.registry.snapshot()}
+        self.assertEqual(rows["admin_dashboard"]["requests"], 1)
+        self.assertGreater(rows["admin_dashboard"]["avg_queries"], 0)
+
+    def test_server_timing_header_only_for_staff(self):
+        self.client.logout()
+        response = self.client.get(reverse("login"))
+        self.assertNotIn("Server-Timing", response)
+        User.objects.create_user("gast", password="pw")
+        self.client.login(username="gast", password="pw")
+        self.assertNotIn("Server-Timing", self.client.get(reverse("dashboards")))
+        self.assertEqual(sum(row["requests"] for row in performance.registry.snapshot()), 2)
+
+    def test_track_adds_external_time(self):
+        with performance.collect() as metrics:
+            with performance.track("ha"):
+                pass
+        self.assertIn("ha", metrics.external)
+
+    def test_registry_is_bounded(self):
+        registry = performance.PerformanceRegistry(max_endpoints=2, max_samples=3)
+        for name in ("a", "b", "c"):
+            for ms in range(5):
+                registry.record(name, total_ms=ms, queries=1, sql_ms=0)
+        rows = {row["endpoint"]: row for row in registry.snapshot()}
+        self.assertEqual(set(rows), {"b", "c"})
+        self.assertEqual(rows["c"]["samples"], 3)
+        self.assertEqual(rows["c"]["max_ms"], 4)
+
+    def test_performance_page(self):
+        self.client.get(reverse("admin_dashboard"))
+        response = self.client.get(reverse("admin_performance"))
+        self.assertContains(response, "admin_dashboard")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BenchmarkTests(TestCase):
+    def test_generate_fake_inventory(self):
+        out = StringIO()
+        call_command("generate_fake_inventory", items=40, overviews=2, depth=3, fanout=2, stdout=out)
+        self.assertEqual(InventoryItem.objects.count(), 40)
+        self.assertEqual(StorageLocation.objects.count(), 2 + 4 + 8)
+        self.assertEqual(InventoryHistory.objects.count(), 40 * 3)
+        self.assertEqual(Overview.objects.filter(slug__startswith="bench-").count(), 2)
+
+    def test_generate_fake_inventory_without_returned_pks(self):
+        # MySQL: bulk_create setzt keine PKs
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            call_command("generate_fake_inventory", items=20, overviews=1, depth=3, fanout=2, stdout=StringIO())
+        self.assertEqual(StorageLocation.objects.filter(parent__parent__isnull=False).count(), 8)
+        self.assertEqual(InventoryItem.objects.filter(storage_location__children__isnull=True).count(), 20)
+        self.assertEqual(InventoryHistory.objects.count(), 20 * 3)
+
+    def test_benchmark_runs_and_detects_regressions(self):
+        call_command("generate_fake_inventory", items=20, overviews=1, depth=2, fanout=2, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "baseline.json"
+            call_command("benchmark_views", baseline=str(path), update_baseline=True, repeat=1, stdout=StringIO())
+            data = json.loads(path.read_text(encoding="utf-8"))
+            names = {row["name"] for row in data["results"]}
+            self.assertIn("overview-dashboard", names)
+            self.assertIn("overview-dashboard-200-uncached", names)
+            self.assertIn("scan-barcode", names)
+
+            baseline = benchmarks.load_baseline(path)
+            result = benchmarks.BenchmarkResult(**baseline["overview-dashboard"])
+            self.assertEqual(benchmarks.compare([result], baseline), [])
+            result.queries += 1
+            result.median_ms = result.median_ms * 3 + 100
+            problems = benchmarks.compare([result], baseline)
+            self.assertEqual(len(problems), 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StorageLocationPathTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.werkstatt = StorageLocation.objects.create(name="Werkstatt")
+        self.regal = StorageLocation.objects.create(name="Regal", parent=self.werkstatt)
+        self.fach = StorageLocation.objects.create(name="Fach", parent=self.regal)
+        self.keller = StorageLocation.objects.create(name="Keller")
+
+    def _fresh(self, location):
+        return StorageLocation.objects.get(pk=location.pk)
+
+    def test_paths_are_stored_on_create(self):
+        fach = self._fresh(self.fach)
+        self.assertEqual(fach.path, f"/{self.werkstatt.pk}/{self.regal.pk}/{self.fach.pk}/")
+        self.assertEqual(fach.full_path, "Werkstatt > Regal > Fach")
+        self.assertEqual(fach.depth, 2)
+
+    def test_moving_subtree_updates_descendants(self):
+        self.regal.parent = self.keller
+        self.regal.save()
+        fach = self._fresh(self.fach)
+        self.assertEqual(fach.path, f"/{self.keller.pk}/{self.regal.pk}/{self.fach.pk}/")
+        self.assertEqual(fach.full_path, "Keller > Regal > Fach")
+        self.assertEqual(fach.depth, 2)
+
+        self.regal.parent = None
+        self.regal.save()
+        fach = self._fresh(self.fach)
+        self.assertEqual(fach.full_path, "Regal > Fach")
+        self.assertEqual(fach.depth, 1)
+
+    def test_rename_updates_descendants(self):
+        self.werkstatt.name = "Halle"
+        self.werkstatt.save(update_fields=["name"])
+        self.assertEqual(self._fresh(self.fach).full_path, "Halle > Regal > Fach")
+        self.assertEqual(self._fresh(self.keller).full_path, "Keller")
+
+    def test_cannot_move_below_own_subtree(self):
+        self.werkstatt.parent = self.fach
+        with self.assertRaises(ValueError):
+            self.werkstatt.save()
+        self.assertIsNone(self._fresh(self.werkstatt).parent_id)
+
+    def test_rebuild_paths_after_bulk_create(self):
+        StorageLocation.objects.bulk_create([StorageLocation(name="Box", parent=self.fach, nfc_token="box-token")])
+        self.assertEqual(StorageLocation.rebuild_paths(), 1)
+        box = StorageLocation.objects.get(name="Box")
+        self.assertEqual(box.full_path, "Werkstatt > Regal > Fach > Box")
+        self.assertEqual(box.depth, 3)
+        self.assertEqual(StorageLocation.rebuild_paths(), 0)
+
+    def test_dashboard_sorts_by_full_path(self):
+        user = User.objects.create_superuser("admin", password="pw")
+        overview = Overview.objects.create(name="Lager", slug="lager")
+        InventoryItem.objects.bulk_create([
+            InventoryItem(name="A", quantity=1, overview=overview, storage_location=self.keller, user=user, barcode="p1", nfc_token="p1"),
+            InventoryItem(name="B", quantity=1, overview=overview, storage_location=self.fach, user=user, barcode="p2", nfc_token="p2"),
+        ])
+        self.client.force_login(user)
+        response = self.client.get(reverse("overview-dashboard", args=[overview.slug]), {"sort": "location"})
+        self.assertEqual([it.name for it in response.context["items"]], ["A", "B"])
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    INVENTORY_NPLUSONE_DETECTION="raise",
+    INVENTORY_NPLUSONE_THRESHOLD=3,
+)
+class NPlusOneTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+
+    def _location_chain(self, depth):
+        parent = None
+        for i in range(depth):
+            parent = StorageLocation.objects.create(name=f"Ebene {i}", parent=parent)
+        return parent
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            nplusone.fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a' AND x IN (%s, %s)"),
+            nplusone.fingerprint("SELECT *  FROM t WHERE id = 22 AND name = 'bb' AND x IN (%s, %s, %s)"),
+        )
+
+    def test_recursive_parent_walk_is_detected(self):
+        leaf = self._location_chain(6)
+        with self.assertRaises(nplusone.NPlusOneDetected) as ctx:
+            with nplusone.detect("test"):
+                node = StorageLocation.objects.get(pk=leaf.pk)
+                while node.parent:
+                    node = node.parent
+        self.assertIn("inventory/tests.py", str(ctx.exception))
+
+    def test_management_commands_are_covered(self):
+        from django.core.management.base import BaseCommand
+
+        class Command(BaseCommand):
+            def handle(self, *args, **options):
+                for pk in range(5):
+                    Overview.objects.filter(pk=pk).exists()
+
+        Command.__module__ = "inventory.management.commands.fake_loop"
+        with self.assertRaisesMessage(nplusone.NPlusOneDetected, "command fake_loop"):
+            call_command(Command())
+        Command.nplusone_scope = False
+        call_command(Command())
+
+    def test_stored_full_path_needs_no_queries(self):
+        leaf = self._location_chain(6)
+        location = StorageLocation.objects.get(pk=leaf.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(location.get_full_path(), " > ".join(f"Ebene {i}" for i in range(6)))
+            self.assertEqual(location.level, 5)
+
+    def test_feedback_list_uses_vote_annotation(self):
+        voters = [User.objects.create_user(f"u{i}") for i in range(3)]
+        for i in range(6):
+            fb = Feedback.objects.create(title=f"Idee {i}", created_by=self.user)
+            for voter in voters:
+                FeedbackVote.objects.create(feedback=fb, user=voter, value=1)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("feedback-list"))
+        self.assertContains(response, "👍 3")
+
+    def test_scheduled_export_has_no_per_row_queries(self):
+        overview = Overview.objects.create(name="Export", slug="export")
+        leaf = self._location_chain(4)
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            for i in range(8):
+                item = InventoryItem.objects.create(
+                    name=f"Teil {i}", quantity=1, overview=overview, storage_location=leaf, user=self.user
+                )
+                item.application_tags.create(name=f"tag-{i}")
+            path = export_overview_to_file(overview=overview, export_format="csv", columns=["name", "tags", "storage_location"])
+            content = (Path(media) / path).read_text(encoding="utf-8")
+        self.assertIn("Ebene 0 > Ebene 1 > Ebene 2 > Ebene 3", content)
+        self.assertIn("tag-7", content)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, INVENTORY_DASHBOARD_PAGINATION="keyset")
+class DashboardKeysetPaginationTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.items = InventoryItem.objects.bulk_create(
+            [
+                InventoryItem(
+                    name=f"Teil {i:02d}",
+                    quantity=i % 4,
+                    overview=self.overview,
+                    user=self.user,
+                    barcode=f"kb-{i}",
+                    nfc_token=f"kn-{i}",
+                )
+                for i in range(12)
+            ]
+        )
+        self.url = reverse("overview-dashboard", args=[self.overview.slug])
+        self.client.force_login(self.user)
+
+    def _walk(self, params):
+        pages, response = [], self.client.get(self.url, params)
+        while True:
+            pages.append([it.pk for it in response.context["items"]])
+            next_url = response.context["next_page_url"]
+            if not next_url:
+                return pages, response
+            response = self.client.get(self.url + next_url)
+
+    def test_pages_follow_sort_with_id_tiebreaker(self):
+        pages, last = self._walk({"sort": "quantity", "order": "desc", "page_size": 5})
+        expected = [it.pk for it in sorted(self.items, key=lambda it: (-it.quantity, -it.pk))]
+        self.assertEqual([pk for page in pages for pk in page], expected)
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual(last.context["page_number"], 3)
+        self.assertEqual(last.context["num_pages"], 3)
+
+        back = self.client.get(self.url + last.context["previous_page_url"])
+        self.assertEqual([it.pk for it in back.context["items"]], pages[1])
+        self.assertEqual(back.context["page_number"], 2)
+
+    def test_nullable_sort_column(self):
+        pages, _ = self._walk({"sort": "category", "page_size": 5})
+        self.assertEqual(sorted(pk for page in pages for pk in page), sorted(it.pk for it in self.items))
+
+    def test_invalid_or_stale_cursor_starts_at_first_page(self):
+        first = self.client.get(self.url, {"page_size": 5})
+        response = self.client.get(self.url, {"page_size": 5, "cursor": "manipuliert"})
+        self.assertEqual(response.context["page_number"], 1)
+        self.assertEqual(response.context["items"], first.context["items"])
+
+        second = self.client.get(self.url + first.context["next_page_url"] + "&sort=quantity")
+        self.assertEqual(second.context["page_number"], 1)
+
+    def test_total_count_is_cached_per_overview_version(self):
+        self.client.get(self.url, {"page_size": 5})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {"page_size": 5})
+        self.assertFalse(any("COUNT(" in q["sql"].upper() for q in ctx.captured_queries))
+        self.assertEqual(response.context["total_count"], 12)
+
+        item = InventoryItem.objects.get(pk=self.items[0].pk)
+        item.overview = Overview.objects.create(name="Anderes", slug="anderes")
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            item.save()
+        response = self.client.get(self.url, {"page_size": 5})
+        self.assertEqual(response.context["total_count"], 11)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BorrowedOpenCounterTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Verleih", slug="verleih", enable_borrow=True)
+        self.item = InventoryItem.objects.bulk_create(
+            [InventoryItem(name="Akkuschrauber", quantity=10, overview=self.overview, user=self.user, barcode="b-1")]
+        )[0]
+        self.client.force_login(self.user)
+
+    def _borrow(self, quantity):
+        self.client.post(
+            reverse("borrow-item", args=[self.item.pk]),
+            {"borrower": "Kim", "quantity_borrowed": quantity},
+        )
+
+    def test_borrow_and_return_update_counter(self):
+        self._borrow(3)
+        self._borrow(2)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.borrowed_open), (5, 5))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.item.calculated_target_quantity, 10)
+
+        borrowing = BorrowedItem.objects.filter(item=self.item).order_by("pk").first()
+        self.client.post(reverse("return-item", args=[borrowing.pk]))
+        # zweite (z. B. doppelt abgeschickte) Rückgabe bucht nicht erneut
+        BorrowedItem.objects.get(pk=borrowing.pk).return_item()
+        stale = BorrowedItem(pk=borrowing.pk, item=self.item, quantity_borrowed=3, borrower="Kim")
+        stale.return_item()
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.borrowed_open), (8, 2))
+
+    def test_item_save_keeps_counter(self):
+        stale = InventoryItem.objects.get(pk=self.item.pk)
+        self._borrow(4)
+        stale.name = "Akkuschrauber 18V"
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            stale.save()
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.name, self.item.borrowed_open), ("Akkuschrauber 18V", 4))
+
+    def test_deleting_open_borrowing_recomputes(self):
+        self._borrow(4)
+        BorrowedItem.objects.get(item=self.item).delete()
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.borrowed_open, 0)
+
+    def test_repair_command(self):
+        self._borrow(2)
+        InventoryItem.objects.filter(pk=self.item.pk).update(borrowed_open=99)
+
+        call_command("repair_borrowed_counts", "--dry-run", stdout=StringIO())
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.borrowed_open, 99)
+
+        out = StringIO()
+        call_command("repair_borrowed_counts", stdout=out)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.borrowed_open, 2)
+        self.assertIn("1 Zähler korrigiert", out.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SearchBackendTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Werkstatt", slug="werkstatt")
+        self.shelf = StorageLocation.objects.create(
+            name="Regal Nord", parent=StorageLocation.objects.create(name="Keller")
+        )
+        self.tag = ApplicationTag.objects.create(name="Elektro")
+        self.category = Category.objects.create(name="Befestigung")
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        # Item-Indizes laufen nach dem Commit (signals.py)
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            self.screw = self._item("Schraube M4", barcode="SCR-4711", category=self.category)
+            self.relay = self._item("Relais 12V", barcode="REL-0815", storage_location=self.shelf)
+        self.relay.application_tags.add(self.tag)
+
+    def _item(self, name, **fields):
+        return InventoryItem.objects.create(name=name, quantity=1, overview=self.overview, user=self.user, **fields)
+
+    def _names(self, query):
+        return sorted(search.search_items(InventoryItem.objects.all(), query).values_list("name", flat=True))
+
+    def test_sqlite_uses_fts_backend(self):
+        self.assertEqual(search.get_backend().name, "sqlite")
+        with self.settings(INVENTORY_SEARCH_BACKEND="orm"):
+            self.assertEqual(search.get_backend().name, "orm")
+
+    def test_matches_substrings_tags_and_location_path(self):
+        for backend in ("auto", "orm"):
+            with self.subTest(backend=backend), self.settings(INVENTORY_SEARCH_BACKEND=backend):
+                self.assertEqual(self._names("chraub"), ["Schraube M4"])
+                self.assertEqual(self._names("4711"), ["Schraube M4"])
+                self.assertEqual(self._names("elektro keller"), ["Relais 12V"])
+                self.assertEqual(self._names("befestigung m4"), ["Schraube M4"])
+                self.assertEqual(self._names("relais m4"), [])
+
+    def test_renames_and_deletes_keep_index_in_sync(self):
+        self.shelf.parent.name = "Dachboden"
+        self.shelf.parent.save()
+        self.assertEqual(self._names("dachboden"), ["Relais 12V"])
+
+        self.tag.name = "Hochvolt"
+        self.tag.save()
+        self.assertEqual(self._names("hochvolt"), ["Relais 12V"])
+        self.assertEqual(self._names("elektro"), [])
+
+        self.category.delete()
+        self.assertEqual(self._names("befestigung"), [])
+
+        screw = InventoryItem.objects.get(pk=self.screw.pk)
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            screw.name = "Mutter M4"
+            screw.save()
+        self.assertEqual(self._names("mutter"), ["Mutter M4"])
+
+    def test_dashboard_search_sorts_by_relevance(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("overview-dashboard", args=[self.overview.slug]), {"q": "0815"})
+        self.assertEqual(response.context["sort_key"], "relevance")
+        self.assertEqual([it.name for it in response.context["items"]], ["Relais 12V"])
+
+    def test_rebuild_command_restores_missing_documents(self):
+        from .models import ItemSearchDocument
+
+        ItemSearchDocument.objects.all().delete()
+        self.assertEqual(self._names("relais"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self._names("relais"), ["Relais 12V"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ItemSuggestTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        suggest.reset_suggest_index()
+        self.addCleanup(suggest.reset_suggest_index)
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        self.lager = Overview.objects.create(name="Lager", slug="lager")
+        self.labor = Overview.objects.create(name="Labor", slug="labor")
+        shelf = StorageLocation.objects.create(name="Regal Nord", parent=StorageLocation.objects.create(name="Keller"))
+        InventoryItem.objects.bulk_create([
+            InventoryItem(name="Schraube M4", variant="verzinkt", barcode="SCR-4711", quantity=1,
+                          overview=self.lager, user=self.admin, storage_location=shelf),
+            InventoryItem(name="Schraube M5", barcode="SCR-4712", quantity=1, overview=self.lager, user=self.admin),
+            InventoryItem(name="Schraubendreher", barcode="TOOL-1", quantity=1, overview=self.labor, user=self.admin),
+        ])
+        self.items = {it.name: it for it in InventoryItem.objects.all()}
+
+    def _names(self, query, access=None, **kwargs):
+        return [entry.name for entry in suggest.suggest(query, access, **kwargs)]
+
+    def test_prefix_matches_name_barcode_variant_and_location(self):
+        self.assertEqual(self._names("schr"), ["Schraube M4", "Schraube M5", "Schraubendreher"])
+        self.assertEqual(self._names("scr-4712"), ["Schraube M5"])
+        self.assertEqual(self._names("verz"), ["Schraube M4"])
+        self.assertEqual(self._names("keller schr"), ["Schraube M4"])
+        self.assertEqual(self._names("schr", overview_id=self.labor.pk), ["Schraubendreher"])
+
+    def test_keystrokes_do_not_query_items(self):
+        self._names("schr")
+        with self.assertNumQueries(0):
+            self._names("schra")
+
+    def test_changes_are_loaded_incrementally(self):
+        self._names("schr")
+        item = self.items["Schraube M5"]
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            with self.captureOnCommitCallbacks(execute=True):
+                item.name = "Mutter M5"
+                item.save()
+        with mock.patch.object(suggest, "_load_entries", wraps=suggest._load_entries) as load:
+            self.assertEqual(self._names("mutt"), ["Mutter M5"])
+        load.assert_called_once_with({item.pk})
+
+        self.items["Schraubendreher"].delete()
+        self.assertEqual(self._names("schr"), ["Schraube M4"])
+
+    def test_evicted_version_forces_rebuild(self):
+        cache.set(suggest.SUGGEST_VERSION_KEY, 1, timeout=None)
+        self._names("schr")
+        # Zähler verdrängt, dann meldet ein anderer Worker eine Änderung
+        cache.delete(suggest.SUGGEST_VERSION_KEY)
+        item = self.items["Schraube M5"]
+        InventoryItem.objects.filter(pk=item.pk).update(name="Mutter M5")
+        suggest.record_suggest_changes([item.pk])
+        self.assertEqual(self._names("mutt"), ["Mutter M5"])
+
+    def test_search_does_not_wait_for_a_rebuild(self):
+        import threading
+
+        self._names("schr")
+        cache.incr(suggest.SUGGEST_VERSION_KEY, suggest.MAX_JOURNAL_GAP + 1)  # Lücke → Neuaufbau
+        suggest._last_version_check = 0.0
+        loading, release = threading.Event(), threading.Event()
+        rebuilt = [suggest._entry(999, "Mutter M5", "", "", self.lager.pk, "")]
+
+        def slow_load(item_ids=None):
+            loading.set()
+            release.wait(5)
+            return rebuilt
+
+        with mock.patch.object(suggest, "_load_entries", slow_load):
+            worker = threading.Thread(target=self._names, args=("mutt",))
+            worker.start()
+            self.assertTrue(loading.wait(5))
+            suggest._last_version_check = 0.0
+            # Neuaufbau hängt in der DB – gesucht wird im bisherigen Index
+            self.assertEqual(self._names("schr"), ["Schraube M4", "Schraube M5", "Schraubendreher"])
+            release.set()
+            worker.join(5)
+        self.assertEqual(self._names("mutt"), ["Mutter M5"])
+
+    def test_index_stays_consistent_across_compactions(self):
+        index = suggest.PrefixIndex()
+        for pk in range(suggest.MAX_FRESH_KEYS * 3):
+            index.add(suggest._entry(pk, f"Teil{pk} Gemeinsam", "", "", None, ""))
+        for pk in range(0, suggest.MAX_FRESH_KEYS * 3, 2):
+            index.remove(pk)
+        index.add(suggest._entry(1, "Teil0 Neu", "", "", None, ""))
+        self.assertEqual([e.id for e in index.search("teil0")], [1])
+        self.assertEqual([e.id for e in index.search("teil2", limit=3)], [21, 23, 25])
+        self.assertEqual(len(index._prefix_ids("gemeinsam", None, 10_000)), suggest.MAX_FRESH_KEYS * 3 // 2 - 1)
+        for keys in (index.keys, index.fresh):
+            self.assertEqual(keys, sorted(keys))
+
+    def test_api_respects_allowed_overviews(self):
+        user = User.objects.create_user("scanner", password="pw")
+        UserProfile.objects.get(user=user).allowed_overviews.add(self.labor)
+        self.client.force_login(user)
+        response = self.client.get(reverse("item-suggest"), {"q": "schr"})
+        self.assertEqual([r["name"] for r in response.json()["results"]], ["Schraubendreher"])
+
+    def test_edit_item_lists_similar_items(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("edit-item", args=[self.items["Schraube M4"].pk]))
+        self.assertEqual([si.name for si in response.context["similar_items"]], ["Schraube M5"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DuplicateDetectionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.category = Category.objects.create(name="Werkzeug")
+        self.tag = ApplicationTag.objects.create(name="Elektro")
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            self.drill = InventoryItem.objects.create(
+                name="Akkuschrauber Makita DDF484", quantity=2, overview=self.overview, user=self.user
+            )
+            InventoryItem.objects.create(name="Lötstation Weller", quantity=1, overview=self.overview, user=self.user)
+
+    def test_near_duplicates_are_scored(self):
+        found = duplicates.find_duplicates("Akkuschrauber Makita DDF 484")
+        self.assertEqual([item_id for item_id, _ in found], [self.drill.pk])
+        self.assertGreaterEqual(found[0][1], duplicates.DUPLICATE_THRESHOLD)
+        self.assertEqual(duplicates.find_duplicates("Messschieber digital"), [])
+
+    def test_lookup_uses_a_few_indexed_queries(self):
+        with self.assertNumQueries(2):
+            duplicates.find_duplicates("Akkuschrauber Makita")
+
+    def test_signature_follows_renames(self):
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            self.drill.name = "Stichsäge Bosch"
+            self.drill.save()
+        self.assertEqual(duplicates.find_duplicates("Akkuschrauber Makita DDF484"), [])
+        self.assertEqual([pk for pk, _ in duplicates.find_duplicates("Stichsäge Bosch")], [self.drill.pk])
+
+    def test_add_form_warns_before_saving_duplicate(self):
+        self.client.force_login(self.user)
+        data = {
+            "name": "Akkuschrauber Makita DDF484",
+            "quantity": 1,
+            "category": self.category.pk,
+            "application_tags": [self.tag.pk],
+            "unit": "pcs",
+            "nfc_base_choice": "local",
+            "o": self.overview.slug,
+        }
+        with self.settings(MEDIA_ROOT=self.media.name):
+            response = self.client.post(reverse("add-equipment"), data)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([si.pk for si in response.context["similar_items"]], [self.drill.pk])
+            self.assertEqual(InventoryItem.objects.filter(name=data["name"]).count(), 1)
+
+            response = self.client.post(reverse("add-equipment"), {**data, "force_save": "1"})
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(InventoryItem.objects.filter(name=data["name"]).count(), 2)
+
+    def test_uploaded_image_survives_duplicate_warning(self):
+        from PIL import Image
+
+        png = io.BytesIO()
+        Image.new("RGB", (4, 4), "red").save(png, format="PNG")
+        self.client.force_login(self.user)
+        data = {
+            "name": "Akkuschrauber Makita DDF484",
+            "quantity": 1,
+            "category": self.category.pk,
+            "application_tags": [self.tag.pk],
+            "unit": "pcs",
+            "nfc_base_choice": "local",
+            "o": self.overview.slug,
+        }
+        with self.settings(MEDIA_ROOT=self.media.name):
+            pending = Path(self.media.name) / views.PENDING_IMAGE_DIR
+            upload = SimpleUploadedFile("erstes.png", png.getvalue(), content_type="image/png")
+            response = self.client.post(reverse("add-equipment"), {**data, "image": upload})
+            first = response.context["pending_image"]
+            self.assertEqual([p.name for p in pending.iterdir()], ["erstes.png"])
+
+            # anderes Bild gewählt → altes Zwischenbild weg
+            upload = SimpleUploadedFile("schrauber.png", png.getvalue(), content_type="image/png")
+            response = self.client.post(reverse("add-equipment"), {**data, "image": upload, "pending_image": first})
+            self.assertContains(response, "„schrauber.png“ wird dabei übernommen")
+            token = response.context["pending_image"]
+            self.assertEqual([p.name for p in pending.iterdir()], ["schrauber.png"])
+
+            response = self.client.post(reverse("add-equipment"), {**data, "force_save": "1", "pending_image": token})
+            self.assertEqual(response.status_code, 302)
+            item = InventoryItem.objects.filter(name=data["name"]).latest("pk")
+            self.assertTrue(item.image.name.startswith("item_images/schrauber"))
+            self.assertTrue(item.image.storage.exists(item.image.name))
+            self.assertEqual(list(pending.iterdir()), [])
+
+            # verlassene Formulare: alte Zwischenbilder räumt der nächste Upload ab
+            abandoned = pending / "verlassen.png"
+            abandoned.write_bytes(png.getvalue())
+            long_ago = time.time() - views.PENDING_IMAGE_MAX_AGE - 60
+            os.utime(abandoned, (long_ago, long_ago))
+            upload = SimpleUploadedFile("neu.png", png.getvalue(), content_type="image/png")
+            self.client.post(reverse("add-equipment"), {**data, "image": upload})
+            self.assertEqual([p.name for p in pending.iterdir()], ["neu.png"])
+
+            # manipuliertes Token wird ignoriert
+            self.client.post(reverse("add-equipment"), {**data, "force_save": "1", "pending_image": token + "x"})
+            self.assertFalse(InventoryItem.objects.filter(name=data["name"]).latest("pk").image)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DashboardFacetTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.tools = Category.objects.create(name="Werkzeug")
+        self.parts = Category.objects.create(name="Kleinteile")
+        self.empty = Category.objects.create(name="Leer")
+        self.tag = ApplicationTag.objects.create(name="Elektro")
+        self.shelf = StorageLocation.objects.create(name="Regal")
+        items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f"Teil {i}", quantity=1, overview=self.overview, user=self.user,
+                          category=self.tools if i < 3 else self.parts,
+                          storage_location=self.shelf if i % 2 else None,
+                          barcode=f"fb-{i}", nfc_token=f"fn-{i}")
+            for i in range(5)
+        ])
+        Through = InventoryItem.application_tags.through
+        Through.objects.bulk_create([Through(inventoryitem_id=it.pk, applicationtag_id=self.tag.pk) for it in items[:2]])
+        self.items = items
+        self.url = reverse("overview-dashboard", args=[self.overview.slug])
+        self.client.force_login(self.user)
+
+    def _counts(self, response):
+        return (
+            {c.name: c.facet_count for c in response.context["categories"]},
+            {t.name: t.facet_count for t in response.context["tags"]},
+            {loc.name: loc.facet_count for loc in response.context["storage_locations"]},
+        )
+
+    def test_counts_per_facet(self):
+        cats, tags, locations = self._counts(self.client.get(self.url))
+        self.assertEqual(cats, {"Kleinteile": 2, "Leer": 0, "Werkzeug": 3})
+        self.assertEqual(tags, {"Elektro": 2})
+        self.assertEqual(locations, {"Regal": 2})
+
+    def test_facet_ignores_its_own_filter(self):
+        cats, tags, locations = self._counts(self.client.get(self.url, {"category": self.parts.pk}))
+        self.assertEqual(cats, {"Kleinteile": 2, "Leer": 0, "Werkzeug": 3})
+        self.assertEqual(tags, {"Elektro": 0})
+        self.assertEqual(locations, {"Regal": 1})
+
+    def test_unfiltered_counts_are_cached_until_items_change(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse(any("GROUP BY" in q["sql"].upper() for q in ctx.captured_queries))
+
+        item = InventoryItem.objects.get(pk=self.items[4].pk)
+        item.category = self.empty
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            item.save()
+        cats, _, _ = self._counts(self.client.get(self.url))
+        self.assertEqual(cats, {"Kleinteile": 1, "Leer": 1, "Werkzeug": 3})
+
+    def test_partial_filter_response_carries_current_counts(self):
+        headers = {"X-Partial": "table", "Accept": "application/json"}
+        data = self.client.get(self.url, {"category": self.parts.pk}, headers=headers).json()
+        self.assertEqual(data["facet_counts"]["tag"], {})  # fehlend = 0
+        self.assertEqual(data["facet_counts"]["storage_location"], {str(self.shelf.pk): 1})
+        self.assertEqual(
+            data["facet_counts"]["category"], {str(self.tools.pk): 3, str(self.parts.pk): 2}
+        )
+
+        response = self.client.get(self.url, {"tag": "Elektro"}, headers={"X-Partial": "table"})
+        counts = json.loads(re.search(r'id="facet-counts"[^>]*>(.*?)</script>', response.content.decode()).group(1))
+        self.assertEqual(counts["category"], {str(self.tools.pk): 2})
+
+    def test_counts_follow_tag_rename(self):
+        response = self.client.get(self.url, {"tag": "Elektro"})
+        self.assertEqual(response.context["total_count"], 2)
+        self.assertEqual(self._counts(response)[0], {"Kleinteile": 0, "Leer": 0, "Werkzeug": 2})
+
+        self.tag.name = "Strom"
+        self.tag.save()
+        ApplicationTag.objects.create(name="Elektro")
+        response = self.client.get(self.url, {"tag": "Elektro"})
+        self.assertEqual(response.context["total_count"], 0)
+        self.assertEqual(self._counts(response)[0], {"Kleinteile": 0, "Leer": 0, "Werkzeug": 0})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RowFragmentCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager", enable_comments=True, enable_borrow=True)
+        self.category = Category.objects.create(name="Werkzeug")
+        self.items = InventoryItem.objects.bulk_create([
+            InventoryItem(name=f"Teil {i}", quantity=5, overview=self.overview, user=self.user,
+                          category=self.category, barcode=f"rb-{i}", nfc_token=f"rn-{i}")
+            for i in range(3)
+        ])
+        self.url = reverse("overview-dashboard", args=[self.overview.slug])
+        self.client.force_login(self.user)
+
+    def _row(self, response, item):
+        return next(row for row in response.context["item_rows"] if f'value="{item.pk}"' in row or f"/{item.pk}/" in row)
+
+    def test_warm_rows_skip_prefetches_and_keep_request_parts(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {"sort": "name"})
+        tables = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("inventory_borroweditem", tables)
+        self.assertNotIn("inventory_itemcomment", tables)
+
+        html = response.content.decode()
+        self.assertNotIn(fragments.CSRF_MARKER, html)
+        self.assertIn("csrfmiddlewaretoken", html)
+        self.assertIn("next=/dashboards/lager/%3Fsort%3Dname", html)
+
+    def test_rows_use_their_own_cache_alias(self):
+        self.client.get(self.url)
+        row_keys = lambda alias: [key for key in caches[alias]._cache if "inventory:row" in key]
+        self.assertEqual(len(row_keys("fragments")), 3)
+        self.assertEqual(row_keys("default"), [])
+
+    def test_borrow_comment_tag_and_rename_invalidate_rows(self):
+        item = self.items[0]
+        self.client.get(self.url)
+
+        BorrowedItem(item=item, borrower="Alex", quantity_borrowed=2).borrow()
+        ItemComment.objects.create(item=item, author=self.user, text="Akku schwach")
+        item.application_tags.add(ApplicationTag.objects.create(name="Elektro"))
+        self.category.name = "Messtechnik"
+        self.category.save()
+
+        row = self._row(self.client.get(self.url), item)
+        self.assertIn("Alex", row)
+        self.assertIn("Akku schwach", row)
+        self.assertIn("Elektro", row)
+        self.assertIn("Messtechnik", row)
+
+    def test_rows_match_uncached_rendering(self):
+        cached_first = self.client.get(self.url).context["item_rows"]
+        cached = self.client.get(self.url).context["item_rows"]
+        with self.settings(INVENTORY_ROW_CACHE="off"):
+            uncached = self.client.get(self.url).context["item_rows"]
+        strip = lambda rows: [re.sub(r'name="csrfmiddlewaretoken" value="[^"]+"', "", r) for r in rows]
+        self.assertEqual(strip(cached), strip(uncached))
+        self.assertEqual(strip(cached_first), strip(cached))
+
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DashboardPartialTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.category = Category.objects.create(name="Werkzeug")
+        InventoryItem.objects.bulk_create([
+            InventoryItem(name=f"Teil {i}", quantity=i, overview=self.overview, user=self.user,
+                          category=self.category, is_favorite=True, barcode=f"pb-{i}", nfc_token=f"pn-{i}")
+            for i in range(8)
+        ])
+        self.url = reverse("overview-dashboard", args=[self.overview.slug])
+        self.client.force_login(self.user)
+
+    def test_partial_renders_only_table_and_pagination(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {"sort": "quantity", "page_size": 5}, headers={"X-Partial": "table"})
+        html = response.content.decode()
+        self.assertTemplateUsed(response, "inventory/partials/overview_table.html")
+        self.assertTemplateNotUsed(response, "inventory/overview_dashboard.html")
+        self.assertIn("Teil 0", html)
+        self.assertIn('aria-label="Paginierung"', html)
+        self.assertNotIn("filterPanel", html)
+        self.assertIn("X-Partial", response["Vary"])
+
+        # warme Anzahl + Zeilen-Cache → außer Session/User/Overview nur die Item-Seite
+        inventory = [q["sql"] for q in ctx.captured_queries if '"inventory_' in q["sql"]]
+        self.assertEqual(len(inventory), 2, inventory)
+        self.assertTrue(any('FROM "inventory_inventoryitem"' in sql for sql in inventory))
+
+    def test_partial_json(self):
+        response = self.client.get(
+            self.url, {"page_size": 5}, headers={"X-Partial": "table", "Accept": "application/json"}
+        )
+        data = response.json()
+        self.assertEqual(data["total_count"], 8)
+        self.assertEqual(data["num_pages"], 2)
+        self.assertIsNotNone(data["next_page_url"])
+        self.assertIn("Teil 0", data["html"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager", enable_comments=True)
+        self.item = InventoryItem.objects.bulk_create([
+            InventoryItem(name="Akkuschrauber", quantity=3, overview=self.overview, user=self.user,
+                          barcode="cb-1", nfc_token="cn-1")
+        ])[0]
+        self.url = reverse("overview-dashboard", args=[self.overview.slug])
+        self.client.force_login(self.user)
+        # erster Aufruf setzt das CSRF-Cookie (Teil des ETags)
+        self.client.get(self.url)
+
+    def _revalidate(self, url, etag, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, headers={"If-None-Match": etag}, **kwargs)
+        return response, " ".join(q["sql"] for q in ctx.captured_queries)
+
+    def test_dashboard_answers_304_without_item_queries(self):
+        first = self.client.get(self.url)
+        etag = first["ETag"]
+        self.assertIn("no-cache", first["Cache-Control"])
+
+        response, sql = self._revalidate(self.url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertNotIn("inventory_inventoryitem", sql)
+
+        # Teilansicht hat ein eigenes ETag
+        partial = self.client.get(self.url, headers={"X-Partial": "table", "If-None-Match": etag})
+        self.assertEqual(partial.status_code, 200)
+
+    def test_item_comment_and_history_writes_change_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        ItemComment.objects.create(item=self.item, author=self.user, text="Akku schwach")
+        response, _ = self._revalidate(self.url, etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response["ETag"]
+        InventoryHistory.objects.create(item=self.item, user=self.user, action=InventoryHistory.Action.UPDATED)
+        self.assertNotEqual(self.client.get(self.url)["ETag"], etag)
+
+        other = Overview.objects.create(name="Andere", slug="andere")
+        etag = self.client.get(self.url)["ETag"]
+        with tempfile.TemporaryDirectory() as tmp, self.settings(MEDIA_ROOT=tmp):
+            InventoryItem.objects.create(
+                name="Zange", quantity=1, overview=other, user=self.user, barcode="cb-2", nfc_token="cn-2"
+            )
+        self.assertEqual(self._revalidate(self.url, etag)[0].status_code, 304)
+
+    def test_export_and_feedback_summary(self):
+        url = reverse("overview-export", args=[self.overview.slug, "csv"]) + "?cols=name"
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self._revalidate(url, etag)[0].status_code, 304)
+
+        summary_url = reverse("feedback-summary")
+        first = self.client.get(summary_url)
+        self.assertNotIn("private", first["Cache-Control"])
+        response, sql = self._revalidate(summary_url, first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn("inventory_feedback", sql)
+
+        Feedback.objects.create(title="Drucker", created_by=self.user)
+        response, _ = self._revalidate(summary_url, first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["open"], 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReorderTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.lager = Overview.objects.create(name="Lager", slug="lager", is_consumable_mode=True, has_min_stock=True)
+        self.werkstatt = Overview.objects.create(name="Werkstatt", slug="werkstatt")
+        self.schrauben = Category.objects.create(name="Schrauben")
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+
+    def _item(self, name, quantity, low_quantity, overview=None, **kwargs):
+        kwargs.setdefault("item_type", "consumable")
+        with self.settings(MEDIA_ROOT=self.media.name):
+            return InventoryItem.objects.create(
+                name=name, quantity=quantity, low_quantity=low_quantity,
+                overview=overview or self.lager, user=self.user, **kwargs
+            )
+
+    def test_flag_follows_quantity_changes(self):
+        item = self._item("Kabelbinder", 5, 3)
+        self.assertFalse(item.below_minimum)
+
+        BorrowedItem(item=item, borrower="Kim", quantity_borrowed=3).borrow()
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.below_minimum), (2, True))
+
+        item.borrowings.get().return_item()
+        item.refresh_from_db()
+        self.assertEqual((item.quantity, item.below_minimum), (5, False))
+
+        item.quantity = 1
+        with self.settings(MEDIA_ROOT=self.media.name):
+            item.save(update_fields=["quantity"])
+        self.assertTrue(InventoryItem.objects.get(pk=item.pk).below_minimum)
+
+        item.low_quantity = 0
+        with self.settings(MEDIA_ROOT=self.media.name):
+            item.save()
+        self.assertFalse(InventoryItem.objects.get(pk=item.pk).below_minimum)
+
+    def test_groups_by_shop_and_category_in_one_query(self):
+        self._item("Schraube M3", 1, 10, order_link="https://www.example-shop.de/m3", category=self.schrauben)
+        self._item("Schraube M4", 0, 10, order_link="https://example-shop.de/m4", category=self.schrauben)
+        self._item("Lötzinn", 0, 2, order_link="https://loet.example/zinn")
+        self._item("Tape", 0, 2)
+        self._item("Genug", 10, 2)
+        self._item("Bohrer", 0, 2, item_type="equipment")
+
+        with CaptureQueriesContext(connection) as ctx:
+            groups = reorder.reorder_groups()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual([g["domain"] for g in groups], ["example-shop.de", "loet.example", ""])
+        shop = groups[0]["categories"][0]
+        self.assertEqual(shop["category"], "Schrauben")
+        self.assertEqual([(it["name"], it["shortfall"]) for it in shop["items"]], [("Schraube M3", 9), ("Schraube M4", 10)])
+
+    def test_page_api_and_access(self):
+        self._item("Kabelbinder", 0, 3)
+        self._item("Klebeband", 0, 3, overview=self.werkstatt)
+        viewer = User.objects.create_user("kim", password="pw")
+        UserProfile.objects.get_or_create(user=viewer)[0].allowed_overviews.add(self.werkstatt)
+        self.client.force_login(viewer)
+
+        data = self.client.get(reverse("reorder-api")).json()
+        self.assertEqual(data["item_count"], 1)
+        self.assertEqual(data["groups"][0]["categories"][0]["items"][0]["name"], "Klebeband")
+        page = self.client.get(reverse("reorder-list"))
+        self.assertContains(page, "Klebeband")
+        self.assertNotContains(page, "Kabelbinder")
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("overview-dashboard", args=[self.lager.slug]), {"only_low": "1"})
+        self.assertEqual([it.name for it in response.context["items"]], ["Kabelbinder"])
+
+    def test_digest_runs_once_per_day(self):
+        self._item("Kabelbinder", 0, 3)
+        with mock.patch("inventory.management.commands.send_reorder_digest.notify_reorder_digest") as notify:
+            call_command("send_reorder_digest", stdout=StringIO())
+            call_command("send_reorder_digest", stdout=StringIO())
+            self.assertEqual(notify.call_count, 1)
+            groups, lines = notify.call_args.args
+            self.assertEqual(groups[0]["item_count"], 1)
+            self.assertIn("Kabelbinder (0/3)", lines[0])
+            call_command("send_reorder_digest", force=True, stdout=StringIO())
+            self.assertEqual(notify.call_count, 2)
+
+    def test_failed_digest_is_retried(self):
+        self._item("Kabelbinder", 0, 3)
+        with mock.patch(
+            "inventory.management.commands.send_reorder_digest.notify_reorder_digest", return_value=False
+        ) as notify:
+            err = StringIO()
+            call_command("send_reorder_digest", stdout=StringIO(), stderr=err)
+            self.assertIn("nicht gesendet", err.getvalue())
+            self.assertIsNone(GlobalSettings.objects.get().last_reorder_digest_at)
+            notify.return_value = True
+            call_command("send_reorder_digest", stdout=StringIO())
+            self.assertEqual(notify.call_count, 2)
+        self.assertIsNotNone(GlobalSettings.objects.get().last_reorder_digest_at)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LocationSubtreeTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager", has_min_stock=True)
+        self.werkstatt = StorageLocation.objects.create(name="Werkstatt")
+        self.regal = StorageLocation.objects.create(name="Regal", parent=self.werkstatt)
+        self.fach = StorageLocation.objects.create(name="Fach", parent=self.regal)
+        self.keller = StorageLocation.objects.create(name="Keller")
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.client.force_login(self.user)
+
+    def _item(self, name, quantity, location, low_quantity=0):
+        # Teilbaum-Summen bucht post_save erst nach dem Commit
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            return InventoryItem.objects.create(
+                name=name, quantity=quantity, low_quantity=low_quantity,
+                overview=self.overview, user=self.user, storage_location=location,
+            )
+
+    def _rollup(self, location):
+        rollup = StorageLocationRollup.objects.get(location=location)
+        return rollup.item_count, rollup.total_quantity, rollup.low_stock_count
+
+    def test_dashboard_filter_matches_whole_subtree(self):
+        self._item("Zange", 1, self.fach)
+        self._item("Säge", 1, self.werkstatt)
+        self._item("Eimer", 1, self.keller)
+        url = reverse("overview-dashboard", args=[self.overview.slug])
+
+        response = self.client.get(url, {"storage_location": self.werkstatt.pk})
+        self.assertEqual(sorted(it.name for it in response.context["items"]), ["Säge", "Zange"])
+        response = self.client.get(url, {"storage_location": self.regal.pk})
+        self.assertEqual([it.name for it in response.context["items"]], ["Zange"])
+        self.assertEqual(self.client.get(url, {"storage_location": "x"}).context["items"], [])
+
+        # Vorfahren belegter Lagerorte sind wählbar und zählen ihren Teilbaum
+        counts = {loc.name: loc.facet_count for loc in response.context["storage_locations"]}
+        self.assertEqual(counts, {"Werkstatt": 2, "Regal": 1, "Fach": 1, "Keller": 1})
+
+    def test_rollups_follow_item_changes(self):
+        zange = self._item("Zange", 4, self.fach, low_quantity=2)
+        self._item("Säge", 1, self.werkstatt, low_quantity=3)
+        self.assertEqual(self._rollup(self.werkstatt), (2, 5, 1))
+        self.assertEqual(self._rollup(self.regal), (1, 4, 0))
+
+        BorrowedItem(item=zange, borrower="Kim", quantity_borrowed=3).borrow()
+        self.assertEqual(self._rollup(self.fach), (1, 1, 1))
+        zange.borrowings.get().return_item()
+        self.assertEqual(self._rollup(self.fach), (1, 4, 0))
+
+        zange.refresh_from_db()
+        zange.storage_location = self.keller
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            zange.save(update_fields=["storage_location"])
+        self.assertEqual(self._rollup(self.regal), (0, 0, 0))
+        self.assertEqual(self._rollup(self.keller), (1, 4, 0))
+
+        zange.is_active = False
+        with self.settings(MEDIA_ROOT=self.media.name), self.captureOnCommitCallbacks(execute=True):
+            zange.save()
+        self.assertEqual(self._rollup(self.keller), (0, 0, 0))
+        self.assertEqual(rollups.rebuild(), 0)
+
+    def test_rollups_follow_subtree_moves_and_deletes(self):
+        self._item("Zange", 4, self.fach)
+        self.regal.parent = self.keller
+        self.regal.save()
+        self.assertEqual(self._rollup(self.werkstatt), (0, 0, 0))
+        self.assertEqual(self._rollup(self.keller), (1, 4, 0))
+
+        self.regal.delete()
+        self.assertEqual(self._rollup(self.keller), (0, 0, 0))
+        self.assertEqual(rollups.rebuild(), 0)
+
+        StorageLocationRollup.objects.filter(location=self.keller).update(item_count=7)
+        call_command("repair_location_rollups", stdout=StringIO())
+        self.assertEqual(self._rollup(self.keller), (0, 0, 0))
+
+    def test_tree_renders_rollups_without_recursive_queries(self):
+        self._item("Zange", 4, self.fach)
+        with self.assertNumQueries(2):
+            tree = StorageLocationForm().parent_tree()
+        werkstatt = next(node for node in tree if node["id"] == self.werkstatt.pk)
+        self.assertEqual(werkstatt["rollup"]["item_count"], 1)
+        self.assertEqual(werkstatt["children"][0]["children"][0]["rollup"]["total_quantity"], 4)
+
+    def test_nfc_page_and_api_list_subtree(self):
+        self._item("Zange", 4, self.fach)
+        self._item("Eimer", 1, self.keller)
+        page = self.client.get(reverse("nfc-location-redirect", args=[self.werkstatt.nfc_token]))
+        self.assertContains(page, "Zange")
+        self.assertContains(page, "Werkstatt &gt; Regal &gt; Fach")
+        self.assertNotContains(page, "Eimer")
+
+        data = self.client.get(reverse("location-items-api", args=[self.werkstatt.pk])).json()
+        self.assertEqual([it["name"] for it in data["items"]], ["Zange"])
+        self.assertEqual(data["location"]["rollup"]["item_count"], 1)
+
+        viewer = User.objects.create_user("kim", password="pw")
+        self.client.force_login(viewer)
+        data = self.client.get(reverse("location-items-api", args=[self.werkstatt.pk])).json()
+        self.assertEqual(data["items"], [])
+        self.assertNotIn("rollup", data["location"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class LatestCommentTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager", enable_comments=True)
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        with self.settings(MEDIA_ROOT=self.media.name):
+            self.item = InventoryItem.objects.create(name="Zange", quantity=1, overview=self.overview, user=self.user)
+        self.client.force_login(self.user)
+
+    def _comments(self, count):
+        return [ItemComment.objects.create(item=self.item, author=self.user, text=f"Notiz {i}") for i in range(count)]
+
+    def _latest_id(self):
+        return InventoryItem.objects.values_list("latest_comment_id", flat=True).get(pk=self.item.pk)
+
+    def test_latest_comment_follows_saves_and_deletes(self):
+        first, second = self._comments(2)
+        self.assertEqual(self._latest_id(), second.pk)
+
+        first.text = "aktualisiert"
+        first.save()
+        self.assertEqual(self._latest_id(), first.pk)
+
+        # Item-save() mit veralteter Instanz überschreibt den Zeiger nicht
+        with self.settings(MEDIA_ROOT=self.media.name):
+            self.item.save()
+        self.assertEqual(self._latest_id(), first.pk)
+
+        first.delete()
+        self.assertEqual(self._latest_id(), second.pk)
+        second.delete()
+        self.assertIsNone(self._latest_id())
+
+    def test_dashboard_loads_one_comment_per_row(self):
+        self._comments(30)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("overview-dashboard", args=[self.overview.slug]))
+        comment_queries = [q["sql"] for q in ctx.captured_queries if "inventory_itemcomment" in q["sql"]]
+        self.assertEqual(len(comment_queries), 1)
+        # per latest_comment-ID, nicht alle Kommentare des Items
+        self.assertRegex(comment_queries[0], r'WHERE "inventory_itemcomment"\."id" (=|IN)')
+        self.assertContains(response, "Notiz 29")
+        self.assertNotContains(response, "Notiz 28")
+
+    def test_comment_thread_is_paged(self):
+        self._comments(25)
+        url = reverse("item-comments", args=[self.item.pk])
+        first = self.client.get(url)
+        self.assertEqual(len(first.context["page"]), 20)
+        self.assertContains(first, "Notiz 24")
+        self.assertNotContains(first, "Notiz 4<")
+        second = self.client.get(url, {"cursor": first.context["page"].next_cursor})
+        self.assertEqual([c.text for c in second.context["page"]], [f"Notiz {i}" for i in range(4, -1, -1)])
+        self.assertFalse(second.context["page"].has_next)
+
+        self.client.force_login(User.objects.create_user("kim", password="pw"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MediaJobTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("kim", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_root = self.settings(MEDIA_ROOT=self.media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.item = InventoryItem.objects.create(name="Zange", quantity=1, overview=self.overview, user=self.user)
+
+    def _files(self):
+        return sorted(p.name for p in Path(self.media.name).rglob("*") if p.is_file())
+
+    def test_save_only_enqueues(self):
+        job = MediaJob.objects.get(item=self.item)
+        self.assertEqual(job.status, MediaJob.Status.PENDING)
+        self.assertEqual(self._files(), [])
+        self.assertEqual(len(self.item.barcode), 12)
+        self.assertEqual(len(self.item.nfc_token), 16)
+
+    def _cached(self, kind, data):
+        return codes.is_cached(kind, "png", data)
+
+    def test_worker_renders_and_skips_unchanged_payload(self):
+        qr_data = codes.code_data("qr", self.item)
+        with mock.patch.object(media, "render", wraps=media.render) as render:
+            self.assertEqual(media.process_jobs()["rendered"], 1)
+            self.assertTrue(self._cached("qr", qr_data))
+            self.assertTrue(self._cached("barcode", self.item.barcode))
+            self.assertEqual(len(self._files()), 2)
+            self.assertEqual(MediaJob.objects.get(item=self.item).status, MediaJob.Status.DONE)
+
+            # Neu eingestellt, Inhalt gleich → kein erneutes Rendern
+            media.enqueue_all()
+            self.assertEqual(media.process_jobs(), {"rendered": 0, "skipped": 1, "failed": 0})
+            self.assertEqual(render.call_count, 1)
+
+            # Name ändert weder Barcode noch QR-URL → gar kein Job
+            self.item.name = "Seitenschneider"
+            self.item.save()
+            self.assertEqual(MediaJob.objects.get(item=self.item).status, MediaJob.Status.DONE)
+
+            self.item.barcode = "NEU-123"
+            self.item.save()
+            self.assertEqual(media.process_jobs()["rendered"], 1)
+            self.assertTrue(self._cached("barcode", "NEU-123"))
+
+    def test_qr_base_url_change_requeues_all(self):
+        media.process_jobs()
+        settings_row = GlobalSettings.objects.create(qr_base_url="https://alt.example")
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.qr_base_url = "https://neu.example"
+            settings_row.save()
+        self.assertEqual(MediaJob.objects.get(item=self.item).status, MediaJob.Status.PENDING)
+
+    def test_failed_render_is_retried_then_marked_failed(self):
+        with mock.patch.object(media, "render", return_value="OSError: voll"), self.assertLogs("inventory.media", "WARNING"):
+            for _ in range(media.MAX_ATTEMPTS):
+                self.assertEqual(media.process_jobs()["failed"], 1)
+        job = MediaJob.objects.get(item=self.item)
+        self.assertEqual((job.status, job.attempts, job.last_error), (MediaJob.Status.FAILED, media.MAX_ATTEMPTS, "OSError: voll"))
+        self.assertEqual(media.process_jobs()["failed"], 0)
+
+    def test_token_collision_retries_insert(self):
+        taken = self.item.barcode
+        with mock.patch("inventory.models.uuid.uuid4") as uuid4:
+            uuid4.side_effect = [
+                mock.Mock(hex=taken + "0000"), mock.Mock(hex="a" * 32),  # erster Versuch: Barcode belegt
+                mock.Mock(hex="b" * 32), mock.Mock(hex="c" * 32),
+            ]
+            item = InventoryItem.objects.create(name="Hammer", quantity=1, overview=self.overview, user=self.user)
+        self.assertEqual(item.barcode, "b" * 12)
+        self.assertEqual(item.nfc_token, "c" * 16)
+
+    def test_other_integrity_errors_are_not_retried(self):
+        with mock.patch("inventory.models.uuid.uuid4", wraps=uuid.uuid4) as uuid4, self.assertRaises(IntegrityError):
+            # vorgegebener (nicht erzeugter) NFC-Token ist belegt → kein neuer Versuch
+            InventoryItem.objects.create(
+                name="Hammer", quantity=1, overview=self.overview, user=self.user, nfc_token=self.item.nfc_token
+            )
+        self.assertEqual(uuid4.call_count, 1)
+
+    def test_save_writes_only_the_row(self):
+        item = InventoryItem.objects.get(pk=self.item.pk)
+        item.name = "Seitenschneider"
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(2):
+            item.save()  # alte Zeile + UPDATE
+        # Suchindex, Dubletten, Typeahead und Teilbaum-Summen folgen nach dem Commit
+        self.assertEqual(len(callbacks), 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(item.version, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CodeEndpointTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_user("kim", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_root = self.settings(MEDIA_ROOT=self.media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        UserProfile.objects.get(user=self.user).allowed_overviews.add(self.overview)
+        self.item = InventoryItem.objects.create(name="Zange", quantity=1, overview=self.overview, user=self.user)
+        self.client.force_login(self.user)
+
+    def test_renders_once_and_serves_immutable(self):
+        url = self.item.qr_url
+        self.assertRegex(url, rf"^/codes/qr/{self.item.pk}-[0-9a-f]{{16}}\.png$")
+        with mock.patch.object(codes, "render_bytes", wraps=codes.render_bytes) as render_bytes:
+            for _ in range(2):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "image/png")
+                self.assertIn("immutable", response["Cache-Control"])
+                self.assertTrue(b"".join(response.streaming_content).startswith(b"\x89PNG"))
+        self.assertEqual(render_bytes.call_count, 1)
+
+        svg = self.client.get(self.item.barcode_url.replace(".png", ".svg"))
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", b"".join(svg.streaming_content))
+
+    def test_base_url_change_changes_url(self):
+        old_url, barcode_url = self.item.qr_url, self.item.barcode_url
+        self.client.get(old_url)
+        GlobalSettings.objects.create(qr_base_url="https://neu.example")
+        new_url = self.item.qr_url
+        self.assertNotEqual(old_url, new_url)
+        self.assertEqual(self.item.barcode_url, barcode_url)
+        self.assertEqual(self.client.get(old_url).url, new_url)
+
+        self.client.get(new_url)
+        self.assertEqual(codes.prune(), 1)
+        self.assertTrue(codes.is_cached("qr", "png", codes.code_data("qr", self.item)))
+
+    def test_prune_sweeps_stale_files_and_abandoned_tmp(self):
+        self.client.get(self.item.qr_url)
+        current = codes.cache_path(codes.cache_key("qr", "png", codes.code_data("qr", self.item)), "png")
+        directory = os.path.dirname(current)
+        names = ("0" * 64 + ".png", "tmpneu.tmp", "tmpalt.tmp")
+        stale, fresh_tmp, old_tmp = (os.path.join(directory, name) for name in names)
+        for path in (stale, fresh_tmp, old_tmp):
+            with open(path, "wb") as fh:
+                fh.write(b"x")
+        long_ago = time.time() - codes.TMP_GRACE_SECONDS - 60
+        os.utime(current, (long_ago, long_ago))  # alte mtime: bleibt trotzdem, weil erwartet
+        os.utime(old_tmp, (long_ago, long_ago))
+
+        self.assertEqual(codes.prune(), 2)
+        self.assertTrue(os.path.exists(current))
+        self.assertTrue(os.path.exists(fresh_tmp))
+        self.assertFalse(os.path.exists(stale))
+        self.assertFalse(os.path.exists(old_tmp))
+
+    def test_prune_keeps_expected_files_on_coarse_timestamps(self):
+        self.client.get(self.item.qr_url)
+        current = codes.cache_path(codes.cache_key("qr", "png", codes.code_data("qr", self.item)), "png")
+        utime = os.utime
+
+        def fat_utime(path, *args, ns=None, **kwargs):
+            # FAT speichert nur gerade Sekunden (abgerundet)
+            if ns is not None:
+                ns = tuple(t // 2_000_000_000 * 2_000_000_000 for t in ns)
+            return utime(path, *args, ns=ns, **kwargs)
+
+        now = time.time_ns() // 2_000_000_000 * 2_000_000_000 + 1_700_000_000
+        with mock.patch.object(codes.os, "utime", fat_utime), mock.patch.object(codes.time, "time_ns", return_value=now):
+            self.assertEqual(codes.prune(), 0)
+        self.assertTrue(os.path.exists(current))
+
+    def test_unknown_item_or_token_is_404(self):
+        self.assertEqual(self.client.get(f"/codes/qr/999999-{'0' * 16}.png").status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.item.qr_url).status_code, 302)
+
+    def test_item_codes_require_overview_access(self):
+        stale_url = re.sub(r"-[0-9a-f]{16}\.", f"-{'0' * 16}.", self.item.barcode_url)
+        self.client.force_login(User.objects.create_user("gast", password="pw"))
+        for url in (self.item.qr_url, self.item.nfc_qr_url, stale_url):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+        location = StorageLocation.objects.create(name="Regal")
+        self.assertEqual(self.client.get(location.qr_url).status_code, 200)
+
+    def test_nfc_and_location_codes(self):
+        location = StorageLocation.objects.create(name="Regal")
+        for url, link in (
+            (self.item.nfc_qr_url, f"/nfc/{self.item.nfc_token}/"),
+            (location.qr_url, f"/nfc/location/{location.nfc_token}/"),
+        ):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            kind = url.split("/")[2]
+            self.assertTrue(codes.code_data(kind, location if kind == "location" else self.item).endswith(link))
+
+    def test_regenerate_codes_renders_only_missing(self):
+        location = StorageLocation.objects.create(name="Regal")
+        out = StringIO()
+        call_command("regenerate_codes", workers=1, stdout=out)
+        self.assertIn("4 Code(s) erwartet, 4 fehlen", out.getvalue())
+        self.assertTrue(codes.is_cached("location", "png", codes.code_data("location", location)))
+
+        with mock.patch.object(codes, "render_bytes", wraps=codes.render_bytes) as render_bytes:
+            call_command("regenerate_codes", workers=1, stdout=StringIO())
+            self.assertEqual(render_bytes.call_count, 0)
+
+            # neue NFC-Basis: nur die NFC-Codes (Item + Lagerort) ändern sich
+            GlobalSettings.objects.create(qr_base_url=codes.qr_base_url(), nfc_base_url_local="https://nfc.example")
+            out = StringIO()
+            call_command("regenerate_codes", workers=1, kinds="nfc,location", prune=True, stdout=out)
+            self.assertEqual(render_bytes.call_count, 2)
+        self.assertIn("2 gerendert, 0 unverändert, 0 fehlgeschlagen; 2 veraltete", out.getvalue())
+
+        out = StringIO()
+        call_command("regenerate_codes", formats="svg", dry_run=True, stdout=out)
+        self.assertIn("4 Code(s) erwartet, 4 fehlen", out.getvalue())
+
+
+@override_settings(CACHES=LOCMEM_CACHES, INVENTORY_LABEL_WORKERS=1)
+class LabelSheetTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Lager", slug="lager")
+        self.other = Overview.objects.create(name="Büro", slug="buero")
+        self.werkstatt = StorageLocation.objects.create(name="Werkstatt")
+        self.regal = StorageLocation.objects.create(name="Regal", parent=self.werkstatt)
+        self.items = [
+            InventoryItem.objects.create(
+                name=f"Zange {i}", quantity=1, overview=self.overview, user=self.user,
+                storage_location=self.regal if i % 2 else self.werkstatt,
+            )
+            for i in range(30)
+        ]
+        self.foreign = InventoryItem.objects.create(name="Locher", quantity=1, overview=self.other, user=self.user)
+        self.client.force_login(self.user)
+
+    def _get(self, **params):
+        params = {"template": "a4-3x8", "kind": "qr", "fmt": "pdf", **params}
+        return self.client.get(reverse("label-sheets"), params)
+
+    def _pdf_pages(self, body):
+        self.assertTrue(body.startswith(b"%PDF-1.4"))
+        self.assertTrue(body.endswith(b"%%EOF\n"))
+        start = int(re.search(rb"startxref\n(\d+)", body).group(1))
+        entries = body[start:].split(b"trailer")[0].splitlines()[3:]
+        for number, entry in enumerate(entries, start=1):
+            self.assertTrue(body[int(entry[:10]):].startswith(b"%d 0 obj" % number))
+        return int(re.search(rb"/Type /Pages /Kids \[.*?\] /Count (\d+)", body).group(1))
+
+    def test_overview_sheet_streams_pdf_pages(self):
+        response = self._get(overview=self.overview.pk)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        # 30 Etiketten, 24 pro A4-Bogen
+        self.assertEqual(self._pdf_pages(b"".join(response.streaming_content)), 2)
+
+        skipped = self._get(overview=self.overview.pk, skip=20)
+        self.assertEqual(self._pdf_pages(b"".join(skipped.streaming_content)), 3)
+
+    def test_selection_by_location_tag_and_ids(self):
+        tag = ApplicationTag.objects.create(name="Elektro")
+        self.items[0].application_tags.add(tag)
+        self.assertEqual(labels.selection_queryset(location=self.regal).count(), 15)
+        self.assertEqual(labels.selection_queryset(location=self.werkstatt).count(), 30)
+        self.assertEqual(list(labels.selection_queryset(tag=tag)), [self.items[0]])
+        ids = labels.parse_ids(f"{self.items[0].pk}, {self.items[2].pk}-{self.items[4].pk}")
+        self.assertEqual(labels.selection_queryset(ids=ids).count(), 4)
+        with self.assertRaises(ValueError):
+            labels.parse_ids("3-1")
+
+    def test_strip_template_svg_one_page_per_label(self):
+        response = self._get(ids=str(self.items[0].pk), template="brother-62x29", kind="barcode", fmt="svg")
+        body = b"".join(response.streaming_content).decode("utf-8")
+        self.assertIn('height="29mm"', body)
+        self.assertEqual(body.count("<g>"), 1)
+        self.assertIn(self.items[0].barcode, body)
+
+    def test_form_requires_selection_and_respects_access(self):
+        self.assertContains(self.client.get(reverse("label-sheets")), "Etiketten erzeugen")
+        self.assertContains(self._get(), "Bitte Dashboard, Lagerort, Tag oder Item-IDs wählen.")
+
+        kim = User.objects.create_user("kim", password="pw")
+        UserProfile.objects.get(user=kim).allowed_overviews.add(self.overview)
+        self.client.force_login(kim)
+        self.assertContains(self._get(ids=str(self.foreign.pk)), "Keine Items in dieser Auswahl.")
+
+    def test_process_pool_matches_inline_rendering(self):
+        template = labels.TEMPLATES["dymo-89x36"]
+        qs = labels.selection_queryset(overview=self.overview)[:6]
+        inline = b"".join(labels.stream_sheet(qs, template, "qr", "pdf", total=6, workers=1, bases=codes.Bases("https://x")))
+        pooled = b"".join(labels.stream_sheet(qs, template, "qr", "pdf", total=6, workers=2, bases=codes.Bases("https://x")))
+        self.assertEqual(inline, pooled)
+        self.assertEqual(self._pdf_pages(pooled), 6)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ItemImportTests(TestCase):
+    HEADER = "Name;Typ;Bestand;Einheit;Kategorie;Lagerort;Mindestbestand;Tags;Barcode;Wartungsdatum;Farbe\n"
+
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Werkstatt", slug="werkstatt")
+        self.category = Category.objects.create(name="Werkzeug")
+        self.halle = StorageLocation.objects.create(name="Halle")
+
+    def _import(self, body, **options):
+        data = (self.HEADER + body).encode("utf-8")
+        return imports.import_items(io.BytesIO(data), "items.csv", user=self.user, overview=self.overview, **options)
+
+    def test_bulk_import_keeps_derived_data_in_sync(self):
+        rows = "".join(
+            f"Zange {i};Verbrauchsmaterial;{i};Stück;werkzeug;Halle > Regal {i % 2};5;rot, Blau;;01.02.2027;x\n"
+            for i in range(30)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            report = self._import(rows + "Säge;;2;m;Neu;;;;BC-1;;\n", chunk_size=10)
+        self.assertLess(len(ctx.captured_queries), 150)
+        self.assertEqual((report.created, report.error_count), (31, 0))
+        self.assertEqual(report.ignored_columns, ["Farbe"])
+        self.assertEqual(report.new_categories, ["Neu"])
+        self.assertEqual(report.new_tags, ["rot", "Blau"])
+        self.assertEqual(report.new_locations, ["Halle > Regal 0", "Halle > Regal 1"])
+
+        item = InventoryItem.objects.get(name="Zange 3")
+        self.assertEqual((item.item_type, item.unit, item.category, item.low_quantity), ("consumable", "pcs", self.category, 5))
+        self.assertEqual(item.storage_location.full_path, "Halle > Regal 1")
+        self.assertEqual(str(item.maintenance_date), "2027-02-01")
+        self.assertTrue(item.below_minimum)
+        self.assertEqual(sorted(item.application_tags.values_list("name", flat=True)), ["Blau", "rot"])
+        self.assertEqual((len(item.barcode), len(item.nfc_token)), (12, 16))
+        self.assertEqual(InventoryItem.objects.get(name="Säge").barcode, "BC-1")
+
+        history = InventoryHistory.objects.get(item=item)
+        self.assertEqual(history.action, InventoryHistory.Action.CREATED)
+        self.assertEqual(history.data_after["quantity"], 3)
+        self.assertEqual(len(history.data_after["tags"]), 2)
+        self.assertEqual(history.meta["source"], "import")
+        self.assertEqual(ItemSearchDocument.objects.count(), 31)
+        self.assertEqual(ItemSimilaritySignature.objects.count(), 31)
+        self.assertEqual(MediaJob.objects.filter(status=MediaJob.Status.PENDING).count(), 31)
+        self.assertEqual(StorageLocationRollup.objects.get(location=self.halle).item_count, 30)
+        self.assertEqual(rollups.rebuild(), 0)
+
+    def test_dry_run_and_all_or_nothing(self):
+        InventoryItem.objects.create(name="Alt", quantity=1, overview=self.overview, user=self.user, barcode="BC-1")
+        body = "Gut;;1;;Neu;Keller;;;;;\n;;1;;;;;;;;\nDoppelt;;1;;;;;;BC-1;;\nKaputt;;1,5;Fass;;;;;;gestern;\n"
+
+        report = self._import(body, dry_run=True)
+        self.assertEqual((report.rows, report.valid, report.created), (4, 1, 0))
+        self.assertEqual([line for line, _ in report.errors], [3, 5, 4])
+        self.assertIn("Name fehlt", report.errors[0][1])
+        self.assertIn("Einheit", report.errors[1][1])
+        self.assertIn("bereits vergeben", report.errors[2][1])
+        self.assertEqual(report.preview[0]["location"], "Keller")
+        self.assertFalse(Category.objects.filter(name="Neu").exists())
+
+        report = self._import(body)
+        self.assertTrue(report.rolled_back)
+        self.assertFalse(InventoryItem.objects.filter(name="Gut").exists())
+        self.assertFalse(StorageLocation.objects.filter(name="Keller").exists())
+
+        report = self._import(body, skip_invalid=True)
+        self.assertEqual(report.created, 1)
+        self.assertEqual(InventoryItem.objects.get(name="Gut").category.name, "Neu")
+
+    def test_file_errors_and_admin_upload(self):
+        with self.assertRaisesMessage(ValueError, "Name"):
+            imports.import_items(io.BytesIO(b"Foo;Bar\n1;2\n"), "x.csv", user=self.user)
+        with self.assertRaisesMessage(ValueError, "UTF-8"):
+            imports.import_items(io.BytesIO("Name\nMüller\n".encode("cp1252")), "x.csv", user=self.user)
+
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile("items.csv", "Name,Bestand,Dashboard\nHammer,2,werkstatt\n".encode("utf-8"))
+        response = self.client.post(reverse("admin_item_import"), {"file": upload, "dry_run": "on"})
+        self.assertContains(response, "Probelauf")
+        self.assertContains(response, "Hammer")
+        self.assertFalse(InventoryItem.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkActionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.user = User.objects.create_superuser("admin", password="pw")
+        self.overview = Overview.objects.create(name="Werkstatt", slug="werkstatt")
+        self.lager = Overview.objects.create(name="Lager", slug="lager")
+        self.halle = StorageLocation.objects.create(name="Halle")
+        self.regal = StorageLocation.objects.create(name="Regal", parent=self.halle)
+        self.keller = StorageLocation.objects.create(name="Keller")
+        self.tag = ApplicationTag.objects.create(name="rot")
+
+    def _items(self, count, **fields):
+        return [
+            InventoryItem.objects.create(
+                name=f"Zange {i}", quantity=5, low_quantity=3, overview=self.overview, user=self.user,
+                storage_location=self.regal, **fields,
+            ).pk
+            for i in range(count)
+        ]
+
+    def _queries(self, action, ids, value=None):
+        with CaptureQueriesContext(connection) as ctx:
+            bulk.apply_action(action, ids, value, user=self.user)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_selection(self):
+        few, many = self._items(3), self._items(40)
+        for action, value in (("set_location", self.keller.pk), ("adjust_quantity", -4), ("add_tag", self.tag.pk)):
+            self.assertEqual(self._queries(action, few, value), self._queries(action, many, value), action)
+
+    def test_history_search_and_rollups_follow_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = self._items(4)
+            inactive = InventoryItem.objects.get(pk=ids[0])
+            inactive.is_active = False
+            inactive.save()
+
+        self.assertEqual(bulk.apply_action("set_location", ids, self.keller.pk, user=self.user), 4)
+        self.assertEqual(bulk.apply_action("adjust_quantity", ids, -4, user=self.user), 4)
+        self.assertEqual(bulk.apply_action("adjust_quantity", ids, -4, user=self.user), 4)
+        self.assertEqual(bulk.apply_action("deactivate", ids, user=self.user), 3)
+        self.assertEqual(rollups.rebuild(), 0)
+
+        item = InventoryItem.objects.get(pk=ids[1])
+        self.assertEqual((item.storage_location, item.quantity, item.below_minimum, item.is_active), (self.keller, 0, True, False))
+        actions = list(InventoryHistory.objects.filter(item=item).order_by("pk").values_list("action", flat=True))
+        Action = InventoryHistory.Action
+        self.assertEqual(actions, [Action.MOVEMENT, Action.QUANTITY, Action.QUANTITY, Action.UPDATED])
+        entry = InventoryHistory.objects.get(item=item, action=Action.MOVEMENT)
+        self.assertEqual((entry.changes[0]["before"], entry.changes[0]["after"]), ("Halle > Regal", "Keller"))
+        self.assertEqual(entry.meta, {"source": "bulk", "action": "set_location"})
+        self.assertIn("keller", ItemSearchDocument.objects.get(item_id=ids[1]).document.lower())
+
+    def test_tags_and_overview_move(self):
+        ids = self._items(3)
+        InventoryItem.objects.get(pk=ids[0]).application_tags.add(self.tag)
+
+        self.assertEqual(bulk.apply_action("add_tag", ids, self.tag.pk, user=self.user), 2)
+        self.assertEqual(self.tag.inventoryitem_set.count(), 3)
+        self.assertEqual(bulk.apply_action("remove_tag", ids[:2], self.tag.pk, user=self.user), 2)
+        self.assertEqual(list(self.tag.inventoryitem_set.values_list("pk", flat=True)), [ids[2]])
+        entry = InventoryHistory.objects.filter(item_id=ids[0], meta__action="remove_tag").get()
+        self.assertEqual((entry.changes[0]["before"], entry.changes[0]["after"]), ("rot", "–"))
+
+        self.assertEqual(bulk.apply_action("move_overview", ids, self.lager.pk, user=self.user), 3)
+        self.assertEqual(InventoryItem.objects.filter(overview=self.lager).count(), 3)
+
+    def test_view_checks_access_and_values(self):
+        ids = self._items(2)
+        kim = User.objects.create_user("kim", password="pw")
+        InventoryItem.objects.filter(pk__in=ids).update(user=kim)
+        UserProfile.objects.get(user=kim).allowed_overviews.add(self.overview)
+        self.client.force_login(kim)
+        url = reverse("bulk-item-action")
+
+        response = self.client.post(url, {"action": "move_overview", "item_ids": ids, "overview": self.lager.pk})
+        self.assertIn("Ungültige Auswahl", str(list(get_messages(response.wsgi_request))[0]))
+        self.assertEqual(InventoryItem.objects.filter(overview=self.overview).count(), 2)
+        self.client.post(url, {"action": "adjust_quantity", "item_ids": ids, "delta": "abc"})
+        self.assertEqual(InventoryItem.objects.filter(quantity=5).count(), 2)
+
+        self.client.post(url, {"action": "adjust_quantity", "item_ids": ids, "delta": "3"})
+        self.assertEqual(InventoryItem.objects.filter(quantity=8).count(), 2)
+
+        other = InventoryItem.objects.create(name="Fremd", quantity=5, overview=self.lager, user=self.user)
+        self.client.post(url, {"action": "deactivate", "item_ids": [other.pk]})
+        other.refresh_from_db()
+        self.assertTrue(other.is_active)
+
+    def test_view_only_changes_own_items(self):
+        ids = self._items(2)
+        kim = User.objects.create_user("kim", password="pw")
+        UserProfile.objects.get(user=kim).allowed_overviews.add(self.overview, self.lager)
+        self.client.force_login(kim)
+        url = reverse("bulk-item-action")
+
+        response = self.client.post(url, {"action": "move_overview", "item_ids": ids, "overview": self.lager.pk})
+        self.assertIn("0 Artikel geändert", str(list(get_messages(response.wsgi_request))[0]))
+        self.assertEqual(InventoryItem.objects.filter(overview=self.overview).count(), 2)
+        self.assertFalse(InventoryHistory.objects.filter(meta__action="move_overview").exists())
+
+        # Favoriten darf jeder mit Zugriff setzen
+        self.client.post(url, {"action": "favorite", "item_ids": ids})
+        self.assertEqual(InventoryItem.objects.filter(is_favorite=True).count(), 2)
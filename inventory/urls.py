@@ -1,12 +1,12 @@
 # inventory/urls.py
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
 from . import views
 from .views import CustomAuthForm
 # API-Views
-from .api import FeedbackSummaryAPI, HAStatusAPI, SystemHealthAPI
+from .api import FeedbackSummaryAPI, HAStatusAPI, ItemSuggestAPI, LocationItemsAPI, ReorderAPI, SystemHealthAPI
 
 urlpatterns = [
     # 1) Frontend-Views
@@ -23,6 +23,11 @@ urlpatterns = [
     path('delete-item/<int:pk>/', views.DeleteItem.as_view(), name='delete-item'),
 
     path('edit-item/<int:pk>/regenerate-qr/', views.RegenerateQRView.as_view(), name='regenerate-qr'),
+    re_path(
+        r'^codes/(?P<kind>qr|barcode|nfc|location)/(?P<token>\d+-[0-9a-f]+)\.(?P<fmt>png|svg)$',
+        views.CodeImageView.as_view(),
+        name='code-image',
+    ),
     path('edit-item/<int:pk>/regenerate-nfc/', views.RegenerateNFCTokenView.as_view(), name='regenerate-nfc'),
     path('edit-item/<int:pk>/delete-image/', views.DeleteImageView.as_view(), name='delete-image'),
     path('item/<int:pk>/history/<int:history_id>/rollback/', views.ItemHistoryRollbackView.as_view(), name='item-history-rollback'),
@@ -33,6 +38,7 @@ urlpatterns = [
     path('items/bulk-action/', views.BulkItemActionView.as_view(), name='bulk-item-action'),
     path('item/<int:item_id>/adjust-quantity/', views.QuickAdjustQuantityView.as_view(), name='adjust-quantity'),
     path('item/<int:item_id>/comment/', views.ItemCommentCreateView.as_view(), name='item-comment-add'),
+    path('item/<int:item_id>/comments/', views.ItemCommentListView.as_view(), name='item-comments'),
     path('nfc/<str:token>/', views.NFCItemRedirectView.as_view(), name='nfc-redirect'),
     path('nfc/location/<str:token>/', views.NFCStorageLocationView.as_view(), name='nfc-location-redirect'),
 
@@ -50,6 +56,7 @@ urlpatterns = [
 
     # Barcode
     path('barcodes/', views.BarcodeListView.as_view(), name='barcode-list'),
+    path('labels/', views.LabelSheetView.as_view(), name='label-sheets'),
     path('scan-barcode/', views.ScanBarcodeView.as_view(), name='scan-barcode'),
 
     # Patch Notes
@@ -74,6 +81,7 @@ urlpatterns = [
     path('exports/scheduled/', views.ScheduledExportView.as_view(), name='scheduled-exports'),
     path('exports/scheduled/<int:pk>/run/', views.ScheduledExportRunView.as_view(), name='scheduled-export-run'),
     path('reports/movements/', views.MovementReportView.as_view(), name='movement-report'),
+    path('reorder/', views.ReorderListView.as_view(), name='reorder-list'),
 
     # 4) Feedback
     path('feedback/', views.FeedbackListView.as_view(), name='feedback-list'),
@@ -89,6 +97,15 @@ urlpatterns = [
     path('api/health/ha/', HAStatusAPI.as_view(), name='ha-health'),
     path('api/health/system/', SystemHealthAPI.as_view(), name='system-health'),
 
+    # 7) Typeahead (Scanner-Stationen, Item-Formulare)
+    path('api/items/suggest/', ItemSuggestAPI.as_view(), name='item-suggest'),
+
+    # 8) Nachbestell-Liste über alle Overviews
+    path('api/reorder/', ReorderAPI.as_view(), name='reorder-api'),
+
+    # 9) Lagerort-Teilbaum (Items inkl. Unterorte)
+    path('api/locations/<int:pk>/items/', LocationItemsAPI.as_view(), name='location-items-api'),
+
     path("item/<int:pk>/move/",views.MoveItemToOverviewView.as_view(),name="move-item-to-overview",),
 
 ]
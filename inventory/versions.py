@@ -0,0 +1,161 @@
+# inventory/versions.py
+#
+# Versionszähler pro Overview im gemeinsamen Cache:
+# - jede Änderung an Items eines Dashboards erhöht den Zähler (siehe signals.py;
+#   queryset.update() muss explizit bump_overview_versions() aufrufen)
+# - abgeleitete Caches (z. B. Trefferanzahl der Dashboard-Paginierung) hängen
+#   die Version an ihren Schlüssel und werden so ohne delete_pattern ungültig
+# - dazu ein globaler Stammdaten-Zähler (Kategorien, Tags, Lagerorte): deren
+#   Namen/Pfade stehen in gecachten Zeilen, ohne dass sich das Item ändert
+# - ein globaler Zähler über alle Overviews und einer für Feedback; alle Zähler
+#   sind Grundlage der ETags in conditional.py
+# - fehlt ein Zähler (Cache geleert/verdrängt), startet er bei der aktuellen
+#   Zeit in ms statt bei 0/1 → frühere Stände (und ihre ETags) kehren nicht
+#   zurück; read_counter()/bump_counter() nutzen auch die übrigen Zähler
+#   (Settings-Snapshot, Zugriffsrechte, Typeahead)
+# - Erhöhen muss prozessübergreifend atomar sein: zwei Worker, die beide N+1
+#   schreiben, lassen einen dazwischen unter N+1 gecachten Stand bis zum
+#   Timeout gelten. Redis/Memcached/LocMem zählen atomar; der Datei-Cache
+#   (incr = get+set) wird per flock auf eine Sperrdatei serialisiert, andere
+#   Backends lehnt checks.py ab (inventory.E005)
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+OVERVIEW_VERSION_PREFIX = "inventory:overview-version"
+COUNTER_LOCK_NAME = ".inventory-counters.lock"
+# Backends, deren add()/incr() auch zwischen Prozessen atomar sind
+ATOMIC_COUNTER_BACKENDS = (
+    "django.core.cache.backends.redis.RedisCache",
+    "django_redis.cache.RedisCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+    "django.core.cache.backends.locmem.LocMemCache",  # nur ein Prozess
+)
+CATALOG_VERSION_KEY = "inventory:catalog-version"
+GLOBAL_VERSION_KEY = "inventory:global-version"
+FEEDBACK_VERSION_KEY = "inventory:feedback-version"
+
+
+def _key(overview_id: int) -> str:
+    return f"{OVERVIEW_VERSION_PREFIX}:{overview_id}"
+
+
+def _seed() -> int:
+    return int(time.time() * 1000)
+
+
+def counter_backend_error() -> str | None:
+    """Grund, warum das Default-Backend nicht atomar zählen kann (None = in Ordnung)."""
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get("BACKEND", "")
+    if backend in ATOMIC_COUNTER_BACKENDS:
+        return None
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], FileBasedCache):
+        return None if fcntl is not None else "Datei-Cache ohne fcntl (Windows) kann nicht sperren"
+    return f"{backend} erhöht Zähler nicht atomar"
+
+
+@contextmanager
+def _counter_lock():
+    """Datei-Cache: add()/incr() sind get+set – per flock über alle Worker serialisieren."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if not isinstance(backend, FileBasedCache) or fcntl is None:
+        yield
+        return
+    os.makedirs(backend._dir, exist_ok=True)
+    with open(os.path.join(backend._dir, COUNTER_LOCK_NAME), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def read_counter(key: str) -> int:
+    """Aktueller Zählerstand; 0 nur, wenn der Cache nicht erreichbar ist."""
+    try:
+        value = cache.get(key)
+        if value is None:
+            with _counter_lock():
+                cache.add(key, _seed(), timeout=None)
+                value = cache.get(key)
+        return int(value or 0)
+    except Exception:
+        return 0
+
+
+def overview_version(overview_id: int | None) -> int:
+    if not overview_id:
+        return 0
+    return read_counter(_key(overview_id))
+
+
+def bump_counter(key: str, step: int = 1) -> int | None:
+    """Erhöht den Zähler und liefert den neuen Stand (None, wenn der Cache nicht erreichbar ist)."""
+    try:
+        with _counter_lock():
+            value = _seed()
+            if cache.add(key, value, timeout=None):
+                return value
+            try:
+                return cache.incr(key, step)
+            except ValueError:
+                # zwischen add() und incr() verdrängt
+                cache.set(key, value, timeout=None)
+                return value
+    except Exception:
+        return None
+
+
+def bump_overview_versions(overview_ids: Iterable[int | None]) -> None:
+    """Erhöht die Zähler der angegebenen Overviews (None/Duplikate werden ignoriert)."""
+    overview_ids = {oid for oid in overview_ids if oid}
+    for overview_id in overview_ids:
+        bump_counter(_key(overview_id))
+    if overview_ids:
+        bump_counter(GLOBAL_VERSION_KEY)
+
+
+def bump_overview_versions_on_commit(overview_ids: Iterable[int | None]) -> None:
+    """Sofort und nach dem Commit – sonst cachen parallele Requests den alten Stand."""
+    overview_ids = [oid for oid in overview_ids if oid]
+    if not overview_ids:
+        return
+    bump_overview_versions(overview_ids)
+    transaction.on_commit(lambda: bump_overview_versions(overview_ids))
+
+
+def global_version() -> int:
+    """Ändert sich mit jedem Overview-Zähler (z. B. für overview-übergreifende APIs)."""
+    return read_counter(GLOBAL_VERSION_KEY)
+
+
+def catalog_version() -> int:
+    return read_counter(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version_on_commit() -> None:
+    bump_counter(CATALOG_VERSION_KEY)
+    transaction.on_commit(lambda: bump_counter(CATALOG_VERSION_KEY))
+
+
+def feedback_version() -> int:
+    return read_counter(FEEDBACK_VERSION_KEY)
+
+
+def bump_feedback_version_on_commit() -> None:
+    bump_counter(FEEDBACK_VERSION_KEY)
+    transaction.on_commit(lambda: bump_counter(FEEDBACK_VERSION_KEY))
@@ -1,4 +1,5 @@
 import csv
+import hashlib
 import os
 import uuid
 from datetime import datetime, timedelta
@@ -6,17 +7,24 @@ from types import SimpleNamespace
 from collections import defaultdict, Counter
 from django import forms
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
 from django.urls import reverse, reverse_lazy, NoReverseMatch
 from django.views.generic import TemplateView, View, UpdateView, DeleteView, ListView
-from django.http import HttpResponse, JsonResponse, HttpResponseBadRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.db.models import Q, F, Sum, Prefetch
+from django.db.models import Count, Q, F, Prefetch, Value, prefetch_related_objects
+from django.db.models.functions import Coalesce, Lower
 from django.conf import settings
 from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.cache import patch_vary_headers
+from django.core import signing
+from django.core.cache import cache
+from django.core.files import File
 from django.core.paginator import Paginator
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.forms import AuthenticationForm
@@ -31,9 +39,21 @@ from .forms import (
     FeedbackForm,
     FeedbackCommentForm,
     ItemCommentForm,
+    LabelSheetForm,
     ScheduledExportForm,
 )
+from . import bulk, codes, labels
+from .access import get_access, load_access
+from .history import MOVEMENT_FIELDS, build_changes, snapshot_item
+from .pagination import KeysetPaginator
+from .reorder import reorder_groups
+from .search import search_items
+from .suggest import similar_item_ids
 from .feature_flags import get_feature_flags
+from .fragments import render_item_rows
+from .conditional import conditional_get, make_etag, page_parts, user_parts
+from .settings_cache import get_settings_snapshot
+from .versions import catalog_version, global_version, overview_version
 from .models import (
     InventoryItem,
     InventoryHistory,
@@ -45,7 +65,6 @@ from .models import (
     TagType,
     ApplicationTag,
     StorageLocation,
-    GlobalSettings,
     Overview,
     Feedback,
     FeedbackComment,
@@ -55,7 +74,13 @@ from .models import (
 )
 from .integrations.homeassistant import notify_item_marked
 from .patch_notes import PATCH_NOTES, CURRENT_VERSION
-from .exports import EXPORT_COLUMNS, calculate_next_run, export_overview_to_file, get_export_columns
+from .exports import (
+    EXPORT_COLUMNS,
+    calculate_next_run,
+    export_overview_to_file,
+    get_export_columns,
+    prepare_export_items,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -91,26 +116,17 @@ def _allowed_overviews_for_user(user):
     - Superuser: alle aktiven Overviews
     - sonst: nur explizit in UserProfile.allowed_overviews gesetzte aktiven Overviews
     - kein Profil / keine Auswahl -> keine Overviews
-    """
-    base_qs = Overview.objects.filter(is_active=True).order_by("order", "name")
-    if not user.is_authenticated:
-        return base_qs.none()
-    if user.is_superuser:
-        return base_qs
 
-    profile = UserProfile.objects.filter(user=user).first()
-    if not profile:
-        return base_qs.none()
-    allowed_ids = list(profile.allowed_overviews.values_list("id", flat=True))
-    if not allowed_ids:
-        return base_qs.none()
-    return base_qs.filter(id__in=allowed_ids)
+    Innerhalb einer Request besser `get_access(request).allowed_overviews()`
+    verwenden – das teilt sich die geladenen IDs mit allen anderen Prüfungen.
+    """
+    return load_access(user).allowed_overviews()
 
 
 def _resolve_nfc_base_url(request, base_choice: str) -> str:
-    gs = GlobalSettings.objects.first()
-    local_base = gs.nfc_base_url_local if gs else ""
-    remote_base = gs.nfc_base_url_remote if gs else ""
+    gs = get_settings_snapshot()
+    local_base = gs.nfc_base_url_local
+    remote_base = gs.nfc_base_url_remote
     base = local_base if base_choice == "local" else remote_base
     if not base:
         return request.build_absolute_uri("/").rstrip("/")
@@ -120,141 +136,6 @@ def _resolve_nfc_base_url(request, base_choice: str) -> str:
 # ---------------------------------------------------------------------------
 # NEU: Historie/Timeline Helper
 # ---------------------------------------------------------------------------
-HISTORY_FIELDS = (
-    "name",
-    "description",
-    "quantity",
-    "unit",
-    "variant",
-    "category_id",
-    "storage_location_id",
-    "location_letter",
-    "location_number",
-    "location_shelf",
-    "low_quantity",
-    "order_link",
-    "maintenance_date",
-    "overview_id",
-    "item_type",
-    "is_active",
-    "tags",
-)
-
-HISTORY_LABELS = {
-    "name": "Name",
-    "description": "Beschreibung",
-    "quantity": "Bestand",
-    "unit": "Einheit",
-    "variant": "Variante",
-    "category_id": "Kategorie",
-    "storage_location_id": "Lagerort",
-    "location_letter": "Ort (Buchstabe)",
-    "location_number": "Ort (Nummer)",
-    "location_shelf": "Ort (Fach)",
-    "low_quantity": "Mindestbestand",
-    "order_link": "Bestell-Link",
-    "maintenance_date": "Wartungs-/Ablaufdatum",
-    "overview_id": "Dashboard",
-    "item_type": "Typ",
-    "is_active": "Aktiv",
-    "tags": "Tags",
-}
-
-MOVEMENT_FIELDS = {
-    "storage_location_id",
-    "location_letter",
-    "location_number",
-    "location_shelf",
-}
-
-
-def _snapshot_item(item: InventoryItem) -> dict:
-    return {
-        "name": item.name,
-        "description": item.description,
-        "quantity": item.quantity,
-        "unit": item.unit,
-        "variant": item.variant,
-        "category_id": item.category_id,
-        "storage_location_id": item.storage_location_id,
-        "location_letter": item.location_letter,
-        "location_number": item.location_number,
-        "location_shelf": item.location_shelf,
-        "low_quantity": item.low_quantity,
-        "order_link": item.order_link,
-        "maintenance_date": item.maintenance_date.isoformat() if item.maintenance_date else None,
-        "overview_id": item.overview_id,
-        "item_type": item.item_type,
-        "is_active": item.is_active,
-        "tags": sorted(item.application_tags.values_list("id", flat=True)),
-    }
-
-
-def _format_bool(value):
-    if value is True:
-        return "Ja"
-    if value is False:
-        return "Nein"
-    return "–"
-
-
-def _format_date(value):
-    if not value:
-        return "–"
-    try:
-        parsed = datetime.fromisoformat(value)
-        return parsed.date().isoformat()
-    except ValueError:
-        return value
-
-
-def _build_changes(before: dict, after: dict) -> list[dict]:
-    category_ids = {before.get("category_id"), after.get("category_id")} - {None}
-    location_ids = {before.get("storage_location_id"), after.get("storage_location_id")} - {None}
-    overview_ids = {before.get("overview_id"), after.get("overview_id")} - {None}
-    tag_ids = set(before.get("tags", [])) | set(after.get("tags", []))
-
-    categories = {c.id: c.name for c in Category.objects.filter(id__in=category_ids)}
-    locations = {l.id: l.get_full_path() for l in StorageLocation.objects.filter(id__in=location_ids)}
-    overviews = {o.id: o.name for o in Overview.objects.filter(id__in=overview_ids)}
-    tags = {t.id: t.name for t in ApplicationTag.objects.filter(id__in=tag_ids)}
-
-    def display_value(field: str, value):
-        if field == "category_id":
-            return categories.get(value, "–") if value else "–"
-        if field == "storage_location_id":
-            return locations.get(value, "–") if value else "–"
-        if field == "overview_id":
-            return overviews.get(value, "–") if value else "–"
-        if field == "tags":
-            return ", ".join(sorted([tags.get(tid, "–") for tid in value])) if value else "–"
-        if field == "maintenance_date":
-            return _format_date(value)
-        if field == "is_active":
-            return _format_bool(value)
-        return value if value not in (None, "") else "–"
-
-    changes = []
-    for field in HISTORY_FIELDS:
-        if before.get(field) != after.get(field):
-            delta = None
-            if field == "quantity":
-                try:
-                    delta = int(after.get(field) or 0) - int(before.get(field) or 0)
-                except (TypeError, ValueError):
-                    delta = None
-            changes.append(
-                {
-                    "field": field,
-                    "label": HISTORY_LABELS.get(field, field),
-                    "before": display_value(field, before.get(field)),
-                    "after": display_value(field, after.get(field)),
-                    "delta": delta,
-                }
-            )
-    return changes
-
-
 def _create_history_entry(
     *,
     item: InventoryItem,
@@ -268,7 +149,7 @@ def _create_history_entry(
     data_before = before or {}
     data_after = after or {}
     if changes is None and before is not None and after is not None:
-        changes = _build_changes(before, after)
+        changes = build_changes(before, after)
     InventoryHistory.objects.create(
         item=item,
         user=user,
@@ -376,21 +257,18 @@ class DashboardSelectorView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        allowed = _allowed_overviews_for_user(self.request.user)
-        overviews = list(allowed)
+        access = get_access(self.request)
+        overviews = list(access.allowed_overviews())
         ctx["overviews"] = overviews
         if _feature_enabled("show_favorites"):
-            profile = UserProfile.objects.filter(user=self.request.user).first()
-            favorite_ids = set(
-                profile.favorite_overviews.values_list("id", flat=True)
-            ) if profile else set()
+            favorite_ids = set(access.favorite_ids)
             ctx["favorite_overviews"] = [ov for ov in overviews if ov.id in favorite_ids]
             ctx["favorite_overview_ids"] = favorite_ids
         else:
             ctx["favorite_overviews"] = []
             ctx["favorite_overview_ids"] = set()
         if _feature_enabled("show_feedback"):
-            ctx["latest_feedback"] = list(Feedback.objects.order_by("-created_at")[:3])
+            ctx["latest_feedback"] = list(Feedback.with_vote_counts(Feedback.objects.order_by("-created_at"))[:3])
         else:
             ctx["latest_feedback"] = []
         return ctx
@@ -400,7 +278,7 @@ def dashboards(request):
     """
     Kompatibilitäts-Route: gleiche Filterung wie oben.
     """
-    allowed = _allowed_overviews_for_user(request.user)
+    allowed = get_access(request).allowed_overviews()
     overviews = (
         allowed.prefetch_related(
             Prefetch("categories", queryset=Category.objects.only("id", "name").order_by("name"))
@@ -504,11 +382,7 @@ class Dashboard(LoginRequiredMixin, View):
             items = items.filter(application_tags__name=tag_filter)
 
         if query:
-            items = items.filter(
-                Q(name__icontains=query)
-                | Q(location_letter__icontains=query)
-                | Q(location_number__icontains=query)
-            )
+            items = search_items(items, query)
 
         if category_filter and category_filter != "all":
             items = items.filter(category__id=category_filter)
@@ -610,6 +484,102 @@ class ConsumableDashboardView(LoginRequiredMixin, View):
 # ---------------------------------------------------------------------------
 # Add/Edit/Delete Views (nur Login nötig)
 # ---------------------------------------------------------------------------
+def _possible_duplicates(request, form):
+    """
+    Mögliche Dubletten eines gültigen Anlege-Formulars (MinHash-Index).
+    Leer, wenn der User nach dem Hinweis bewusst erneut speichert (force_save).
+    """
+    if request.POST.get("force_save") or not form.is_valid():
+        return []
+    data = form.cleaned_data
+    return InventoryItem.get_similar_items(
+        data.get("name") or "",
+        data.get("variant") or "",
+        data.get("description") or "",
+        access=get_access(request),
+    )
+
+
+PENDING_IMAGE_SALT = "inventory.pending-image"
+PENDING_IMAGE_MAX_AGE = 24 * 3600
+# Zwischenablage für Bilder hinter dem Dubletten-Hinweis; was nicht übernommen
+# wird, räumt _prune_pending_images() nach PENDING_IMAGE_MAX_AGE ab
+PENDING_IMAGE_DIR = "item_images/pending"
+
+
+def _image_storage():
+    return InventoryItem._meta.get_field("image").storage
+
+
+def _pending_image(request, *, replaced_ok: bool = False):
+    """
+    Beim Dubletten-Hinweis zwischengespeichertes Bild (Name im Storage) oder
+    None. Eine neue Datei im selben POST hat Vorrang (replaced_ok=True liefert
+    den Namen trotzdem – zum Aufräumen).
+    """
+    token = request.POST.get("pending_image")
+    if not token or (request.FILES.get("image") and not replaced_ok):
+        return None
+    try:
+        name = signing.loads(token, salt=PENDING_IMAGE_SALT, max_age=PENDING_IMAGE_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if not name.startswith(f"{PENDING_IMAGE_DIR}/"):
+        return None
+    return name if _image_storage().exists(name) else None
+
+
+def _prune_pending_images(storage) -> None:
+    """Liegengebliebene Zwischenbilder (Formular verlassen) löschen."""
+    cutoff = timezone.now() - timedelta(seconds=PENDING_IMAGE_MAX_AGE)
+    try:
+        _, files = storage.listdir(PENDING_IMAGE_DIR)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for filename in files:
+        name = f"{PENDING_IMAGE_DIR}/{filename}"
+        try:
+            if storage.get_modified_time(name) < cutoff:
+                storage.delete(name)
+        except (FileNotFoundError, NotImplementedError):
+            continue
+
+
+def _adopt_pending_image(request, item) -> None:
+    """Zwischenbild beim Speichern an seinen endgültigen Ort übernehmen."""
+    name = _pending_image(request)
+    if not name:
+        return
+    storage = _image_storage()
+    with storage.open(name) as fh:
+        item.image.save(os.path.basename(name), File(fh), save=False)
+    storage.delete(name)
+
+
+def _carry_image(request, form) -> dict:
+    """
+    Browser schicken Datei-Felder nach dem Dubletten-Hinweis nicht erneut:
+    das Bild unter PENDING_IMAGE_DIR speichern und signiert als hidden Feld
+    mitgeben, damit „trotzdem speichern“ es übernimmt (siehe _pending_image).
+    Ein ersetztes Zwischenbild wird sofort gelöscht.
+    """
+    name = _pending_image(request)
+    upload = request.FILES.get("image")
+    if upload is not None and "image" not in form.errors:
+        storage = _image_storage()
+        replaced = _pending_image(request, replaced_ok=True)
+        if replaced:
+            storage.delete(replaced)
+        _prune_pending_images(storage)
+        name = storage.save(f"{PENDING_IMAGE_DIR}/{storage.get_valid_name(os.path.basename(upload.name))}", upload)
+    if not name:
+        return {}
+    return {
+        "pending_image": signing.dumps(name, salt=PENDING_IMAGE_SALT),
+        "pending_image_name": os.path.basename(name),
+    }
+
+
 class AddEquipmentItem(LoginRequiredMixin, View):
     def get(self, request):
         ov, features, slug = _get_overview_and_features(request, "equipment")
@@ -630,10 +600,12 @@ class AddEquipmentItem(LoginRequiredMixin, View):
         ov, features, slug = _get_overview_and_features(request, "equipment")
         form = EquipmentItemForm(request.POST, request.FILES, user=request.user)
 
-        if form.is_valid():
+        similar_items = _possible_duplicates(request, form)
+        if form.is_valid() and not similar_items:
             item = form.save(commit=False)
             item.user = request.user
             item.item_type = "equipment"
+            _adopt_pending_image(request, item)
 
             # 🔑 WICHTIG
             if ov:
@@ -645,7 +617,7 @@ class AddEquipmentItem(LoginRequiredMixin, View):
                 item=item,
                 user=request.user,
                 action=InventoryHistory.Action.CREATED,
-                after=_snapshot_item(item),
+                after=snapshot_item(item),
                 meta={"source": "create"},
             )
             messages.success(request, f"Artikel „{item.name}“ wurde angelegt.")
@@ -662,6 +634,8 @@ class AddEquipmentItem(LoginRequiredMixin, View):
                 "overview": ov,
                 "item_type": "equipment",
                 "o": slug,
+                "similar_items": similar_items,
+                **_carry_image(request, form),
             },
         )
 
@@ -687,10 +661,12 @@ class AddConsumableItem(LoginRequiredMixin, View):
         ov, features, slug = _get_overview_and_features(request, "consumable")
         form = ConsumableItemForm(request.POST, request.FILES, user=request.user)
 
-        if form.is_valid():
+        similar_items = _possible_duplicates(request, form)
+        if form.is_valid() and not similar_items:
             item = form.save(commit=False)
             item.user = request.user
             item.item_type = "consumable"
+            _adopt_pending_image(request, item)
 
             # 🔑 WICHTIG
             if ov:
@@ -702,7 +678,7 @@ class AddConsumableItem(LoginRequiredMixin, View):
                 item=item,
                 user=request.user,
                 action=InventoryHistory.Action.CREATED,
-                after=_snapshot_item(item),
+                after=snapshot_item(item),
                 meta={"source": "create"},
             )
             messages.success(request, f"Artikel „{item.name}“ wurde angelegt.")
@@ -719,6 +695,8 @@ class AddConsumableItem(LoginRequiredMixin, View):
                 "overview": ov,
                 "item_type": "consumable",
                 "o": slug,
+                "similar_items": similar_items,
+                **_carry_image(request, form),
             },
         )
 
@@ -794,14 +772,15 @@ class EditItem(LoginRequiredMixin, UpdateView):
         )
 
         # 🔑 Dashboard-Auswahl für "Item verschieben"
-        if self.request.user.is_superuser:
-            overview_list = Overview.objects.filter(is_active=True)
-        else:
-            profile = UserProfile.objects.filter(user=self.request.user).first()
-            overview_list = (
-                profile.allowed_overviews.filter(is_active=True)
-                if profile else Overview.objects.none()
-            )
+        access = get_access(self.request)
+        overview_list = access.allowed_overviews()
+
+        # Ähnliche Items aus dem Typeahead-Index (keine Suche über die Tabelle)
+        similar_ids = similar_item_ids(item.pk, access)
+        similar_items = sorted(
+            InventoryItem.objects.filter(pk__in=similar_ids).only("id", "name", "quantity"),
+            key=lambda si: similar_ids.index(si.pk),
+        ) if similar_ids else []
 
         ctx.update(
             {
@@ -810,7 +789,8 @@ class EditItem(LoginRequiredMixin, UpdateView):
                 "o": slug,
                 "next": self.request.GET.get("next", ""),
                 "item_type": item.item_type or "equipment",
-                "similar_items": [],
+                "similar_items": similar_items,
+                "comments_enabled": bool(item.overview_id and item.overview.enable_comments),
                 "overview_list": overview_list,  # 👈 WICHTIG
                 "nfc_url": (
                     f"{_resolve_nfc_base_url(self.request, item.nfc_base_choice)}"
@@ -831,11 +811,11 @@ class EditItem(LoginRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         item = self.get_object()
-        before = _snapshot_item(item)
+        before = snapshot_item(item)
         response = super().form_valid(form)
         item.refresh_from_db()
-        after = _snapshot_item(item)
-        changes = _build_changes(before, after)
+        after = snapshot_item(item)
+        changes = build_changes(before, after)
         if not changes:
             return response
 
@@ -884,7 +864,7 @@ class ItemHistoryRollbackView(LoginRequiredMixin, View):
             messages.error(request, "Kein Rollback-Zustand vorhanden.")
             return redirect("edit-item", pk=pk)
 
-        current = _snapshot_item(item)
+        current = snapshot_item(item)
         target = history.data_before
 
         item.name = target.get("name")
@@ -911,8 +891,8 @@ class ItemHistoryRollbackView(LoginRequiredMixin, View):
             item.application_tags.set(target["tags"])
 
         item.refresh_from_db()
-        after = _snapshot_item(item)
-        changes = _build_changes(current, after)
+        after = snapshot_item(item)
+        changes = build_changes(current, after)
         _create_history_entry(
             item=item,
             user=request.user,
@@ -930,7 +910,7 @@ class ItemHistoryRollbackView(LoginRequiredMixin, View):
 class MoveItemToOverviewView(LoginRequiredMixin, View):
     def post(self, request, pk):
         item = get_object_or_404(InventoryItem, pk=pk)
-        before = _snapshot_item(item)
+        before = snapshot_item(item)
 
         # 🔒 Item-Besitz prüfen
         if not request.user.is_superuser and item.user != request.user:
@@ -945,18 +925,16 @@ class MoveItemToOverviewView(LoginRequiredMixin, View):
         target = get_object_or_404(Overview, pk=target_id, is_active=True)
 
         # 🔒 Ziel-Dashboard-Rechte prüfen
-        if not request.user.is_superuser:
-            profile = UserProfile.objects.filter(user=request.user).first()
-            if not profile or not profile.allowed_overviews.filter(pk=target.pk).exists():
-                messages.error(request, "Du darfst dieses Dashboard nicht verwenden.")
-                return redirect("edit-item", pk=pk)
+        if not get_access(request).can_view(target):
+            messages.error(request, "Du darfst dieses Dashboard nicht verwenden.")
+            return redirect("edit-item", pk=pk)
 
         old = item.overview
         item.overview = target
         item.save(update_fields=["overview"])
         item.refresh_from_db()
-        after = _snapshot_item(item)
-        changes = _build_changes(before, after)
+        after = snapshot_item(item)
+        changes = build_changes(before, after)
         if changes:
             _create_history_entry(
                 item=item,
@@ -980,16 +958,22 @@ class OverviewExportView(LoginRequiredMixin, View):
     def get(self, request, slug, export_format):
         overview = get_object_or_404(Overview, slug=slug, is_active=True)
 
-        if not request.user.is_superuser:
-            profile = UserProfile.objects.filter(user=request.user).first()
-            allowed = profile.allowed_overviews.filter(pk=overview.pk).exists() if profile else False
-            if not allowed:
-                messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
-                return redirect("dashboards")
+        if not get_access(request).can_view(overview):
+            messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
+            return redirect("dashboards")
 
         if export_format not in ("csv", "excel"):
             return HttpResponseBadRequest("Ungültiges Export-Format.")
 
+        etag = make_etag(
+            (overview_version(overview.pk), catalog_version()),
+            "export",
+            request.user.pk,
+            request.get_full_path(),
+        )
+        return conditional_get(request, etag, lambda: self.export(request, overview, export_format))
+
+    def export(self, request, overview, export_format):
         view = OverviewDashboardView()
         view.request = request
         view.overview = overview
@@ -997,7 +981,7 @@ class OverviewExportView(LoginRequiredMixin, View):
         qs = view.apply_filters(qs)
         qs, _, _ = view.apply_sort(qs)
 
-        items = (
+        items = prepare_export_items(
             qs.select_related("category", "storage_location", "overview")
             .prefetch_related("application_tags")
             .order_by("name")
@@ -1141,9 +1125,8 @@ class MovementReportView(LoginRequiredMixin, TemplateView):
             "item__overview",
         )
 
-        allowed_overviews = Overview.objects.filter(is_active=True)
+        allowed_overviews = get_access(self.request).allowed_overviews()
         if not self.request.user.is_superuser:
-            allowed_overviews = _allowed_overviews_for_user(self.request.user)
             qs = qs.filter(item__overview__in=allowed_overviews)
 
         overview_id = (self.request.GET.get("overview") or "").strip()
@@ -1185,10 +1168,9 @@ class MovementReportView(LoginRequiredMixin, TemplateView):
             item.id: item.name
             for item in InventoryItem.objects.filter(id__in=top_item_ids)
         }
-        location_names = {
-            loc.id: loc.get_full_path()
-            for loc in StorageLocation.objects.filter(id__in=top_location_ids)
-        }
+        location_names = dict(
+            StorageLocation.objects.filter(id__in=top_location_ids).values_list("id", "full_path")
+        )
         user_names = {
             user.id: user.username
             for user in User.objects.filter(id__in=[user_id for user_id, _ in user_counts.most_common(5)])
@@ -1277,15 +1259,13 @@ class BorrowedItemsView(LoginRequiredMixin, View):
         next_url = request.POST.get("next") or request.META.get("HTTP_REFERER") or ""
 
         if form.is_valid():
-            before = _snapshot_item(item)
+            before = snapshot_item(item)
             borrowed = form.save(commit=False)
             borrowed.item = item
-            borrowed.save()
-            item.quantity -= borrowed.quantity_borrowed
-            item.save()
+            borrowed.borrow()
             item.refresh_from_db()
-            after = _snapshot_item(item)
-            changes = _build_changes(before, after)
+            after = snapshot_item(item)
+            changes = build_changes(before, after)
             _create_history_entry(
                 item=item,
                 user=request.user,
@@ -1316,11 +1296,11 @@ class ReturnItemView(LoginRequiredMixin, View):
     def post(self, request, borrow_id):
         borrowed = get_object_or_404(BorrowedItem, id=borrow_id)
         if not borrowed.returned:
-            before = _snapshot_item(borrowed.item)
+            before = snapshot_item(borrowed.item)
             borrowed.return_item()
             borrowed.item.refresh_from_db()
-            after = _snapshot_item(borrowed.item)
-            changes = _build_changes(before, after)
+            after = snapshot_item(borrowed.item)
+            changes = build_changes(before, after)
             _create_history_entry(
                 item=borrowed.item,
                 user=request.user,
@@ -1353,7 +1333,8 @@ class RegenerateQRView(LoginRequiredMixin, View):
         if not request.user.is_superuser and item.user != request.user:
             messages.error(request, "Du darfst dieses Item nicht verschieben.")
             return redirect("edit-item", pk=pk)
-        item.generate_qr_code()
+        # ausdrücklich angefordert → Cache-Dateien dieses Items sofort neu rendern
+        codes.refresh(item)
         messages.success(request, "QR-Code wurde neu generiert.")
         o = request.POST.get("o") or request.GET.get("o") or ""
         nxt = request.POST.get("next") or request.GET.get("next") or ""
@@ -1370,6 +1351,85 @@ class RegenerateQRView(LoginRequiredMixin, View):
         return redirect(url)
 
 
+class CodeImageView(LoginRequiredMixin, View):
+    """
+    /codes/<kind>/<id>-<digest>.<png|svg> – rendert beim ersten Abruf
+    (codes.py). Passt der Digest zum aktuellen Inhalt, ist die Antwort
+    unveränderlich; ein veralteter Digest leitet auf die aktuelle URL um.
+    Item-Codes nur mit Zugriff auf das Overview – sonst 404 (auch vor dem
+    Redirect, der die aktuelle URL verraten würde).
+    """
+
+    IMMUTABLE = "private, max-age=31536000, immutable"
+
+    def get(self, request, kind, token, fmt):
+        parsed = codes.parse_token(token)
+        if parsed is None:
+            raise Http404
+        pk, token_digest = parsed
+        source = codes.lookup(kind, pk)
+        if source is None:
+            raise Http404
+        if kind in codes.ITEM_KINDS and not get_access(request).can_view(source.overview_id):
+            raise Http404
+        data = codes.code_data(kind, source)
+        if not data:
+            raise Http404
+        if token_digest != codes.digest(kind, data):
+            return redirect("code-image", kind=kind, token=codes.token_for(kind, source), fmt=fmt)
+
+        path = codes.ensure(kind, fmt, data)
+        response = FileResponse(open(path, "rb"), content_type=codes.FORMATS[fmt])
+        response["Cache-Control"] = self.IMMUTABLE
+        if request.GET.get("download"):
+            response["Content-Disposition"] = f'attachment; filename="{kind}_{pk}.{fmt}"'
+        return response
+
+
+class LabelSheetView(LoginRequiredMixin, View):
+    """
+    Etikettenbogen für eine Auswahl (Dashboard, Lagerort-Teilbaum, Tag, IDs)
+    als PDF/SVG – Seiten werden gestreamt (labels.py). Ohne gültige Auswahl:
+    Formular.
+    """
+
+    template_name = "inventory/label_sheets.html"
+
+    def get(self, request):
+        access = get_access(request)
+        # ohne Vorlage nur vorbelegen (z. B. ?kind=barcode aus der Barcode-Liste)
+        if "template" in request.GET:
+            form = LabelSheetForm(request.GET, access=access)
+        else:
+            form = LabelSheetForm(initial=request.GET.dict(), access=access)
+        if form.is_bound and form.is_valid():
+            data = form.cleaned_data
+            qs = labels.selection_queryset(
+                access,
+                overview=data["overview"],
+                location=data["location"],
+                tag=data["tag"],
+                ids=data["ids"],
+            )
+            total = qs.count()
+            if total:
+                fmt = data["fmt"]
+                stream = labels.stream_sheet(
+                    qs,
+                    labels.TEMPLATES[data["template"]],
+                    data["kind"],
+                    fmt,
+                    total=total,
+                    skip=data["skip"],
+                    workers=labels.label_workers(),
+                )
+                response = StreamingHttpResponse(stream, content_type=labels.FORMATS[fmt])
+                response["Content-Disposition"] = f'attachment; filename="etiketten-{data["kind"]}.{fmt}"'
+                return response
+            form.add_error(None, "Keine Items in dieser Auswahl.")
+        return render(request, self.template_name, {"form": form})
+
+
 class RegenerateNFCTokenView(LoginRequiredMixin, View):
     def post(self, request, pk):
         item = get_object_or_404(InventoryItem, pk=pk)
@@ -1475,9 +1535,13 @@ class ScanBarcodeView(LoginRequiredMixin, View):
 
 
 class BarcodeListView(LoginRequiredMixin, View):
+    PER_PAGE = 100
+
     def get(self, request):
-        items = InventoryItem.objects.all().order_by("id")
-        return render(request, "inventory/barcode_list.html", {"items": items})
+        # seitenweise statt aller Items; gedruckt wird über die Etikettenbögen
+        qs = InventoryItem.objects.only("id", "name", "barcode")
+        page = KeysetPaginator(qs, "id", per_page=self.PER_PAGE).page(request.GET.get("cursor"))
+        return render(request, "inventory/barcode_list.html", {"items": page, "page": page})
 
 
 # ---------------------------------------------------------------------------
@@ -1514,21 +1578,19 @@ class QuickAdjustQuantityView(LoginRequiredMixin, View):
             messages.error(request, "Schnellanpassung ist für dieses Dashboard deaktiviert.")
             return redirect(next_url)
 
-        if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user).filter(pk=overview.pk).exists()
-            if not allowed:
-                messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
-                return redirect(next_url)
+        if not get_access(request).can_view(overview):
+            messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
+            return redirect(next_url)
 
-        before = _snapshot_item(item)
+        before = snapshot_item(item)
         new_quantity = item.quantity + delta
         if new_quantity < 0:
             new_quantity = 0
         item.quantity = new_quantity
         item.save(update_fields=["quantity"])
         item.refresh_from_db()
-        after = _snapshot_item(item)
-        changes = _build_changes(before, after)
+        after = snapshot_item(item)
+        changes = build_changes(before, after)
         _create_history_entry(
             item=item,
             user=request.user,
@@ -1563,17 +1625,17 @@ class NFCItemRedirectView(LoginRequiredMixin, View):
 
 class NFCStorageLocationView(LoginRequiredMixin, View):
     def get(self, request, token):
-        location = get_object_or_404(StorageLocation, nfc_token=token)
+        location = get_object_or_404(StorageLocation.objects.select_related("rollup"), nfc_token=token)
+        # inkl. aller Unterorte (Regal-Tag zeigt auch den Inhalt der Fächer)
         items = InventoryItem.objects.filter(
-            storage_location=location,
+            location.subtree_items_q(),
             is_active=True,
-        ).select_related("overview", "category")
+        ).select_related("overview", "category", "storage_location")
 
         if not request.user.is_superuser:
-            allowed_overviews = _allowed_overviews_for_user(request.user)
-            items = items.filter(overview__in=allowed_overviews)
+            items = items.filter(overview_id__in=get_access(request).allowed_ids)
 
-        items = items.order_by("name")
+        items = items.order_by("storage_location__full_path", "name")
 
         return render(
             request,
@@ -1581,12 +1643,19 @@ class NFCStorageLocationView(LoginRequiredMixin, View):
             {
                 "location": location,
                 "items": items,
+                # Summen zählen alle Overviews → nur für Admins
+                "rollup": getattr(location, "rollup", None) if request.user.is_superuser else None,
             },
         )
 
 
 class DrawerItemsAPI(LoginRequiredMixin, View):
     def get(self, request, location_letter, location_number):
+        # Schublade kann Items mehrerer Overviews enthalten → globaler Zähler
+        etag = make_etag((global_version(),), "drawer", request.get_full_path())
+        return conditional_get(request, etag, lambda: self.items(location_letter, location_number))
+
+    def items(self, location_letter, location_number):
         items = InventoryItem.objects.filter(
             location_letter=location_letter, location_number=location_number, is_active=True
         )
@@ -1594,72 +1663,118 @@ class DrawerItemsAPI(LoginRequiredMixin, View):
         return JsonResponse(data, safe=False)
 
 
+class ReorderListView(LoginRequiredMixin, View):
+    """Nachbestell-Liste über alle sichtbaren Overviews (siehe reorder.py)."""
+
+    def get(self, request):
+        etag = make_etag(
+            (global_version(), catalog_version()), "reorder", user_parts(request), page_parts(request)
+        )
+        return conditional_get(request, etag, lambda: self.render(request))
+
+    def render(self, request):
+        groups = reorder_groups(get_access(request))
+        return render(
+            request,
+            "inventory/reorder_list.html",
+            {"groups": groups, "item_count": sum(group["item_count"] for group in groups)},
+        )
+
+
 class QRCodeListAdminView(LoginRequiredMixin, View):
     def get(self, request):
-        items = InventoryItem.objects.all().order_by("id")
-        return render(request, "inventory/admin_qr_code_list.html", {"items": items})
+        # QR-Codes aller Items druckt man über die Etikettenbögen
+        return redirect("label-sheets")
 
 
 # ---------------------------------------------------------------------------
 # Neues, modulares Overview-Dashboard (mit Whitelist-Check je User)
 # ---------------------------------------------------------------------------
+def _state_hash(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
 class OverviewDashboardView(LoginRequiredMixin, TemplateView):
     template_name = "inventory/overview_dashboard.html"
 
     SORT_MAP = {
         "name": "name",
         "category": "category__name",
-        "location": "storage_location__name",
+        "location": "storage_location__full_path",
         "quantity": "quantity",
         "min": "low_quantity",
         "borrowed": "borrowed_open",
+        "relevance": "search_rank",
     }
     DEFAULT_SORT = "name"
+    # Keyset-Paginierung braucht NOT-NULL-Sortierwerte (Kategorie/Lagerort sind optional).
+    KEYSET_NULLABLE = {"category__name", "storage_location__full_path"}
+    FILTER_PARAMS = (
+        "q", "category", "tag", "storage_location", "location_letter", "location_number", "only_low",
+    )
+    # Facette (= GET-Parameter) → Gruppierungsspalte in facet_queryset()
+    FACETS = {
+        "category": "category_id",
+        "tag": "applicationtag_id",
+        "storage_location": "storage_location_id",
+    }
 
     def dispatch(self, request, *args, **kwargs):
         self.overview = get_object_or_404(Overview, slug=kwargs["slug"], is_active=True)
 
-        if not request.user.is_superuser:
-            profile = UserProfile.objects.filter(user=request.user).first()
-            allowed = profile.allowed_overviews.filter(pk=self.overview.pk).exists() if profile else False
-            if not allowed:
-                messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
-                return redirect("dashboards")
+        if not get_access(request).can_view(self.overview):
+            messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
+            return redirect("dashboards")
 
         return super().dispatch(request, *args, **kwargs)
 
-    def base_queryset(self):
+    def get(self, request, *args, **kwargs):
+        # Polling (Browser-Tabs, HA-Dashboards): 304 ohne Item-Queries, solange
+        # sich weder Items des Overviews noch Stammdaten/Rechte geändert haben
+        etag = make_etag(
+            (overview_version(self.overview.pk), catalog_version()),
+            "dashboard",
+            sorted(self.overview.features().items()),
+            request.headers.get(self.PARTIAL_HEADER, ""),
+            user_parts(request),
+            page_parts(request),
+        )
+        return conditional_get(
+            request,
+            etag,
+            lambda: super(OverviewDashboardView, self).get(request, *args, **kwargs),
+            vary=(self.PARTIAL_HEADER, "Accept"),
+        )
+
+    def row_prefetches(self):
+        """Nur für Zeilen, die nicht aus dem Fragment-Cache kommen (siehe prepare_rows)."""
         open_borrowings = Prefetch(
             "borrowings",
             queryset=BorrowedItem.objects.filter(returned=False),
             to_attr="prefetched_open_borrowings",
         )
-        comment_prefetch = Prefetch(
-            "comments",
-            queryset=ItemComment.objects.select_related("author").order_by("-updated_at", "-created_at"),
-            to_attr="prefetched_comments",
-        )
+        # nur der neueste Kommentar (InventoryItem.latest_comment), nicht der ganze Verlauf
+        comment_prefetch = Prefetch("latest_comment", queryset=ItemComment.objects.select_related("author"))
 
         prefetches = ["application_tags", open_borrowings]
         if self.overview.enable_comments:
             prefetches.append(comment_prefetch)
+        return prefetches
 
+    def base_queryset(self):
         qs = (
             InventoryItem.objects
             .filter(overview=self.overview)  # 🔑 HIER ist der Fix
             .select_related("category", "storage_location", "user")
-            .prefetch_related(*prefetches)
-            .annotate(
-                borrowed_open=Sum(
-                    "borrowings__quantity_borrowed",
-                    filter=Q(borrowings__returned=False)
-                )
-            )
         )
         return qs
 
+    def prepare_rows(self, items):
+        prefetch_related_objects(items, *self.row_prefetches())
 
-    def apply_filters(self, qs):
+
+    def apply_filters(self, qs, skip=(), ranked=True):
+        """`skip`: Filter-Parameter, die ignoriert werden (Facetten-Zählung)."""
         request = self.request
         q = request.GET.get("q", "").strip()
         category_id = request.GET.get("category", "").strip()
@@ -1670,21 +1785,18 @@ class OverviewDashboardView(LoginRequiredMixin, TemplateView):
         only_low = request.GET.get("only_low", "") == "1"
 
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q)
-                | Q(barcode__icontains=q)
-                | Q(location_letter__icontains=q)
-                | Q(location_number__icontains=q)
-            )
+            qs = search_items(qs, q, ranked=ranked)
 
-        if category_id and category_id != "all":
+        if category_id and category_id != "all" and "category" not in skip:
             qs = qs.filter(category_id=category_id)
 
-        if tag_name and tag_name != "all":
+        if tag_name and tag_name != "all" and "tag" not in skip:
             qs = qs.filter(application_tags__name=tag_name)
 
-        if storage_location_id:
-            qs = qs.filter(storage_location_id=storage_location_id)
+        if storage_location_id and "storage_location" not in skip:
+            # ganzer Teilbaum ("alles in der Werkstatt"), nicht nur der Knoten selbst
+            location = self.selected_location(storage_location_id)
+            qs = qs.filter(location.subtree_items_q()) if location else qs.none()
 
         if loc_letter:
             qs = qs.filter(location_letter__iexact=loc_letter)
@@ -1692,17 +1804,157 @@ class OverviewDashboardView(LoginRequiredMixin, TemplateView):
             qs = qs.filter(location_number__iexact=loc_number)
 
         if only_low and self.overview.has_min_stock:
-            qs = qs.filter(quantity__lt=F("low_quantity"))
+            qs = qs.filter(below_minimum=True)
 
         return qs.distinct()
 
+    def selected_location(self, location_id):
+        """Gefilterter Lagerort (pro Request einmal geladen) oder None."""
+        cache_attr = "_selected_location"
+        if not hasattr(self, cache_attr):
+            location = None
+            if str(location_id).isdigit():
+                location = StorageLocation.objects.filter(pk=location_id).only("pk", "path").first()
+            setattr(self, cache_attr, location)
+        return getattr(self, cache_attr)
+
+    def resolve_sort(self, qs):
+        """(sort_key, order) – bei einer Suche ohne explizite Sortierung nach Relevanz."""
+        searching = "search_rank" in qs.query.annotations
+        sort_key = self.request.GET.get("sort", "relevance" if searching else self.DEFAULT_SORT)
+        if sort_key not in self.SORT_MAP or (sort_key == "relevance" and not searching):
+            sort_key = self.DEFAULT_SORT
+        order = self.request.GET.get("order", "desc" if sort_key == "relevance" else "asc")
+        return sort_key, "desc" if order == "desc" else "asc"
+
     def apply_sort(self, qs):
-        sort_key = self.request.GET.get("sort", self.DEFAULT_SORT)
-        order = self.request.GET.get("order", "asc")
-        field = self.SORT_MAP.get(sort_key, self.SORT_MAP[self.DEFAULT_SORT])
+        sort_key, order = self.resolve_sort(qs)
+        field = self.SORT_MAP[sort_key]
         if order == "desc":
-            field = f"-{field}"
-        return qs.order_by(field), sort_key, order
+            return qs.order_by(f"-{field}", "-pk"), sort_key, order
+        return qs.order_by(field, "pk"), sort_key, order
+
+    def apply_keyset(self, qs, per_page, state):
+        """Cursor-Paginierung über (Sortierwert, id); liefert Seite + Sortierinfos."""
+        sort_key, order = self.resolve_sort(qs)
+        key = self.SORT_MAP[sort_key]
+        if key in self.KEYSET_NULLABLE:
+            qs = qs.annotate(keyset_value=Coalesce(key, Value("")))
+            key = "keyset_value"
+        paginator = KeysetPaginator(
+            qs,
+            key,
+            descending=order == "desc",
+            per_page=per_page,
+            fingerprint=_state_hash(state, sort_key, order, per_page),
+        )
+        return paginator.page(self.request.GET.get("cursor")), sort_key, order
+
+    def filter_state(self, filters_enabled):
+        if not filters_enabled:
+            return ()
+        state = []
+        for name in self.FILTER_PARAMS:
+            value = self.request.GET.get(name, "").strip()
+            if value:
+                state.append((name, value))
+        return tuple(state)
+
+    def total_count(self, state, filters_enabled):
+        """
+        Trefferanzahl über das schlanke Item-Queryset (ohne select_related),
+        gecacht pro Overview-/Stammdaten-Version + Filter (tag=/q= treffen
+        Namen, die sich ohne Item-Änderung umbenennen). None = Anzahl abgeschaltet.
+        """
+        if getattr(settings, "INVENTORY_DASHBOARD_COUNT", "cached") == "off":
+            return None
+        key = (
+            f"inventory:dashboard-count:{self.overview.pk}:"
+            f"{overview_version(self.overview.pk)}:{catalog_version()}:{_state_hash(state)}"
+        )
+        try:
+            count = cache.get(key)
+        except Exception:
+            count = None
+        if count is None:
+            qs = InventoryItem.objects.filter(overview=self.overview)
+            if filters_enabled:
+                qs = self.apply_filters(qs)
+            count = qs.count()
+            try:
+                cache.set(key, count, getattr(settings, "INVENTORY_DASHBOARD_COUNT_TIMEOUT", 600))
+            except Exception:
+                pass
+        return count
+
+    def facet_queryset(self, facet, item_ids):
+        """Eine gruppierte Zählung pro Facette: Wert → Anzahl Items."""
+        if facet == "tag":
+            rows = (
+                InventoryItem.application_tags.through.objects
+                .filter(inventoryitem_id__in=item_ids)
+                .values("applicationtag_id")
+            )
+        else:
+            rows = InventoryItem.objects.filter(pk__in=item_ids).values(self.FACETS[facet])
+        return rows.annotate(n=Count("pk")).values_list(self.FACETS[facet], "n")
+
+    def facet_counts(self, state, filters_enabled):
+        """
+        Anzahl Treffer je Kategorie/Tag/Lagerort. Jede Facette zählt über die
+        aktuelle Treffermenge ohne ihren eigenen Filter (sonst stünden alle
+        anderen Werte derselben Facette auf 0). Gecacht pro Overview-/Stammdaten-
+        Version + übrigem Filterzustand → ungefilterte Zahlen kommen fast immer
+        aus dem Cache.
+        """
+        if not filters_enabled or getattr(settings, "INVENTORY_DASHBOARD_FACETS", "cached") == "off":
+            return None
+        version = f"{overview_version(self.overview.pk)}:{catalog_version()}"
+        counts = {}
+        for facet in self.FACETS:
+            facet_state = tuple((name, value) for name, value in state if name != facet)
+            key = f"inventory:dashboard-facets:{self.overview.pk}:{version}:{facet}:{_state_hash(facet_state)}"
+            try:
+                cached = cache.get(key)
+            except Exception:
+                cached = None
+            if cached is None:
+                item_ids = InventoryItem.objects.filter(overview=self.overview)
+                if facet_state:
+                    item_ids = self.apply_filters(item_ids, skip=(facet,), ranked=False)
+                cached = dict(self.facet_queryset(facet, item_ids.values("pk")))
+                try:
+                    cache.set(key, cached, getattr(settings, "INVENTORY_DASHBOARD_COUNT_TIMEOUT", 600))
+                except Exception:
+                    pass
+            counts[facet] = cached
+        return counts
+
+    def used_location_paths(self, state, facets):
+        """Belegte Lagerorte dieses Dashboards: ID → materialisierter Pfad."""
+        if facets is not None and all(name == "storage_location" for name, _ in state):
+            # ungefilterte Lagerort-Facette kennt bereits alle belegten Lagerorte
+            location_qs = StorageLocation.objects.filter(pk__in=[pk for pk in facets["storage_location"] if pk])
+        else:
+            location_qs = StorageLocation.objects.filter(items__overview=self.overview).distinct()
+        return dict(location_qs.values_list("pk", "path"))
+
+    @staticmethod
+    def location_facet_counts(facets, used_paths):
+        """Lagerort-Facette über den ganzen Teilbaum: jeder Vorfahr zählt mit."""
+        subtree_counts = defaultdict(int)
+        for pk, path in used_paths.items():
+            for ancestor_id in StorageLocation.path_ids(path) or [pk]:
+                subtree_counts[ancestor_id] += facets["storage_location"].get(pk, 0)
+        return subtree_counts
+
+    def page_url(self, **params):
+        query = self.request.GET.copy()
+        for name in ("page", "cursor"):
+            query.pop(name, None)
+        for name, value in params.items():
+            query[name] = value
+        return f"?{query.urlencode()}"
 
     def get_auxiliary_choices(self):
         cats = list(self.overview.categories.all())
@@ -1733,51 +1985,154 @@ class OverviewDashboardView(LoginRequiredMixin, TemplateView):
             except NoReverseMatch:
                 return "/add-equipment/"
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        features = self.overview.features()
-        base_qs = self.base_queryset()
-        qs = base_qs
-        if features.get("enable_advanced_filters", True):
+    # ------------------------------------------------------------
+    # Teil-Antworten (nur Tabelle + Paginierung)
+    # ------------------------------------------------------------
+    PARTIAL_HEADER = "X-Partial"
+    PARTIAL_TEMPLATE = "inventory/partials/overview_table.html"
+
+    def is_partial(self):
+        """Sortieren/Blättern/Filtern per fetch: Header `X-Partial: table`."""
+        return self.request.headers.get(self.PARTIAL_HEADER) == "table"
+
+    def render_to_response(self, context, **response_kwargs):
+        if not self.is_partial():
+            response = super().render_to_response(context, **response_kwargs)
+        elif "application/json" in self.request.headers.get("Accept", ""):
+            response = JsonResponse(
+                {
+                    "html": render_to_string(self.PARTIAL_TEMPLATE, context, request=self.request),
+                    "page_number": context["page_number"],
+                    "num_pages": context["num_pages"],
+                    "total_count": context["total_count"],
+                    "facet_counts": context.get("facet_option_counts"),
+                    "next_page_url": context["next_page_url"],
+                    "previous_page_url": context["previous_page_url"],
+                }
+            )
+        else:
+            response = TemplateResponse(self.request, self.PARTIAL_TEMPLATE, context)
+        # gleiche URL, unterschiedlicher Inhalt → Browser-/Proxy-Caches trennen
+        patch_vary_headers(response, (self.PARTIAL_HEADER, "Accept"))
+        return response
+
+    def table_context(self, features, filters_enabled):
+        """Alles, was Tabelle und Paginierung brauchen – sonst keine Queries."""
+        qs = self.base_queryset()
+        if filters_enabled:
             qs = self.apply_filters(qs)
-        qs, sort_key, order = self.apply_sort(qs)
 
         try:
             per_page = int(self.request.GET.get("page_size", "25"))
         except ValueError:
             per_page = 25
         per_page = max(5, min(per_page, 200))
-        paginator = Paginator(qs, per_page)
-        page_number = self.request.GET.get("page", "1")
-        page_obj = paginator.get_page(page_number)
+
+        state = self.filter_state(filters_enabled)
+        total_count = self.total_count(state, filters_enabled)
+        num_pages = max(1, -(-total_count // per_page)) if total_count is not None else None
+
+        if getattr(settings, "INVENTORY_DASHBOARD_PAGINATION", "keyset") == "offset":
+            qs, sort_key, order = self.apply_sort(qs)
+            paginator = Paginator(qs, per_page)
+            if total_count is not None:
+                # gecachte Anzahl übernehmen → kein eigenes COUNT pro Seitenaufruf
+                paginator.count = total_count
+            page_obj = paginator.get_page(self.request.GET.get("page", "1"))
+            page_number = page_obj.number
+            num_pages = paginator.num_pages
+            next_page_url = self.page_url(page=page_obj.next_page_number()) if page_obj.has_next() else None
+            previous_page_url = (
+                self.page_url(page=page_obj.previous_page_number()) if page_obj.has_previous() else None
+            )
+        else:
+            paginator = None
+            page_obj, sort_key, order = self.apply_keyset(qs, per_page, state)
+            page_number = page_obj.number
+            next_page_url = self.page_url(cursor=page_obj.next_cursor) if page_obj.next_cursor else None
+            previous_page_url = (
+                self.page_url(cursor=page_obj.previous_cursor) if page_obj.previous_cursor else None
+            )
+        items = list(page_obj.object_list)
 
         def next_order_for(col):
             if sort_key == col and order == "asc":
                 return "desc"
             return "asc"
 
+        item_rows = render_item_rows(
+            self.request,
+            items,
+            {"overview": self.overview, "features": features, "global_features": get_feature_flags()},
+            prepare=self.prepare_rows,
+        )
+        return {
+            "overview": self.overview,
+            "features": features,
+            "items": items,
+            "item_rows": item_rows,
+            "page_obj": page_obj,
+            "paginator": paginator,
+            "per_page": per_page,
+            "page_number": page_number,
+            "num_pages": num_pages,
+            "total_count": total_count,
+            "next_page_url": next_page_url,
+            "previous_page_url": previous_page_url,
+            "first_page_url": self.page_url() if page_number > 1 else None,
+            "sort_key": sort_key,
+            "order": order,
+            "next_order": {
+                "name": next_order_for("name"),
+                "category": next_order_for("category"),
+                "location": next_order_for("location"),
+                "quantity": next_order_for("quantity"),
+                "min": next_order_for("min"),
+                "borrowed": next_order_for("borrowed"),
+            },
+        }
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        features = self.overview.features()
+        filters_enabled = features.get("enable_advanced_filters", True)
+        ctx.update(self.table_context(features, filters_enabled))
+        state = self.filter_state(filters_enabled)
+        facets = self.facet_counts(state, filters_enabled)
+        if self.is_partial():
+            # Filterleiste, Favoriten, Export & Co. bleiben im Browser stehen;
+            # nur die Zahlen in den Dropdowns folgen der neuen Treffermenge
+            if facets is not None:
+                used_paths = self.used_location_paths(state, facets)
+                ctx["facet_option_counts"] = {
+                    "category": facets["category"],
+                    "tag": facets["tag"],
+                    "storage_location": dict(self.location_facet_counts(facets, used_paths)),
+                }
+            return ctx
+
         cats, tags = self.get_auxiliary_choices()
+        used_paths = self.used_location_paths(state, facets)
+        # belegte Lagerorte + ihre Vorfahren (Filter wirkt auf den ganzen Teilbaum)
+        location_ids = {pk for path in used_paths.values() for pk in StorageLocation.path_ids(path)}
         storage_locations = list(
-            StorageLocation.objects.filter(items__overview=self.overview)
-            .distinct()
+            StorageLocation.objects.filter(pk__in=location_ids | set(used_paths)).order_by(Lower("full_path"), "pk")
         )
-        storage_locations.sort(key=lambda loc: loc.get_full_path().lower())
-        favorites = base_qs.filter(is_favorite=True).order_by("name")[:6]
+        if facets is not None:
+            for obj in cats:
+                obj.facet_count = facets["category"].get(obj.pk, 0)
+            for obj in tags:
+                obj.facet_count = facets["tag"].get(obj.pk, 0)
+            subtree_counts = self.location_facet_counts(facets, used_paths)
+            for obj in storage_locations:
+                obj.facet_count = subtree_counts[obj.pk]
+        favorites = self.base_queryset().filter(is_favorite=True).order_by("name")[:6]
         overview_is_favorite = False
         if _feature_enabled("show_favorites"):
-            profile = UserProfile.objects.filter(user=self.request.user).first()
-            overview_is_favorite = bool(
-                profile and profile.favorite_overviews.filter(pk=self.overview.pk).exists()
-            )
+            overview_is_favorite = get_access(self.request).is_favorite(self.overview)
 
         ctx.update(
             {
-                "overview": self.overview,
-                "features": features,
-                "items": page_obj.object_list,
-                "page_obj": page_obj,
-                "paginator": paginator,
-                "per_page": per_page,
                 "q": self.request.GET.get("q", "").strip() if features.get("enable_advanced_filters", True) else "",
                 "selected_category": self.request.GET.get("category", "") if features.get("enable_advanced_filters", True) else "",
                 "selected_tag": self.request.GET.get("tag", "") if features.get("enable_advanced_filters", True) else "",
@@ -1785,19 +2140,10 @@ class OverviewDashboardView(LoginRequiredMixin, TemplateView):
                 "location_letter": self.request.GET.get("location_letter", "") if features.get("enable_advanced_filters", True) else "",
                 "location_number": self.request.GET.get("location_number", "") if features.get("enable_advanced_filters", True) else "",
                 "only_low": self.request.GET.get("only_low", "") == "1" if features.get("enable_advanced_filters", True) else False,
-                "sort_key": sort_key,
-                "order": order,
-                "next_order": {
-                    "name": next_order_for("name"),
-                    "category": next_order_for("category"),
-                    "location": next_order_for("location"),
-                    "quantity": next_order_for("quantity"),
-                    "min": next_order_for("min"),
-                    "borrowed": next_order_for("borrowed"),
-                },
                 "categories": cats,
                 "tags": tags,
                 "storage_locations": storage_locations,
+                "show_facet_counts": facets is not None,
                 "add_url": self._compute_add_url(),
                 "export_csv_url": reverse(
                     "overview-export",
@@ -1812,6 +2158,12 @@ class OverviewDashboardView(LoginRequiredMixin, TemplateView):
                 "overview_is_favorite": overview_is_favorite,
             }
         )
+        if get_feature_flags().get("enable_bulk_actions", True):
+            # Ziele der Massenaktionen: alle erlaubten Dashboards, alle Lagerorte
+            ctx["bulk_overviews"] = list(get_access(self.request).allowed_overviews().only("id", "name"))
+            ctx["bulk_locations"] = list(
+                StorageLocation.objects.only("id", "full_path").order_by(Lower("full_path"), "pk")
+            )
         return ctx
 
 
@@ -1821,11 +2173,9 @@ class ToggleFavoriteView(LoginRequiredMixin, View):
             messages.error(request, "Favoriten sind aktuell deaktiviert.")
             return redirect("dashboards")
         item = get_object_or_404(InventoryItem, pk=item_id)
-        if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user)
-            if item.overview_id not in allowed.values_list("id", flat=True):
-                messages.error(request, "Kein Zugriff auf diesen Artikel.")
-                return redirect("dashboards")
+        if not get_access(request).can_view(item.overview_id):
+            messages.error(request, "Kein Zugriff auf diesen Artikel.")
+            return redirect("dashboards")
 
         item.is_favorite = not item.is_favorite
         item.save(update_fields=["is_favorite"])
@@ -1842,13 +2192,11 @@ class ToggleOverviewFavoriteView(LoginRequiredMixin, View):
             messages.error(request, "Favoriten sind aktuell deaktiviert.")
             return redirect("dashboards")
         overview = get_object_or_404(Overview, slug=slug, is_active=True)
-        if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user).filter(pk=overview.pk).exists()
-            if not allowed:
-                messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
-                return redirect("dashboards")
+        if not get_access(request).can_view(overview):
+            messages.error(request, "Du hast keinen Zugriff auf dieses Dashboard.")
+            return redirect("dashboards")
         profile, _ = UserProfile.objects.get_or_create(user=request.user)
-        if profile.favorite_overviews.filter(pk=overview.pk).exists():
+        if get_access(request).is_favorite(overview):
             profile.favorite_overviews.remove(overview)
             messages.success(request, f"Dashboard „{overview.name}“ aus Favoriten entfernt.")
         else:
@@ -1858,31 +2206,65 @@ class ToggleOverviewFavoriteView(LoginRequiredMixin, View):
 
 
 class BulkItemActionView(LoginRequiredMixin, View):
+    """Massenaktionen aus dem Dashboard – mengenbasiert, siehe bulk.apply_action."""
+
+    VALUE_MODELS = {
+        "overview": Overview,
+        "category": Category,
+        "storage_location": StorageLocation,
+        "tag": ApplicationTag,
+    }
+
     def post(self, request):
         if not get_feature_flags().get("enable_bulk_actions", True):
             messages.error(request, "Bulk-Aktionen sind aktuell deaktiviert.")
             return redirect("dashboards")
+        back = request.POST.get("next") or request.META.get("HTTP_REFERER") or "dashboards"
         action = (request.POST.get("action") or "").strip()
-        ids = request.POST.getlist("item_ids")
+        ids = [value for value in request.POST.getlist("item_ids") if value.isdigit()]
         if not ids:
             messages.warning(request, "Keine Artikel ausgewählt.")
-            return redirect(request.META.get("HTTP_REFERER") or "dashboards")
+            return redirect(back)
+        if action not in bulk.ACTIONS:
+            messages.error(request, "Ungültige Bulk-Aktion.")
+            return redirect(back)
+        try:
+            value = self._value(request, action)
+        except ValueError as exc:
+            messages.error(request, str(exc))
+            return redirect(back)
 
         items = InventoryItem.objects.filter(id__in=ids)
         if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user)
-            items = items.filter(overview__in=allowed)
-
-        if action == "favorite":
-            items.update(is_favorite=True)
-            messages.success(request, "Ausgewählte Artikel wurden als Favorit markiert.")
-        elif action == "unfavorite":
-            items.update(is_favorite=False)
-            messages.success(request, "Favoriten wurden entfernt.")
-        else:
-            messages.error(request, "Ungültige Bulk-Aktion.")
-
-        return redirect(request.POST.get("next") or request.META.get("HTTP_REFERER") or "dashboards")
+            items = items.filter(overview_id__in=get_access(request).allowed_ids)
+            # 🔒 Item-Besitz prüfen (wie beim Bearbeiten/Verschieben einzelner Items)
+            if action not in bulk.OWNER_FREE_ACTIONS:
+                items = items.filter(user=request.user)
+        count = bulk.apply_action(action, items.values_list("pk", flat=True), value, user=request.user)
+        messages.success(request, f"{bulk.ACTIONS[action]}: {count} Artikel geändert.")
+        return redirect(back)
+
+    def _value(self, request, action):
+        field = bulk.VALUE_FIELDS.get(action)
+        if field is None:
+            return None
+        raw = (request.POST.get(field) or "").strip()
+        if field == "delta":
+            try:
+                delta = int(raw)
+            except ValueError:
+                raise ValueError("Bitte eine ganze Zahl als Bestandsänderung angeben.") from None
+            if not delta or abs(delta) > bulk.MAX_DELTA:
+                raise ValueError(f"Die Bestandsänderung muss zwischen 1 und {bulk.MAX_DELTA} (±) liegen.")
+            return delta
+        if not raw.isdigit():
+            raise ValueError("Bitte einen Wert für die Aktion auswählen.")
+        targets = self.VALUE_MODELS[field].objects.filter(pk=int(raw))
+        if field == "overview" and not request.user.is_superuser:
+            targets = targets.filter(pk__in=get_access(request).allowed_ids)
+        if not targets.exists():
+            raise ValueError("Ungültige Auswahl für die Bulk-Aktion.")
+        return int(raw)
 
 
 class ItemAttachmentUploadView(LoginRequiredMixin, View):
@@ -1891,8 +2273,9 @@ class ItemAttachmentUploadView(LoginRequiredMixin, View):
             messages.error(request, "Anhänge sind aktuell deaktiviert.")
             return redirect("dashboards")
         if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user)
-            if not InventoryItem.objects.filter(pk=item_id, overview__in=allowed).exists():
+            if not InventoryItem.objects.filter(
+                pk=item_id, overview_id__in=get_access(request).allowed_ids
+            ).exists():
                 messages.error(request, "Kein Zugriff auf diesen Artikel.")
                 return redirect("dashboards")
         item = get_object_or_404(InventoryItem, pk=item_id)
@@ -1917,11 +2300,9 @@ class ItemAttachmentDeleteView(LoginRequiredMixin, View):
         attachment = get_object_or_404(ItemAttachment, pk=attachment_id)
         item = attachment.item
 
-        if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user)
-            if not allowed.filter(pk=item.overview_id).exists():
-                messages.error(request, "Kein Zugriff auf diesen Artikel.")
-                return redirect("dashboards")
+        if not get_access(request).can_view(item.overview_id):
+            messages.error(request, "Kein Zugriff auf diesen Artikel.")
+            return redirect("dashboards")
 
         file_path = attachment.file.path if attachment.file else None
         attachment.delete()
@@ -1948,7 +2329,9 @@ class FeedbackListView(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        qs = Feedback.objects.select_related("created_by", "assignee").order_by("-created_at")
+        qs = Feedback.with_vote_counts(
+            Feedback.objects.select_related("created_by", "assignee")
+        ).order_by("-created_at")
         status_param = (self.request.GET.get("status") or "").strip().lower()
 
         # deutsche & englische Aliase erlauben
@@ -2020,10 +2403,7 @@ class FeedbackCreateView(LoginRequiredMixin, View):
         if dashboard_slug:
             overview = Overview.objects.filter(slug=dashboard_slug, is_active=True).first()
             if overview:
-                allowed = request.user.is_superuser or _allowed_overviews_for_user(request.user).filter(
-                    pk=overview.pk
-                ).exists()
-                if allowed:
+                if get_access(request).can_view(overview):
                     overview_hint = overview
                     initial["title"] = f"Dashboard: {overview.name}"
         form = FeedbackForm(initial=initial)
@@ -2096,18 +2476,16 @@ class FeedbackCommentCreateView(LoginRequiredMixin, View):
 
 class ItemCommentCreateView(LoginRequiredMixin, View):
     def post(self, request, item_id):
-        item = get_object_or_404(InventoryItem, pk=item_id)
+        item = get_object_or_404(InventoryItem.objects.select_related("overview", "latest_comment"), pk=item_id)
         if not item.overview or not item.overview.enable_comments:
             messages.error(request, "Kommentare sind für dieses Dashboard deaktiviert.")
             return redirect(request.POST.get("next") or request.META.get("HTTP_REFERER") or "dashboards")
-        if not request.user.is_superuser:
-            allowed = _allowed_overviews_for_user(request.user).filter(pk=item.overview_id).exists()
-            if not allowed:
-                messages.error(request, "Kein Zugriff auf diesen Artikel.")
-                return redirect("dashboards")
+        if not get_access(request).can_view(item.overview_id):
+            messages.error(request, "Kein Zugriff auf diesen Artikel.")
+            return redirect("dashboards")
 
         action = (request.POST.get("action") or "").strip().lower()
-        existing_comment = ItemComment.objects.filter(item=item).order_by("-updated_at", "-created_at").first()
+        existing_comment = item.latest_comment
         if action == "delete":
             if existing_comment:
                 existing_comment.delete()
@@ -2133,6 +2511,32 @@ class ItemCommentCreateView(LoginRequiredMixin, View):
 
         return redirect(request.POST.get("next") or request.META.get("HTTP_REFERER") or "dashboards")
 
+
+class ItemCommentListView(LoginRequiredMixin, View):
+    """
+    Kommentar-Verlauf eines Items seitenweise (neueste zuerst, Keyset über id)
+    als HTML-Fragment – die Item-Seite lädt ihn erst beim Aufklappen nach.
+    """
+
+    PER_PAGE = 20
+    TEMPLATE = "inventory/partials/item_comments.html"
+
+    def get(self, request, item_id):
+        item = get_object_or_404(InventoryItem.objects.select_related("overview"), pk=item_id)
+        # Fragment-Endpunkt: kein Redirect mit Meldung, einfach 404
+        if not item.overview or not item.overview.enable_comments or not get_access(request).can_view(item.overview_id):
+            raise Http404("Keine Kommentare für diesen Artikel.")
+
+        paginator = KeysetPaginator(
+            ItemComment.objects.filter(item=item).select_related("author"),
+            "id",
+            descending=True,
+            per_page=self.PER_PAGE,
+            fingerprint=f"comments:{item.pk}",
+        )
+        page = paginator.page(request.GET.get("cursor"))
+        return render(request, self.TEMPLATE, {"item": item, "page": page})
+
 # --------------------------------------------------------
 # Login: Benutzer ist deaktiviert -> klare Fehlermeldung
 # --------------------------------------------------------
@@ -81,9 +81,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Request-Metriken (Server-Timing, /manage/performance/) – möglichst weit außen
+    'inventory.middleware.PerformanceMiddleware',
+    # N+1-Erkennung (nur mit INVENTORY_NPLUSONE_DETECTION=log|raise aktiv)
+    'inventory.middleware.NPlusOneMiddleware',
     'inventory.middleware.MaintenanceModeMiddleware',
     # NEU: macht aktuelle Request global (ThreadLocal) verfügbar → dynamische Deeplinks
     'inventory.middleware.ThreadLocalMiddleware',
+    # Dashboard-Rechte einmal pro Request laden → request.access
+    'inventory.middleware.AccessContextMiddleware',
 ]
 
 ROOT_URLCONF = 'inventory_management.urls'
@@ -113,6 +119,67 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'inventory_management.wsgi.application'
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Cache
+#   Muss zwischen allen gunicorn-Workern geteilt sein (Settings-Snapshot,
+#   Invalidierungszähler). Per ENV steuerbar:
+#     CACHE_BACKEND=file|redis|locmem
+#   Standard ist der Datei-Cache. Er löscht beim Überschreiten von MAX_ENTRIES
+#   (hier CACHE_MAX_ENTRIES, Standard 5000) zufällig 1/CULL_FREQUENCY (1/3)
+#   aller Einträge – auch Versionszähler. Ein verdrängter Zähler startet bei
+#   der aktuellen Zeit in ms neu (inventory/versions.py), kostet also nur ein
+#   Neuladen. Zähler werden atomar erhöht: beim Datei-Cache per flock auf eine
+#   Sperrdatei im Cache-Verzeichnis (nur ein Host); andere Backends als
+#   file/redis/memcached/locmem meldet der Systemcheck inventory.E005.
+#   Gerenderte Dashboard-Zeilen liegen im eigenen Alias "fragments" und
+#   verdrängen so keine Zähler. Ihre Schlüssel enthalten die Item-Version;
+#   beim Datei-Cache reicht daher ein LocMem-Cache pro Worker (ein Datei-Cache
+#   listet bei jedem set() das Verzeichnis – bei 200 Zeilen pro Seite zu teuer).
+#     CACHE_FRAGMENT_MAX_ENTRIES=20000
+# ──────────────────────────────────────────────────────────────────────────────
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file').lower()
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '5000'))
+CACHE_FRAGMENT_MAX_ENTRIES = int(os.getenv('CACHE_FRAGMENT_MAX_ENTRIES', '20000'))
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION') or 'redis://127.0.0.1:6379/1',
+        },
+        'fragments': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_LOCATION') or 'redis://127.0.0.1:6379/1',
+            'KEY_PREFIX': 'fragments',
+        },
+    }
+elif CACHE_BACKEND == 'locmem':
+    # Nur für Einzelprozess-Betrieb (runserver, Tests).
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        },
+        'fragments': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'fragments',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_FRAGMENT_MAX_ENTRIES},
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION') or str(BASE_DIR / 'cache'),
+            'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+        },
+        'fragments': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'fragments',
+            'OPTIONS': {'MAX_ENTRIES': CACHE_FRAGMENT_MAX_ENTRIES},
+        },
+    }
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Datenbank
 #   Per ENV steuerbar:
@@ -169,6 +236,40 @@ LANGUAGE_CODE = 'de'
 # Versionierung (mit Patch Notes synchron halten)
 # ──────────────────────────────────────────────────────────────────────────────
 INVENTORY_VERSION = "1.0.7"
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Performance-Messung (/manage/performance/ + Server-Timing-Header nur für Staff)
+# ──────────────────────────────────────────────────────────────────────────────
+INVENTORY_PERFORMANCE_ENABLED = os.getenv('INVENTORY_PERFORMANCE_ENABLED', 'true').lower() == 'true'
+INVENTORY_PERFORMANCE_MAX_ENDPOINTS = int(os.getenv('INVENTORY_PERFORMANCE_MAX_ENDPOINTS', '200'))
+INVENTORY_PERFORMANCE_MAX_SAMPLES = int(os.getenv('INVENTORY_PERFORMANCE_MAX_SAMPLES', '200'))
+
+# N+1-Erkennung für Entwicklung/Tests: off | log | raise
+#   raise → Request/Command/Test schlägt fehl, sobald sich eine Query-Form
+#           öfter als INVENTORY_NPLUSONE_THRESHOLD wiederholt
+INVENTORY_NPLUSONE_DETECTION = os.getenv('INVENTORY_NPLUSONE_DETECTION', 'off').lower()
+INVENTORY_NPLUSONE_THRESHOLD = int(os.getenv('INVENTORY_NPLUSONE_THRESHOLD', '5'))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Dashboard-Paginierung
+#   keyset → Cursor-Paginierung (konstante Kosten pro Seite), offset → ?page=N
+#   Gesamtanzahl: cached → pro Overview-Version/Filter gecacht, off → keine Anzahl
+#   Filter-Facetten (Anzahl je Kategorie/Tag/Lagerort): cached | off
+#   Zeilen-Cache: on → gerenderte Item-Zeilen pro InventoryItem.version, off
+# ──────────────────────────────────────────────────────────────────────────────
+INVENTORY_DASHBOARD_PAGINATION = os.getenv('INVENTORY_DASHBOARD_PAGINATION', 'keyset').lower()
+INVENTORY_DASHBOARD_COUNT = os.getenv('INVENTORY_DASHBOARD_COUNT', 'cached').lower()
+INVENTORY_DASHBOARD_FACETS = os.getenv('INVENTORY_DASHBOARD_FACETS', 'cached').lower()
+INVENTORY_ROW_CACHE = os.getenv('INVENTORY_ROW_CACHE', 'on').lower()
+INVENTORY_ROW_CACHE_TIMEOUT = int(os.getenv('INVENTORY_ROW_CACHE_TIMEOUT', '3600'))
+INVENTORY_DASHBOARD_COUNT_TIMEOUT = int(os.getenv('INVENTORY_DASHBOARD_COUNT_TIMEOUT', '600'))
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Artikelsuche (siehe inventory/search.py)
+#   auto → PostgreSQL: tsvector + pg_trgm, SQLite: FTS5, sonst ORM-Fallback
+# ──────────────────────────────────────────────────────────────────────────────
+INVENTORY_SEARCH_BACKEND = os.getenv('INVENTORY_SEARCH_BACKEND', 'auto').lower()
+
 TIME_ZONE = 'Europe/Berlin'
 USE_I18N = True
 USE_TZ = True
@@ -182,6 +283,10 @@ STATICFILES_DIRS = []
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# QR-/Barcode-Cache für /codes/ (leer → MEDIA_ROOT/codes, siehe inventory/codes.py)
+INVENTORY_CODE_CACHE_ROOT = os.getenv('INVENTORY_CODE_CACHE_ROOT', '')
+# Prozesse für Etikettenbögen (inventory/labels.py; 0 → min(4, CPU-Kerne))
+INVENTORY_LABEL_WORKERS = int(os.getenv('INVENTORY_LABEL_WORKERS', '0'))
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Defaults